@@ -5,6 +5,8 @@
 通过创建单位名称的N-gram切片索引，实现更快速的模糊匹配
 """
 
+import os
+import sys
 import pymongo
 import re
 import jieba
@@ -13,11 +15,25 @@ import time
 from collections import defaultdict
 import json
 
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.matching.incremental_index_maintainer import IncrementalIndexMaintainer, NameSliceTarget
+
+# 建立切片索引的集合和字段
+SLICE_INDEX_FIELDS = [
+    ('xfaqpc_jzdwxx', 'UNIT_NAME'),
+    ('xxj_shdwjbxx', 'dwmc')
+]
+
 class UnitNameSliceIndexer:
     def __init__(self):
         """初始化索引器"""
         self.client = pymongo.MongoClient('mongodb://localhost:27017/')
         self.db = self.client['Unit_Info']
+        self.maintainer = IncrementalIndexMaintainer(self.db)
         self.stats = {
             'slice_indexes_created': 0,
             'keyword_indexes_created': 0,
@@ -88,6 +104,9 @@ class UnitNameSliceIndexer:
         slice_collection.drop()
         keyword_collection.drop()
         
+        # 记录增量维护水位（构建期间的变更由下一次增量同步补齐）
+        self.maintainer.mark_baseline(NameSliceTarget(self.db, collection_name, field_name))
+        
         # 批量处理数据
         batch_size = 1000
         total_processed = 0
@@ -175,6 +194,26 @@ class UnitNameSliceIndexer:
             'records_processed': total_processed
         }
     
+    def update_slice_indexes_incrementally(self):
+        """增量同步切片索引：只为新增/修改/删除的记录更新切片和关键词"""
+        results = []
+        for collection_name, field_name in SLICE_INDEX_FIELDS:
+            target = NameSliceTarget(self.db, collection_name, field_name)
+            if not target.exists():
+                print(f"\n📊 {collection_name} 尚无切片索引，执行整表构建")
+                results.append(self.create_slice_indexes_for_collection(collection_name, field_name))
+                continue
+            
+            result = self.maintainer.sync_target(target)
+            if result['status'] == 'rebuild_required':
+                results.append(self.create_slice_indexes_for_collection(collection_name, field_name))
+                continue
+            print(f"   ✅ {collection_name}.{field_name}: {result['status']}, "
+                  f"新增/修改 {result.get('upserted', 0)}, 删除 {result.get('deleted', 0)}, "
+                  f"索引版本 {result.get('index_version', '-')}")
+            results.append(result)
+        return results
+    
     def create_fast_lookup_indexes(self):
         """创建快速查找索引"""
         print(f"\n🚀 创建快速查找索引...")
@@ -270,12 +309,7 @@ class UnitNameSliceIndexer:
         
         # 1. 创建切片索引
         print("\n📊 第1步: 创建单位名称切片索引")
-        collections_fields = [
-            ('xfaqpc_jzdwxx', 'UNIT_NAME'),
-            ('xxj_shdwjbxx', 'dwmc')
-        ]
-        
-        for collection_name, field_name in collections_fields:
+        for collection_name, field_name in SLICE_INDEX_FIELDS:
             result = self.create_slice_indexes_for_collection(collection_name, field_name)
             results.append(result)
         
@@ -324,6 +358,8 @@ class UnitNameSliceIndexer:
 def main():
     """主函数"""
     indexer = UnitNameSliceIndexer()
+    if '--incremental' in sys.argv:
+        return indexer.update_slice_indexes_incrementally()
     return indexer.run_optimization()
 
 if __name__ == "__main__":
@@ -8,11 +8,13 @@ from .data_analyzer import DataAnalyzer
 from .schema_detector import SchemaDetector
 from .validation_engine import ValidationEngine
 from .kg_data_adapter import KGDataAdapter
+from .streaming_ingestor import StreamingIngestor
 
 __all__ = [
     'CSVProcessor',
     'DataAnalyzer',
     'SchemaDetector', 
     'ValidationEngine',
-    'KGDataAdapter'
+    'KGDataAdapter',
+    'StreamingIngestor'
 ]
\ No newline at end of file
@@ -61,13 +61,15 @@ class CSVProcessor:
             logger.warning(f"编码检测失败: {str(e)}, 使用默认编码utf-8")
             return 'utf-8'
     
-    def validate_file(self, file_path: str, file_content: bytes = None) -> Dict[str, Any]:
+    def validate_file(self, file_path: str, file_content: bytes = None,
+                      file_size: int = None) -> Dict[str, Any]:
         """
         验证文件有效性
         
         Args:
             file_path: 文件路径
             file_content: 文件内容(可选)
+            file_size: 文件大小(可选，流式导入时不读取文件内容，直接传入大小)
             
         Returns:
             Dict: 验证结果
@@ -90,6 +92,7 @@ class CSVProcessor:
             # 检查文件大小
             if file_content:
                 file_size = len(file_content)
+            if file_size is not None:
                 validation_result['file_info']['size'] = file_size
                 
                 if file_size > self.max_file_size:
@@ -0,0 +1,365 @@
+"""
+流式文件导入器
+按块读取CSV/Excel文件，逐块清洗、去重并以无序批量写入MongoDB，内存占用与文件大小无关
+"""
+
+import os
+import re
+import codecs
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterator, Callable
+
+import numpy as np
+import pandas as pd
+
+from .csv_processor import CSVProcessor
+
+logger = logging.getLogger(__name__)
+
+NA_VALUES = ['', 'NULL', 'null', 'None', 'N/A', 'NA']
+
+# 编码/分隔符嗅探读取的字节数
+SNIFF_BYTES = 64 * 1024
+
+# 按整数写入的取值：不含前导零（编码、电话等以0开头的值保留为字符串），不超过int64范围
+INT_PATTERN = r'[+-]?(?:0|[1-9]\d{0,17})'
+# 以0开头的数字串（编码、区号、电话等），不按数值解析
+LEADING_ZERO_PATTERN = r'[+-]?0\d+.*'
+
+COLUMN_TYPE_INT = 'int'
+COLUMN_TYPE_FLOAT = 'float'
+COLUMN_TYPE_STR = 'str'
+
+
+def sanitize_field_name(name) -> str:
+    """字段名清洗（Mongo不允许包含'.'或以'$'开头）"""
+    n = str(name)
+    if n.startswith('$'):
+        n = f"f_{n[1:]}"  # 前缀替换
+    n = n.replace('.', '_')
+    n = re.sub(r'\s+', '_', n).strip('_')
+    return n or 'field'
+
+
+def infer_column_types(chunk: pd.DataFrame) -> Dict[str, str]:
+    """
+    由首块的字符串值推断每列类型（整列非空值都可解析时才按数值列处理）
+
+    Returns:
+        Dict: {列名: 'int' / 'float' / 'str'}
+    """
+    column_types = {}
+    for column in chunk.columns:
+        values = chunk[column].dropna()
+        if values.empty:
+            column_types[column] = COLUMN_TYPE_STR
+        elif values.str.fullmatch(INT_PATTERN).all():
+            column_types[column] = COLUMN_TYPE_INT
+        elif (pd.to_numeric(values, errors='coerce').notna().all()
+              and not values.str.fullmatch(LEADING_ZERO_PATTERN).any()):
+            column_types[column] = COLUMN_TYPE_FLOAT
+        else:
+            column_types[column] = COLUMN_TYPE_STR
+    return column_types
+
+
+def apply_column_types(chunk: pd.DataFrame, column_types: Dict[str, str]) -> pd.DataFrame:
+    """
+    按首块推断的列类型转换字符串块，所有块使用同一套类型
+
+    无法按该类型解析的值保留原字符串，不会因后续块出现非数值而丢失数据
+    """
+    converted = {}
+    for column in chunk.columns:
+        column_type = column_types.get(column, COLUMN_TYPE_STR)
+        values = chunk[column]
+        if column_type == COLUMN_TYPE_STR:
+            continue
+
+        present = values.notna()
+        if column_type == COLUMN_TYPE_INT:
+            parsed = values.str.fullmatch(INT_PATTERN).fillna(False).astype(bool)
+            numbers = values[parsed].map(int)
+        else:
+            numeric = pd.to_numeric(values, errors='coerce')
+            parsed = numeric.notna() & present & ~values.str.fullmatch(LEADING_ZERO_PATTERN).fillna(False).astype(bool)
+            numbers = numeric[parsed]
+
+        if parsed.sum() == present.sum():
+            dtype = 'Int64' if column_type == COLUMN_TYPE_INT else 'float64'
+            converted[column] = numbers.reindex(values.index).astype(dtype)
+        else:
+            mixed = values.astype(object)
+            mixed[parsed] = numbers.astype(object)
+            converted[column] = mixed
+
+    if not converted:
+        return chunk
+    return chunk.assign(**converted)
+
+
+class _RowDeduplicator:
+    """跨块行去重：已写入行的64位哈希按大小分层保存为若干有序数组（每行8字节）
+
+    新块的哈希作为一个有序段追加，末尾两段大小相近时归并，段数保持在O(log n)，
+    总归并代价O(n log n)，避免每块都整体插入已见数组
+    """
+
+    def __init__(self):
+        self._runs: List[np.ndarray] = []
+
+    def _seen_mask(self, hashes: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            pos = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[pos] == hashes
+        return found
+
+    def _add(self, new_hashes: np.ndarray):
+        if not len(new_hashes):
+            return
+        self._runs.append(np.sort(new_hashes))
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            last = self._runs.pop()
+            self._runs[-1] = np.sort(np.concatenate([self._runs[-1], last]), kind='mergesort')
+
+    def filter(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        if chunk.empty:
+            return chunk
+
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy(dtype=np.uint64)
+        # 块内首次出现
+        keep = np.zeros(len(hashes), dtype=bool)
+        keep[np.unique(hashes, return_index=True)[1]] = True
+        # 之前的块中未出现
+        keep &= ~self._seen_mask(hashes)
+
+        self._add(hashes[keep])
+        return chunk[keep]
+
+
+class StreamingIngestor:
+    """流式CSV/Excel导入器"""
+
+    def __init__(self, csv_processor: Optional[CSVProcessor] = None, chunk_size: int = 20000,
+                 sample_rows: int = 10000, drop_duplicates: bool = True):
+        """
+        初始化导入器
+
+        Args:
+            csv_processor: CSV处理器（复用其编码检测和分隔符检测）
+            chunk_size: 每块行数
+            sample_rows: 保留用于数据分析/模式检测的样本行数
+            drop_duplicates: 是否移除重复行
+        """
+        self.csv_processor = csv_processor or CSVProcessor()
+        self.chunk_size = chunk_size
+        self.sample_rows = sample_rows
+        self.drop_duplicates = drop_duplicates
+
+    # ==================== 嗅探 ====================
+
+    def sniff(self, file_path: str) -> Dict[str, str]:
+        """
+        根据文件开头的字节检测编码和分隔符
+
+        Returns:
+            Dict: {'encoding': ..., 'delimiter': ...}
+        """
+        with open(file_path, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+
+        if head.startswith(codecs.BOM_UTF8):
+            encoding_attempts = ['utf-8-sig']
+        else:
+            # 截断到最后一个完整行，避免多字节字符被截断导致误判
+            last_newline = head.rfind(b'\n')
+            if 0 < last_newline < len(head) - 1:
+                head = head[:last_newline + 1]
+            detected = self.csv_processor.detect_encoding(head)
+            encoding_attempts = [detected]
+            if detected.lower() == 'gb2312':
+                encoding_attempts.append('gbk')
+        for fallback in ['utf-8', 'gbk', 'gb2312', 'utf-8-sig']:
+            if fallback not in encoding_attempts:
+                encoding_attempts.append(fallback)
+
+        for encoding in encoding_attempts:
+            try:
+                text = head.decode(encoding)
+                break
+            except (UnicodeDecodeError, LookupError):
+                continue
+        else:
+            encoding, text = 'utf-8', head.decode('utf-8', errors='replace')
+
+        return {
+            'encoding': encoding,
+            'delimiter': self.csv_processor._detect_delimiter(text[:5000])
+        }
+
+    # ==================== 分块读取 ====================
+
+    def iter_csv_chunks(self, file_path: str, encoding: str, delimiter: str,
+                        position: Optional[Dict[str, int]] = None) -> Iterator[pd.DataFrame]:
+        """
+        按块读取CSV/TXT文件（position['bytes']实时记录已读取的字节数）
+
+        所有列按字符串读取：逐块推断类型会使同一列在不同块中得到不同类型，
+        写入的BSON类型不一致，跨块去重的哈希也无法对齐；列类型由 ingest 按首块统一推断后转换
+        """
+        with open(file_path, 'rb') as f:
+            reader = pd.read_csv(
+                f,
+                encoding=encoding,
+                encoding_errors='replace',
+                delimiter=delimiter,
+                chunksize=self.chunk_size,
+                dtype=str,
+                low_memory=False,
+                na_values=NA_VALUES
+            )
+            with reader:
+                for chunk in reader:
+                    if position is not None:
+                        position['bytes'] = f.tell()
+                    yield chunk
+
+    def iter_excel_chunks(self, file_path: str) -> Iterator[pd.DataFrame]:
+        """按块读取Excel文件（.xlsx以只读模式逐行读取；.xls格式不支持流式读取，整表读取后分块）"""
+        if Path(file_path).suffix.lower() != '.xlsx':
+            df = pd.read_excel(file_path, na_values=NA_VALUES)
+            for start in range(0, len(df), self.chunk_size):
+                yield df.iloc[start:start + self.chunk_size]
+            return
+
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [str(v) if v is not None else f'Unnamed: {i}' for i, v in enumerate(header)]
+
+            na_set = set(NA_VALUES)
+            batch: List[tuple] = []
+            for row in rows:
+                batch.append(tuple(None if isinstance(v, str) and v.strip() in na_set else v for v in row))
+                if len(batch) >= self.chunk_size:
+                    # 保留单元格原始类型，不按块推断列类型
+                    yield pd.DataFrame(batch, columns=columns, dtype=object)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=columns, dtype=object)
+        finally:
+            workbook.close()
+
+    # ==================== 导入 ====================
+
+    def ingest(self, file_path: str, file_name: str, collection,
+               progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        流式导入文件到集合
+
+        Args:
+            file_path: 本地文件路径
+            file_name: 原始文件名（用于判断文件类型）
+            collection: 目标MongoDB集合
+            progress_callback: 进度回调，参数为进度字典
+
+        Returns:
+            Dict: 导入结果（行数、列、编码、分隔符、样本DataFrame等）；文件未通过校验时success为False
+        """
+        total_bytes = os.path.getsize(file_path)
+        validation = self.csv_processor.validate_file(file_name, file_size=total_bytes)
+        if not validation['valid']:
+            logger.warning(f"文件验证未通过: {file_name}, {validation['errors']}")
+            return {'success': False, 'errors': validation['errors'], 'row_count': 0}
+
+        is_excel = Path(file_name).suffix.lower() in ['.xlsx', '.xls']
+        position = {'bytes': 0}
+
+        if is_excel:
+            encoding, delimiter = 'binary', ','
+            chunks = self.iter_excel_chunks(file_path)
+        else:
+            sniffed = self.sniff(file_path)
+            encoding, delimiter = sniffed['encoding'], sniffed['delimiter']
+            chunks = self.iter_csv_chunks(file_path, encoding, delimiter, position)
+        logger.info(f"开始流式导入: {file_name}, 编码: {encoding}, 分隔符: {delimiter!r}")
+
+        deduplicator = _RowDeduplicator() if self.drop_duplicates else None
+        column_mapping: Dict[str, str] = {}
+        # CSV各列类型（按首个非空块推断，之后各块沿用）；Excel单元格自带类型，不做转换
+        column_types: Optional[Dict[str, str]] = None
+        non_null_columns = set()
+        sample_parts: List[pd.DataFrame] = []
+        sample_size = 0
+        rows_read = rows_inserted = duplicates_removed = 0
+
+        for chunk in chunks:
+            rows_read += len(chunk)
+            chunk = chunk.dropna(how='all')
+            if not column_mapping:
+                column_mapping = {col: sanitize_field_name(str(col).strip()) for col in chunk.columns}
+            chunk = chunk.rename(columns=column_mapping)
+            if not is_excel and not chunk.empty:
+                if column_types is None:
+                    column_types = infer_column_types(chunk)
+                    logger.info(f"CSV列类型推断: {column_types}")
+                chunk = apply_column_types(chunk, column_types)
+
+            if deduplicator is not None:
+                before = len(chunk)
+                chunk = deduplicator.filter(chunk)
+                duplicates_removed += before - len(chunk)
+            if chunk.empty:
+                continue
+
+            non_null_columns.update(chunk.columns[chunk.notna().any()].tolist())
+            if sample_size < self.sample_rows:
+                part = chunk.head(self.sample_rows - sample_size)
+                sample_parts.append(part)
+                sample_size += len(part)
+
+            # 将NaN转为None后无序批量写入
+            records = chunk.astype(object).where(pd.notna(chunk), None).to_dict('records')
+            collection.insert_many(records, ordered=False)
+            rows_inserted += len(records)
+
+            if progress_callback:
+                progress_callback({
+                    'rows_read': rows_read,
+                    'rows_inserted': rows_inserted,
+                    'duplicates_removed': duplicates_removed,
+                    'bytes_read': position['bytes'],
+                    'total_bytes': total_bytes,
+                    'progress': int(position['bytes'] / total_bytes * 100) if total_bytes and not is_excel else None
+                })
+
+        # 整个文件中全部为空的列不保留（与整表清洗时的列删除一致）
+        empty_columns = [c for c in dict.fromkeys(column_mapping.values()) if c not in non_null_columns]
+        if empty_columns and rows_inserted:
+            collection.update_many({}, {'$unset': {c: '' for c in empty_columns}})
+
+        sample = pd.concat(sample_parts, ignore_index=True) if sample_parts else pd.DataFrame(
+            columns=list(dict.fromkeys(column_mapping.values())))
+        sample = sample.drop(columns=[c for c in empty_columns if c in sample.columns])
+        if duplicates_removed:
+            logger.info(f"移除了 {duplicates_removed} 个重复行")
+        logger.info(f"流式导入完成: {file_name}, 写入 {rows_inserted} 行 x {len(sample.columns)} 列")
+
+        return {
+            'success': True,
+            'encoding': encoding,
+            'delimiter': delimiter,
+            'row_count': rows_inserted,
+            'column_count': len(sample.columns),
+            'columns': sample.columns.tolist(),
+            'column_mapping': {k: v for k, v in column_mapping.items() if v not in empty_columns},
+            'duplicates_removed': duplicates_removed,
+            'sample': sample
+        }
@@ -3,5 +3,6 @@
 """
 
 from .connection import DatabaseManager
+from .range_reader import IdRangeReader
 
-__all__ = ['DatabaseManager'] 
\ No newline at end of file
+__all__ = ['DatabaseManager', 'IdRangeReader'] 
\ No newline at end of file
@@ -0,0 +1,303 @@
+"""
+集合列式快照模块
+将集合（的映射字段）导出为本地Arrow IPC文件，以 记录数 + 最大_id（+ 已建索引的更新时间字段最大值）作为变更指纹，
+表未变化时通过内存映射零拷贝加载快照，重复匹配任务无需再次从MongoDB拉取和解码整表
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterator
+
+from bson import ObjectId
+
+from .range_reader import IdRangeReader
+from .index_versions import compute_table_version
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    logging.warning("pyarrow未安装，集合快照功能不可用，将直接从数据库读取")
+
+logger = logging.getLogger(__name__)
+
+# 默认快照目录：项目根目录下的 data/snapshots
+DEFAULT_SNAPSHOT_DIR = Path(__file__).parent.parent.parent / "data" / "snapshots"
+
+SNAPSHOT_FORMAT_VERSION = '1'
+
+
+def _has_leading_index(collection, field: str) -> bool:
+    """集合上是否存在以该字段为首键的索引"""
+    try:
+        return any(spec['key'][0][0] == field for spec in collection.index_information().values())
+    except Exception as e:
+        logger.debug(f"读取集合索引信息失败: {collection.name} - {str(e)}")
+        return False
+
+
+def compute_snapshot_fingerprint(collection, updated_field: Optional[str] = None) -> str:
+    """
+    计算集合变更指纹（记录数 + 最大_id，更新时间字段已建索引时附加其最大值以感知原地修改）
+
+    更新时间字段没有索引时，取最大值需要整表扫描，该字段不参与指纹
+
+    Args:
+        collection: MongoDB集合
+        updated_field: 更新时间字段（可选）
+
+    Returns:
+        str: 变更指纹
+    """
+    fingerprint = compute_table_version(collection)
+    if updated_field and not _has_leading_index(collection, updated_field):
+        logger.debug(f"更新时间字段 {updated_field} 未建索引，快照指纹不含该字段: {collection.name}")
+        updated_field = None
+    if updated_field:
+        last = list(collection.find({updated_field: {'$exists': True}}, {updated_field: 1})
+                    .sort(updated_field, -1).limit(1))
+        fingerprint += f":{last[0].get(updated_field) if last else ''}"
+    return fingerprint
+
+
+def _to_arrow_column(values: List[Any]) -> 'pa.Array':
+    """将一批字段值转换为Arrow数组（类型无法统一时退化为字符串）"""
+    values = [str(v) if isinstance(v, ObjectId) else v for v in values]
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError, OverflowError):
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def _unify_chunks(chunks: List['pa.Array']) -> List['pa.Array']:
+    """统一同一列各批次的类型（全空批次按其他批次类型转换，类型冲突时整列转为字符串）"""
+    types = {c.type for c in chunks if not pa.types.is_null(c.type)}
+    if not types:
+        return chunks
+    if len(types) == 1:
+        target = types.pop()
+        return [c.cast(target) if pa.types.is_null(c.type) else c for c in chunks]
+
+    return [pa.array([None if v is None else str(v) for v in c.to_pylist()], type=pa.string())
+            for c in chunks]
+
+
+class CollectionSnapshot:
+    """内存映射的集合列式快照"""
+
+    def __init__(self, table: 'pa.Table', fingerprint: str, objectid_ids: bool, path: Optional[Path] = None):
+        self.table = table
+        self.fingerprint = fingerprint
+        self.objectid_ids = objectid_ids
+        self.path = path
+
+    @property
+    def num_rows(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def fields(self) -> List[str]:
+        return self.table.column_names
+
+    def column(self, field: str) -> List[Any]:
+        """获取单列的全部值"""
+        return self.table.column(field).to_pylist()
+
+    def _rows_to_records(self, rows: List[Dict]) -> List[Dict]:
+        """还原为文档形式（去掉空值字段，_id还原为ObjectId）"""
+        records = []
+        for row in rows:
+            record = {k: v for k, v in row.items() if v is not None}
+            if self.objectid_ids and '_id' in record:
+                record['_id'] = ObjectId(record['_id'])
+            records.append(record)
+        return records
+
+    def iter_batches(self, batch_size: int = 1000, limit: int = 0) -> Iterator[List[Dict]]:
+        """按批次输出记录（按_id升序）"""
+        total = min(self.num_rows, limit) if limit else self.num_rows
+        for offset in range(0, total, batch_size):
+            length = min(batch_size, total - offset)
+            yield self._rows_to_records(self.table.slice(offset, length).to_pylist())
+
+    def to_records(self, limit: int = 0) -> List[Dict]:
+        """输出全部记录"""
+        records = []
+        for batch in self.iter_batches(batch_size=10000, limit=limit):
+            records.extend(batch)
+        return records
+
+    # ==================== 导出/加载 ====================
+
+    @classmethod
+    def export(cls, collection, path: Path, fields: Optional[List[str]] = None,
+               updated_field: Optional[str] = None, batch_size: int = 10000,
+               fingerprint: Optional[str] = None) -> 'CollectionSnapshot':
+        """
+        扫描集合并原子写入Arrow IPC快照文件
+
+        Args:
+            collection: MongoDB集合
+            path: 快照文件路径
+            fields: 导出字段（None表示全部字段）
+            updated_field: 指纹使用的更新时间字段
+            batch_size: 读取批次大小
+            fingerprint: 已计算的变更指纹（None时重新计算）
+        """
+        start_time = time.time()
+        fingerprint = fingerprint or compute_snapshot_fingerprint(collection, updated_field)
+        projection = {field: 1 for field in fields} if fields else None
+
+        column_order: List[str] = ['_id']
+        columns: Dict[str, List['pa.Array']] = {'_id': []}
+        objectid_ids = True
+        for batch in IdRangeReader(collection, projection=projection, batch_size=batch_size).iter_batches():
+            for record in batch:
+                for key in record:
+                    if key not in columns:
+                        column_order.append(key)
+                        # 之前批次中不存在的字段补空值
+                        columns[key] = [pa.nulls(len(chunk)) for chunk in columns['_id']]
+            objectid_ids = objectid_ids and all(isinstance(r['_id'], ObjectId) for r in batch)
+            for key in column_order:
+                columns[key].append(_to_arrow_column([r.get(key) for r in batch]))
+
+        arrays = {key: pa.chunked_array(_unify_chunks(columns[key]), type=None) if columns[key]
+                  else pa.chunked_array([], type=pa.null()) for key in column_order}
+        table = pa.table(arrays)
+        table = table.replace_schema_metadata({
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'collection': collection.name,
+            'fingerprint': fingerprint,
+            'fields': json.dumps(sorted(fields) if fields else None),
+            'objectid_ids': '1' if objectid_ids else '0'
+        })
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 同目录下的唯一临时文件，并发导出同一快照时互不覆盖，写完后原子替换
+        fd, temp_name = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=str(path.parent))
+        os.close(fd)
+        try:
+            with pa.OSFile(temp_name, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table, max_chunksize=batch_size)
+            os.replace(temp_name, path)
+        except Exception:
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+            raise
+
+        logger.info(f"💾 集合快照已导出: {collection.name}, {table.num_rows} 条记录 x {table.num_columns} 列, "
+                   f"耗时 {time.time() - start_time:.2f}s -> {path}")
+        return cls(table, fingerprint, objectid_ids, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['CollectionSnapshot']:
+        """
+        以内存映射方式加载快照（零拷贝）
+
+        Returns:
+            Optional[CollectionSnapshot]: 快照，文件不存在或格式不兼容时返回None
+        """
+        if not path.exists():
+            return None
+
+        try:
+            table = pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+            metadata = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+            if metadata.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+                logger.warning(f"集合快照格式版本不兼容，忽略: {path}")
+                return None
+            return cls(table, metadata.get('fingerprint', ''), metadata.get('objectid_ids') == '1', path)
+
+        except Exception as e:
+            logger.warning(f"加载集合快照失败: {path} - {str(e)}")
+            return None
+
+
+def _snapshot_path(collection_name: str, fields: Optional[List[str]], snapshot_dir: Optional[str]) -> Path:
+    base_dir = Path(snapshot_dir) if snapshot_dir else DEFAULT_SNAPSHOT_DIR
+    fields_key = hashlib.md5(json.dumps(sorted(fields) if fields else None).encode('utf-8')).hexdigest()[:12]
+    return base_dir / f"{collection_name}__{fields_key}.arrow"
+
+
+def get_collection_snapshot(collection, fields: Optional[List[str]] = None,
+                            updated_field: Optional[str] = None, snapshot_dir: Optional[str] = None,
+                            build_if_missing: bool = True,
+                            fingerprint: Optional[str] = None) -> Optional[CollectionSnapshot]:
+    """
+    获取与集合当前内容一致的快照：指纹一致时直接内存映射加载，否则（按需）重新导出
+
+    Args:
+        collection: MongoDB集合
+        fields: 快照字段（None表示全部字段，_id总是包含）
+        updated_field: 指纹使用的更新时间字段
+        snapshot_dir: 快照目录
+        build_if_missing: 快照缺失或过期时是否重新导出
+        fingerprint: 调用方已计算的变更指纹（同一任务内多次读取时复用，None时重新计算）
+
+    Returns:
+        Optional[CollectionSnapshot]: 快照，不可用时返回None（调用方应回退为直接读库）
+    """
+    if not PYARROW_AVAILABLE:
+        return None
+
+    fields = sorted({f for f in fields if f and f != '_id'}) if fields else None
+    path = _snapshot_path(collection.name, fields, snapshot_dir)
+    try:
+        snapshot = CollectionSnapshot.load(path)
+        fingerprint = fingerprint or compute_snapshot_fingerprint(collection, updated_field)
+        if snapshot is not None and snapshot.fingerprint == fingerprint:
+            logger.info(f"⚡ 使用集合快照: {collection.name} ({snapshot.num_rows} 条记录)")
+            return snapshot
+
+        if not build_if_missing:
+            return None
+        return CollectionSnapshot.export(collection, path, fields, updated_field, fingerprint=fingerprint)
+
+    except Exception as e:
+        logger.warning(f"获取集合快照失败，回退为直接读库: {collection.name} - {str(e)}")
+        return None
+
+
+def iter_collection_batches(collection, fields: Optional[List[str]] = None, batch_size: int = 1000,
+                            limit: int = 0, use_snapshot: bool = True,
+                            updated_field: Optional[str] = None,
+                            build_snapshot: Optional[bool] = None,
+                            fingerprint: Optional[str] = None) -> Iterator[List[Dict]]:
+    """
+    按批次读取集合记录：优先使用快照，不可用时按_id范围分页读库
+
+    build_snapshot为None时，部分读取（limit>0）只复用已有快照，不为此触发整表导出
+    """
+    if build_snapshot is None:
+        build_snapshot = not limit
+    snapshot = get_collection_snapshot(collection, fields, updated_field, build_if_missing=build_snapshot,
+                                       fingerprint=fingerprint) if use_snapshot else None
+    if snapshot is not None:
+        yield from snapshot.iter_batches(batch_size, limit)
+        return
+
+    projection = {field: 1 for field in fields} if fields else None
+    yield from IdRangeReader(collection, projection=projection, batch_size=batch_size,
+                             limit=limit).iter_batches()
+
+
+def load_collection_records(collection, fields: Optional[List[str]] = None, limit: int = 0,
+                            use_snapshot: bool = True, updated_field: Optional[str] = None,
+                            build_snapshot: Optional[bool] = None,
+                            fingerprint: Optional[str] = None) -> List[Dict]:
+    """一次性读取集合记录（优先使用快照）"""
+    records = []
+    for batch in iter_collection_batches(collection, fields, batch_size=10000, limit=limit,
+                                         use_snapshot=use_snapshot, updated_field=updated_field,
+                                         build_snapshot=build_snapshot, fingerprint=fingerprint):
+        records.extend(batch)
+    return records
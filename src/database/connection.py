@@ -12,6 +12,7 @@ import redis
 from datetime import datetime
 from threading import Lock
 from src.utils.helpers import convert_objectid_to_str
+from .range_reader import IdRangeReader
 from pymongo.errors import ConnectionFailure
 from redis import Redis
 from redis.exceptions import ConnectionError as RedisConnectionError
@@ -285,13 +286,14 @@ class DatabaseManager:
             logger.error(f"获取集合{collection_name}记录数失败: {str(e)}")
             return 0
             
-    def get_supervision_units(self, skip: int = 0, limit: int = 100) -> List[Dict]:
+    def get_supervision_units(self, skip: int = 0, limit: int = 100, after_id: Any = None) -> List[Dict]:
         """
         获取消防监督管理系统单位数据
         
         Args:
-            skip: 跳过记录数
+            skip: 跳过记录数（仅在未提供after_id时使用）
             limit: 限制记录数
+            after_id: 按_id范围分页，返回该_id之后的记录
             
         Returns:
             List[Dict]: 单位数据列表
@@ -300,8 +302,12 @@ class DatabaseManager:
             collection_name = self.mongodb_config.get('collections', {}).get('supervision_units', 'xxj_shdwjbxx')
             collection = self.get_collection(collection_name)
             
-            cursor = collection.find({}).skip(skip).limit(limit)
-            results = list(cursor)
+            if after_id is not None:
+                reader = IdRangeReader(collection, batch_size=limit, start_after=after_id, limit=limit)
+                results = next(reader.iter_batches(), [])
+            else:
+                cursor = collection.find({}).skip(skip).limit(limit)
+                results = list(cursor)
             
             # 转换ObjectId为字符串，确保JSON序列化正常
             return convert_objectid_to_str(results)
@@ -310,13 +316,14 @@ class DatabaseManager:
             logger.error(f"获取监督管理系统数据失败: {str(e)}")
             return []
             
-    def get_inspection_units(self, skip: int = 0, limit: int = 100) -> List[Dict]:
+    def get_inspection_units(self, skip: int = 0, limit: int = 100, after_id: Any = None) -> List[Dict]:
         """
         获取消防隐患安全排查系统单位数据
         
         Args:
-            skip: 跳过记录数
+            skip: 跳过记录数（仅在未提供after_id时使用）
             limit: 限制记录数
+            after_id: 按_id范围分页，返回该_id之后的记录
             
         Returns:
             List[Dict]: 单位数据列表
@@ -325,8 +332,12 @@ class DatabaseManager:
             collection_name = self.mongodb_config.get('collections', {}).get('inspection_units', 'xfaqpc_jzdwxx')
             collection = self.get_collection(collection_name)
             
-            cursor = collection.find({}).skip(skip).limit(limit)
-            results = list(cursor)
+            if after_id is not None:
+                reader = IdRangeReader(collection, batch_size=limit, start_after=after_id, limit=limit)
+                results = next(reader.iter_batches(), [])
+            else:
+                cursor = collection.find({}).skip(skip).limit(limit)
+                results = list(cursor)
             
             # 转换ObjectId为字符串，确保JSON序列化正常
             return convert_objectid_to_str(results)
@@ -335,6 +346,34 @@ class DatabaseManager:
             logger.error(f"获取安全排查系统数据失败: {str(e)}")
             return []
             
+    def iter_units(self, collection_key: str, batch_size: int = 1000, projection: Optional[Dict] = None,
+                   start_after: Any = None):
+        """
+        按_id范围流式读取单位数据
+        
+        Args:
+            collection_key: 集合配置键（'inspection_units' 或 'supervision_units'）
+            batch_size: 批次大小
+            projection: 字段投影
+            start_after: 从该_id之后开始读取（断点续跑，字符串形式的ObjectId会自动还原）
+            
+        Yields:
+            List[Dict]: 批次数据（ObjectId已转换为字符串，批次末条记录的_id即为检查点）
+        """
+        defaults = {'inspection_units': 'xfaqpc_jzdwxx', 'supervision_units': 'xxj_shdwjbxx'}
+        collection_name = self.mongodb_config.get('collections', {}).get(
+            collection_key, defaults.get(collection_key, collection_key)
+        )
+        reader = IdRangeReader(
+            self.get_collection(collection_name),
+            projection=projection,
+            batch_size=batch_size,
+            start_after=start_after
+        )
+        
+        for batch in reader.iter_batches():
+            yield convert_objectid_to_str(batch)
+            
     def save_match_result(self, match_result: Dict) -> bool:
         """
         保存匹配结果
@@ -0,0 +1,45 @@
+"""
+索引版本记录模块
+计算目标表版本与增量维护版本，派生索引（特征库、精确匹配索引、MinHash-LSH索引、集合快照等）
+据此判断是否需要重建
+"""
+
+import re
+
+# 增量索引维护状态集合（IncrementalIndexMaintainer 在其中记录各索引目标的 index_version）
+INDEX_STATE_COLLECTION = 'index_maintenance_state'
+
+
+def compute_table_version(collection) -> str:
+    """
+    计算目标表版本（记录数 + 最大_id），插入或删除记录后版本改变
+
+    Args:
+        collection: 目标表集合
+
+    Returns:
+        str: 表版本标识
+    """
+    count = collection.count_documents({})
+    last = list(collection.find({}, {'_id': 1}).sort('_id', -1).limit(1))
+    return f"{count}:{last[0]['_id'] if last else ''}"
+
+
+def compute_maintained_version(collection) -> int:
+    """
+    增量维护器为该表各索引目标记录的 index_version 之和
+    记录被原地修改时表版本不变，但增量同步后该值增加；未做增量维护的表为0
+    """
+    state_collection = collection.database[INDEX_STATE_COLLECTION]
+    # 维护状态键格式为 "<kind>:<表名>.<字段名>"
+    pattern = f"^[^:]*:{re.escape(collection.name)}\\."
+    states = state_collection.find({'_id': {'$regex': pattern}}, {'index_version': 1})
+    return sum(int(state.get('index_version', 0)) for state in states)
+
+
+def compute_index_source_version(collection) -> str:
+    """
+    派生索引（精确匹配索引、MinHash-LSH索引等）的数据源版本：表版本 + 增量维护版本，
+    插入、删除以及经增量维护同步的原地修改都会改变该版本
+    """
+    return f"{compute_table_version(collection)}#{compute_maintained_version(collection)}"
@@ -0,0 +1,93 @@
+"""
+按_id范围分页的流式读取模块
+以 _id > last_id 代替 skip/limit 分页，后续批次查询代价不随偏移量增长，
+并支持从检查点记录的 last_id 处继续读取
+"""
+
+import logging
+from typing import Dict, List, Any, Optional, Iterator
+from bson import ObjectId
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+
+logger = logging.getLogger(__name__)
+
+def normalize_id(value: Any) -> Any:
+    """将24位十六进制字符串还原为ObjectId，其他类型原样返回"""
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return value
+
+
+class IdRangeReader:
+    """按_id范围分页的流式读取器"""
+
+    def __init__(self, collection: Collection, query: Optional[Dict] = None,
+                 projection: Optional[Dict] = None, batch_size: int = 1000,
+                 start_after: Any = None, limit: int = 0):
+        """
+        初始化读取器
+
+        Args:
+            collection: MongoDB集合
+            query: 过滤条件
+            projection: 字段投影（None表示全部字段）
+            batch_size: 每批记录数
+            start_after: 从该_id之后开始读取（用于断点续跑，支持字符串形式的ObjectId）
+            limit: 最多读取的记录数（0表示不限制）
+        """
+        self.collection = collection
+        self.query = query or {}
+        self.projection = projection
+        self.batch_size = max(1, batch_size)
+        self.limit = limit
+        self.last_id = normalize_id(start_after)
+        self.records_read = 0
+
+    def _build_query(self) -> Dict:
+        """构建带_id下界的查询条件"""
+        if self.last_id is None:
+            return self.query
+
+        range_condition = {'_id': {'$gt': self.last_id}}
+        if not self.query:
+            return range_condition
+        if '_id' in self.query:
+            return {'$and': [self.query, range_condition]}
+        return {**self.query, **range_condition}
+
+    def iter_batches(self) -> Iterator[List[Dict]]:
+        """
+        按批次读取记录
+
+        Yields:
+            List[Dict]: 批次记录（按_id升序）
+        """
+        while True:
+            current_batch_size = self.batch_size
+            if self.limit:
+                remaining = self.limit - self.records_read
+                if remaining <= 0:
+                    break
+                current_batch_size = min(current_batch_size, remaining)
+
+            cursor = self.collection.find(self._build_query(), self.projection) \
+                .sort('_id', ASCENDING).limit(current_batch_size)
+            batch = list(cursor)
+            if not batch:
+                break
+
+            self.last_id = batch[-1]['_id']
+            self.records_read += len(batch)
+            yield batch
+
+            if len(batch) < current_batch_size:
+                break
+
+    def iter_records(self) -> Iterator[Dict]:
+        """逐条读取记录"""
+        for batch in self.iter_batches():
+            yield from batch
+
+    def __iter__(self) -> Iterator[List[Dict]]:
+        return self.iter_batches()
@@ -0,0 +1,100 @@
+"""
+相似实体对生成模块
+在字符集合上做前缀过滤 + 位置过滤（PPJoin）：按全局频次从低到高排列每个集合的元素，
+Jaccard相似度不低于阈值的两个集合必然在各自的前若干个（低频）元素中有交集，
+因此只需在倒排索引中为共享前缀元素的集合生成候选对并核验，无需两两比较，且不会漏掉满足阈值的对
+"""
+
+import math
+from collections import Counter
+from typing import Dict, List, Hashable, Iterable, Set, Tuple
+
+# 浮点阈值换算成整数长度时的容差（宁可多留候选，不可漏掉）
+_EPSILON = 1e-9
+
+
+def _ceil(value: float) -> int:
+    return math.ceil(value - _EPSILON)
+
+
+def jaccard_similar_pairs(token_sets: List[Set[Hashable]], threshold: float) -> List[Tuple[int, int]]:
+    """
+    找出Jaccard相似度不低于阈值的全部集合对
+
+    Args:
+        token_sets: 各对象的元素集合（如标签的字符集合）
+        threshold: Jaccard相似度下限（0-1）
+
+    Returns:
+        List[Tuple[int, int]]: 按 (i, j) 升序排列的下标对（i < j）；两个空集合视为相同
+    """
+    count = len(token_sets)
+    if threshold <= 0:
+        return [(i, j) for i in range(count) for j in range(i + 1, count)]
+
+    frequency = Counter(token for tokens in token_sets for token in tokens)
+    rank = {token: position for position, token in
+            enumerate(sorted(frequency, key=lambda token: (frequency[token], repr(token))))}
+    ordered = [sorted(tokens, key=rank.__getitem__) for tokens in token_sets]
+    overlap_ratio = threshold / (1 + threshold)
+
+    # token -> [(集合下标, 元素在该集合中的位置)]
+    postings: Dict[Hashable, List[Tuple[int, int]]] = {}
+    pairs = []
+    empty_sets = []
+
+    # 按集合大小升序处理，已入索引的集合都不大于当前集合
+    for index in sorted(range(count), key=lambda i: (len(ordered[i]), i)):
+        tokens = ordered[index]
+        size = len(tokens)
+        if size == 0:
+            empty_sets.append(index)
+            continue
+
+        overlaps: Dict[int, int] = {}
+        min_size = _ceil(threshold * size)
+        probe_length = size - min_size + 1
+        for position, token in enumerate(tokens[:probe_length]):
+            for other, other_position in postings.get(token, ()):
+                other_size = len(ordered[other])
+                # 长度过滤
+                if other_size < min_size:
+                    continue
+                current = overlaps.get(other, 0)
+                if current < 0:
+                    continue
+                # 位置过滤：已有交集 + 剩余元素可能的最大交集 不足所需交集时剪枝
+                required = _ceil(overlap_ratio * (size + other_size))
+                remaining = min(size - position - 1, other_size - other_position - 1)
+                overlaps[other] = current + 1 if current + 1 + remaining >= required else -1
+
+        token_set = token_sets[index]
+        for other, overlap in overlaps.items():
+            if overlap > 0:
+                intersection = len(token_set & token_sets[other])
+                if intersection >= threshold * (size + len(ordered[other]) - intersection) - _EPSILON:
+                    pairs.append((min(index, other), max(index, other)))
+
+        # 索引前缀：只需索引能与更大集合达到所需交集的前若干个元素
+        index_length = size - _ceil(2 * overlap_ratio * size) + 1
+        for position, token in enumerate(tokens[:index_length]):
+            postings.setdefault(token, []).append((index, position))
+
+    pairs.extend((i, j) for position, i in enumerate(empty_sets) for j in empty_sets[position + 1:])
+    pairs.sort()
+    return pairs
+
+
+def partner_positions(partners: Iterable[Hashable], positions: Dict[Hashable, List[int]]) -> List[int]:
+    """
+    把伙伴ID映射为其在原列表中的位置（升序），用于按原遍历顺序输出稀疏的配对结果
+
+    Args:
+        partners: 伙伴ID
+        positions: ID -> 在原列表中的位置列表
+    """
+    result = []
+    for partner in partners:
+        result.extend(positions.get(partner, ()))
+    result.sort()
+    return result
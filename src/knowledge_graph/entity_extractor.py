@@ -5,28 +5,23 @@
 
 import re
 import logging
+import importlib.util
 from typing import Dict, List, Any, Optional, Set, Tuple
 import pandas as pd
 import math
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from .kg_models import Entity, EntityType
+from ..utils.tokenizer_service import get_tokenizer, MODE_POS
+from ..utils.bounded_cache import BoundedCache
 # 延迟导入以避免循环依赖
 # from ..data_manager.schema_detector import SchemaDetector
 
-# NLP相关导入 - 可选依赖
-try:
-    import warnings
-    # 抑制jieba的pkg_resources弃用警告
-    with warnings.catch_warnings():
-        warnings.filterwarnings("ignore", category=UserWarning, module="jieba._compat")
-        import jieba
-        import jieba.posseg as pseg
-    HAS_JIEBA = True
-    logger_init = logging.getLogger(__name__)
-    logger_init.info("jieba中文分词库加载成功")
-except ImportError:
-    HAS_JIEBA = False
-    logger_init = logging.getLogger(__name__)
+# NLP相关依赖 - 可选（分词由共享分词服务完成，此处只检测jieba是否可用）
+HAS_JIEBA = importlib.util.find_spec('jieba') is not None
+logger_init = logging.getLogger(__name__)
+if HAS_JIEBA:
+    logger_init.info("jieba中文分词库可用")
+else:
     logger_init.warning("jieba库未安装，将使用基础实体识别")
 
 try:
@@ -95,6 +90,11 @@ class EntityExtractor:
             'low': 0.5
         })
         
+        # 按列抽取：每个不同取值只验证、评分一次（跨批次复用）
+        self.columnar_extraction = self.config.get('columnar_extraction', True)
+        self._value_scores = BoundedCache('entity_extractor.value_scores',
+                                          max_entries=self.config.get('value_score_cache_size', 100000))
+        
     def _detect_entity_fields(self, df: pd.DataFrame) -> Dict[str, List[str]]:
         """
         简化的实体字段检测
@@ -143,25 +143,16 @@ class EntityExtractor:
     def _init_nlp_components(self) -> None:
         """初始化NLP组件"""
         if HAS_JIEBA:
-            # 加载自定义词典（如果有的话）
+            # 共享分词服务：加载自定义词典（如果有的话）并初始化一次
+            tokenizer = get_tokenizer()
             custom_dict_path = self.config.get('custom_dict_path')
             if custom_dict_path:
                 try:
-                    jieba.load_userdict(custom_dict_path)
-                    logger.info(f"加载自定义词典: {custom_dict_path}")
+                    tokenizer.add_user_dict(custom_dict_path)
                 except Exception as e:
                     logger.warning(f"加载自定义词典失败: {e}")
-            
-            # 设置分词模式 - Windows系统不支持并行模式
-            try:
-                import os
-                if os.name == 'posix':  # Unix/Linux系统
-                    jieba.enable_parallel(4)  # 启用并行分词
-                    logger.info("jieba分词器初始化完成（并行模式）")
-                else:  # Windows系统
-                    logger.info("jieba分词器初始化完成（串行模式）")
-            except Exception as e:
-                logger.warning(f"jieba并行模式设置失败: {e}，使用串行模式")
+            tokenizer.warm_up()
+            logger.info("jieba分词器初始化完成（共享分词服务）")
         
         if HAS_SKLEARN:
             # 初始化TF-IDF向量化器
@@ -292,6 +283,139 @@ class EntityExtractor:
         """
         按类型抽取实体
         
+        Args:
+            df: 数据框
+            entity_type: 实体类型
+            field_names: 字段名列表
+            table_name: 表名
+            
+        Returns:
+            List[Entity]: 实体列表
+        """
+        if self.columnar_extraction:
+            return self._extract_entities_by_column(df, entity_type, field_names, table_name)
+        return self._extract_entities_by_row(df, entity_type, field_names, table_name)
+    
+    def _extract_entities_by_column(self, df: pd.DataFrame,
+                                    entity_type: EntityType,
+                                    field_names: List[str],
+                                    table_name: str) -> List[Entity]:
+        """
+        按列抽取实体：主字段每个不同取值只验证、评分并创建一个实体
+        
+        结果与逐行抽取再经 _deduplicate_entities 合并相同：去重键不区分大小写，
+        实体取该键首次出现的有效行，属性以首行为准，首行缺失的属性取同键后续有效行中第一个非空值，
+        置信度取同键各取值的最大值
+        """
+        entities = []
+        
+        if not field_names or field_names[0] not in df.columns:
+            return entities
+        
+        primary_field = field_names[0]  # 主要字段
+        
+        # 主字段去空、去首尾空白后的取值（按行位置索引，避免重复行索引干扰）
+        labels = self._clean_column(df[primary_field]).dropna()
+        if labels.empty:
+            return entities
+        
+        # 每个不同取值验证、评分一次；评分用到的词性标注先整列批量完成并记忆
+        distinct_labels = labels.drop_duplicates()
+        if HAS_JIEBA:
+            get_tokenizer().tokenize_many(distinct_labels.tolist(), MODE_POS)
+        survivors = {}
+        for position, value in distinct_labels.items():
+            try:
+                confidence = self._score_entity_value(value, entity_type)
+                if confidence is not None:
+                    survivors[value] = (position, confidence)
+            except Exception as e:
+                logger.warning(f"抽取实体失败，行 {df.index[position]}: {str(e)}")
+        
+        if not survivors:
+            return entities
+        
+        # 属性列：实体字段 + 上下文相关字段（键名标准化）
+        property_columns = [(field_name, field_name) for field_name in field_names if field_name in df.columns]
+        property_columns += [(self._normalize_property_key(field), field)
+                             for field in self._find_related_fields(entity_type, df.columns)]
+        
+        survivor_labels = labels[labels.isin(survivors)]
+        property_frame = pd.DataFrame({
+            column_position: self._clean_column(df[column]).take(survivor_labels.index).values
+            for column_position, (_, column) in enumerate(property_columns)
+        }, index=survivor_labels.index)
+        # 与去重键一致按小写取值分组：同键各行中每个属性第一个非空值
+        group_keys = survivor_labels.str.lower()
+        group_values = property_frame.groupby(group_keys.values, sort=False).first()
+        
+        # 同键的不同大小写取值合并为一个实体：取首次出现的取值，置信度取最大值
+        merged = {}
+        for value, (position, confidence) in survivors.items():
+            key = value.lower()
+            if key in merged:
+                first_value, first_position, best = merged[key]
+                merged[key] = (first_value, first_position, max(best, confidence))
+            else:
+                merged[key] = (value, position, confidence)
+        
+        for group_key, (value, position, confidence) in merged.items():
+            properties = {}
+            for (key, _), field_value in zip(property_columns, property_frame.loc[position]):
+                if pd.notna(field_value):
+                    properties[key] = field_value
+            if len(properties) < len(property_columns):
+                for (key, _), field_value in zip(property_columns, group_values.loc[group_key]):
+                    if key not in properties and pd.notna(field_value):
+                        properties[key] = field_value
+            
+            entities.append(Entity(
+                type=entity_type,
+                label=value,
+                properties=properties,
+                source_table=table_name,
+                source_column=primary_field,
+                source_record_id=str(df.index[position]),
+                confidence=confidence
+            ))
+        
+        return entities
+    
+    @staticmethod
+    def _clean_column(column: pd.Series) -> pd.Series:
+        """列值转为去首尾空白的字符串（按行位置索引），空值和空串为None"""
+        values = column.reset_index(drop=True)
+        present = values.notna()
+        cleaned = pd.Series(None, index=values.index, dtype=object)
+        if present.any():
+            stripped = values[present].map(str).str.strip()
+            cleaned[stripped.index] = stripped.where(stripped != '', None)
+        return cleaned
+    
+    def _score_entity_value(self, value: str, entity_type: EntityType) -> Optional[float]:
+        """
+        验证实体取值并计算置信度（按 类型+取值 缓存）
+        
+        Returns:
+            Optional[float]: 置信度，取值无效时为None
+        """
+        key = (entity_type, value)
+        cached = self._value_scores.get(key)
+        if cached is None:
+            if self._is_valid_entity_value(value, entity_type):
+                cached = (self._calculate_entity_confidence(value, entity_type),)
+            else:
+                cached = (None,)
+            self._value_scores.set(key, cached)
+        return cached[0]
+    
+    def _extract_entities_by_row(self, df: pd.DataFrame,
+                                 entity_type: EntityType,
+                                 field_names: List[str],
+                                 table_name: str) -> List[Entity]:
+        """
+        逐行抽取实体（columnar_extraction关闭时使用）
+        
         Args:
             df: 数据框
             entity_type: 实体类型
@@ -430,7 +554,7 @@ class EntityExtractor:
         """计算词性标注分数"""
         try:
             # 使用jieba进行词性标注
-            seg_result = list(pseg.cut(value))
+            seg_result = get_tokenizer().tokenize(value, MODE_POS)
             
             if not seg_result:
                 return 0.0
@@ -841,7 +965,7 @@ class EntityExtractor:
             context = context or {}
             
             # 1. 使用jieba进行词性标注
-            seg_result = list(pseg.cut(text))
+            seg_result = get_tokenizer().tokenize(text, MODE_POS)
             
             # 2. 基于词性和规则抽取实体
             for word, pos in seg_result:
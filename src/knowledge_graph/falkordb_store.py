@@ -567,9 +567,210 @@ class FalkorDBStore:
             logger.error(f"保存三元组失败: {triple.id} - {e}")
             return False
     
+    # ====== UNWIND批量写入 ======
+    
+    # 实体节点属性（与save_entity写入的属性一致）
+    ENTITY_FIELDS = ('label', 'type', 'properties', 'aliases', 'source_table', 'source_column',
+                     'source_record_id', 'confidence', 'created_time', 'updated_time')
+    
+    # 关系节点属性（与save_relation写入的属性一致）
+    RELATION_FIELDS = ('type', 'label', 'properties', 'domain', 'range', 'inverse_relation',
+                       'is_symmetric', 'is_transitive', 'confidence', 'created_time', 'updated_time')
+    
+    # 三元组边属性（与save_triple写入的属性一致，作为MERGE的匹配模式）
+    EDGE_FIELDS = ('triple_id', 'relation_id', 'confidence', 'source', 'evidence', 'created_time', 'updated_time')
+    
+    @staticmethod
+    def _enum_value(value: Any) -> str:
+        """枚举取value，其余转字符串（None为空串）"""
+        if value is None:
+            return ''
+        return value.value if hasattr(value, 'value') else str(value)
+    
+    @staticmethod
+    def _edge_type(relation: Relation) -> str:
+        """关系类型转为有效的Cypher边类型名"""
+        return FalkorDBStore._enum_value(relation.type).replace(' ', '_').replace('-', '_').upper()
+    
+    def _entity_row(self, entity: Entity) -> Dict[str, Any]:
+        """实体 -> UNWIND行参数"""
+        return {
+            'entity_id': entity.id,
+            'label': entity.label,
+            'type': entity.type.value,
+            'properties': str(entity.properties) if entity.properties else '',
+            'aliases': str(entity.aliases) if entity.aliases else '',
+            'source_table': entity.source_table or '',
+            'source_column': entity.source_column or '',
+            'source_record_id': entity.source_record_id or '',
+            'confidence': float(entity.confidence),
+            'created_time': entity.created_time.isoformat() if entity.created_time else '',
+            'updated_time': entity.updated_time.isoformat() if entity.updated_time else ''
+        }
+    
+    def _relation_row(self, relation: Relation) -> Dict[str, Any]:
+        """关系 -> UNWIND行参数"""
+        return {
+            'relation_id': relation.id,
+            'type': self._enum_value(relation.type),
+            'label': relation.label or '',
+            'properties': str(relation.properties) if relation.properties else '',
+            'domain': self._enum_value(relation.domain),
+            'range': self._enum_value(relation.range),
+            'inverse_relation': relation.inverse_relation or '',
+            'is_symmetric': bool(relation.is_symmetric),
+            'is_transitive': bool(relation.is_transitive),
+            'confidence': float(relation.confidence),
+            'created_time': relation.created_time.isoformat() if relation.created_time else '',
+            'updated_time': relation.updated_time.isoformat() if relation.updated_time else ''
+        }
+    
+    def _edge_row(self, triple: KnowledgeTriple) -> Dict[str, Any]:
+        """三元组 -> UNWIND行参数"""
+        return {
+            'subject_id': triple.subject.id,
+            'object_id': triple.object.id,
+            'triple_id': triple.id,
+            'relation_id': triple.predicate.id,
+            'confidence': float(triple.confidence),
+            'source': triple.source or '',
+            'evidence': str(triple.evidence) if triple.evidence else '',
+            'created_time': triple.created_time.isoformat() if triple.created_time else '',
+            'updated_time': triple.updated_time.isoformat() if triple.updated_time else ''
+        }
+    
+    def _entity_graphs(self) -> List[Tuple[Any, Optional[str]]]:
+        """实体写入的目标图及其项目标签（双重存储时写入全局图+项目图，与save_entity一致）"""
+        if self.project_name and self.global_graph and self.project_graph:
+            return [(self.global_graph, self.project_name), (self.project_graph, None)]
+        return [(self.graph, None)]
+    
+    def _edge_graph(self):
+        """三元组边写入的目标图（与save_triple一致）"""
+        return self.project_graph if (self.project_name and self.project_graph) else self.graph
+    
+    def _run_unwind(self, graph, cypher: str, rows: List[Dict[str, Any]], batch_size: int,
+                    description: str) -> int:
+        """
+        按batch_size分块执行 UNWIND $rows 查询
+        
+        Returns:
+            int: 成功写入的行数（失败的分块记录日志后跳过）
+        """
+        written = 0
+        for i in range(0, len(rows), batch_size):
+            chunk = rows[i:i + batch_size]
+            try:
+                graph.query(cypher, {'rows': chunk})
+                written += len(chunk)
+            except Exception as e:
+                logger.warning(f"批量写入{description}失败（{len(chunk)}行）: {e}")
+            self.stats['queries_executed'] += 1
+        return written
+    
+    def bulk_save_entities(self, entities: List[Entity], batch_size: int = 1000) -> int:
+        """
+        按实体类型分组，以参数化 UNWIND ... MERGE 批量保存实体（每组每批一次往返）
+        
+        Args:
+            entities: 实体列表（同ID多次出现时以最后一个为准）
+            batch_size: 每次查询的行数
+            
+        Returns:
+            int: 成功保存的实体数量
+        """
+        groups: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for entity in entities:
+            groups.setdefault(entity.type.value, {})[entity.id] = self._entity_row(entity)
+        
+        saved_count = 0
+        for entity_type, rows_by_id in groups.items():
+            rows = list(rows_by_id.values())
+            group_saved = len(rows)
+            for graph, project_name in self._entity_graphs():
+                fields = self.ENTITY_FIELDS
+                graph_rows = rows
+                if project_name:
+                    # 全局图中的实体带项目标签
+                    fields = fields + ('project_name',)
+                    graph_rows = [dict(row, project_name=project_name) for row in rows]
+                assignments = ', '.join(f"e.{field} = row.{field}" for field in fields)
+                cypher = f"UNWIND $rows AS row MERGE (e:{entity_type} {{entity_id: row.entity_id}}) SET {assignments}"
+                written = self._run_unwind(graph, cypher, graph_rows, batch_size, f"实体[{entity_type}]")
+                group_saved = min(group_saved, written)
+            saved_count += group_saved
+        
+        self.stats['entities_stored'] += saved_count
+        self.stats['last_operation_time'] = datetime.now()
+        return saved_count
+    
+    def bulk_save_relations(self, relations: List[Relation], batch_size: int = 1000) -> int:
+        """
+        以参数化 UNWIND ... MERGE 批量保存关系节点
+        
+        Args:
+            relations: 关系列表（同ID只保存一次）
+            batch_size: 每次查询的行数
+            
+        Returns:
+            int: 成功保存的关系数量
+        """
+        rows = list({relation.id: self._relation_row(relation) for relation in relations}.values())
+        assignments = ', '.join(f"r.{field} = row.{field}" for field in self.RELATION_FIELDS)
+        cypher = f"UNWIND $rows AS row MERGE (r:Relation {{relation_id: row.relation_id}}) SET {assignments}"
+        
+        saved_count = self._run_unwind(self.graph, cypher, rows, batch_size, "关系")
+        self.stats['relations_stored'] += saved_count
+        self.stats['last_operation_time'] = datetime.now()
+        return saved_count
+    
+    def bulk_save_triples(self, triples: List[KnowledgeTriple], batch_size: int = 1000) -> int:
+        """
+        批量保存三元组：先批量写入涉及的实体和关系节点，再按 (主体类型, 关系类型, 客体类型)
+        分组以 UNWIND ... MATCH ... MERGE 批量创建边
+        
+        Args:
+            triples: 三元组列表
+            batch_size: 每次查询的行数
+            
+        Returns:
+            int: 成功保存的三元组数量
+        """
+        if not triples:
+            return 0
+        
+        entities: Dict[str, Entity] = {}
+        relations: Dict[str, Relation] = {}
+        edge_groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+        for triple in triples:
+            entities[triple.subject.id] = triple.subject
+            entities[triple.object.id] = triple.object
+            relations[triple.predicate.id] = triple.predicate
+            key = (self._enum_value(triple.subject.type), self._edge_type(triple.predicate),
+                   self._enum_value(triple.object.type))
+            edge_groups.setdefault(key, []).append(self._edge_row(triple))
+        
+        self.bulk_save_entities(list(entities.values()), batch_size)
+        self.bulk_save_relations(list(relations.values()), batch_size)
+        
+        edge_properties = ', '.join(f"{field}: row.{field}" for field in self.EDGE_FIELDS)
+        target_graph = self._edge_graph()
+        saved_count = 0
+        for (subject_type, edge_type, object_type), rows in edge_groups.items():
+            cypher = (f"UNWIND $rows AS row "
+                      f"MATCH (s:{subject_type} {{entity_id: row.subject_id}}) "
+                      f"MATCH (o:{object_type} {{entity_id: row.object_id}}) "
+                      f"MERGE (s)-[r:{edge_type} {{{edge_properties}}}]->(o)")
+            saved_count += self._run_unwind(target_graph, cypher, rows, batch_size,
+                                            f"三元组[{subject_type}-{edge_type}->{object_type}]")
+        
+        self.stats['triples_stored'] += saved_count
+        self.stats['last_operation_time'] = datetime.now()
+        return saved_count
+    
     def batch_save_entities(self, entities: List[Entity], batch_size: int = 1000) -> int:
         """
-        批量保存实体（高性能版本）
+        批量保存实体（按类型分组的UNWIND批量写入）
         
         Args:
             entities: 实体列表
@@ -578,57 +779,18 @@ class FalkorDBStore:
         Returns:
             int: 成功保存的实体数量
         """
-        success_count = 0
         start_time = time.time()
-        
         logger.info(f"开始批量保存实体: {len(entities)}个")
         
-        # 分批处理
-        for i in range(0, len(entities), batch_size):
-            batch = entities[i:i + batch_size]
-            batch_success = 0
-            
-            # 构建批量Cypher查询
-            cypher_queries = []
-            params_list = []
-            
-            for entity in batch:
-                query = f"""
-                MERGE (e:{entity.type.value} {{entity_id: $entity_id}})
-                SET e.label = $label,
-                    e.type = $type,
-                    e.confidence = $confidence,
-                    e.source_table = $source_table,
-                    e.updated_time = $updated_time
-                """
-                
-                params = {
-                    'entity_id': entity.id,
-                    'label': entity.label,
-                    'type': entity.type.value,
-                    'confidence': float(entity.confidence),
-                    'source_table': entity.source_table or '',
-                    'updated_time': datetime.now().isoformat()
-                }
-                
-                try:
-                    self.graph.query(query, params)
-                    batch_success += 1
-                except Exception as e:
-                    logger.warning(f"批量保存实体失败: {entity.id} - {e}")
-            
-            success_count += batch_success
-            logger.info(f"批量保存实体进度: {i + len(batch)}/{len(entities)} ({batch_success}/{len(batch)} 成功)")
+        success_count = self.bulk_save_entities(entities, batch_size)
         
         elapsed_time = time.time() - start_time
         logger.info(f"批量保存实体完成: {success_count}/{len(entities)} 成功, 耗时: {elapsed_time:.2f}秒")
-        
-        self.stats['entities_stored'] += success_count
         return success_count
     
     def batch_save_triples(self, triples: List[KnowledgeTriple], batch_size: int = 500) -> int:
         """
-        批量保存三元组（超高性能版本）
+        批量保存三元组（按类型分组的UNWIND批量写入）
         
         Args:
             triples: 三元组列表
@@ -637,27 +799,13 @@ class FalkorDBStore:
         Returns:
             int: 成功保存的三元组数量
         """
-        success_count = 0
         start_time = time.time()
-        
         logger.info(f"开始批量保存三元组: {len(triples)}个")
         
-        # 分批处理
-        for i in range(0, len(triples), batch_size):
-            batch = triples[i:i + batch_size]
-            batch_success = 0
-            
-            for triple in batch:
-                if self.save_triple(triple):
-                    batch_success += 1
-            
-            success_count += batch_success
-            logger.info(f"批量保存三元组进度: {i + len(batch)}/{len(triples)} ({batch_success}/{len(batch)} 成功)")
+        success_count = self.bulk_save_triples(triples, batch_size)
         
         elapsed_time = time.time() - start_time
         logger.info(f"批量保存三元组完成: {success_count}/{len(triples)} 成功, 耗时: {elapsed_time:.2f}秒")
-        
-        self.stats['triples_stored'] += success_count
         return success_count
     
     def query_entities(self, entity_type: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
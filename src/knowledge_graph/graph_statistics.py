@@ -0,0 +1,544 @@
+"""
+图统计模块
+供大规模知识图谱质量评估使用：计数、置信度、完整性、唯一性等统计下推到MongoDB/FalkorDB聚合完成；
+连通分量由流式读取的边游标逐批做并查集得到；聚类系数与平均路径长度在紧凑的稀疏邻接矩阵上随机抽样估计，
+并给出置信区间。全程不把实体/三元组对象整体加载到内存
+"""
+
+import ast
+import logging
+import math
+from array import array
+from collections import Counter
+from typing import Dict, List, Any, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+logger = logging.getLogger(__name__)
+
+# 置信度聚合结果的字段（数量、和、平方和、最小、最大、达标数量）
+EMPTY_CONFIDENCE_AGGREGATE = {'count': 0, 'sum': 0.0, 'sum_squares': 0.0, 'min': None, 'max': None, 'high': 0}
+
+
+def merge_confidence_aggregates(aggregates: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """合并多组置信度聚合结果"""
+    merged = dict(EMPTY_CONFIDENCE_AGGREGATE)
+    for aggregate in aggregates:
+        merged['count'] += aggregate.get('count') or 0
+        merged['sum'] += aggregate.get('sum') or 0.0
+        merged['sum_squares'] += aggregate.get('sum_squares') or 0.0
+        merged['high'] += aggregate.get('high') or 0
+        for key, pick in (('min', min), ('max', max)):
+            value = aggregate.get(key)
+            if value is not None:
+                merged[key] = value if merged[key] is None else pick(merged[key], value)
+    return merged
+
+
+def confidence_stats(aggregate: Dict[str, Any], sampled_values: Sequence[float]) -> Dict[str, Any]:
+    """
+    由聚合结果计算置信度统计（均值/极值/标准差精确，中位数取自随机样本）
+
+    Args:
+        aggregate: 置信度聚合结果
+        sampled_values: 随机抽样的置信度
+    """
+    count = aggregate['count']
+    if not count:
+        return {'average': 0.0, 'median': 0.0, 'min': 0.0, 'max': 0.0, 'std_dev': 0.0}
+    mean = aggregate['sum'] / count
+    # 样本标准差（与statistics.stdev一致）
+    variance = (aggregate['sum_squares'] - count * mean * mean) / (count - 1) if count > 1 else 0.0
+    values = sorted(value for value in sampled_values if value is not None)
+    return {
+        'average': mean,
+        'median': float(np.median(values)) if values else mean,
+        'min': aggregate['min'],
+        'max': aggregate['max'],
+        'std_dev': math.sqrt(max(variance, 0.0))
+    }
+
+
+def confidence_interval(values: Sequence[float], population_size: int, z: float = 1.96) -> Dict[str, Any]:
+    """
+    样本均值及其置信区间（正态近似，样本覆盖全部总体时区间宽度为0）
+
+    Args:
+        values: 样本值
+        population_size: 总体大小
+        z: 置信水平对应的分位数（1.96对应95%）
+    """
+    size = len(values)
+    if not size:
+        return {'mean': 0.0, 'lower': 0.0, 'upper': 0.0, 'sample_size': 0, 'population_size': population_size}
+    mean = float(np.mean(values))
+    margin = 0.0
+    if 1 < size < population_size:
+        margin = z * float(np.std(values, ddof=1)) / math.sqrt(size)
+    return {
+        'mean': mean,
+        'lower': mean - margin,
+        'upper': mean + margin,
+        'sample_size': size,
+        'population_size': population_size
+    }
+
+
+def parse_literal(value: Any, default: Any) -> Any:
+    """解析以str()形式存储的列表/字典属性（FalkorDB中的properties、evidence）"""
+    if isinstance(value, (list, dict)):
+        return value
+    if not value:
+        return default
+    try:
+        parsed = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return default
+    return parsed if isinstance(parsed, type(default)) else default
+
+
+class UnionFind:
+    """
+    并查集（节点为连续整数编号）：按批合并，批内的根节点图用连通分量算法一次合并，
+    查找时指针跳跃并做路径压缩，避免逐条边的Python循环
+    """
+
+    def __init__(self):
+        self._parent = np.zeros(1024, dtype=np.int64)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def grow(self, node_count: int):
+        """扩充节点到node_count个（新节点各自成一个集合）"""
+        if node_count <= self._count:
+            return
+        if node_count > len(self._parent):
+            parent = np.zeros(max(node_count, 2 * len(self._parent)), dtype=np.int64)
+            parent[:self._count] = self._parent[:self._count]
+            self._parent = parent
+        self._parent[self._count:node_count] = np.arange(self._count, node_count)
+        self._count = node_count
+
+    def find(self, nodes: np.ndarray) -> np.ndarray:
+        """批量查找根节点（并把这些节点直接指向根）"""
+        parent = self._parent
+        roots = parent[nodes]
+        while True:
+            grandparents = parent[roots]
+            if np.array_equal(grandparents, roots):
+                break
+            roots = grandparents
+        parent[nodes] = roots
+        return roots
+
+    def union_pairs(self, firsts: np.ndarray, seconds: np.ndarray):
+        """合并一批节点对"""
+        first_roots, second_roots = self.find(firsts), self.find(seconds)
+        differ = first_roots != second_roots
+        if not differ.any():
+            return
+        first_roots, second_roots = first_roots[differ], second_roots[differ]
+        roots, inverse = np.unique(np.concatenate([first_roots, second_roots]), return_inverse=True)
+        pair_count = len(first_roots)
+        root_graph = sparse.coo_matrix((np.ones(pair_count, dtype=np.int8),
+                                        (inverse[:pair_count], inverse[pair_count:])),
+                                       shape=(len(roots), len(roots)))
+        component_count, labels = csgraph.connected_components(root_graph, directed=False)
+        # 每个分量以其中编号最小的根为新根
+        new_roots = np.full(component_count, np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(new_roots, labels, roots)
+        self._parent[roots] = new_roots[labels]
+
+    def component_labels(self) -> np.ndarray:
+        """全部节点所属集合的根节点"""
+        return self.find(np.arange(self._count))
+
+    def component_sizes(self) -> np.ndarray:
+        """各连通分量的大小"""
+        sizes = np.bincount(self.component_labels(), minlength=self._count)
+        return sizes[sizes > 0]
+
+
+class EdgeScan:
+    """
+    边流的单次扫描结果：节点编号、并查集以及紧凑的边数组（每条边8字节）
+    节点只包含出现在边中的实体，孤立实体由调用方按实体总数补足
+    """
+
+    def __init__(self):
+        self.node_index: Dict[str, int] = {}
+        self.components = UnionFind()
+        self.sources = array('i')
+        self.targets = array('i')
+        self._adjacency: Optional[sparse.csr_matrix] = None
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_index)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.sources)
+
+    def add_edges(self, edges: Sequence[Tuple[str, str]]):
+        """加入一批 (主体ID, 客体ID) 边"""
+        node_index = self.node_index
+        assign = node_index.setdefault
+        # setdefault在插入前求值len，新ID恰好得到下一个编号
+        subjects = [assign(subject_id, len(node_index)) for subject_id, _ in edges]
+        targets = [assign(object_id, len(node_index)) for _, object_id in edges]
+        self.components.grow(len(node_index))
+        self.components.union_pairs(np.asarray(subjects, dtype=np.int64), np.asarray(targets, dtype=np.int64))
+        self.sources.extend(subjects)
+        self.targets.extend(targets)
+        self._adjacency = None
+
+    @classmethod
+    def from_batches(cls, batches: Iterator[List[Tuple[str, str]]]) -> 'EdgeScan':
+        scan = cls()
+        for edges in batches:
+            scan.add_edges(edges)
+        return scan
+
+    def largest_component_size(self) -> int:
+        sizes = self.components.component_sizes()
+        return int(sizes.max()) if sizes.size else 0
+
+    def _edge_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        return np.frombuffer(self.sources, dtype=np.int32), np.frombuffer(self.targets, dtype=np.int32)
+
+    def degree_distribution(self) -> Dict[str, Any]:
+        """度分布（与逐三元组计数的口径一致：自环计两次）"""
+        if not self.edge_count:
+            return {'average_degree': 0.0, 'degree_distribution': {}}
+        sources, targets = self._edge_arrays()
+        degrees = (np.bincount(sources, minlength=self.node_count) +
+                   np.bincount(targets, minlength=self.node_count))
+        values, counts = np.unique(degrees, return_counts=True)
+        return {
+            'average_degree': float(degrees.mean()),
+            'max_degree': int(values[-1]),
+            'min_degree': int(values[0]),
+            'degree_distribution': {int(value): int(count) for value, count in zip(values, counts)}
+        }
+
+    def adjacency(self) -> sparse.csr_matrix:
+        """无向、去自环、去重边的布尔邻接矩阵（CSR）"""
+        if self._adjacency is None:
+            sources, targets = self._edge_arrays()
+            keep = sources != targets
+            rows = np.concatenate([sources[keep], targets[keep]])
+            cols = np.concatenate([targets[keep], sources[keep]])
+            adjacency = sparse.csr_matrix((np.ones(len(rows), dtype=bool), (rows, cols)),
+                                          shape=(self.node_count, self.node_count))
+            adjacency.sum_duplicates()
+            adjacency.sort_indices()
+            self._adjacency = adjacency
+        return self._adjacency
+
+
+def sample_clustering_coefficients(adjacency: sparse.csr_matrix, sample_size: int,
+                                   rng: np.random.Generator, max_neighbors: int = 1000) -> List[float]:
+    """
+    抽样节点的局部聚类系数（度小于2的节点为0）
+
+    Args:
+        adjacency: 无向布尔邻接矩阵
+        sample_size: 抽样节点数（不小于节点数时计算全部节点）
+        rng: 随机数生成器
+        max_neighbors: 高度数节点只在随机抽取的这么多邻居之间统计连边比例
+    """
+    node_count = adjacency.shape[0]
+    if node_count == 0:
+        return []
+    nodes = np.arange(node_count) if sample_size >= node_count else \
+        rng.choice(node_count, size=sample_size, replace=False)
+    coefficients = []
+    for node in nodes:
+        neighbors = adjacency.indices[adjacency.indptr[node]:adjacency.indptr[node + 1]]
+        if len(neighbors) < 2:
+            coefficients.append(0.0)
+            continue
+        if len(neighbors) > max_neighbors:
+            neighbors = rng.choice(neighbors, size=max_neighbors, replace=False)
+        links = adjacency[neighbors][:, neighbors].nnz / 2
+        pairs = len(neighbors) * (len(neighbors) - 1) / 2
+        coefficients.append(links / pairs)
+    return coefficients
+
+
+def sample_path_lengths(adjacency: sparse.csr_matrix, sample_size: int,
+                        rng: np.random.Generator) -> List[float]:
+    """
+    抽样源节点的平均最短路径长度（无向BFS，到其可达节点的平均跳数；无可达节点的源忽略）
+
+    Args:
+        adjacency: 无向布尔邻接矩阵
+        sample_size: 抽样源节点数
+        rng: 随机数生成器
+    """
+    node_count = adjacency.shape[0]
+    if node_count == 0:
+        return []
+    sources = np.arange(node_count) if sample_size >= node_count else \
+        rng.choice(node_count, size=sample_size, replace=False)
+    path_lengths = []
+    depths = np.empty(node_count, dtype=np.int32)
+    for source in sources:
+        order, predecessors = csgraph.breadth_first_order(adjacency, source, directed=True,
+                                                          return_predecessors=True)
+        reached = order[1:]
+        if not reached.size:
+            continue
+        # 由BFS树的前驱逐层推出跳数（迭代次数等于源节点的离心率）
+        depths[reached] = -1
+        depths[source] = 0
+        pending = reached
+        while pending.size:
+            parent_depths = depths[predecessors[pending]]
+            ready = parent_depths >= 0
+            depths[pending[ready]] = parent_depths[ready] + 1
+            pending = pending[~ready]
+        path_lengths.append(float(depths[reached].mean()))
+    return path_lengths
+
+
+class MongoGraphSource:
+    """基于MongoDB知识图谱存储（KnowledgeGraphStore）的统计数据源"""
+
+    # 两种三元组文档格式：完整格式（subject/predicate/object子文档）与批量写入的扁平格式
+    TRIPLE_FIELDS = {
+        'subject_id': {'$ifNull': ['$subject.id', '$subject_id']},
+        'object_id': {'$ifNull': ['$object.id', '$object_id']},
+        'relation_type': {'$ifNull': ['$predicate.type', '$predicate_type']},
+        'subject_type': {'$ifNull': ['$subject.type', '$subject_type']},
+        'object_type': {'$ifNull': ['$object.type', '$object_type']},
+        'confidence': '$confidence',
+        # 扁平格式没有关系置信度，取三元组置信度
+        'relation_confidence': {'$ifNull': ['$predicate.confidence', '$confidence']}
+    }
+
+    def __init__(self, kg_store):
+        self.entities = kg_store.entities_collection
+        self.triples = kg_store.triples_collection
+
+    @staticmethod
+    def _confidence_accumulators(field: str, prefix: str, threshold: float) -> Dict[str, Any]:
+        value = f'${field}'
+        return {
+            f'{prefix}count': {'$sum': {'$cond': [{'$eq': [{'$ifNull': [value, None]}, None]}, 0, 1]}},
+            f'{prefix}sum': {'$sum': value},
+            f'{prefix}sum_squares': {'$sum': {'$multiply': [value, value]}},
+            f'{prefix}min': {'$min': value},
+            f'{prefix}max': {'$max': value},
+            f'{prefix}high': {'$sum': {'$cond': [{'$gte': [value, threshold]}, 1, 0]}}
+        }
+
+    @staticmethod
+    def _confidence_aggregate(document: Dict[str, Any], prefix: str) -> Dict[str, Any]:
+        return {key: document.get(f'{prefix}{key}') for key in EMPTY_CONFIDENCE_AGGREGATE}
+
+    def entity_summary(self, confidence_min: float) -> Dict[str, Any]:
+        """实体总数、置信度聚合、完整实体数、唯一键数与类型分布"""
+        grouped = list(self.entities.aggregate([
+            {'$group': {'_id': None, **self._confidence_accumulators('confidence', '', confidence_min)}}
+        ]))
+        type_distribution = {document['_id']: document['count'] for document in self.entities.aggregate([
+            {'$group': {'_id': '$type', 'count': {'$sum': 1}}}
+        ])}
+        distinct = list(self.entities.aggregate([
+            {'$group': {'_id': {'type': '$type', 'label': {'$toLower': '$label'}}}},
+            {'$count': 'keys'}
+        ]))
+        complete = self.entities.count_documents({
+            'label': {'$regex': r'\S'},
+            'type': {'$ne': None},
+            'properties': {'$type': 'object', '$ne': {}}
+        })
+        return {
+            'total': sum(type_distribution.values()),
+            'confidence': self._confidence_aggregate(grouped[0], '') if grouped else dict(EMPTY_CONFIDENCE_AGGREGATE),
+            'complete': complete,
+            'distinct_keys': distinct[0]['keys'] if distinct else 0,
+            'type_distribution': type_distribution
+        }
+
+    def triple_groups(self, triple_confidence_min: float, relation_confidence_min: float) -> List[Dict[str, Any]]:
+        """按 (关系类型, 主体类型, 客体类型, 是否完整) 分组的三元组数量与置信度聚合"""
+        pipeline = [
+            {'$project': self.TRIPLE_FIELDS},
+            {'$group': {
+                '_id': {
+                    'relation_type': '$relation_type',
+                    'subject_type': '$subject_type',
+                    'object_type': '$object_type',
+                    'complete': {'$and': [{'$ne': [{'$ifNull': [f'${field}', None]}, None]}
+                                          for field in ('subject_id', 'relation_type', 'object_id')]}
+                },
+                'total': {'$sum': 1},
+                **self._confidence_accumulators('confidence', 'triple_', triple_confidence_min),
+                **self._confidence_accumulators('relation_confidence', 'relation_', relation_confidence_min)
+            }}
+        ]
+        return [{
+            **document['_id'],
+            'count': document['total'],
+            'triple_confidence': self._confidence_aggregate(document, 'triple_'),
+            'relation_confidence': self._confidence_aggregate(document, 'relation_')
+        } for document in self.triples.aggregate(pipeline, allowDiskUse=True)]
+
+    def iter_edge_batches(self, batch_size: int) -> Iterator[List[Tuple[str, str]]]:
+        """流式读取 (主体ID, 客体ID) 边（单游标，仅投影ID字段）"""
+        projection = {'_id': 0, 'subject.id': 1, 'object.id': 1, 'subject_id': 1, 'object_id': 1}
+        batch = []
+        for document in self.triples.find({}, projection, batch_size=batch_size):
+            subject_id = (document.get('subject') or {}).get('id') or document.get('subject_id')
+            object_id = (document.get('object') or {}).get('id') or document.get('object_id')
+            if subject_id and object_id:
+                batch.append((subject_id, object_id))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def count_existing_entities(self, entity_ids: List[str]) -> int:
+        """给定ID中存在对应实体的数量"""
+        return self.entities.count_documents({'id': {'$in': entity_ids}})
+
+    def sample_entities(self, size: int) -> List[Dict[str, Any]]:
+        """随机抽样实体（置信度、属性、时间戳）"""
+        return list(self.entities.aggregate([
+            {'$sample': {'size': size}},
+            {'$project': {'_id': 0, 'confidence': 1, 'properties': 1, 'created_time': 1, 'updated_time': 1}}
+        ]))
+
+    def sample_triples(self, size: int) -> List[Dict[str, Any]]:
+        """随机抽样三元组（三元组/关系置信度、证据、创建时间）"""
+        fields = self.TRIPLE_FIELDS
+        return list(self.triples.aggregate([
+            {'$sample': {'size': size}},
+            {'$project': {'_id': 0, 'confidence': fields['confidence'],
+                          'relation_confidence': fields['relation_confidence'],
+                          'evidence': 1, 'created_time': 1}}
+        ]))
+
+
+class FalkorDBGraphSource:
+    """基于FalkorDB知识图谱存储（FalkorDBStore）的统计数据源（项目模式下统计项目图）"""
+
+    # 实体节点（关系节点没有entity_id）
+    ENTITY_MATCH = "MATCH (e) WHERE e.entity_id IS NOT NULL"
+
+    def __init__(self, kg_store):
+        self.graph = kg_store.project_graph if (kg_store.project_name and kg_store.project_graph) else kg_store.graph
+
+    def _rows(self, cypher: str, params: Optional[Dict[str, Any]] = None) -> List[List[Any]]:
+        return self.graph.query(cypher, params or {}).result_set or []
+
+    @staticmethod
+    def _confidence_columns(value: str, threshold_param: str) -> str:
+        return (f"count({value}), sum({value}), sum({value} * {value}), min({value}), max({value}), "
+                f"sum(CASE WHEN {value} >= ${threshold_param} THEN 1 ELSE 0 END)")
+
+    @staticmethod
+    def _confidence_aggregate(columns: Sequence[Any]) -> Dict[str, Any]:
+        return dict(zip(EMPTY_CONFIDENCE_AGGREGATE, columns))
+
+    def entity_summary(self, confidence_min: float) -> Dict[str, Any]:
+        """实体总数、置信度聚合、完整实体数、唯一键数与类型分布"""
+        row = self._rows(
+            f"{self.ENTITY_MATCH} RETURN count(e), "
+            f"sum(CASE WHEN trim(coalesce(e.label, '')) <> '' AND coalesce(e.properties, '') <> '' "
+            f"AND e.properties <> '{{}}' THEN 1 ELSE 0 END), "
+            f"count(DISTINCT coalesce(e.type, '') + ':' + toLower(coalesce(e.label, ''))), "
+            f"{self._confidence_columns('e.confidence', 'threshold')}",
+            {'threshold': confidence_min})
+        total, complete, distinct_keys, *confidence = row[0] if row else (0, 0, 0)
+        type_distribution = {entity_type: count for entity_type, count in
+                             self._rows(f"{self.ENTITY_MATCH} RETURN e.type, count(e)")}
+        return {
+            'total': total,
+            'confidence': self._confidence_aggregate(confidence) if confidence else dict(EMPTY_CONFIDENCE_AGGREGATE),
+            'complete': complete,
+            'distinct_keys': distinct_keys,
+            'type_distribution': type_distribution
+        }
+
+    def triple_groups(self, triple_confidence_min: float, relation_confidence_min: float) -> List[Dict[str, Any]]:
+        """按 (关系类型, 主体类型, 客体类型) 分组的边数量与置信度聚合（边的两端总是存在）"""
+        rows = self._rows(
+            "MATCH (s)-[r]->(o) RETURN type(r), s.type, o.type, count(r), "
+            f"{self._confidence_columns('r.confidence', 'triple_threshold')}, "
+            f"sum(CASE WHEN r.confidence >= $relation_threshold THEN 1 ELSE 0 END)",
+            {'triple_threshold': triple_confidence_min, 'relation_threshold': relation_confidence_min})
+        groups = []
+        for relation_type, subject_type, object_type, count, *confidence, relation_high in rows:
+            triple_confidence = self._confidence_aggregate(confidence)
+            groups.append({
+                'relation_type': relation_type,
+                'subject_type': subject_type,
+                'object_type': object_type,
+                'complete': True,
+                'count': count,
+                'triple_confidence': triple_confidence,
+                # 边上只存三元组置信度
+                'relation_confidence': dict(triple_confidence, high=relation_high)
+            })
+        return groups
+
+    def iter_edge_batches(self, batch_size: int) -> Iterator[List[Tuple[str, str]]]:
+        """按起点节点内部ID区间分页读取边（节点ID区间查找可走NodeByIdSeek，避免每页全图扫描）"""
+        max_row = self._rows("MATCH (n) RETURN max(id(n))")
+        max_id = max_row[0][0] if max_row and max_row[0][0] is not None else -1
+        cypher = ("MATCH (s) WHERE id(s) >= $start AND id(s) < $end "
+                  "MATCH (s)-[r]->(o) "
+                  "RETURN coalesce(s.entity_id, toString(id(s))), coalesce(o.entity_id, toString(id(o)))")
+        for start in range(0, max_id + 1, batch_size):
+            edges = [(subject_id, object_id) for subject_id, object_id in
+                     self._rows(cypher, {'start': start, 'end': start + batch_size})]
+            if edges:
+                yield edges
+
+    def count_existing_entities(self, entity_ids: List[str]) -> int:
+        """给定ID中存在对应实体的数量"""
+        row = self._rows(f"{self.ENTITY_MATCH} AND e.entity_id IN $ids RETURN count(DISTINCT e.entity_id)",
+                         {'ids': entity_ids})
+        return row[0][0] if row else 0
+
+    def sample_entities(self, size: int) -> List[Dict[str, Any]]:
+        """随机抽样实体（置信度、属性、时间戳）"""
+        rows = self._rows(f"{self.ENTITY_MATCH} RETURN e.confidence, e.properties, e.created_time, "
+                          f"e.updated_time ORDER BY rand() LIMIT $size", {'size': size})
+        return [{'confidence': confidence, 'properties': parse_literal(properties, {}),
+                 'created_time': created_time, 'updated_time': updated_time}
+                for confidence, properties, created_time, updated_time in rows]
+
+    def sample_triples(self, size: int) -> List[Dict[str, Any]]:
+        """随机抽样边（置信度、证据、创建时间）"""
+        rows = self._rows("MATCH ()-[r]->() RETURN r.confidence, r.evidence, r.created_time "
+                          "ORDER BY rand() LIMIT $size", {'size': size})
+        return [{'confidence': confidence, 'relation_confidence': confidence,
+                 'evidence': parse_literal(evidence, []), 'created_time': created_time}
+                for confidence, evidence, created_time in rows]
+
+
+def create_graph_source(kg_store):
+    """按存储类型创建统计数据源（MongoDB存储或FalkorDB存储）"""
+    if hasattr(kg_store, 'triples_collection'):
+        return MongoGraphSource(kg_store)
+    if hasattr(kg_store, 'graph'):
+        return FalkorDBGraphSource(kg_store)
+    raise ValueError(f"不支持的知识图谱存储类型: {type(kg_store).__name__}")
+
+
+def summarize_type_groups(groups: Sequence[Dict[str, Any]], key: str) -> Dict[str, int]:
+    """三元组分组按某个类型字段汇总数量"""
+    distribution = Counter()
+    for group in groups:
+        distribution[group[key]] += group['count']
+    return dict(distribution)
@@ -3,10 +3,17 @@
 协调实体抽取、关系抽取和知识图谱存储的整体流程
 """
 
+import os
+import pickle
 import logging
-from typing import Dict, List, Any, Optional, Union, TYPE_CHECKING
+import queue
+import sqlite3
+import tempfile
+import threading
+from typing import Dict, List, Any, Iterator, Optional, Set, Tuple, Union, TYPE_CHECKING
 import pandas as pd
 from datetime import datetime
+from pymongo.collection import Collection
 
 from .kg_models import Entity, Relation, KnowledgeTriple, Ontology, create_default_ontology
 from .kg_store import KnowledgeGraphStore
@@ -16,9 +23,64 @@ if TYPE_CHECKING:
 
 from .entity_extractor import EntityExtractor
 from .relation_extractor import RelationExtractor
+from ..database.range_reader import IdRangeReader
 
 logger = logging.getLogger(__name__)
 
+
+class _StreamingBuildState:
+    """
+    流式构建的跨分块去重状态，落盘到临时SQLite文件：
+    实体键 -> 已写入实体的序列化快照，以及已写入的三元组键。
+    常驻内存的只有当前分块涉及的键，单位名称表等几乎每行都是新实体的表也不会随表规模增长
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        fd, self.path = tempfile.mkstemp(prefix='kg_stream_', suffix='.sqlite', dir=directory)
+        os.close(fd)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute('PRAGMA journal_mode=OFF')
+        self._conn.execute('PRAGMA synchronous=OFF')
+        self._conn.execute('CREATE TABLE entities (key TEXT PRIMARY KEY, entity BLOB NOT NULL)')
+        self._conn.execute('CREATE TABLE triple_keys (key TEXT PRIMARY KEY)')
+
+    def _select_existing(self, table: str, column: str, keys: List[str]) -> Iterator[tuple]:
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            yield from self._conn.execute(
+                f'SELECT {column} FROM {table} WHERE key IN ({placeholders})', chunk)
+
+    def load_entities(self, keys: List[str]) -> Dict[str, Entity]:
+        """读取已有实体的快照（每次读取都是新对象，不与已交给写入线程的实体共享）"""
+        return {key: pickle.loads(blob) for key, blob in self._select_existing('entities', 'key, entity', keys)}
+
+    def save_entities(self, entities: Dict[str, Entity]) -> None:
+        """记录（或更新）实体键对应的实体快照"""
+        if entities:
+            self._conn.executemany('INSERT OR REPLACE INTO entities VALUES (?, ?)',
+                                   [(key, pickle.dumps(entity, pickle.HIGHEST_PROTOCOL))
+                                    for key, entity in entities.items()])
+            self._conn.commit()
+
+    def add_triple_keys(self, keys: List[str]) -> Set[str]:
+        """记录三元组键，返回此前未出现过的键"""
+        unique = list(dict.fromkeys(keys))
+        seen = {row[0] for row in self._select_existing('triple_keys', 'key', unique)}
+        new_keys = [key for key in unique if key not in seen]
+        if new_keys:
+            self._conn.executemany('INSERT INTO triple_keys VALUES (?)', [(key,) for key in new_keys])
+            self._conn.commit()
+        return set(new_keys)
+
+    def close(self) -> None:
+        self._conn.close()
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            logger.warning(f"删除流式构建状态文件失败: {self.path} - {str(e)}")
+
+
 class KnowledgeGraphBuilder:
     """知识图谱构建器"""
     
@@ -46,7 +108,10 @@ class KnowledgeGraphBuilder:
             'batch_size': 1000,
             'enable_validation': True,
             'auto_merge_entities': True,
-            'confidence_threshold': 0.5
+            'confidence_threshold': 0.5,
+            'streaming_build': False,
+            'streaming_chunk_size': 5000,
+            'pipeline_queue_size': 2
         })
         
         logger.info("知识图谱构建器初始化完成")
@@ -223,6 +288,227 @@ class KnowledgeGraphBuilder:
             
             return build_result
     
+    def build_knowledge_graph_streaming(self, source: Union[pd.DataFrame, Collection],
+                                        table_name: str,
+                                        project_id: str = None,
+                                        progress_callback=None,
+                                        query: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        流式构建知识图谱：按行分块抽取实体和关系，完成的分块经有界队列交给写入线程批量存储
+        
+        内存占用只与分块大小有关，存储延迟与抽取计算重叠。跨分块的同一实体（类型+小写标签）
+        通过落盘的实体键映射合并到首次出现的实体上；相似度等跨记录关系只在分块内发现
+        
+        Args:
+            source: 数据框或MongoDB集合（集合按_id范围分页读取）
+            table_name: 表名
+            project_id: 项目ID
+            progress_callback: 进度回调
+            query: 集合的过滤条件
+            
+        Returns:
+            Dict: 构建结果（字段与 build_knowledge_graph_from_dataframe 一致；
+                  有分块写入失败时status为'partial'）
+        """
+        chunk_size = self.build_config.get('streaming_chunk_size', 5000)
+        queue_size = self.build_config.get('pipeline_queue_size', 2)
+        
+        build_result = {
+            'project_id': project_id,
+            'table_name': table_name,
+            'start_time': datetime.now().isoformat(),
+            'status': 'in_progress',
+            'statistics': {},
+            'entities_created': 0,
+            'relations_created': 0,
+            'triples_created': 0,
+            'errors': [],
+            'streaming': True
+        }
+        
+        logger.info(f"开始流式构建知识图谱: {table_name} (分块大小: {chunk_size})")
+        
+        write_queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        write_totals = {'entities': 0, 'triples': 0}
+        writer = threading.Thread(
+            target=self._write_chunks,
+            args=(write_queue, write_totals, build_result['errors']),
+            name=f"kg-writer-{table_name}",
+            daemon=True
+        )
+        writer.start()
+        
+        # 跨分块的实体键映射（去重键 -> 首次出现的实体）和已写入的三元组键，落盘到临时SQLite文件
+        build_state = _StreamingBuildState(self.build_config.get('streaming_state_dir'))
+        statistics = self._generate_build_statistics([], [])
+        processed_records = 0
+        
+        try:
+            for offset, chunk_df in self._iter_source_chunks(source, chunk_size, query):
+                new_entities, updated_entities, triples = self._process_chunk(
+                    chunk_df, offset, table_name, build_state
+                )
+                processed_records += len(chunk_df)
+                self._merge_build_statistics(statistics, self._generate_build_statistics(new_entities, triples))
+                
+                # 队列满时阻塞，抽取速度受写入速度约束
+                write_queue.put((new_entities + updated_entities, len(new_entities), triples))
+                
+                if progress_callback:
+                    progress_callback({
+                        'current_step': 2,
+                        'step_name': '流式构建',
+                        'processed_records': processed_records,
+                        'extracted_entities': statistics['total_entities'],
+                        'discovered_relations': statistics['total_triples'],
+                        'current_table': table_name
+                    })
+        except Exception as e:
+            error_msg = f"知识图谱流式构建失败: {str(e)}"
+            logger.error(error_msg)
+            build_result.update({'status': 'failed', 'error': error_msg})
+        finally:
+            write_queue.put(None)
+            writer.join()
+            build_state.close()
+        
+        if build_result['status'] != 'failed':
+            # 写入线程出错时部分分块未入库，不能报告为完成
+            build_result['status'] = 'partial' if build_result['errors'] else 'completed'
+            if build_result['errors']:
+                logger.warning(f"知识图谱流式构建部分分块写入失败: {len(build_result['errors'])} 个分块")
+        build_result.update({
+            'end_time': datetime.now().isoformat(),
+            'processed_records': processed_records,
+            'entities_created': write_totals['entities'],
+            'triples_created': write_totals['triples'],
+            'statistics': statistics
+        })
+        
+        logger.info(f"知识图谱流式构建结束: {processed_records}条记录, "
+                    f"{write_totals['entities']}个实体写入, {write_totals['triples']}个三元组写入")
+        return build_result
+    
+    def _iter_source_chunks(self, source: Union[pd.DataFrame, Collection], chunk_size: int,
+                            query: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[int, pd.DataFrame]]:
+        """
+        按行分块读取数据源
+        
+        Yields:
+            Tuple[int, DataFrame]: (分块首行的全局行号, 行索引从0开始的分块)
+        """
+        if isinstance(source, pd.DataFrame):
+            for offset in range(0, len(source), chunk_size):
+                yield offset, source.iloc[offset:offset + chunk_size].reset_index(drop=True)
+            return
+        
+        offset = 0
+        for batch in IdRangeReader(source, query=query, batch_size=chunk_size).iter_batches():
+            chunk_df = pd.DataFrame(batch)
+            if '_id' in chunk_df.columns:
+                chunk_df = chunk_df.drop('_id', axis=1)
+            yield offset, chunk_df
+            offset += len(batch)
+    
+    def _process_chunk(self, chunk_df: pd.DataFrame, offset: int, table_name: str,
+                       build_state: _StreamingBuildState) -> Tuple[List[Entity], List[Entity], List[KnowledgeTriple]]:
+        """
+        抽取单个分块的实体和关系，并与之前分块的实体、三元组去重合并
+        
+        返回的实体和三元组交给写入线程后不再被修改：与已有实体的合并作用在从状态文件读出的新副本上
+        
+        Returns:
+            Tuple: (新实体, 因合并而变化的已有实体, 三元组)
+        """
+        entities = self.entity_extractor.extract_entities_from_dataframe(chunk_df, table_name)
+        if self.build_config.get('enable_validation', True):
+            entities = self._validate_entities(entities)
+        if self.build_config.get('auto_merge_entities', True):
+            entities = self._merge_similar_entities(entities)
+        
+        # 关系抽取按分块内的行位置定位记录
+        triples = self.relation_extractor.extract_relations_from_dataframe(chunk_df, entities, table_name)
+        
+        # 记录ID换算为全局行号
+        for entity in entities:
+            if entity.source_record_id and entity.source_record_id.isdigit():
+                entity.source_record_id = str(int(entity.source_record_id) + offset)
+        
+        # 合并到已有实体，三元组改为指向合并后的实体
+        keys = [self._entity_key(entity) for entity in entities]
+        chunk_index = build_state.load_entities(list(dict.fromkeys(keys)))
+        known_keys = set(chunk_index)
+        new_entities, updated_entities = [], {}
+        changed: Dict[str, Entity] = {}
+        canonical: Dict[str, Entity] = {}
+        for key, entity in zip(keys, entities):
+            existing = chunk_index.get(key)
+            if existing is None:
+                chunk_index[key] = entity
+                changed[key] = entity
+                new_entities.append(entity)
+            elif existing is not entity:
+                if self._merge_entity_into(existing, entity):
+                    changed[key] = existing
+                    if key in known_keys:
+                        updated_entities[existing.id] = existing
+                canonical[entity.id] = existing
+        build_state.save_entities(changed)
+        
+        if canonical:
+            for triple in triples:
+                triple.subject = canonical.get(triple.subject.id, triple.subject)
+                triple.object = canonical.get(triple.object.id, triple.object)
+        
+        if self.build_config.get('enable_validation', True):
+            triples = self._validate_triples(triples)
+        confidence_threshold = self.build_config.get('confidence_threshold', 0.5)
+        
+        # 之前分块已写入的三元组不再重复写入
+        # 关系对象每次抽取都新建（ID不同），按关系类型判断是否同一条边
+        triples = [triple for triple in triples if triple.confidence >= confidence_threshold]
+        triple_keys = [f"{triple.subject.id}|{triple.predicate.type.value}|{triple.object.id}"
+                       for triple in triples]
+        new_keys = build_state.add_triple_keys(triple_keys)
+        unique_triples = []
+        for triple, triple_key in zip(triples, triple_keys):
+            if triple_key in new_keys:
+                new_keys.discard(triple_key)
+                unique_triples.append(triple)
+        
+        return new_entities, list(updated_entities.values()), unique_triples
+    
+    def _write_chunks(self, write_queue: queue.Queue, totals: Dict[str, int], errors: List[str]) -> None:
+        """写入线程：依次批量保存队列中的分块，直到收到None"""
+        while True:
+            item = write_queue.get()
+            if item is None:
+                break
+            entities, new_count, triples = item
+            try:
+                # 合并后变化的已有实体随分块重写，不重复计数
+                totals['entities'] += min(self._batch_save_entities(entities), new_count)
+                totals['triples'] += self._batch_save_triples(triples)
+            except Exception as e:
+                error_msg = f"分块写入失败: {str(e)}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+    
+    @staticmethod
+    def _merge_build_statistics(total: Dict[str, Any], chunk: Dict[str, Any]) -> None:
+        """把分块统计累加到总统计"""
+        for section in ('entity_count_by_type', 'relation_count_by_type', 'confidence_distribution'):
+            for key, count in chunk[section].items():
+                total[section][key] = total[section].get(key, 0) + count
+        
+        for count_key, average_key in (('total_entities', 'average_entity_confidence'),
+                                       ('total_triples', 'average_triple_confidence')):
+            count = total[count_key] + chunk[count_key]
+            if count:
+                total[average_key] = (total[average_key] * total[count_key] +
+                                      chunk[average_key] * chunk[count_key]) / count
+            total[count_key] = count
+    
     def _validate_entities(self, entities: List[Entity]) -> List[Entity]:
         """验证实体"""
         valid_entities = []
@@ -281,7 +567,7 @@ class KnowledgeGraphBuilder:
         
         # 按类型和标签分组
         for entity in entities:
-            key = f"{entity.type.value}:{entity.label.lower()}"
+            key = self._entity_key(entity)
             if key not in entity_groups:
                 entity_groups[key] = []
             entity_groups[key].append(entity)
@@ -294,29 +580,57 @@ class KnowledgeGraphBuilder:
                 # 合并多个实体
                 primary_entity = group[0]
                 for other_entity in group[1:]:
-                    # 合并属性
-                    for key, value in other_entity.properties.items():
-                        if key not in primary_entity.properties:
-                            primary_entity.add_property(key, value)
-                    
-                    # 合并别名
-                    for alias in other_entity.aliases:
-                        primary_entity.add_alias(alias)
-                    
-                    # 使用最高置信度
-                    if other_entity.confidence > primary_entity.confidence:
-                        primary_entity.confidence = other_entity.confidence
+                    self._merge_entity_into(primary_entity, other_entity)
                 
                 merged_entities.append(primary_entity)
         
         logger.info(f"实体合并: {len(entities)} -> {len(merged_entities)}")
         return merged_entities
     
+    @staticmethod
+    def _entity_key(entity: Entity) -> str:
+        """实体去重键（类型 + 小写标签）"""
+        return f"{entity.type.value}:{entity.label.lower()}"
+    
+    @staticmethod
+    def _merge_entity_into(primary_entity: Entity, other_entity: Entity) -> bool:
+        """
+        把other_entity的信息合并进primary_entity
+        
+        Returns:
+            bool: primary_entity是否有变化
+        """
+        changed = False
+        
+        # 合并属性
+        for key, value in other_entity.properties.items():
+            if key not in primary_entity.properties:
+                primary_entity.add_property(key, value)
+                changed = True
+        
+        # 合并别名
+        for alias in other_entity.aliases:
+            if alias not in primary_entity.aliases:
+                primary_entity.add_alias(alias)
+                changed = True
+        
+        # 使用最高置信度
+        if other_entity.confidence > primary_entity.confidence:
+            primary_entity.confidence = other_entity.confidence
+            changed = True
+        
+        return changed
+    
     def _batch_save_entities(self, entities: List[Entity]) -> int:
         """批量保存实体"""
         batch_size = self.build_config['batch_size']
-        saved_count = 0
+        if hasattr(self.kg_store, 'bulk_save_entities'):
+            # 图数据库后端：按类型分组UNWIND批量写入
+            saved_count = self.kg_store.bulk_save_entities(entities, batch_size)
+            logger.info(f"批量保存实体: {saved_count}/{len(entities)}")
+            return saved_count
         
+        saved_count = 0
         for i in range(0, len(entities), batch_size):
             batch = entities[i:i + batch_size]
             
@@ -332,6 +646,12 @@ class KnowledgeGraphBuilder:
     def _batch_save_triples(self, triples: List[KnowledgeTriple]) -> int:
         """批量保存三元组"""
         batch_size = self.build_config['batch_size']
+        if hasattr(self.kg_store, 'bulk_save_triples'):
+            # 图数据库后端：关系节点与边按类型分组UNWIND批量写入
+            saved_count = self.kg_store.bulk_save_triples(triples, batch_size)
+            logger.info(f"批量保存三元组: {saved_count}/{len(triples)}")
+            return saved_count
+        
         saved_count = 0
         
         # 首先保存关系
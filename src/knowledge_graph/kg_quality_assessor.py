@@ -5,16 +5,42 @@
 
 import logging
 import math
-from typing import Dict, List, Any, Optional, Tuple, Set
+from threading import Lock
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
 import statistics
 
+import numpy as np
+
 from .kg_models import Entity, Relation, KnowledgeTriple, EntityType, RelationType
 from .kg_store import KnowledgeGraphStore
+from .graph_statistics import (EdgeScan, create_graph_source, merge_confidence_aggregates, confidence_stats,
+                               confidence_interval, sample_clustering_coefficients, sample_path_lengths,
+                               summarize_type_groups)
 
 logger = logging.getLogger(__name__)
 
+# 关系类型对主体/客体实体类型的约束（未定义约束的关系认为是一致的）
+RELATION_TYPE_CONSTRAINTS = {
+    RelationType.LOCATED_IN: {
+        'subject_types': [EntityType.ORGANIZATION, EntityType.PERSON],
+        'object_types': [EntityType.LOCATION]
+    },
+    RelationType.MANAGED_BY: {
+        'subject_types': [EntityType.ORGANIZATION],
+        'object_types': [EntityType.PERSON]
+    },
+    RelationType.REPRESENTS: {
+        'subject_types': [EntityType.PERSON],
+        'object_types': [EntityType.ORGANIZATION]
+    },
+    RelationType.CONTACT_OF: {
+        'subject_types': [EntityType.ORGANIZATION, EntityType.PERSON],
+        'object_types': [EntityType.IDENTIFIER]
+    }
+}
+
 class KnowledgeGraphQualityAssessor:
     """知识图谱质量评估器"""
     
@@ -459,33 +485,13 @@ class KnowledgeGraphQualityAssessor:
         if not triple.subject or not triple.predicate or not triple.object:
             return False
         
-        # 基于关系类型检查实体类型约束
-        relation_type = triple.predicate.type
-        subject_type = triple.subject.type
-        object_type = triple.object.type
-        
-        # 定义类型约束规则
-        type_constraints = {
-            RelationType.LOCATED_IN: {
-                'subject_types': [EntityType.ORGANIZATION, EntityType.PERSON],
-                'object_types': [EntityType.LOCATION]
-            },
-            RelationType.MANAGED_BY: {
-                'subject_types': [EntityType.ORGANIZATION],
-                'object_types': [EntityType.PERSON]
-            },
-            RelationType.REPRESENTS: {
-                'subject_types': [EntityType.PERSON],
-                'object_types': [EntityType.ORGANIZATION]
-            },
-            RelationType.CONTACT_OF: {
-                'subject_types': [EntityType.ORGANIZATION, EntityType.PERSON],
-                'object_types': [EntityType.IDENTIFIER]
-            }
-        }
-        
-        if relation_type in type_constraints:
-            constraint = type_constraints[relation_type]
+        return self._relation_types_consistent(triple.predicate.type, triple.subject.type, triple.object.type)
+    
+    def _relation_types_consistent(self, relation_type: RelationType, subject_type: EntityType,
+                                   object_type: EntityType) -> bool:
+        """基于关系类型检查实体类型约束"""
+        if relation_type in RELATION_TYPE_CONSTRAINTS:
+            constraint = RELATION_TYPE_CONSTRAINTS[relation_type]
             subject_valid = subject_type in constraint['subject_types']
             object_valid = object_type in constraint['object_types']
             return subject_valid and object_valid
@@ -497,71 +503,55 @@ class KnowledgeGraphQualityAssessor:
         if not triples:
             return 0.0
         
-        evidence_scores = []
-        for triple in triples:
-            if triple.evidence:
-                # 证据数量分数
-                evidence_count_score = min(len(triple.evidence) / 3.0, 1.0)
-                
-                # 证据多样性分数
-                evidence_sources = set()
-                for evidence in triple.evidence:
-                    if ':' in evidence:
-                        source = evidence.split(':', 1)[0]
-                        evidence_sources.add(source)
-                
-                diversity_score = min(len(evidence_sources) / 2.0, 1.0)
-                
-                # 综合证据分数
-                evidence_score = (evidence_count_score + diversity_score) / 2.0
-                evidence_scores.append(evidence_score)
-            else:
-                evidence_scores.append(0.0)
+        evidence_scores = [self._evidence_score(triple.evidence) for triple in triples]
         
         return statistics.mean(evidence_scores) if evidence_scores else 0.0
     
+    def _evidence_score(self, evidence_list: List[str]) -> float:
+        """单个三元组的证据分数"""
+        if not evidence_list:
+            return 0.0
+        
+        # 证据数量分数
+        evidence_count_score = min(len(evidence_list) / 3.0, 1.0)
+        
+        # 证据多样性分数
+        evidence_sources = set()
+        for evidence in evidence_list:
+            if ':' in evidence:
+                source = evidence.split(':', 1)[0]
+                evidence_sources.add(source)
+        
+        diversity_score = min(len(evidence_sources) / 2.0, 1.0)
+        
+        # 综合证据分数
+        return (evidence_count_score + diversity_score) / 2.0
+    
     def _analyze_graph_connectivity(self, entities: List[Entity], 
                                   triples: List[KnowledgeTriple]) -> float:
         """分析图连通性"""
         if not entities or not triples:
             return 0.0
         
-        # 构建邻接表
-        adjacency = defaultdict(set)
-        for triple in triples:
-            if triple.subject and triple.object:
-                adjacency[triple.subject.id].add(triple.object.id)
-                adjacency[triple.object.id].add(triple.subject.id)
-        
-        # 使用DFS查找连通组件
-        visited = set()
-        connected_components = []
+        # 并查集合并边的两端（迭代实现，大连通分量不会超出递归深度）
+        scan = EdgeScan()
+        scan.add_edges([(triple.subject.id, triple.object.id) for triple in triples
+                        if triple.subject and triple.object])
         
+        # 包含实体的最大连通分量（孤立实体自成一个分量）
+        roots = scan.components.component_labels()
+        sizes = np.bincount(roots, minlength=len(roots))
+        largest_component_size = 0
         for entity in entities:
-            if entity.id not in visited:
-                component = set()
-                self._dfs(entity.id, adjacency, visited, component)
-                if component:
-                    connected_components.append(component)
+            node = scan.node_index.get(entity.id)
+            size = int(sizes[roots[node]]) if node is not None else 1
+            largest_component_size = max(largest_component_size, size)
         
         # 计算连通性分数
-        if not connected_components:
-            return 0.0
-        
-        largest_component_size = max(len(comp) for comp in connected_components)
         connectivity_score = largest_component_size / len(entities)
         
         return connectivity_score
     
-    def _dfs(self, node_id: str, adjacency: Dict, visited: Set, component: Set) -> None:
-        """深度优先搜索"""
-        visited.add(node_id)
-        component.add(node_id)
-        
-        for neighbor in adjacency.get(node_id, []):
-            if neighbor not in visited:
-                self._dfs(neighbor, adjacency, visited, component)
-    
     def _analyze_degree_distribution(self, entities: List[Entity], 
                                    triples: List[KnowledgeTriple]) -> Dict[str, Any]:
         """分析度分布"""
@@ -619,7 +609,7 @@ class KnowledgeGraphQualityAssessor:
             neighbors = list(adjacency[entity_id])
             for i in range(len(neighbors)):
                 for j in range(i + 1, len(neighbors)):
-                    if neighbors[j] in adjacency[neighbors[i]]:
+                    if neighbors[j] in adjacency.get(neighbors[i], ()):
                         triangles += 1
         
         # 简化的聚类系数计算
@@ -682,11 +672,15 @@ class KnowledgeGraphQualityAssessor:
     
     def _is_entity_data_type_consistent(self, entity: Entity) -> bool:
         """检查单个实体的数据类型一致性"""
-        if not entity.properties:
+        return self._are_properties_type_consistent(entity.properties)
+    
+    def _are_properties_type_consistent(self, properties: Dict[str, Any]) -> bool:
+        """检查属性值的数据类型一致性"""
+        if not properties:
             return True
         
         # 检查属性值的类型一致性
-        for key, value in entity.properties.items():
+        for key, value in properties.items():
             if key.lower() in ['confidence', 'score', 'weight']:
                 # 数值类型属性
                 try:
@@ -889,3 +883,376 @@ class KnowledgeGraphQualityAssessor:
                 'uniqueness'
             ]
         }
+
+
+class StreamingQualityAssessor(KnowledgeGraphQualityAssessor):
+    """
+    流式知识图谱质量评估器（适用于百万级边的大图）
+    计数、置信度、完整性、唯一性由存储端聚合得到；连通性由流式边扫描 + 并查集得到；
+    聚类系数与平均路径长度随机抽样估计并给出置信区间；证据、数据类型与时间戳一致性基于随机样本。
+    评估报告结构与KnowledgeGraphQualityAssessor一致
+    """
+    
+    def __init__(self, kg_store, config: Dict[str, Any] = None):
+        """
+        初始化流式质量评估器
+        
+        Args:
+            kg_store: 知识图谱存储引擎（KnowledgeGraphStore 或 FalkorDBStore）
+            config: 配置参数（除基类参数外支持抽样参数）
+        """
+        super().__init__(kg_store, config)
+        
+        # 抽样与流式读取参数
+        self.sampling_config = {
+            'edge_batch_size': self.config.get('edge_batch_size', 10000),
+            'clustering_sample_size': self.config.get('clustering_sample_size', 500),
+            'clustering_max_neighbors': self.config.get('clustering_max_neighbors', 1000),
+            'path_sample_size': self.config.get('path_sample_size', 20),
+            'consistency_sample_size': self.config.get('consistency_sample_size', 2000),
+            'reference_sample_size': self.config.get('reference_sample_size', 20000),
+            'confidence_z': self.config.get('confidence_z', 1.96),
+            'random_seed': self.config.get('random_seed')
+        }
+        self.source = create_graph_source(kg_store)
+        
+        # 单次评估内共享的聚合/扫描结果
+        self._assessment_cache: Dict[str, Any] = {}
+        self._assessment_lock = Lock()
+        self._rng = np.random.default_rng(self.sampling_config['random_seed'])
+    
+    def assess_overall_quality(self) -> Dict[str, Any]:
+        """评估知识图谱整体质量（聚合与边扫描结果在各评估维度间共享）"""
+        with self._assessment_lock:
+            self._assessment_cache = {}
+            self._rng = np.random.default_rng(self.sampling_config['random_seed'])
+            try:
+                quality_report = super().assess_overall_quality()
+                if 'error' not in quality_report:
+                    quality_report['sampling'] = self.sampling_config
+                return quality_report
+            finally:
+                self._assessment_cache = {}
+    
+    def _cached(self, key: str, compute):
+        if key not in self._assessment_cache:
+            self._assessment_cache[key] = compute()
+        return self._assessment_cache[key]
+    
+    def _entity_summary(self) -> Dict[str, Any]:
+        return self._cached('entity_summary', lambda: self.source.entity_summary(
+            self.quality_thresholds['entity_confidence_min']))
+    
+    def _triple_groups(self) -> List[Dict[str, Any]]:
+        return self._cached('triple_groups', lambda: self.source.triple_groups(
+            self.quality_thresholds['triple_confidence_min'], self.quality_thresholds['relation_confidence_min']))
+    
+    def _entity_sample(self) -> List[Dict[str, Any]]:
+        return self._cached('entity_sample', lambda: self.source.sample_entities(
+            self.sampling_config['consistency_sample_size']))
+    
+    def _triple_sample(self) -> List[Dict[str, Any]]:
+        return self._cached('triple_sample', lambda: self.source.sample_triples(
+            self.sampling_config['consistency_sample_size']))
+    
+    def _edge_scan(self) -> EdgeScan:
+        def scan_edges() -> EdgeScan:
+            start_time = datetime.now()
+            scan = EdgeScan.from_batches(self.source.iter_edge_batches(self.sampling_config['edge_batch_size']))
+            logger.info(f"边扫描完成: {scan.edge_count} 条边, {scan.node_count} 个节点, "
+                        f"耗时: {(datetime.now() - start_time).total_seconds():.2f}秒")
+            return scan
+        return self._cached('edge_scan', scan_edges)
+    
+    @staticmethod
+    def _to_enum(enum_class, value: Any) -> Any:
+        """存储中的类型字符串转为枚举（未知类型原样返回）"""
+        try:
+            return enum_class(value)
+        except ValueError:
+            return value
+    
+    def _consistent_triple_count(self, groups: List[Dict[str, Any]]) -> int:
+        """满足关系类型约束的三元组数量（不完整的三元组视为不一致）"""
+        return sum(group['count'] for group in groups if group['complete'] and self._relation_types_consistent(
+            self._to_enum(RelationType, group['relation_type']),
+            self._to_enum(EntityType, group['subject_type']),
+            self._to_enum(EntityType, group['object_type'])))
+    
+    def _assess_entity_quality(self) -> Dict[str, Any]:
+        """评估实体质量（存储端聚合）"""
+        logger.debug("开始评估实体质量")
+        
+        try:
+            summary = self._entity_summary()
+            total_entities = summary['total']
+            
+            if not total_entities:
+                return {'score': 0.0, 'details': {'error': '没有找到实体'}}
+            
+            # 置信度分析（中位数取自随机样本）
+            confidence = summary['confidence']
+            stats = confidence_stats(confidence, [entity.get('confidence') for entity in self._entity_sample()])
+            high_quality_ratio = confidence['high'] / confidence['count'] if confidence['count'] else 0.0
+            
+            # 完整性：标签非空、类型非空、属性非空的实体比例
+            completeness_score = summary['complete'] / total_entities
+            
+            # 唯一性：(类型, 小写标签) 重复的实体比例
+            duplicate_count = total_entities - summary['distinct_keys']
+            uniqueness_score = max(1.0 - duplicate_count / total_entities, 0.0)
+            
+            entity_score = (
+                stats['average'] * 0.4 +
+                high_quality_ratio * 0.3 +
+                completeness_score * 0.2 +
+                uniqueness_score * 0.1
+            )
+            
+            return {
+                'score': entity_score,
+                'details': {
+                    'total_entities': total_entities,
+                    'confidence_stats': stats,
+                    'high_quality_ratio': high_quality_ratio,
+                    'completeness_score': completeness_score,
+                    'uniqueness_score': uniqueness_score,
+                    'type_distribution': summary['type_distribution']
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"实体质量评估失败: {str(e)}")
+            return {'score': 0.0, 'details': {'error': str(e)}}
+    
+    def _assess_relation_quality(self) -> Dict[str, Any]:
+        """评估关系质量（按关系/实体类型分组聚合）"""
+        logger.debug("开始评估关系质量")
+        
+        try:
+            groups = self._triple_groups()
+            total_relations = sum(group['count'] for group in groups)
+            
+            if not total_relations:
+                return {'score': 0.0, 'details': {'error': '没有找到关系'}}
+            
+            confidence = merge_confidence_aggregates([group['relation_confidence'] for group in groups])
+            stats = confidence_stats(confidence, [triple.get('relation_confidence') for triple in self._triple_sample()])
+            stats.pop('std_dev')
+            
+            consistency_score = self._consistent_triple_count(groups) / total_relations
+            
+            # 完整性：主体、谓词、客体、置信度齐全的比例
+            complete_count = sum(group['triple_confidence']['count'] for group in groups if group['complete'])
+            completeness_score = complete_count / total_relations
+            
+            high_quality_ratio = confidence['high'] / confidence['count'] if confidence['count'] else 0.0
+            
+            relation_score = (
+                stats['average'] * 0.4 +
+                consistency_score * 0.3 +
+                completeness_score * 0.2 +
+                high_quality_ratio * 0.1
+            )
+            
+            return {
+                'score': relation_score,
+                'details': {
+                    'total_relations': total_relations,
+                    'confidence_stats': stats,
+                    'consistency_score': consistency_score,
+                    'completeness_score': completeness_score,
+                    'high_quality_ratio': high_quality_ratio,
+                    'type_distribution': summarize_type_groups(groups, 'relation_type')
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"关系质量评估失败: {str(e)}")
+            return {'score': 0.0, 'details': {'error': str(e)}}
+    
+    def _assess_triple_quality(self) -> Dict[str, Any]:
+        """评估三元组质量（分组聚合 + 证据抽样）"""
+        logger.debug("开始评估三元组质量")
+        
+        try:
+            groups = self._triple_groups()
+            total_triples = sum(group['count'] for group in groups)
+            
+            if not total_triples:
+                return {'score': 0.0, 'details': {'error': '没有找到三元组'}}
+            
+            samples = self._triple_sample()
+            confidence = merge_confidence_aggregates([group['triple_confidence'] for group in groups])
+            stats = confidence_stats(confidence, [triple.get('confidence') for triple in samples])
+            stats.pop('std_dev')
+            
+            completeness_ratio = sum(group['count'] for group in groups if group['complete']) / total_triples
+            
+            evidence_scores = [self._evidence_score(triple.get('evidence') or []) for triple in samples]
+            evidence_quality = statistics.mean(evidence_scores) if evidence_scores else 0.0
+            
+            high_quality_ratio = confidence['high'] / confidence['count'] if confidence['count'] else 0.0
+            
+            triple_score = (
+                stats['average'] * 0.4 +
+                completeness_ratio * 0.3 +
+                evidence_quality * 0.2 +
+                high_quality_ratio * 0.1
+            )
+            
+            return {
+                'score': triple_score,
+                'details': {
+                    'total_triples': total_triples,
+                    'confidence_stats': stats,
+                    'completeness_ratio': completeness_ratio,
+                    'evidence_quality': evidence_quality,
+                    'evidence_sample_size': len(evidence_scores),
+                    'high_quality_ratio': high_quality_ratio
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"三元组质量评估失败: {str(e)}")
+            return {'score': 0.0, 'details': {'error': str(e)}}
+    
+    def _assess_graph_structure(self) -> Dict[str, Any]:
+        """评估图结构质量（流式边扫描 + 抽样估计）"""
+        logger.debug("开始评估图结构质量")
+        
+        try:
+            total_entities = self._entity_summary()['total']
+            scan = self._edge_scan()
+            
+            if not total_entities or not scan.edge_count:
+                return {'score': 0.0, 'details': {'error': '图数据不足'}}
+            
+            # 连通性：最大连通分量（孤立实体自成一个分量）占实体总数的比例
+            component_sizes = scan.components.component_sizes()
+            largest_component_size = max(int(component_sizes.max()), 1)
+            connectivity_score = largest_component_size / total_entities
+            
+            degree_distribution = scan.degree_distribution()
+            
+            # 有向图密度
+            total_triples = sum(group['count'] for group in self._triple_groups())
+            graph_density = total_triples / (total_entities * (total_entities - 1)) if total_entities > 1 else 0.0
+            
+            # 聚类系数与平均路径长度：抽样节点估计（无向图）
+            z = self.sampling_config['confidence_z']
+            adjacency = scan.adjacency()
+            clustering = confidence_interval(sample_clustering_coefficients(
+                adjacency, self.sampling_config['clustering_sample_size'], self._rng,
+                self.sampling_config['clustering_max_neighbors']), scan.node_count, z)
+            path_length = confidence_interval(sample_path_lengths(
+                adjacency, self.sampling_config['path_sample_size'], self._rng), scan.node_count, z)
+            clustering_coefficient = clustering['mean']
+            avg_path_length = path_length['mean']
+            
+            structure_score = (
+                connectivity_score * 0.3 +
+                min(graph_density * 10, 1.0) * 0.25 +  # 密度标准化
+                clustering_coefficient * 0.25 +
+                (1.0 / max(avg_path_length, 1.0)) * 0.2  # 路径长度越短越好
+            )
+            
+            return {
+                'score': structure_score,
+                'details': {
+                    'connectivity_score': connectivity_score,
+                    'connected_components': len(component_sizes) + max(total_entities - scan.node_count, 0),
+                    'largest_component_size': largest_component_size,
+                    'degree_distribution': degree_distribution,
+                    'graph_density': graph_density,
+                    'clustering_coefficient': clustering_coefficient,
+                    'clustering_coefficient_ci': clustering,
+                    'average_path_length': avg_path_length,
+                    'average_path_length_ci': path_length
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"图结构质量评估失败: {str(e)}")
+            return {'score': 0.0, 'details': {'error': str(e)}}
+    
+    def _assess_data_consistency(self) -> Dict[str, Any]:
+        """评估数据一致性（引用/类型一致性基于扫描与分组聚合，数据类型/时间戳基于随机样本）"""
+        logger.debug("开始评估数据一致性")
+        
+        try:
+            groups = self._triple_groups()
+            total_triples = sum(group['count'] for group in groups)
+            total_entities = self._entity_summary()['total']
+            
+            entity_ref_consistency = self._check_sampled_reference_consistency() \
+                if total_entities and total_triples else 0.0
+            relation_type_consistency = self._consistent_triple_count(groups) / total_triples if total_triples else 0.0
+            
+            entity_samples = self._entity_sample()
+            data_type_consistency = (
+                sum(1 for entity in entity_samples if self._are_properties_type_consistent(entity.get('properties')))
+                / len(entity_samples)) if entity_samples else 0.0
+            
+            timestamp_consistency = self._check_sampled_timestamp_consistency(entity_samples, self._triple_sample())
+            
+            consistency_score = (
+                entity_ref_consistency * 0.3 +
+                relation_type_consistency * 0.3 +
+                data_type_consistency * 0.2 +
+                timestamp_consistency * 0.2
+            )
+            
+            return {
+                'score': consistency_score,
+                'details': {
+                    'entity_reference_consistency': entity_ref_consistency,
+                    'relation_type_consistency': relation_type_consistency,
+                    'data_type_consistency': data_type_consistency,
+                    'timestamp_consistency': timestamp_consistency
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"数据一致性评估失败: {str(e)}")
+            return {'score': 0.0, 'details': {'error': str(e)}}
+    
+    def _check_sampled_reference_consistency(self) -> float:
+        """三元组引用的实体ID中存在对应实体的比例（引用过多时随机抽样）"""
+        referenced_ids = list(self._edge_scan().node_index)
+        if not referenced_ids:
+            return 1.0
+        
+        sample_size = self.sampling_config['reference_sample_size']
+        if len(referenced_ids) > sample_size:
+            positions = self._rng.choice(len(referenced_ids), size=sample_size, replace=False)
+            referenced_ids = [referenced_ids[position] for position in positions]
+        
+        valid_references = 0
+        for start in range(0, len(referenced_ids), 1000):
+            valid_references += self.source.count_existing_entities(referenced_ids[start:start + 1000])
+        
+        return valid_references / len(referenced_ids)
+    
+    def _check_sampled_timestamp_consistency(self, entity_samples: List[Dict[str, Any]],
+                                             triple_samples: List[Dict[str, Any]]) -> float:
+        """样本实体的更新时间不早于创建时间、样本三元组的创建时间格式有效的比例"""
+        consistent_items = 0
+        for entity in entity_samples:
+            created_time, updated_time = entity.get('created_time'), entity.get('updated_time')
+            if not created_time or not updated_time:
+                consistent_items += 1  # 没有时间戳认为是一致的
+                continue
+            try:
+                if datetime.fromisoformat(str(updated_time)) >= datetime.fromisoformat(str(created_time)):
+                    consistent_items += 1
+            except (ValueError, TypeError):
+                pass
+        
+        for triple in triple_samples:
+            created_time = triple.get('created_time')
+            if not created_time or self._is_valid_timestamp(created_time):
+                consistent_items += 1
+        
+        total_items = len(entity_samples) + len(triple_samples)
+        return consistent_items / total_items if total_items > 0 else 1.0
@@ -13,6 +13,7 @@ from pymongo import MongoClient, ASCENDING, DESCENDING, TEXT, HASHED
 from pymongo.database import Database
 from pymongo.collection import Collection
 from pymongo.errors import BulkWriteError, DuplicateKeyError
+from ..utils.bounded_cache import BoundedCache
 from .kg_models import Entity, Relation, KnowledgeTriple, Ontology, EntityType, RelationType
 
 logger = logging.getLogger(__name__)
@@ -56,10 +57,13 @@ class KnowledgeGraphStore:
         self.max_workers = self.config.get('max_workers', 4)
         self.enable_compression = self.config.get('enable_compression', True)
         self.cache_size = self.config.get('cache_size', 10000)
+        self.cache_ttl = self.config.get('cache_ttl')
         
-        # 内存缓存
-        self._entity_cache = {}
-        self._relation_cache = {}
+        # 内存缓存（有界LRU/TTL缓存）
+        self._entity_cache = BoundedCache('kg_store.entity', max_entries=self.cache_size,
+                                          ttl_seconds=self.cache_ttl)
+        self._relation_cache = BoundedCache('kg_store.relation', max_entries=self.cache_size,
+                                            ttl_seconds=self.cache_ttl)
         self._cache_stats = {'hits': 0, 'misses': 0}
         
         # 创建优化索引
@@ -180,23 +184,18 @@ class KnowledgeGraphStore:
             self._performance_stats['total_time'] / self._performance_stats['operations']
         )
     
-    def _get_from_cache(self, cache_dict: Dict, key: str) -> Optional[Any]:
+    def _get_from_cache(self, cache: BoundedCache, key: str) -> Optional[Any]:
         """从缓存获取数据"""
-        if key in cache_dict:
+        value = cache.get(key)
+        if value is not None:
             self._cache_stats['hits'] += 1
-            return cache_dict[key]
         else:
             self._cache_stats['misses'] += 1
-            return None
+        return value
     
-    def _set_to_cache(self, cache_dict: Dict, key: str, value: Any) -> None:
-        """设置缓存数据"""
-        if len(cache_dict) >= self.cache_size:
-            # 简单的LRU：删除最旧的项
-            oldest_key = next(iter(cache_dict))
-            del cache_dict[oldest_key]
-        
-        cache_dict[key] = value
+    def _set_to_cache(self, cache: BoundedCache, key: str, value: Any) -> None:
+        """设置缓存数据（超出容量时由缓存按LRU淘汰）"""
+        cache.set(key, value)
     
     def clear_cache(self) -> None:
         """清空缓存"""
@@ -994,7 +993,8 @@ class KnowledgeGraphStore:
             'cache_size': {
                 'entities': len(self._entity_cache),
                 'relations': len(self._relation_cache),
-                'max_size': self.cache_size
+                'max_size': self.cache_size,
+                'evictions': self._entity_cache.evictions + self._relation_cache.evictions
             },
             'config': {
                 'batch_size': self.batch_size,
@@ -4,26 +4,21 @@
 """
 
 import logging
+import importlib.util
 import re
 from typing import Dict, List, Any, Optional, Tuple, Set
 import pandas as pd
 import math
 from .kg_models import Entity, Relation, KnowledgeTriple, EntityType, RelationType
+from .candidate_pairs import jaccard_similar_pairs, partner_positions
+from ..utils.tokenizer_service import get_tokenizer, MODE_POS
 
-# NLP相关导入 - 可选依赖
-try:
-    import warnings
-    # 抑制jieba的pkg_resources弃用警告
-    with warnings.catch_warnings():
-        warnings.filterwarnings("ignore", category=UserWarning, module="jieba._compat")
-        import jieba
-        import jieba.posseg as pseg
-    HAS_JIEBA = True
-    logger_init = logging.getLogger(__name__)
-    logger_init.info("jieba中文分词库加载成功 - 关系抽取器")
-except ImportError:
-    HAS_JIEBA = False
-    logger_init = logging.getLogger(__name__)
+# NLP相关依赖 - 可选（分词由共享分词服务完成，此处只检测jieba是否可用）
+HAS_JIEBA = importlib.util.find_spec('jieba') is not None
+logger_init = logging.getLogger(__name__)
+if HAS_JIEBA:
+    logger_init.info("jieba中文分词库可用 - 关系抽取器")
+else:
     logger_init.warning("jieba库未安装，将使用基础关系抽取")
 
 try:
@@ -602,32 +597,40 @@ class RelationExtractor:
             List[KnowledgeTriple]: 三元组列表
         """
         triples = []
+        similarity_threshold = 0.8  # 高相似度阈值
         
         # 查找相似的组织实体
         org_entities = [e for e in entities if e.type == EntityType.ORGANIZATION]
         
-        for i, entity1 in enumerate(org_entities):
-            for entity2 in org_entities[i+1:]:
-                similarity = self._calculate_entity_similarity(entity1, entity2)
+        # 综合相似度 = 标签0.7 + 属性0.3（属性最多1），超过阈值要求标签字符Jaccard不低于 (0.8-0.3)/0.7，
+        # 先用前缀过滤找出满足该下限的候选对，只对候选计算综合相似度，结果与两两比较一致
+        label_threshold = (similarity_threshold - 0.3) / 0.7 - 1e-9
+        label_sets = [set(entity.label.lower()) for entity in org_entities]
+        candidate_pairs = jaccard_similar_pairs(label_sets, label_threshold)
+        logger.debug(f"跨记录相似实体候选对: {len(candidate_pairs)} (组织实体 {len(org_entities)} 个)")
+        
+        for i, j in candidate_pairs:
+            entity1, entity2 = org_entities[i], org_entities[j]
+            similarity = self._calculate_entity_similarity(entity1, entity2)
+            
+            if similarity > similarity_threshold:
+                # 创建相似关系
+                similar_relation = Relation(
+                    type=RelationType.SIMILAR_TO,
+                    is_symmetric=True,
+                    confidence=similarity
+                )
                 
-                if similarity > 0.8:  # 高相似度阈值
-                    # 创建相似关系
-                    similar_relation = Relation(
-                        type=RelationType.SIMILAR_TO,
-                        is_symmetric=True,
-                        confidence=similarity
-                    )
-                    
-                    triple = KnowledgeTriple(
-                        subject=entity1,
-                        predicate=similar_relation,
-                        object=entity2,
-                        confidence=similarity,
-                        source="similarity_analysis",
-                        evidence=[f"similarity_score:{similarity:.3f}"]
-                    )
-                    
-                    triples.append(triple)
+                triple = KnowledgeTriple(
+                    subject=entity1,
+                    predicate=similar_relation,
+                    object=entity2,
+                    confidence=similarity,
+                    source="similarity_analysis",
+                    evidence=[f"similarity_score:{similarity:.3f}"]
+                )
+                
+                triples.append(triple)
         
         return triples
     
@@ -690,7 +693,7 @@ class RelationExtractor:
         
         try:
             # 使用jieba分词和词性标注
-            words = list(pseg.cut(text))
+            words = get_tokenizer().tokenize(text, MODE_POS)
             
             # 查找关系触发词和模式
             for relation_type, pattern_info in self.relation_patterns.items():
@@ -809,9 +812,18 @@ class RelationExtractor:
             # 分析实体共现模式
             cooccurrence_matrix = self._build_entity_cooccurrence_matrix(entities)
             
+            # 只有共现过的实体对分数大于0，按共现矩阵（记录ID倒排）取伙伴，保持原遍历顺序
+            positions: Dict[str, List[int]] = {}
+            for position, entity in enumerate(entities):
+                positions.setdefault(entity.id, []).append(position)
+            
             # 基于共现频率和模式推断关系
             for entity1 in entities:
-                for entity2 in entities:
+                partners = cooccurrence_matrix.get(entity1.id)
+                if not partners:
+                    continue
+                for position in partner_positions(partners, positions):
+                    entity2 = entities[position]
                     if entity1.id == entity2.id:
                         continue
                     
@@ -9,6 +9,9 @@ import re
 import logging
 from typing import Dict, List, Optional
 
+from src.utils.bounded_cache import BoundedCache
+from .address_parser import parse_address
+
 logger = logging.getLogger(__name__)
 
 
@@ -237,7 +240,7 @@ class AddressNormalizer:
     
     def extract_standard_components(self, address: str) -> Dict[str, str]:
         """
-        提取标准化地址组件
+        提取标准化地址组件（使用共享地址解析引擎）
         
         Args:
             address: 标准化后的地址
@@ -245,42 +248,17 @@ class AddressNormalizer:
         Returns:
             Dict[str, str]: 地址组件字典
         """
-        components = {
-            'province': '',
-            'city': '',
-            'district': '',
-            'street': '',
-            'number': '',
-            'building': '',
-            'detail': ''
-        }
-        
-        remaining = address
-        
-        # 按优先级提取组件
-        patterns = {
-            'province': r'([^省市区县]{2,8}(?:省|市|自治区))',
-            'city': r'([^省市区县]{2,8}(?:市|州|县))', 
-            'district': r'([^省市区县]{2,8}(?:区|县|镇|开发区|高新区|经济区))',
-            'street': r'([^路街道巷弄里号栋幢座楼室层]{1,20}(?:路|街|道|巷|弄|里|大街|大道|街道))',
-            'number': r'(\d+(?:号|弄|栋|幢|座|楼|室|层)(?:\d+(?:号|室|层)?)?)',
-            'building': r'([^路街道巷弄里号栋幢座楼室层]{2,20}(?:养老院|敬老院|老年公寓|护理院|福利院|大厦|大楼|广场|中心|院|园|村|小区|公司|厂|店|馆|所|站|场))'
-        }
-        
-        for component, pattern in patterns.items():
-            matches = re.findall(pattern, remaining)
-            if matches:
-                components[component] = matches[0]
-                remaining = remaining.replace(matches[0], '', 1)
-        
-        components['detail'] = remaining.strip()
-        
-        return components
+        return parse_address(address).to_dict()
+
+
+# 进程内共享的标准化器（标准化过程无状态）及标准化结果缓存
+_normalizer = AddressNormalizer()
+_normalize_cache = BoundedCache('address_normalizer.normalize', max_entries=100000)
 
 
 def normalize_address_for_matching(address: str) -> str:
     """
-    地址匹配专用标准化函数
+    地址匹配专用标准化函数（结果按原始地址缓存）
     
     Args:
         address: 原始地址
@@ -288,5 +266,10 @@ def normalize_address_for_matching(address: str) -> str:
     Returns:
         str: 标准化后的地址
     """
-    normalizer = AddressNormalizer()
-    return normalizer.normalize_address(address)
+    if not address or not isinstance(address, str):
+        return ""
+    normalized = _normalize_cache.get(address)
+    if normalized is None:
+        normalized = _normalizer.normalize_address(address)
+        _normalize_cache.set(address, normalized)
+    return normalized
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享地址解析引擎
+省/市/区县优先由行政区划前缀Trie（地名库）从地址开头识别，其余层级使用预编译正则按6级结构提取；
+解析结果为紧凑的槽位记录，按地址串缓存。整列地址可批量解析为列式组件表，
+组件值编码为整数后，一条地址对整列的比较即为数组运算
+"""
+
+import re
+import logging
+from threading import Lock
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.utils.bounded_cache import BoundedCache
+from src.utils.keyword_automaton import PrefixTrie
+
+logger = logging.getLogger(__name__)
+
+# 6级地址层级：1省级、2地级、3县级、4乡级、5村级、6门牌
+HIERARCHY_LEVELS = ('province', 'city', 'district', 'town', 'street', 'number')
+# 全部组件（建筑物名称、其他详细信息不参与6级匹配）
+COMPONENT_FIELDS = HIERARCHY_LEVELS + ('building', 'detail')
+
+# 行政区划层级（地名库识别的层级）
+ADMIN_LEVELS = ('province', 'city', 'district')
+
+# 按层级提取组件的正则（地名库未识别的层级使用，取最长匹配）
+COMPONENT_PATTERNS = {
+    'province': re.compile(r'([^省市区县]{2,8}(?:省|市|自治区))'),
+    'city': re.compile(r'([^省市区县]{2,8}(?:市|州|县))'),
+    'district': re.compile(r'([^省市区县镇]{2,8}(?:区|县|开发区|高新区|经济区))'),
+    'town': re.compile(r'([^省市区县]{2,8}(?:镇|乡|街道))'),
+    'street': re.compile(r'([^路街道巷弄里号栋幢座楼室层]{1,20}(?:路|街|道|巷|里|大街|大道|街道|村|邨|社区|新村|小区|公寓|花园|苑|庄|家园|城|园区))'),
+    'number': re.compile(r'(\d+(?:弄\d*号?|号|栋|幢|座|楼|室|层))'),
+    'building': re.compile(r'([^路街道巷弄里号栋幢座楼室层]{2,20}(?:养老院|敬老院|老年公寓|护理院|福利院|公司|厂|店|馆|所|站|场|生态园|科技园|工业园|产业园|广场|中心|大厦))')
+}
+
+# 解析前移除的行政层级占位词
+_PLACEHOLDER_PATTERN = re.compile(r'市辖区|县辖区')
+
+# 地名库：省级行政区
+GAZETTEER_PROVINCES = [
+    '北京市', '天津市', '上海市', '重庆市', '河北省', '山西省', '辽宁省', '吉林省', '黑龙江省', '江苏省',
+    '浙江省', '安徽省', '福建省', '江西省', '山东省', '河南省', '湖北省', '湖南省', '广东省', '海南省',
+    '四川省', '贵州省', '云南省', '陕西省', '甘肃省', '青海省', '台湾省', '内蒙古自治区', '广西壮族自治区',
+    '西藏自治区', '宁夏回族自治区', '新疆维吾尔自治区', '香港特别行政区', '澳门特别行政区'
+]
+
+# 地名库：地级市（省会及长三角、计划单列等常见城市）
+GAZETTEER_CITIES = [
+    '石家庄市', '太原市', '沈阳市', '长春市', '哈尔滨市', '南京市', '杭州市', '合肥市', '福州市', '南昌市',
+    '济南市', '郑州市', '武汉市', '长沙市', '广州市', '海口市', '成都市', '贵阳市', '昆明市', '西安市',
+    '兰州市', '西宁市', '呼和浩特市', '南宁市', '拉萨市', '银川市', '乌鲁木齐市', '深圳市', '大连市', '青岛市',
+    '宁波市', '厦门市', '苏州市', '无锡市', '常州市', '南通市', '嘉兴市', '湖州市', '绍兴市'
+]
+
+# 地名库：直辖市下辖区县
+GAZETTEER_DISTRICTS = [
+    # 上海
+    '浦东新区', '黄浦区', '徐汇区', '长宁区', '静安区', '普陀区', '虹口区', '杨浦区', '闵行区', '宝山区',
+    '嘉定区', '金山区', '松江区', '青浦区', '奉贤区', '崇明区', '崇明县', '卢湾区', '闸北区', '南汇区',
+    # 北京
+    '东城区', '西城区', '朝阳区', '丰台区', '石景山区', '海淀区', '门头沟区', '房山区', '通州区', '顺义区',
+    '昌平区', '大兴区', '怀柔区', '平谷区', '密云区', '延庆区',
+    # 天津
+    '和平区', '河东区', '河西区', '南开区', '河北区', '红桥区', '东丽区', '西青区', '津南区', '北辰区',
+    '武清区', '宝坻区', '滨海新区', '宁河区', '静海区', '蓟州区',
+    # 重庆
+    '渝中区', '大渡口区', '江北区', '沙坪坝区', '九龙坡区', '南岸区', '北碚区', '綦江区', '大足区', '渝北区',
+    '巴南区', '黔江区', '长寿区', '江津区', '合川区', '永川区', '南川区', '璧山区', '铜梁区', '潼南区',
+    '荣昌区', '开州区', '梁平区', '武隆区'
+]
+
+
+class AddressComponents:
+    """地址组件记录（槽位存储；解析结果在缓存中共享，调用方不应修改）"""
+
+    __slots__ = COMPONENT_FIELDS
+
+    def __init__(self, province: str = '', city: str = '', district: str = '', town: str = '',
+                 street: str = '', number: str = '', building: str = '', detail: str = ''):
+        self.province = province
+        self.city = city
+        self.district = district
+        self.town = town
+        self.street = street
+        self.number = number
+        self.building = building
+        self.detail = detail
+
+    def get(self, field: str, default: str = '') -> str:
+        """按组件名读取（兼容字典式访问）"""
+        return getattr(self, field, default) if field in COMPONENT_FIELDS else default
+
+    def __getitem__(self, field: str) -> str:
+        if field not in COMPONENT_FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, AddressComponents) and self.values() == other.values()
+
+    def __hash__(self) -> int:
+        return hash(self.values())
+
+    def __repr__(self) -> str:
+        parts = ', '.join(f"{field}={getattr(self, field)!r}" for field in COMPONENT_FIELDS if getattr(self, field))
+        return f"AddressComponents({parts})"
+
+    def values(self) -> Tuple[str, ...]:
+        """按 COMPONENT_FIELDS 顺序的组件值"""
+        return tuple(getattr(self, field) for field in COMPONENT_FIELDS)
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        return zip(COMPONENT_FIELDS, self.values())
+
+    def to_dict(self) -> Dict[str, str]:
+        """转换为组件字典（新对象，可修改）"""
+        return dict(self.items())
+
+    def keywords(self, fields: Sequence[str] = HIERARCHY_LEVELS + ('building',)) -> List[str]:
+        """指定组件中的非空值（按层级顺序，去重）"""
+        return list(dict.fromkeys(value for value in (getattr(self, f) for f in fields) if value))
+
+
+EMPTY_COMPONENTS = AddressComponents()
+
+
+class AddressComponentTable:
+    """列式地址组件表：每个组件一列整数编码（0表示空值），编码共享同一词表"""
+
+    def __init__(self, codes: Dict[str, np.ndarray], vocabulary: List[str]):
+        self.codes = codes
+        self.vocabulary = vocabulary
+        self._code_of = {value: code for code, value in enumerate(vocabulary)}
+
+    def __len__(self) -> int:
+        return len(next(iter(self.codes.values()))) if self.codes else 0
+
+    @classmethod
+    def from_components(cls, records: Sequence[AddressComponents]) -> 'AddressComponentTable':
+        """由组件记录序列构建"""
+        vocabulary = ['']
+        code_of = {'': 0}
+        columns = {field: np.zeros(len(records), dtype=np.int32) for field in COMPONENT_FIELDS}
+        for row, record in enumerate(records):
+            for field, value in record.items():
+                if value:
+                    code = code_of.get(value)
+                    if code is None:
+                        code = code_of[value] = len(vocabulary)
+                        vocabulary.append(value)
+                    columns[field][row] = code
+        return cls(columns, vocabulary)
+
+    def code_of(self, value: str) -> int:
+        """组件值的编码（表中不存在的值返回-1，与任何行都不相等）"""
+        return self._code_of.get(value, -1) if value else 0
+
+    def column(self, field: str) -> np.ndarray:
+        """组件列的取值数组（object）"""
+        return np.asarray(self.vocabulary, dtype=object)[self.codes[field]]
+
+    def row(self, index: int) -> AddressComponents:
+        """还原某行的组件记录"""
+        return AddressComponents(*(self.vocabulary[self.codes[field][index]] for field in COMPONENT_FIELDS))
+
+    def compare(self, components: AddressComponents,
+                levels: Sequence[str] = HIERARCHY_LEVELS) -> np.ndarray:
+        """
+        一条地址与整列逐层比较
+
+        Returns:
+            np.ndarray: 形状 (行数, 层数) 的int8矩阵，1=两边相同，0=任一边为空，-1=两边不同
+        """
+        result = np.zeros((len(self), len(levels)), dtype=np.int8)
+        for index, level in enumerate(levels):
+            value = components.get(level)
+            if not value:
+                continue
+            column = self.codes[level]
+            present = column != 0
+            result[:, index] = np.where(column == self.code_of(value), 1, np.where(present, -1, 0))
+        return result
+
+    def weighted_overlap(self, components: AddressComponents, weight_of: Callable[[str, str], float],
+                         levels: Sequence[str] = HIERARCHY_LEVELS) -> np.ndarray:
+        """
+        一条地址与整列的加权组件重叠度：Σ相同组件权重 / Σ两边组件权重并集
+
+        Args:
+            components: 地址组件
+            weight_of: (层级, 组件值) -> 权重
+            levels: 参与比较的层级
+        """
+        intersection = np.zeros(len(self))
+        union = np.zeros(len(self))
+        for level in levels:
+            codes = self.codes[level]
+            unique_codes, inverse = np.unique(codes, return_inverse=True)
+            column_weights = np.array([weight_of(level, self.vocabulary[code]) if code else 0.0
+                                       for code in unique_codes])[inverse]
+            value = components.get(level)
+            source_weight = weight_of(level, value) if value else 0.0
+            equal = codes == self.code_of(value) if value else np.zeros(len(self), dtype=bool)
+            intersection += np.where(equal, source_weight, 0.0)
+            union += np.where(equal, source_weight, source_weight + column_weights)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(union > 0, intersection / union, 0.0)
+
+
+class AddressParser:
+    """地址解析器：地名库前缀Trie + 预编译层级正则，结果按地址缓存"""
+
+    def __init__(self, cache_size: int = 100000):
+        self._gazetteer = PrefixTrie()
+        for level, names in (('province', GAZETTEER_PROVINCES), ('city', GAZETTEER_CITIES),
+                             ('district', GAZETTEER_DISTRICTS)):
+            for name in names:
+                self._gazetteer.add(name, ADMIN_LEVELS.index(level))
+        self._cache = BoundedCache('address_parser.parse', max_entries=cache_size)
+
+    def parse(self, address: str) -> AddressComponents:
+        """
+        解析地址组件（输入应为标准化后的地址）
+
+        Args:
+            address: 地址
+
+        Returns:
+            AddressComponents: 组件记录（缓存共享对象）
+        """
+        if not address:
+            return EMPTY_COMPONENTS
+        components = self._cache.get(address)
+        if components is None:
+            components = self._parse_uncached(address)
+            self._cache.set(address, components)
+        return components
+
+    def parse_many(self, addresses: Iterable[str], use_cache: bool = True) -> List[AddressComponents]:
+        """
+        批量解析地址（同一批内重复地址只解析一次）
+
+        Args:
+            addresses: 地址序列
+            use_cache: 是否读写解析缓存（一次性解析整列时可关闭，避免挤出热点地址）
+        """
+        parsed: Dict[str, AddressComponents] = {}
+        results = []
+        for address in addresses:
+            components = parsed.get(address)
+            if components is None:
+                if not address:
+                    components = EMPTY_COMPONENTS
+                elif use_cache:
+                    components = self.parse(address)
+                else:
+                    components = self._parse_uncached(address)
+                parsed[address] = components
+            results.append(components)
+        return results
+
+    def parse_column(self, addresses: Iterable[str], use_cache: bool = False) -> AddressComponentTable:
+        """将一整列地址解析为列式组件表"""
+        return AddressComponentTable.from_components(self.parse_many(addresses, use_cache=use_cache))
+
+    def _match_admin_prefix(self, address: str) -> Tuple[Dict[str, str], int]:
+        """从地址开头按 省→市→区县 顺序识别地名库中的行政区划，返回 (组件, 已识别长度)"""
+        found: Dict[str, str] = {}
+        position = 0
+        deepest = -1
+        while position < len(address):
+            best, best_level = '', None
+            for name, level in self._gazetteer.iter_prefixes(address, position):
+                if level > deepest:
+                    best, best_level = name, level
+            if not best:
+                break
+            found[ADMIN_LEVELS[best_level]] = best
+            deepest = best_level
+            position += len(best)
+        return found, position
+
+    def _parse_uncached(self, address: str) -> AddressComponents:
+        """解析地址组件"""
+        remaining = _PLACEHOLDER_PATTERN.sub('', address)
+        components = dict.fromkeys(COMPONENT_FIELDS, '')
+
+        # 1. 地名库识别开头的行政区划；已识别的最深层级及其上级不再用正则提取
+        admin, consumed = self._match_admin_prefix(remaining)
+        skip_levels = set()
+        if admin:
+            components.update(admin)
+            deepest = max(ADMIN_LEVELS.index(level) for level in admin)
+            skip_levels = set(ADMIN_LEVELS[:deepest + 1])
+            remaining = remaining[consumed:]
+
+        # 2. 其余层级按顺序用正则提取（取最长匹配，并从剩余地址中移除）
+        for component, pattern in COMPONENT_PATTERNS.items():
+            if component in skip_levels:
+                continue
+            matches = pattern.findall(remaining)
+            if matches:
+                matched_component = max(matches, key=len)
+                components[component] = matched_component
+                remaining = remaining.replace(matched_component, '', 1)
+
+        # 剩余部分作为详细信息
+        components['detail'] = remaining.strip()
+        return AddressComponents(**components)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取解析缓存统计"""
+        return self._cache.get_stats()
+
+
+_parser: Optional[AddressParser] = None
+_parser_lock = Lock()
+
+
+def get_address_parser() -> AddressParser:
+    """获取进程内共享的地址解析器"""
+    global _parser
+    if _parser is None:
+        with _parser_lock:
+            if _parser is None:
+                _parser = AddressParser()
+    return _parser
+
+
+def parse_address(address: str) -> AddressComponents:
+    """使用共享解析器解析地址组件"""
+    return get_address_parser().parse(address)
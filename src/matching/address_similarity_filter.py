@@ -6,10 +6,11 @@
 """
 
 import logging
-import re
 from typing import Dict, List, Set, Tuple, Optional
 from dataclasses import dataclass
 
+from .address_parser import get_address_parser
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -41,6 +42,19 @@ class AddressSimilarityFilter:
             '大道': 0.6
         }
         
+        # 各层级关键词未命中后缀时的默认权重
+        self.level_default_weights = {
+            'city': 0.3,
+            'district': 0.4,
+            'town': 0.3,
+            'street': 0.6
+        }
+        self.keyword_levels = tuple(self.level_default_weights)
+        # 按后缀长度降序，优先匹配"大道""街道"等长后缀
+        self._weighted_suffixes = sorted(self.keyword_weights, key=len, reverse=True)
+        
+        self.address_parser = get_address_parser()
+        
         # 统计信息
         self.stats = {
             'total_processed': 0,
@@ -69,16 +83,15 @@ class AddressSimilarityFilter:
         
         # 获取源记录的地址字段
         source_address = self._extract_address_from_record(source_record, mappings, 'source')
+        target_addresses = [self._extract_address_from_record(match.get('target_record', {}), mappings, 'target')
+                            for match in matches]
+        
+        # 批量计算地址相似度：目标地址解析为列式组件表，与源地址逐层比较
+        similarities = self.calculate_address_similarities(source_address, target_addresses)
         
-        for match in matches:
+        for match, target_address, address_similarity in zip(matches, target_addresses, similarities):
             self.stats['total_processed'] += 1
             
-            target_record = match.get('target_record', {})
-            target_address = self._extract_address_from_record(target_record, mappings, 'target')
-            
-            # 计算地址相似度
-            address_similarity = self.calculate_address_similarity(source_address, target_address)
-            
             # 应用过滤规则
             if self._should_keep_match(match, address_similarity, source_address, target_address):
                 # 更新匹配结果，添加地址相似度信息
@@ -127,9 +140,35 @@ class AddressSimilarityFilter:
         # 计算加权相似度
         return self._calculate_weighted_similarity(keywords1, keywords2)
     
+    def calculate_address_similarities(self, address: str, candidates: List[str]) -> List[float]:
+        """
+        计算一个地址与一批地址的相似度（与 calculate_address_similarity 结果一致）
+        
+        Args:
+            address: 地址
+            candidates: 候选地址列表
+            
+        Returns:
+            List[float]: 与候选地址一一对应的相似度
+        """
+        if not address or not candidates:
+            return [0.0] * len(candidates)
+        
+        table = self.address_parser.parse_column(candidates, use_cache=True)
+        similarities = table.weighted_overlap(self.address_parser.parse(address), self._keyword_weight,
+                                              levels=self.keyword_levels)
+        return [float(similarity) if candidate else 0.0 for similarity, candidate in zip(similarities, candidates)]
+    
+    def _keyword_weight(self, level: str, keyword: str) -> float:
+        """地址关键词权重（按关键词后缀，未命中时取层级默认权重）"""
+        for suffix in self._weighted_suffixes:
+            if keyword.endswith(suffix):
+                return self.keyword_weights[suffix]
+        return self.level_default_weights.get(level, 0.0)
+    
     def _extract_address_keywords(self, address: str) -> Dict[str, float]:
         """
-        提取地址关键词及其权重
+        提取地址关键词及其权重（市、区县、镇街道、道路组件）
         
         Args:
             address: 地址字符串
@@ -140,43 +179,12 @@ class AddressSimilarityFilter:
         if not address:
             return {}
         
+        components = self.address_parser.parse(address)
         keywords = {}
-        
-        # 清理地址：移除门牌号等具体信息
-        cleaned_addr = re.sub(r'\d+号.*$', '', address)
-        cleaned_addr = re.sub(r'[层楼室栋座幢]\d*.*$', '', cleaned_addr)
-        
-        # 提取市
-        city_pattern = r'([^省]*?市)'
-        cities = re.findall(city_pattern, cleaned_addr)
-        for city in cities:
-            if len(city) >= 3:
-                keywords[city] = self.keyword_weights.get('市', 0.3)
-        
-        # 提取区县
-        district_pattern = r'([^市]*?)(区|县)'
-        districts = re.findall(district_pattern, cleaned_addr)
-        for district, suffix in districts:
-            if len(district) >= 2:
-                full_district = district + suffix
-                keywords[full_district] = self.keyword_weights.get(suffix, 0.4)
-        
-        # 提取镇街道
-        town_pattern = r'([^区县]*?)(镇|街道)'
-        towns = re.findall(town_pattern, cleaned_addr)
-        for town, suffix in towns:
-            if len(town) >= 2:
-                full_town = town + suffix
-                keywords[full_town] = self.keyword_weights.get(suffix, 0.3)
-        
-        # 提取路街
-        road_pattern = r'([^镇街道区县市]*?)(路|街|道|巷|弄|大道)'
-        roads = re.findall(road_pattern, cleaned_addr)
-        for road, suffix in roads:
-            if len(road) >= 2:
-                full_road = road + suffix
-                keywords[full_road] = self.keyword_weights.get(suffix, 0.6)
-        
+        for level in self.keyword_levels:
+            keyword = components.get(level)
+            if keyword:
+                keywords[keyword] = self._keyword_weight(level, keyword)
         return keywords
     
     def _calculate_weighted_similarity(self, keywords1: Dict[str, float], 
@@ -0,0 +1,372 @@
+"""
+分块（Blocking）候选生成引擎
+按映射声明的分块键函数（区县+核心名称前缀、信用代码前缀、电话尾号、拼音排序邻域等），
+一次流式扫描目标记录建立全部分块，为每条源记录输出有上限的候选集合，
+使模糊匹配的比较次数可控、可预测，并统计每条记录的候选对数
+"""
+
+import re
+import time
+import bisect
+import logging
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Dict, List, Any, Optional, Callable, Iterable, Iterator, Tuple
+
+from src.utils.helpers import normalize_string, normalize_phone
+from .exact_match_index import normalize_credit_code
+from .structured_name_matcher import StructuredNameMatcher
+from .similarity_scorer import SimilarityCalculator
+
+logger = logging.getLogger(__name__)
+
+METHOD_STANDARD = 'standard'
+METHOD_SORTED_NEIGHBORHOOD = 'sorted_neighborhood'
+
+# 区县提取（跳过省、市前缀）
+_DISTRICT_PATTERN = re.compile(r'([^\s省市区县]{2,4}?(?:区|县))')
+
+_name_parser = StructuredNameMatcher()
+
+
+# ==================== 分块键函数 ====================
+# 签名: (字段值列表, 参数) -> 键（None表示该记录不参与此规则）
+
+BLOCKING_KEY_FUNCTIONS: Dict[str, Callable[[List[Any], Dict[str, Any]], Optional[str]]] = {}
+
+
+def register_key_function(name: str):
+    """注册分块键函数"""
+    def decorator(func):
+        BLOCKING_KEY_FUNCTIONS[name] = func
+        return func
+    return decorator
+
+
+def _core_name(value: Any) -> str:
+    """单位名称核心部分（解析失败时使用标准化全名）"""
+    normalized = normalize_string(value)
+    if not normalized:
+        return ''
+    structure = _name_parser.parse_company_name(normalized)
+    return structure.core_name or normalized
+
+
+def _district(address: Any) -> str:
+    match = _DISTRICT_PATTERN.search(normalize_string(address))
+    return match.group(1) if match else ''
+
+
+@register_key_function('exact')
+def _exact_key(values: List[Any], params: Dict[str, Any]) -> Optional[str]:
+    """标准化后的完整值"""
+    return normalize_string(values[0]).lower() or None
+
+
+@register_key_function('name_prefix')
+def _name_prefix_key(values: List[Any], params: Dict[str, Any]) -> Optional[str]:
+    """标准化名称前N个字符"""
+    return normalize_string(values[0])[:params.get('length', 4)] or None
+
+
+@register_key_function('core_name_prefix')
+def _core_name_prefix_key(values: List[Any], params: Dict[str, Any]) -> Optional[str]:
+    """核心名称前N个字符（去除行政区域、业务类型和公司性质）"""
+    return _core_name(values[0])[:params.get('length', 2)] or None
+
+
+@register_key_function('district_core_name')
+def _district_core_name_key(values: List[Any], params: Dict[str, Any]) -> Optional[str]:
+    """区县 + 核心名称前N个字符（字段顺序：名称、地址）"""
+    if len(values) < 2:
+        return None
+    district = _district(values[1])
+    prefix = _core_name(values[0])[:params.get('length', 2)]
+    return f"{district}|{prefix}" if district and prefix else None
+
+
+@register_key_function('credit_code_prefix')
+def _credit_code_prefix_key(values: List[Any], params: Dict[str, Any]) -> Optional[str]:
+    """标准化统一社会信用代码前N位（默认8位：登记管理部门、机构类别、行政区划）"""
+    code = normalize_credit_code(values[0])
+    length = params.get('length', 8)
+    return (code[:length] if length else code) or None
+
+
+@register_key_function('phone_suffix')
+def _phone_suffix_key(values: List[Any], params: Dict[str, Any]) -> Optional[str]:
+    """标准化电话号码后N位"""
+    phone = normalize_phone(values[0])
+    length = params.get('length', 6)
+    return phone[-length:] if len(phone) >= length else None
+
+
+@register_key_function('pinyin')
+def _pinyin_key(values: List[Any], params: Dict[str, Any]) -> Optional[str]:
+    """核心名称拼音（用于排序邻域，指定length时取前缀）"""
+    pinyin = SimilarityCalculator._to_pinyin(_core_name(values[0]))
+    length = params.get('length')
+    return (pinyin[:length] if length else pinyin) or None
+
+
+# ==================== 分块规则 ====================
+
+@dataclass
+class BlockingRule:
+    """分块规则"""
+    name: str
+    function: str
+    source_fields: List[str]
+    target_fields: List[str]
+    params: Dict[str, Any] = field(default_factory=dict)
+    method: str = METHOD_STANDARD     # standard / sorted_neighborhood
+    window: int = 10                  # 排序邻域窗口大小
+
+    def __post_init__(self):
+        if self.function not in BLOCKING_KEY_FUNCTIONS:
+            raise ValueError(f"未知的分块键函数: {self.function}")
+        if self.method not in (METHOD_STANDARD, METHOD_SORTED_NEIGHBORHOOD):
+            raise ValueError(f"未知的分块方法: {self.method}")
+
+    def key_of(self, record: Dict, fields: List[str]) -> Optional[str]:
+        values = [record.get(f) for f in fields]
+        if not values or not values[0]:
+            return None
+        try:
+            return BLOCKING_KEY_FUNCTIONS[self.function](values, self.params)
+        except Exception as e:
+            logger.debug(f"分块键计算失败 {self.name}: {str(e)}")
+            return None
+
+    def source_key(self, record: Dict) -> Optional[str]:
+        return self.key_of(record, self.source_fields)
+
+    def target_key(self, record: Dict) -> Optional[str]:
+        return self.key_of(record, self.target_fields)
+
+
+def rules_from_mappings(mappings: List[Dict], target_table: Optional[str] = None) -> List[BlockingRule]:
+    """
+    从字段映射中读取分块规则
+
+    映射可声明 blocking_keys，每项为键函数名或字典：
+        {'function': 'district_core_name', 'params': {'length': 2},
+         'extra_source_fields': ['ADDRESS'], 'extra_target_fields': ['dwdz'],
+         'method': 'sorted_neighborhood', 'window': 10}
+
+    Args:
+        mappings: 字段映射配置
+        target_table: 只读取该目标表的映射（None表示全部）
+
+    Returns:
+        List[BlockingRule]: 分块规则
+    """
+    rules = []
+    for mapping in mappings:
+        if target_table and mapping.get('target_table', target_table) != target_table:
+            continue
+        for spec in mapping.get('blocking_keys') or []:
+            if isinstance(spec, str):
+                spec = {'function': spec}
+            source_fields = [mapping['source_field']] + list(spec.get('extra_source_fields', []))
+            target_fields = [mapping['target_field']] + list(spec.get('extra_target_fields', []))
+            rules.append(BlockingRule(
+                name=spec.get('name') or f"{mapping['source_field']}->{mapping['target_field']}:{spec['function']}",
+                function=spec['function'],
+                source_fields=source_fields,
+                target_fields=target_fields,
+                params=dict(spec.get('params', {})),
+                method=spec.get('method', METHOD_STANDARD),
+                window=spec.get('window', 10)
+            ))
+    return rules
+
+
+def get_blocking_config() -> Dict[str, Any]:
+    """读取分块配置（high_performance.json 的 blocking 节）"""
+    from src.utils.config import ConfigManager
+    return ConfigManager().get_performance_config().get('blocking', {})
+
+
+# ==================== 分块引擎 ====================
+
+class BlockingEngine:
+    """分块候选生成引擎"""
+
+    def __init__(self, rules: List[BlockingRule], max_block_size: int = 500,
+                 max_candidates_per_record: int = 200):
+        """
+        初始化引擎
+
+        Args:
+            rules: 分块规则（按优先级排列，候选超过上限时优先保留靠前规则的候选）
+            max_block_size: 单个分块的最大记录数，超过时该分块区分度过低，整体丢弃
+            max_candidates_per_record: 每条源记录的最大候选数
+        """
+        self.rules = rules
+        self.max_block_size = max_block_size
+        self.max_candidates_per_record = max_candidates_per_record
+
+        self._blocks: Dict[str, Dict[str, List[Any]]] = {}
+        self._oversized: Dict[str, set] = {}
+        self._sorted_keys: Dict[str, List[str]] = {}
+        self._sorted_ids: Dict[str, List[Any]] = {}
+        self._built = False
+
+        self._stats_lock = Lock()
+        self.stats = {
+            'target_records': 0,
+            'build_time': 0.0,
+            'source_records': 0,
+            'candidate_pairs': 0,
+            'max_pairs_per_record': 0,
+            'records_without_candidates': 0,
+            'records_truncated': 0
+        }
+
+    @classmethod
+    def from_config(cls, mappings: List[Dict], target_table: Optional[str] = None,
+                    config: Optional[Dict[str, Any]] = None) -> Optional['BlockingEngine']:
+        """
+        按映射中声明的分块键创建引擎；映射未声明时使用配置的默认规则，分块未启用时返回None
+        """
+        config = get_blocking_config() if config is None else config
+        rules = rules_from_mappings(mappings, target_table)
+        if not rules and config.get('enabled'):
+            rules = rules_from_mappings([
+                {**mapping, 'blocking_keys': config.get('default_rules', {}).get(mapping.get('target_field'), [])}
+                for mapping in mappings
+            ], target_table)
+        if not rules:
+            return None
+        return cls(rules, config.get('max_block_size', 500), config.get('max_candidates_per_record', 200))
+
+    @property
+    def source_fields(self) -> List[str]:
+        """计算源记录分块键需要的源字段"""
+        return list(dict.fromkeys(f for rule in self.rules for f in rule.source_fields))
+
+    @property
+    def target_fields(self) -> List[str]:
+        """构建分块需要的目标字段"""
+        return list(dict.fromkeys(f for rule in self.rules for f in rule.target_fields))
+
+    # ==================== 构建 ====================
+
+    def build(self, target_records: Iterable[Dict], id_field: str = '_id') -> 'BlockingEngine':
+        """一次流式扫描目标记录，建立所有规则的分块"""
+        start_time = time.time()
+        blocks = {rule.name: {} for rule in self.rules}
+        oversized = {rule.name: set() for rule in self.rules}
+        sorted_pairs = {rule.name: [] for rule in self.rules if rule.method == METHOD_SORTED_NEIGHBORHOOD}
+        count = 0
+
+        for record in target_records:
+            count += 1
+            record_id = record.get(id_field)
+            for rule in self.rules:
+                key = rule.target_key(record)
+                if key is None:
+                    continue
+                if rule.method == METHOD_SORTED_NEIGHBORHOOD:
+                    sorted_pairs[rule.name].append((key, record_id))
+                    continue
+
+                if key in oversized[rule.name]:
+                    continue
+                block = blocks[rule.name].setdefault(key, [])
+                block.append(record_id)
+                if len(block) > self.max_block_size:
+                    del blocks[rule.name][key]
+                    oversized[rule.name].add(key)
+
+        for name, pairs in sorted_pairs.items():
+            pairs.sort(key=lambda p: p[0])
+            self._sorted_keys[name] = [p[0] for p in pairs]
+            self._sorted_ids[name] = [p[1] for p in pairs]
+
+        self._blocks = blocks
+        self._oversized = oversized
+        self._built = True
+        self.stats['target_records'] = count
+        self.stats['build_time'] = time.time() - start_time
+
+        logger.info(f"🧱 分块构建完成: {count} 条目标记录, {len(self.rules)} 条规则, "
+                   f"耗时 {self.stats['build_time']:.2f}s")
+        for rule in self.rules:
+            if rule.method == METHOD_SORTED_NEIGHBORHOOD:
+                logger.info(f"  {rule.name}: 排序邻域 {len(self._sorted_keys[rule.name])} 个键, 窗口 {rule.window}")
+            else:
+                logger.info(f"  {rule.name}: {len(blocks[rule.name])} 个分块, "
+                           f"超限丢弃 {len(oversized[rule.name])} 个")
+        return self
+
+    # ==================== 候选生成 ====================
+
+    def _neighborhood(self, rule: BlockingRule, key: str) -> List[Any]:
+        keys = self._sorted_keys[rule.name]
+        position = bisect.bisect_left(keys, key)
+        half = max(1, rule.window // 2)
+        return self._sorted_ids[rule.name][max(0, position - half):position + half]
+
+    def candidate_ids(self, source_record: Dict) -> List[Any]:
+        """
+        获取源记录的候选目标记录ID（按规则优先级去重，不超过每记录上限）
+        """
+        if not self._built:
+            raise RuntimeError("分块尚未构建，请先调用build()")
+
+        candidates: Dict[Any, None] = {}
+        truncated = False
+        for rule in self.rules:
+            key = rule.source_key(source_record)
+            if key is None:
+                continue
+            if rule.method == METHOD_SORTED_NEIGHBORHOOD:
+                block = self._neighborhood(rule, key)
+            else:
+                block = self._blocks[rule.name].get(key, ())
+            for record_id in block:
+                candidates[record_id] = None
+                if len(candidates) >= self.max_candidates_per_record:
+                    truncated = True
+                    break
+            if truncated:
+                break
+
+        pairs = len(candidates)
+        with self._stats_lock:
+            self.stats['source_records'] += 1
+            self.stats['candidate_pairs'] += pairs
+            self.stats['max_pairs_per_record'] = max(self.stats['max_pairs_per_record'], pairs)
+            if not pairs:
+                self.stats['records_without_candidates'] += 1
+            if truncated:
+                self.stats['records_truncated'] += 1
+        return list(candidates)
+
+    def iter_candidate_pairs(self, source_records: Iterable[Dict]) -> Iterator[Tuple[Dict, List[Any]]]:
+        """逐条输出 (源记录, 候选目标ID列表)"""
+        for source_record in source_records:
+            yield source_record, self.candidate_ids(source_record)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取分块与候选统计"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['avg_pairs_per_record'] = (stats['candidate_pairs'] / stats['source_records']
+                                         if stats['source_records'] else 0.0)
+        stats['rules'] = {}
+        for rule in self.rules:
+            if rule.method == METHOD_SORTED_NEIGHBORHOOD:
+                stats['rules'][rule.name] = {'method': rule.method, 'keys': len(self._sorted_keys.get(rule.name, ())),
+                                             'window': rule.window}
+                continue
+            blocks = self._blocks.get(rule.name, {})
+            stats['rules'][rule.name] = {
+                'method': rule.method,
+                'blocks': len(blocks),
+                'oversized_blocks': len(self._oversized.get(rule.name, ())),
+                'largest_block': max((len(b) for b in blocks.values()), default=0)
+            }
+        return stats
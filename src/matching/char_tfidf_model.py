@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+字符级N元TF-IDF模型
+每个目标表在全表语料上拟合一次并落盘（记录目标表数据源版本，表变更后重新拟合），目标文本的向量预先计算为稀疏矩阵缓存；
+查询时只做无状态的向量转换和稀疏点积，不再对每一对字符串重新拟合，可安全地被多线程共享
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Any, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize as l2_normalize
+
+from src.utils.helpers import normalize_string
+from ..database.range_reader import IdRangeReader
+from ..database.index_versions import compute_index_source_version
+
+logger = logging.getLogger(__name__)
+
+# 默认模型目录：项目根目录下的 data/tfidf_models
+DEFAULT_MODEL_DIR = Path(__file__).parent.parent.parent / "data" / "tfidf_models"
+
+
+class CharNgramTfidfModel:
+    """字符级N元TF-IDF模型（按目标表拟合）"""
+
+    FORMAT_VERSION = 1
+
+    META_FILE = 'meta.json'
+    VOCABULARY_FILE = 'vocabulary.json'
+    IDF_FILE = 'idf.npy'
+    TEXTS_FILE = 'texts.json'
+    VECTORS_FILE = 'vectors.npz'
+
+    def __init__(self, table_name: str, model_dir: Optional[str] = None,
+                 ngram_range: tuple = (1, 3), max_features: int = 200000):
+        """
+        初始化模型
+
+        Args:
+            table_name: 目标表名
+            model_dir: 模型根目录（默认 data/tfidf_models）
+            ngram_range: 字符N元范围
+            max_features: 词表上限
+        """
+        self.table_name = table_name
+        self.model_dir = Path(model_dir) if model_dir else DEFAULT_MODEL_DIR
+        self.ngram_range = tuple(ngram_range)
+        self.max_features = max_features
+        self.meta: Dict[str, Any] = {}
+
+        self._vocabulary: Dict[str, int] = {}
+        self._idf: Optional[np.ndarray] = None
+        # 目标文本向量缓存：标准化文本 -> 行号
+        self._text_rows: Dict[str, int] = {}
+        self._vectors = None
+        # 无状态分析器（只做字符切分，不持有拟合状态）
+        self._analyzer = CountVectorizer(analyzer='char', ngram_range=self.ngram_range).build_analyzer()
+
+    @property
+    def path(self) -> Path:
+        """模型文件目录"""
+        return self.model_dir / self.table_name
+
+    @property
+    def fields(self) -> List[str]:
+        """拟合语料所用的字段"""
+        return self.meta.get('fields', [])
+
+    @property
+    def source_version(self) -> Optional[str]:
+        """拟合时目标表的数据源版本（表版本 + 增量维护版本）"""
+        return self.meta.get('source_version')
+
+    # ==================== 拟合 ====================
+
+    def fit(self, texts: List[str], fields: Optional[List[str]] = None) -> 'CharNgramTfidfModel':
+        """
+        在目标表语料上拟合，并预计算所有目标文本的向量
+
+        Args:
+            texts: 已标准化的目标文本（每个字段值一条）
+            fields: 语料来源字段（记录在元数据中）
+        """
+        corpus = [text for text in texts if text]
+        if not corpus:
+            raise ValueError(f"目标表 {self.table_name} 没有可用于拟合的文本")
+
+        vectorizer = TfidfVectorizer(analyzer='char', ngram_range=self.ngram_range,
+                                     max_features=self.max_features)
+        vectorizer.fit(corpus)
+        self._vocabulary = {term: int(col) for term, col in vectorizer.vocabulary_.items()}
+        self._idf = np.asarray(vectorizer.idf_, dtype=np.float64)
+
+        unique_texts = list(dict.fromkeys(corpus))
+        self._text_rows = {text: row for row, text in enumerate(unique_texts)}
+        self._vectors = self.transform(unique_texts)
+
+        self.meta = {
+            'format_version': self.FORMAT_VERSION,
+            'table_name': self.table_name,
+            'fields': list(fields or []),
+            'ngram_range': list(self.ngram_range),
+            'max_features': self.max_features,
+            'document_count': len(corpus),
+            'text_count': len(unique_texts),
+            'vocabulary_size': len(self._vocabulary),
+            'built_at': time.time()
+        }
+        return self
+
+    @classmethod
+    def build_from_collection(cls, collection, fields: List[str], model_dir: Optional[str] = None,
+                              batch_size: int = 5000, **model_kwargs) -> 'CharNgramTfidfModel':
+        """
+        读取目标表指定字段拟合模型
+
+        Args:
+            collection: 目标表集合
+            fields: 参与拟合的文本字段
+            model_dir: 模型根目录
+            batch_size: 读取批次大小
+        """
+        start_time = time.time()
+        # 先于读取语料记录版本，读取期间的变更会在下次获取时触发重新拟合
+        source_version = compute_index_source_version(collection)
+        projection = {field: 1 for field in fields}
+        texts = []
+        for batch in IdRangeReader(collection, projection=projection, batch_size=batch_size).iter_batches():
+            for record in batch:
+                for field in fields:
+                    value = record.get(field)
+                    if value:
+                        texts.append(normalize_string(str(value)))
+
+        model = cls(collection.name, model_dir, **model_kwargs).fit(texts, fields)
+        model.meta['source_version'] = source_version
+        logger.info(f"🔤 字符TF-IDF模型拟合完成: {collection.name} {fields}, "
+                   f"文本 {model.meta['text_count']}, 词表 {model.meta['vocabulary_size']}, "
+                   f"耗时 {time.time() - start_time:.2f}s")
+        return model
+
+    # ==================== 向量化 ====================
+
+    def transform(self, texts: Sequence[str]):
+        """
+        将文本转换为L2归一化的TF-IDF稀疏矩阵（无状态，线程安全）
+
+        Args:
+            texts: 已标准化的文本
+
+        Returns:
+            csr_matrix: 文本数 × 词表大小
+        """
+        rows, cols, values = [], [], []
+        for row, text in enumerate(texts):
+            term_counts: Dict[int, int] = {}
+            for term in self._analyzer(text) if text else ():
+                col = self._vocabulary.get(term)
+                if col is not None:
+                    term_counts[col] = term_counts.get(col, 0) + 1
+            for col, count in term_counts.items():
+                rows.append(row)
+                cols.append(col)
+                values.append(count * self._idf[col])
+
+        matrix = sparse.csr_matrix(
+            (np.asarray(values, dtype=np.float64), (rows, cols)),
+            shape=(len(texts), len(self._vocabulary))
+        )
+        return l2_normalize(matrix, norm='l2', copy=False)
+
+    def vectors_for(self, texts: Sequence[str]):
+        """
+        获取文本向量：目标表中已有的文本直接取预计算行，其余现场转换
+
+        Returns:
+            csr_matrix: 与texts顺序一致的向量矩阵
+        """
+        known_positions, known_rows = [], []
+        unknown_positions, unknown_texts = [], []
+        for position, text in enumerate(texts):
+            row = self._text_rows.get(text)
+            if row is None:
+                unknown_positions.append(position)
+                unknown_texts.append(text)
+            else:
+                known_positions.append(position)
+                known_rows.append(row)
+
+        if not unknown_texts:
+            return self._vectors[known_rows]
+        if not known_rows:
+            return self.transform(unknown_texts)
+
+        stacked = sparse.vstack([self._vectors[known_rows], self.transform(unknown_texts)], format='csr')
+        order = np.empty(len(texts), dtype=np.int64)
+        order[np.asarray(known_positions + unknown_positions, dtype=np.int64)] = np.arange(len(texts))
+        return stacked[order]
+
+    def cosine_to_vectors(self, source_text: str, vectors) -> np.ndarray:
+        """计算源文本与一组候选向量的余弦相似度（稀疏点积）"""
+        if vectors.shape[0] == 0 or not source_text:
+            return np.zeros(vectors.shape[0], dtype=np.float64)
+        source_vector = self.transform([source_text])
+        scores = (vectors @ source_vector.T).toarray().ravel()
+        return np.clip(scores, 0.0, 1.0)
+
+    def cosine_many(self, source_text: str, candidate_texts: Sequence[str]) -> np.ndarray:
+        """计算源文本与一组候选文本的余弦相似度"""
+        return self.cosine_to_vectors(source_text, self.vectors_for(candidate_texts))
+
+    # ==================== 持久化 ====================
+
+    def save(self):
+        """原子写入模型目录（先写临时目录再替换）"""
+        target_path = self.path
+        temp_path = target_path.with_name(target_path.name + '.tmp')
+        old_path = target_path.with_name(target_path.name + '.old')
+
+        shutil.rmtree(temp_path, ignore_errors=True)
+        temp_path.mkdir(parents=True, exist_ok=True)
+
+        np.save(temp_path / self.IDF_FILE, self._idf)
+        sparse.save_npz(temp_path / self.VECTORS_FILE, self._vectors, compressed=False)
+        texts = [None] * len(self._text_rows)
+        for text, row in self._text_rows.items():
+            texts[row] = text
+        with open(temp_path / self.TEXTS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(texts, f, ensure_ascii=False)
+        with open(temp_path / self.VOCABULARY_FILE, 'w', encoding='utf-8') as f:
+            json.dump(self._vocabulary, f, ensure_ascii=False)
+        with open(temp_path / self.META_FILE, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+
+        shutil.rmtree(old_path, ignore_errors=True)
+        if target_path.exists():
+            os.replace(target_path, old_path)
+        os.replace(temp_path, target_path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+        logger.info(f"💾 字符TF-IDF模型已保存: {target_path}")
+
+    @classmethod
+    def load(cls, table_name: str, model_dir: Optional[str] = None) -> Optional['CharNgramTfidfModel']:
+        """
+        加载模型
+
+        Returns:
+            Optional[CharNgramTfidfModel]: 模型实例，不存在或格式不兼容时返回None
+        """
+        base_dir = Path(model_dir) if model_dir else DEFAULT_MODEL_DIR
+        path = base_dir / table_name
+        meta_path = path / cls.META_FILE
+        if not meta_path.exists():
+            return None
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('format_version') != cls.FORMAT_VERSION:
+                logger.warning(f"字符TF-IDF模型格式版本不兼容，忽略: {path}")
+                return None
+
+            model = cls(table_name, model_dir, tuple(meta['ngram_range']), meta['max_features'])
+            model.meta = meta
+            model._idf = np.load(path / cls.IDF_FILE)
+            model._vectors = sparse.load_npz(path / cls.VECTORS_FILE).tocsr()
+            with open(path / cls.VOCABULARY_FILE, 'r', encoding='utf-8') as f:
+                model._vocabulary = json.load(f)
+            with open(path / cls.TEXTS_FILE, 'r', encoding='utf-8') as f:
+                model._text_rows = {text: row for row, text in enumerate(json.load(f))}
+
+            logger.info(f"📂 字符TF-IDF模型已加载: {path}, 文本 {len(model._text_rows)}, "
+                       f"词表 {len(model._vocabulary)}")
+            return model
+
+        except Exception as e:
+            logger.warning(f"加载字符TF-IDF模型失败: {path} - {str(e)}")
+            return None
+
+
+# ==================== 进程内共享 ====================
+
+_model_registry: Dict[str, CharNgramTfidfModel] = {}
+_registry_lock = Lock()
+
+
+def get_tfidf_model(table_name: str, model_dir: Optional[str] = None) -> Optional[CharNgramTfidfModel]:
+    """获取（必要时从磁盘加载）进程内共享的模型"""
+    model = _model_registry.get(table_name)
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        model = _model_registry.get(table_name)
+        if model is None:
+            model = CharNgramTfidfModel.load(table_name, model_dir)
+            if model is not None:
+                _model_registry[table_name] = model
+        return model
+
+
+def ensure_tfidf_model(db_manager, table_name: str, fields: List[str], model_dir: Optional[str] = None,
+                       force_rebuild: bool = False) -> Optional[CharNgramTfidfModel]:
+    """
+    获取目标表模型，不存在、未覆盖所需字段或目标表数据源版本已变化时拟合并落盘
+
+    Args:
+        db_manager: 数据库管理器
+        table_name: 目标表名
+        fields: 需要覆盖的文本字段
+        model_dir: 模型根目录
+        force_rebuild: 是否强制重新拟合
+    """
+    model = None if force_rebuild else get_tfidf_model(table_name, model_dir)
+    try:
+        collection = db_manager.get_collection(table_name)
+        if model is not None and set(fields) <= set(model.fields):
+            if model.source_version == compute_index_source_version(collection):
+                return model
+            logger.info(f"字符TF-IDF模型已过期（目标表已变更），重新拟合: {table_name}")
+
+        fit_fields = sorted(set(fields) | set(model.fields if model else []))
+        model = CharNgramTfidfModel.build_from_collection(collection, fit_fields, model_dir)
+        model.save()
+    except Exception as e:
+        logger.error(f"拟合字符TF-IDF模型失败: {table_name} - {str(e)}")
+        return get_tfidf_model(table_name, model_dir)
+
+    with _registry_lock:
+        _model_registry[table_name] = model
+    return model
+
+
+def invalidate_tfidf_model(table_name: str):
+    """模型重建后使进程内缓存失效"""
+    with _registry_lock:
+        _model_registry.pop(table_name, None)
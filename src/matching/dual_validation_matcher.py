@@ -20,6 +20,7 @@ from src.matching.fuzzy_matcher import FuzzyMatcher
 from src.matching.enhanced_fuzzy_matcher import EnhancedFuzzyMatcher
 from src.matching.intelligent_unit_name_matcher import IntelligentUnitNameMatcher
 from src.matching.content_field_analyzer import ContentFieldAnalyzer
+from src.matching.address_parser import parse_address
 
 @dataclass
 class FieldValidationConfig:
@@ -653,48 +654,9 @@ class DualValidationMatcher:
         if norm_addr1 == norm_addr2:
             return 1.0
         
-        # 提取关键地址组件
-        def extract_address_components(addr):
-            components = {
-                'province': '',
-                'city': '',
-                'district': '',
-                'street': '',
-                'number': ''
-            }
-            
-            # 简单的地址组件提取
-            import re
-            
-            # 提取省份
-            province_match = re.search(r'(.*?省)', addr)
-            if province_match:
-                components['province'] = province_match.group(1)
-            
-            # 提取市
-            city_match = re.search(r'(.*?市)', addr)
-            if city_match:
-                components['city'] = city_match.group(1)
-            
-            # 提取区县
-            district_match = re.search(r'(.*?[区县])', addr)
-            if district_match:
-                components['district'] = district_match.group(1)
-            
-            # 提取街道
-            street_match = re.search(r'(.*?[路街道巷弄])', addr)
-            if street_match:
-                components['street'] = street_match.group(1)
-            
-            # 提取门牌号
-            number_match = re.search(r'(\d+号?)', addr)
-            if number_match:
-                components['number'] = number_match.group(1)
-            
-            return components
-        
-        comp1 = extract_address_components(addr1)
-        comp2 = extract_address_components(addr2)
+        # 提取关键地址组件（共享地址解析引擎，结果按地址缓存）
+        comp1 = parse_address(addr1)
+        comp2 = parse_address(addr2)
         
         # 计算各组件相似度
         component_scores = {}
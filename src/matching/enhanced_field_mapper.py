@@ -5,6 +5,7 @@
 
 import numpy as np
 import logging
+import importlib.util
 from typing import Dict, List, Any, Tuple, Optional
 from collections import defaultdict
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -12,14 +13,13 @@ from sklearn.metrics.pairwise import cosine_similarity
 import re
 import json
 
-# 动态导入jieba，如果失败则使用基础分词
-try:
-    import jieba
-    JIEBA_AVAILABLE = True
-except ImportError:
-    JIEBA_AVAILABLE = False
+# 检测jieba是否可用（分词由共享分词服务完成），不可用时使用基础分词
+JIEBA_AVAILABLE = importlib.util.find_spec('jieba') is not None
+if not JIEBA_AVAILABLE:
     logging.warning("jieba未安装，将使用基础分词功能")
 
+from ..utils.tokenizer_service import get_tokenizer
+
 logger = logging.getLogger(__name__)
 
 class EnhancedFieldMapper:
@@ -36,7 +36,7 @@ class EnhancedFieldMapper:
         
         # 初始化中文分词（如果可用）
         if JIEBA_AVAILABLE:
-            jieba.initialize()
+            get_tokenizer().warm_up()
         
         # 字段语义词典
         self.field_semantic_dict = {
@@ -167,8 +167,8 @@ class EnhancedFieldMapper:
         """计算语义相似度"""
         # 中文分词（优先使用jieba，否则使用简单分词）
         if JIEBA_AVAILABLE:
-            words1 = list(jieba.cut(field1.lower()))
-            words2 = list(jieba.cut(field2.lower()))
+            words1 = get_tokenizer().lcut(field1.lower())
+            words2 = get_tokenizer().lcut(field2.lower())
         else:
             # 基础分词：按常见分隔符分割
             words1 = re.split(r'[_\-\s]+', field1.lower())
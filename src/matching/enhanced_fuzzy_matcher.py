@@ -11,6 +11,7 @@ from dataclasses import dataclass
 
 from .fuzzy_matcher import FuzzyMatcher, FuzzyMatchResult, SimilarityCalculator
 from .structured_name_matcher import StructuredNameMatcher, StructuredMatchResult
+from src.utils.pinyin_table import to_pinyin
 from rapidfuzz import fuzz
 
 logger = logging.getLogger(__name__)
@@ -69,8 +70,13 @@ class EnhancedFuzzyMatcher(FuzzyMatcher):
         """
         # 收集所有候选匹配
         candidates = []
-        
-        for target_record in target_records:
+        string_scores = self._prescore_string_fields(source_record, target_records)
+
+        if self.enhanced_config['use_structured_matching'] and self.feature_store is None:
+            # 候选目标名称批量预解析（写入解析缓存，逐对比较时直接命中）
+            self.structured_matcher.parse_many([self._safe_str(t.get('dwmc')) for t in target_records])
+
+        for target_record, target_string_scores in zip(target_records, string_scores):
             # 1. 首先进行结构化名称匹配
             structured_result = None
             if self.enhanced_config['use_structured_matching']:
@@ -86,7 +92,7 @@ class EnhancedFuzzyMatcher(FuzzyMatcher):
             
             # 2. 计算增强的相似度分数
             score, field_similarities, explanation = self._calculate_enhanced_similarity(
-                source_record, target_record, structured_result
+                source_record, target_record, structured_result, target_string_scores
             )
             
             # 2.5 核心名称相似度检查（新增）
@@ -141,6 +147,11 @@ class EnhancedFuzzyMatcher(FuzzyMatcher):
             }
         )
     
+    def attach_feature_store(self, store):
+        """挂载目标表特征库（同时供结构化名称匹配使用）"""
+        super().attach_feature_store(store)
+        self.structured_matcher.attach_feature_store(store)
+    
     def _perform_structured_matching(self, source_record: Dict, target_record: Dict) -> Optional[StructuredMatchResult]:
         """
         执行结构化名称匹配
@@ -169,7 +180,12 @@ class EnhancedFuzzyMatcher(FuzzyMatcher):
             logger.error(f"结构化匹配失败: {str(e)}")
             return None
     
-    def _calculate_record_similarity(self, source_record: Dict, target_record: Dict) -> Tuple[float, Dict]:
+    def _string_field_value(self, record: Dict, field: str) -> str:
+        """取字符串类型字段的比较值（强制字符串转换，与本类的相似度计算保持一致）"""
+        return str(record.get(field, ''))
+    
+    def _calculate_record_similarity(self, source_record: Dict, target_record: Dict,
+                                     string_scores: Optional[Dict[str, float]] = None) -> Tuple[float, Dict]:
         """
         计算两条记录的相似度 (重写父类方法以进行双向消毒)
         """
@@ -203,7 +219,9 @@ class EnhancedFuzzyMatcher(FuzzyMatcher):
             target_value = str(target_record.get(target_field, ''))
 
             similarity = 0.0
-            if match_type == 'string':
+            if match_type == 'string' and string_scores is not None and field_name in string_scores:
+                similarity = string_scores[field_name]
+            elif match_type == 'string':
                 similarity = self.similarity_calculator.calculate_string_similarity(source_value, target_value)
             elif match_type == 'address':
                 similarity = self.similarity_calculator.calculate_address_similarity(source_value, target_value)
@@ -219,7 +237,8 @@ class EnhancedFuzzyMatcher(FuzzyMatcher):
         return final_score, field_similarities
     
     def _calculate_enhanced_similarity(self, source_record: Dict, target_record: Dict, 
-                                     structured_result: Optional[StructuredMatchResult]) -> Tuple[float, Dict, Dict]:
+                                     structured_result: Optional[StructuredMatchResult],
+                                     string_scores: Optional[Dict[str, float]] = None) -> Tuple[float, Dict, Dict]:
         """
         计算增强的相似度分数
         
@@ -227,6 +246,7 @@ class EnhancedFuzzyMatcher(FuzzyMatcher):
             source_record: 源记录
             target_record: 目标记录
             structured_result: 结构化匹配结果
+            string_scores: 批量预计算的字符串字段相似度
             
         Returns:
             Tuple[float, Dict, Dict]: (总分数, 字段相似度, 解释)
@@ -234,7 +254,7 @@ class EnhancedFuzzyMatcher(FuzzyMatcher):
         explanation = {"positive": [], "negative": []}
         
         # 1. 使用重写的、安全的基础模糊匹配计算初始分数
-        base_score, field_similarities = self._calculate_record_similarity(source_record, target_record)
+        base_score, field_similarities = self._calculate_record_similarity(source_record, target_record, string_scores)
         explanation['positive'].append(f"基础模糊匹配得分: {base_score:.2f}")
 
         # 2. 如果有结构化匹配结果，进行增强调整
@@ -312,9 +332,12 @@ class EnhancedFuzzyMatcher(FuzzyMatcher):
                 
                 # 拼音检查（防止音近字不同的误匹配）
                 try:
-                    import pypinyin
-                    source_pinyin = ''.join([p[0] for p in pypinyin.pinyin(source_core, style=pypinyin.NORMAL)])
-                    target_pinyin = ''.join([p[0] for p in pypinyin.pinyin(target_core, style=pypinyin.NORMAL)])
+                    source_pinyin = to_pinyin(source_core)
+                    target_pinyin = None
+                    if self.feature_store is not None:
+                        target_pinyin = self.feature_store.core_pinyin(structured_result.target_structure.original)
+                    if target_pinyin is None:
+                        target_pinyin = to_pinyin(target_core)
                     
                     # 拼音完全不同时进行惩罚
                     pinyin_sim = fuzz.ratio(source_pinyin, target_pinyin) / 100.0
@@ -6,12 +6,12 @@
 """
 
 import re
-import jieba
 import difflib
 from fuzzywuzzy import fuzz, process
 from difflib import SequenceMatcher
 from typing import List, Dict, Tuple, Optional
 import logging
+from ..utils.tokenizer_service import get_tokenizer
 
 logger = logging.getLogger(__name__)
 
@@ -140,8 +140,8 @@ class EnhancedMatcher:
         scores["core_fuzz_token"] = fuzz.token_sort_ratio(core1, core2) / 100.0
         
         # 5. 分词匹配
-        words1 = set(jieba.lcut(core1)) - self.stop_words
-        words2 = set(jieba.lcut(core2)) - self.stop_words
+        words1 = set(get_tokenizer().tokenize(core1)) - self.stop_words
+        words2 = set(get_tokenizer().tokenize(core2)) - self.stop_words
         
         if words1 and words2:
             intersection = len(words1 & words2)
@@ -0,0 +1,317 @@
+"""
+精确匹配哈希索引模块
+将目标记录按标准化后的统一社会信用代码、单位名称建立 键 -> 目标记录 哈希索引，
+精确匹配每条源记录只需一次字典查找；支持磁盘快照和增量更新
+"""
+
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Any, Optional
+
+from ..database.range_reader import IdRangeReader, normalize_id
+from ..database.index_versions import compute_index_source_version
+
+logger = logging.getLogger(__name__)
+
+# 默认快照目录：项目根目录下的 data/exact_match_index
+DEFAULT_SNAPSHOT_DIR = Path(__file__).parent.parent.parent / "data" / "exact_match_index"
+
+# 进程内缓存的索引与目标表版本的最短复核间隔（秒）
+VERSION_CHECK_INTERVAL = 30.0
+
+
+def normalize_credit_code(credit_code) -> str:
+    """
+    标准化统一社会信用代码（去空白和连接符、转大写，非18位视为无效）
+
+    Returns:
+        str: 标准化后的信用代码，无效时为空串
+    """
+    if not credit_code:
+        return ''
+
+    normalized = ''.join(str(credit_code).split())
+    normalized = normalized.replace('-', '').replace('_', '').upper()
+    return normalized if len(normalized) == 18 else ''
+
+
+def normalize_unit_name(unit_name) -> str:
+    """
+    标准化单位名称（统一括号、合并空白、转小写，精确匹配要求其余部分完全一致）
+
+    Returns:
+        str: 标准化后的单位名称
+    """
+    if not unit_name:
+        return ''
+
+    try:
+        normalized = str(unit_name).strip()
+    except Exception:
+        return ''
+
+    normalized = normalized.replace('（', '(').replace('）', ')')
+    normalized = normalized.replace('[', '(').replace(']', ')')
+    normalized = normalized.replace('【', '(').replace('】', ')')
+    normalized = ' '.join(normalized.split())
+    return normalized.lower()
+
+
+class ExactMatchIndex:
+    """精确匹配哈希索引"""
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, credit_code_field: str = 'tyshxydm', unit_name_field: str = 'dwmc',
+                 collection=None):
+        """
+        初始化索引
+
+        Args:
+            credit_code_field: 目标记录的信用代码字段
+            unit_name_field: 目标记录的单位名称字段
+            collection: 目标表集合（为None时索引直接持有记录对象，否则持有记录_id并按需回表读取）
+        """
+        self.credit_code_field = credit_code_field
+        self.unit_name_field = unit_name_field
+        self.collection = collection
+        self.table_version: Optional[str] = None
+        self.built_at: Optional[float] = None
+
+        self._credit_code_keys: Dict[str, List[Any]] = {}
+        self._unit_name_keys: Dict[str, List[Any]] = {}
+        self._lock = Lock()
+
+    @property
+    def table_name(self) -> Optional[str]:
+        return self.collection.name if self.collection is not None else None
+
+    def __len__(self) -> int:
+        return sum(len(refs) for refs in self._credit_code_keys.values())
+
+    # ==================== 构建 ====================
+
+    @classmethod
+    def from_records(cls, records: List[Dict], credit_code_field: str = 'tyshxydm',
+                     unit_name_field: str = 'dwmc') -> 'ExactMatchIndex':
+        """由内存中的目标记录列表构建索引（索引项即记录本身）"""
+        index = cls(credit_code_field, unit_name_field)
+        for record in records:
+            index._add(record, record)
+        index.built_at = time.time()
+        return index
+
+    @classmethod
+    def build_from_collection(cls, collection, credit_code_field: str = 'tyshxydm',
+                              unit_name_field: str = 'dwmc', batch_size: int = 10000) -> 'ExactMatchIndex':
+        """扫描目标表构建索引（索引项为记录_id）"""
+        start_time = time.time()
+        index = cls(credit_code_field, unit_name_field, collection)
+        index.table_version = compute_index_source_version(collection)
+
+        projection = {credit_code_field: 1, unit_name_field: 1}
+        for batch in IdRangeReader(collection, projection=projection, batch_size=batch_size).iter_batches():
+            for record in batch:
+                index._add(record, str(record['_id']))
+
+        index.built_at = time.time()
+        logger.info(f"🔑 精确匹配索引构建完成: {collection.name}, 信用代码键 {len(index._credit_code_keys)}, "
+                   f"单位名称键 {len(index._unit_name_keys)}, 耗时 {time.time() - start_time:.2f}s")
+        return index
+
+    def _add(self, record: Dict, ref: Any):
+        credit_code = normalize_credit_code(record.get(self.credit_code_field))
+        if credit_code:
+            self._credit_code_keys.setdefault(credit_code, []).append(ref)
+        unit_name = normalize_unit_name(record.get(self.unit_name_field))
+        if unit_name:
+            self._unit_name_keys.setdefault(unit_name, []).append(ref)
+
+    def _remove(self, keys: Dict[str, List[Any]], key: str, ref: Any):
+        refs = keys.get(key)
+        if not refs:
+            return
+        # 内存记录按对象身份匹配，_id索引项按值匹配
+        remaining = [r for r in refs if not (r is ref or (isinstance(ref, str) and r == ref))]
+        if remaining:
+            keys[key] = remaining
+        else:
+            keys.pop(key, None)
+
+    # ==================== 增量更新 ====================
+
+    def add_record(self, record: Dict):
+        """目标表新增记录后调用"""
+        ref = record if self.collection is None else str(record['_id'])
+        with self._lock:
+            self._add(record, ref)
+
+    def remove_record(self, record: Dict):
+        """目标表删除记录后调用（record需包含删除前的信用代码和单位名称）"""
+        ref = record if self.collection is None else str(record['_id'])
+        with self._lock:
+            self._remove(self._credit_code_keys, normalize_credit_code(record.get(self.credit_code_field)), ref)
+            self._remove(self._unit_name_keys, normalize_unit_name(record.get(self.unit_name_field)), ref)
+
+    def update_record(self, old_record: Dict, new_record: Dict):
+        """目标表记录修改后调用"""
+        self.remove_record(old_record)
+        self.add_record(new_record)
+
+    # ==================== 查询 ====================
+
+    def lookup_credit_code(self, credit_code: str) -> List[Dict]:
+        """按标准化信用代码查找目标记录"""
+        return self._resolve(self._credit_code_keys.get(credit_code, ()))
+
+    def lookup_unit_name(self, unit_name: str) -> List[Dict]:
+        """按标准化单位名称查找目标记录"""
+        return self._resolve(self._unit_name_keys.get(unit_name, ()))
+
+    def _resolve(self, refs) -> List[Dict]:
+        """将索引项还原为目标记录（按_id回表时保持索引中的顺序）"""
+        refs = list(refs)
+        if not refs or self.collection is None:
+            return refs
+
+        records = {str(r['_id']): r for r in self.collection.find({'_id': {'$in': [normalize_id(r) for r in refs]}})}
+        return [records[ref] for ref in refs if ref in records]
+
+    # ==================== 快照 ====================
+
+    def save(self, snapshot_dir: Optional[str] = None):
+        """原子写入磁盘快照（仅按_id索引的目标表索引，须与目标表内容一致时调用）"""
+        if self.collection is None:
+            raise ValueError("内存记录索引不支持快照")
+
+        base_dir = Path(snapshot_dir) if snapshot_dir else DEFAULT_SNAPSHOT_DIR
+        base_dir.mkdir(parents=True, exist_ok=True)
+        path = base_dir / f"{self.table_name}.json"
+        temp_path = path.with_name(path.name + '.tmp')
+        # 增量更新后索引与当前表内容一致，以当前表版本作为快照版本
+        self.table_version = compute_index_source_version(self.collection)
+
+        payload = {
+            'format_version': self.FORMAT_VERSION,
+            'table_name': self.table_name,
+            'table_version': self.table_version,
+            'credit_code_field': self.credit_code_field,
+            'unit_name_field': self.unit_name_field,
+            'built_at': self.built_at,
+            'credit_code_keys': self._credit_code_keys,
+            'unit_name_keys': self._unit_name_keys
+        }
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        logger.info(f"💾 精确匹配索引快照已保存: {path}")
+
+    @classmethod
+    def load(cls, collection, snapshot_dir: Optional[str] = None) -> Optional['ExactMatchIndex']:
+        """
+        加载磁盘快照
+
+        Returns:
+            Optional[ExactMatchIndex]: 索引实例，快照不存在或格式不兼容时返回None
+        """
+        base_dir = Path(snapshot_dir) if snapshot_dir else DEFAULT_SNAPSHOT_DIR
+        path = base_dir / f"{collection.name}.json"
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            if payload.get('format_version') != cls.FORMAT_VERSION:
+                logger.warning(f"精确匹配索引快照格式版本不兼容，忽略: {path}")
+                return None
+
+            index = cls(payload['credit_code_field'], payload['unit_name_field'], collection)
+            index.table_version = payload.get('table_version')
+            index.built_at = payload.get('built_at')
+            index._credit_code_keys = payload.get('credit_code_keys', {})
+            index._unit_name_keys = payload.get('unit_name_keys', {})
+            return index
+
+        except Exception as e:
+            logger.warning(f"加载精确匹配索引快照失败: {path} - {str(e)}")
+            return None
+
+
+# ==================== 进程内共享 ====================
+
+_index_registry: Dict[str, ExactMatchIndex] = {}
+# 表名 -> 上次确认缓存索引与目标表版本一致的时间
+_version_checked_at: Dict[str, float] = {}
+_registry_lock = Lock()
+
+
+def get_exact_match_index(db_manager, table_name: str, credit_code_field: str = 'tyshxydm',
+                          unit_name_field: str = 'dwmc', snapshot_dir: Optional[str] = None,
+                          force_rebuild: bool = False,
+                          version_check_interval: float = VERSION_CHECK_INTERVAL) -> Optional[ExactMatchIndex]:
+    """
+    获取目标表精确匹配索引：优先使用进程内缓存，其次是与当前表版本一致的磁盘快照，否则重建并保存快照。
+    进程内缓存的索引每隔version_check_interval秒与目标表版本（含增量维护版本）复核一次，
+    目标表被重建或更新后丢弃旧索引
+
+    Args:
+        db_manager: 数据库管理器
+        table_name: 目标表名
+        credit_code_field: 信用代码字段
+        unit_name_field: 单位名称字段
+        snapshot_dir: 快照目录
+        force_rebuild: 是否强制重建
+        version_check_interval: 缓存索引复核表版本的间隔（秒，0表示每次获取都复核）
+    """
+    with _registry_lock:
+        try:
+            collection = db_manager.get_collection(table_name)
+            current_version = None
+            index = None if force_rebuild else _index_registry.get(table_name)
+            if index is not None:
+                if time.time() - _version_checked_at.get(table_name, 0.0) < version_check_interval:
+                    return index
+                current_version = compute_index_source_version(collection)
+                if index.table_version == current_version:
+                    _version_checked_at[table_name] = time.time()
+                    return index
+                logger.info(f"精确匹配索引已过期（目标表已变更）: {table_name}")
+                index = None
+
+            if not force_rebuild:
+                index = ExactMatchIndex.load(collection, snapshot_dir)
+                if current_version is None:
+                    current_version = compute_index_source_version(collection)
+                if index is not None and (
+                        index.table_version != current_version
+                        or index.credit_code_field != credit_code_field
+                        or index.unit_name_field != unit_name_field):
+                    logger.info(f"精确匹配索引快照已过期: {table_name}")
+                    index = None
+
+            if index is None:
+                index = ExactMatchIndex.build_from_collection(collection, credit_code_field, unit_name_field)
+                try:
+                    index.save(snapshot_dir)
+                except Exception as e:
+                    logger.warning(f"保存精确匹配索引快照失败: {str(e)}")
+
+            _index_registry[table_name] = index
+            _version_checked_at[table_name] = time.time()
+            return index
+
+        except Exception as e:
+            logger.error(f"获取精确匹配索引失败: {table_name} - {str(e)}")
+            return None
+
+
+def invalidate_exact_match_index(table_name: str):
+    """使进程内缓存的索引失效（下次获取时按快照或重建）"""
+    with _registry_lock:
+        _index_registry.pop(table_name, None)
+        _version_checked_at.pop(table_name, None)
@@ -7,6 +7,8 @@ import logging
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from .match_result import MatchResult, MultiMatchResult
+from .exact_match_index import ExactMatchIndex, normalize_credit_code, normalize_unit_name
+from .address_parser import parse_address
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,30 @@ class ExactMatcher:
         self.config = config
         self.exact_match_config = config.get('exact_match', {})
         self.fields_config = self.exact_match_config.get('fields', {})
+        
+        # 目标表哈希索引（attach_index挂载），target_records为None时使用
+        self.index: Optional[ExactMatchIndex] = None
+    
+    def attach_index(self, index: Optional[ExactMatchIndex]):
+        """
+        挂载目标表精确匹配索引
+        
+        Args:
+            index: 由 get_exact_match_index 获取的索引（None表示卸载）
+        """
+        self.index = index
+    
+    def _resolve_index(self, target_records: Optional[List[Dict]]) -> Optional[ExactMatchIndex]:
+        """
+        获取本次调用使用的索引：未传目标列表时用挂载的表索引，否则为该列表临时建立内存索引
+
+        列表可能被调用方原地修改，无法可靠判断是否变化，因此不跨调用缓存列表索引；
+        每次公开调用只建立一次并向下传给各 _match_by_* 方法，
+        对所有源记录复用同一目标列表的调用方应使用 batch_match 或建立索引后通过 attach_index 挂载
+        """
+        if target_records is None:
+            return self.index
+        return ExactMatchIndex.from_records(target_records)
     
     def _safe_str(self, value, default: str = '') -> str:
         """安全地将任何类型转换为字符串并去除空白"""
@@ -34,20 +60,24 @@ class ExactMatcher:
         except Exception:
             return default
         
-    def match_single_record(self, source_record: Dict, target_records: List[Dict]) -> MatchResult:
+    def match_single_record(self, source_record: Dict, target_records: Optional[List[Dict]] = None) -> MatchResult:
         """
         对单条记录进行精确匹配
         
         Args:
             source_record: 源记录（消防监督系统）
-            target_records: 目标记录列表（安全排查系统）
+            target_records: 目标记录列表（安全排查系统），None表示使用挂载的目标表索引
             
         Returns:
             MatchResult: 匹配结果
         """
+        return self._match_single_record_with_index(source_record, self._resolve_index(target_records))
+    
+    def _match_single_record_with_index(self, source_record: Dict, index: Optional[ExactMatchIndex]) -> MatchResult:
+        """使用已解析的索引对单条记录进行精确匹配"""
         try:
             # 仅使用统一社会信用代码进行精确匹配
-            credit_code_result = self._match_by_credit_code(source_record, target_records)
+            credit_code_result = self._match_by_credit_code(source_record, index)
             if credit_code_result.matched:
                 logger.info(f"信用代码精确匹配成功: {source_record.get('UNIT_NAME', 'Unknown')}")
                 return credit_code_result
@@ -71,13 +101,18 @@ class ExactMatcher:
                 match_details={'error': str(e)}
             )
     
-    def _match_by_credit_code(self, source_record: Dict, target_records: List[Dict]) -> MatchResult:
+    @staticmethod
+    def _lookup_credit_code(credit_code: str, index: Optional[ExactMatchIndex]) -> List[Dict]:
+        """按标准化信用代码查找目标记录"""
+        return index.lookup_credit_code(credit_code) if index is not None else []
+    
+    def _match_by_credit_code(self, source_record: Dict, index: Optional[ExactMatchIndex]) -> MatchResult:
         """
         基于统一社会信用代码进行匹配
         
         Args:
             source_record: 源记录（安全排查系统）
-            target_records: 目标记录列表（消防监督系统）
+            index: 目标记录（消防监督系统）的精确匹配索引
             
         Returns:
             MatchResult: 匹配结果
@@ -95,15 +130,8 @@ class ExactMatcher:
                 source_record=source_record
             )
         
-        # 收集所有匹配的目标记录
-        matched_targets = []
-        for target_record in target_records:
-            target_credit_code = self._normalize_credit_code(
-                target_record.get('tyshxydm', '')
-            )
-            
-            if target_credit_code and source_credit_code == target_credit_code:
-                matched_targets.append(target_record)
+        # 哈希索引查找所有匹配的目标记录
+        matched_targets = self._lookup_credit_code(source_credit_code, index)
         
         # 如果没有匹配记录
         if not matched_targets:
@@ -311,24 +339,11 @@ class ExactMatcher:
         return min(1.0, similarity)
     
     def _extract_address_keywords(self, address: str) -> set:
-        """提取地址关键词"""
+        """提取地址关键词（共享地址解析引擎的各级组件）"""
         if not address:
             return set()
         
-        # 移除常见的地址前缀
-        address = address.replace('上海市', '').replace('市', '')
-        address = address.replace('区', '').replace('县', '')
-        
-        # 分割地址，提取有意义的词汇
-        keywords = set()
-        
-        # 按常见分隔符分割
-        parts = address.replace('号', ' ').replace('室', ' ').replace('层', ' ').replace('楼', ' ')
-        for part in parts.split():
-            if len(part) >= 2:  # 只保留长度>=2的词
-                keywords.add(part)
-        
-        return keywords
+        return set(parse_address(address).keywords())
     
     def _calculate_completeness_score(self, record: Dict) -> float:
         """计算记录完整度分数"""
@@ -343,13 +358,13 @@ class ExactMatcher:
         
         return (filled_fields / len(important_fields)) * 10
     
-    def _match_by_unit_name(self, source_record: Dict, target_records: List[Dict]) -> MatchResult:
+    def _match_by_unit_name(self, source_record: Dict, index: Optional[ExactMatchIndex]) -> MatchResult:
         """
         基于单位名称进行精确匹配
         
         Args:
             source_record: 源记录（安全排查系统）
-            target_records: 目标记录列表（消防监督系统）
+            index: 目标记录（消防监督系统）的精确匹配索引
             
         Returns:
             MatchResult: 匹配结果
@@ -367,24 +382,20 @@ class ExactMatcher:
                 source_record=source_record
             )
         
-        for target_record in target_records:
-            target_unit_name = self._normalize_unit_name(
-                target_record.get('dwmc', '')
+        matched_targets = index.lookup_unit_name(source_unit_name) if index is not None else []
+        if matched_targets:
+            # 单位名称精确匹配（注意：现在只有信用代码才算精确匹配）
+            return MatchResult(
+                matched=True,
+                match_type='unit_name',
+                confidence=1.0,
+                source_record=source_record,
+                target_record=matched_targets[0],
+                match_details={
+                    'source_unit_name': source_unit_name,
+                    'target_unit_name': source_unit_name
+                }
             )
-            
-            if target_unit_name and source_unit_name == target_unit_name:
-                # 单位名称精确匹配（注意：现在只有信用代码才算精确匹配）
-                return MatchResult(
-                    matched=True,
-                    match_type='unit_name',
-                    confidence=1.0,
-                    source_record=source_record,
-                    target_record=target_record,
-                    match_details={
-                        'source_unit_name': source_unit_name,
-                        'target_unit_name': target_unit_name
-                    }
-                )
         
         return MatchResult(
             matched=False,
@@ -403,24 +414,7 @@ class ExactMatcher:
         Returns:
             str: 标准化后的信用代码
         """
-        if not credit_code:
-            return ''
-        
-        # 确保是字符串类型
-        credit_code_str = str(credit_code)
-        
-        # 移除空格和特殊字符
-        normalized = ''.join(credit_code_str.split())
-        normalized = normalized.replace('-', '').replace('_', '')
-        
-        # 转换为大写
-        normalized = normalized.upper()
-        
-        # 验证长度（统一社会信用代码应为18位）
-        if len(normalized) == 18:
-            return normalized
-        
-        return ''
+        return normalize_credit_code(credit_code)
     
     def _normalize_unit_name(self, unit_name) -> str:
         """
@@ -432,42 +426,22 @@ class ExactMatcher:
         Returns:
             str: 标准化后的单位名称
         """
-        if not unit_name:
-            return ''
-        
-        # 确保是字符串类型
-        unit_name_str = str(unit_name)
-        
-        # 移除首尾空格
-        normalized = self._safe_str(unit_name_str)
-        
-        # 统一括号格式
-        normalized = normalized.replace('（', '(').replace('）', ')')
-        normalized = normalized.replace('[', '(').replace(']', ')')
-        normalized = normalized.replace('【', '(').replace('】', ')')
-        
-        # 移除多余空格
-        normalized = ' '.join(normalized.split())
-        
-        # 转换为小写进行比较（避免大小写差异）
-        normalized = normalized.lower()
-        
-        return normalized
+        return normalize_unit_name(unit_name)
     
-    def match_single_record_multi(self, source_record: Dict, target_records: List[Dict]) -> MultiMatchResult:
+    def match_single_record_multi(self, source_record: Dict, target_records: Optional[List[Dict]] = None) -> MultiMatchResult:
         """
         对单条记录进行一对多精确匹配
         
         Args:
             source_record: 源记录（安全排查系统）
-            target_records: 目标记录列表（消防监督系统）
+            target_records: 目标记录列表（消防监督系统），None表示使用挂载的目标表索引
             
         Returns:
             MultiMatchResult: 一对多匹配结果
         """
         try:
             # 使用统一社会信用代码进行匹配
-            credit_code_matches = self._match_by_credit_code_multi(source_record, target_records)
+            credit_code_matches = self._match_by_credit_code_multi(source_record, self._resolve_index(target_records))
             
             if credit_code_matches:
                 # 按检查时间排序（最新的在前）
@@ -541,13 +515,13 @@ class ExactMatcher:
                 }
             )
     
-    def _match_by_credit_code_multi(self, source_record: Dict, target_records: List[Dict]) -> List[Dict]:
+    def _match_by_credit_code_multi(self, source_record: Dict, index: Optional[ExactMatchIndex]) -> List[Dict]:
         """
         基于统一社会信用代码进行一对多匹配
         
         Args:
             source_record: 源记录（安全排查系统）
-            target_records: 目标记录列表（消防监督系统）
+            index: 目标记录（消防监督系统）的精确匹配索引
             
         Returns:
             List[Dict]: 所有匹配的目标记录
@@ -560,17 +534,7 @@ class ExactMatcher:
         if not source_credit_code:
             return []
         
-        # 收集所有匹配的目标记录
-        matched_targets = []
-        for target_record in target_records:
-            target_credit_code = self._normalize_credit_code(
-                target_record.get('tyshxydm', '')
-            )
-            
-            if target_credit_code and source_credit_code == target_credit_code:
-                matched_targets.append(target_record)
-        
-        return matched_targets
+        return self._lookup_credit_code(source_credit_code, index)
     
     def _sort_matches_by_date(self, matches: List[Dict]) -> List[Dict]:
         """
@@ -636,13 +600,13 @@ class ExactMatcher:
         
         return None
     
-    def batch_match(self, source_records: List[Dict], target_records: List[Dict]) -> List[MatchResult]:
+    def batch_match(self, source_records: List[Dict], target_records: Optional[List[Dict]] = None) -> List[MatchResult]:
         """
-        批量精确匹配
+        批量精确匹配（目标列表只建一次哈希索引，每条源记录O(1)查找）
         
         Args:
             source_records: 源记录列表
-            target_records: 目标记录列表
+            target_records: 目标记录列表，None表示使用挂载的目标表索引
             
         Returns:
             List[MatchResult]: 匹配结果列表
@@ -651,10 +615,11 @@ class ExactMatcher:
         total_count = len(source_records)
         
         logger.info(f"开始批量精确匹配，共 {total_count} 条记录")
+        index = self._resolve_index(target_records)
         
         for i, source_record in enumerate(source_records):
             try:
-                result = self.match_single_record(source_record, target_records)
+                result = self._match_single_record_with_index(source_record, index)
                 results.append(result)
                 
                 # 每处理100条记录输出进度
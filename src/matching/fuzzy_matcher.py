@@ -8,13 +8,13 @@ import re
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import jieba
-import pypinyin
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 from .similarity_scorer import SimilarityCalculator
 from .match_result import MatchResult, MultiMatchResult
+from src.utils.pinyin_table import to_pinyin
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +36,20 @@ class SimilarityCalculator:
     def __init__(self, config: Dict):
         self.config = config
         self.chinese_config = config.get('string_similarity', {}).get('chinese_processing', {})
+        # 目标表特征库（TargetFeatureStore），挂载后目标侧预处理结果直接查表
+        self.feature_store = None
+    
+    def attach_feature_store(self, store):
+        """挂载目标表特征库（传入None则恢复逐次预处理）"""
+        self.feature_store = store
+    
+    def _preprocess_target(self, text: str) -> str:
+        """预处理目标侧字符串（特征库中已有则直接读取）"""
+        if self.feature_store is not None and text:
+            processed = self.feature_store.processed_text(text)
+            if processed is not None:
+                return processed
+        return self._preprocess_string(text)
         
     def calculate_string_similarity(self, str1: str, str2: str) -> float:
         """
@@ -53,7 +67,7 @@ class SimilarityCalculator:
         
         # 预处理字符串
         processed_str1 = self._preprocess_string(str1)
-        processed_str2 = self._preprocess_string(str2)
+        processed_str2 = self._preprocess_target(str2)
         
         if not processed_str1 or not processed_str2:
             return 0.0
@@ -70,9 +84,7 @@ class SimilarityCalculator:
         # 3. 移除余弦相似度，因为它在这种场景下性能极差
         # similarities['cosine'] = self._calculate_cosine_similarity(processed_str1, processed_str2)
         
-        # 4. 中文处理相似度
-        if self.chinese_config.get('enable_pinyin', False):
-            similarities['pinyin'] = self._calculate_pinyin_similarity(str1, str2)
+        # 4. 拼音相似度未参与下方加权（权重表中没有pinyin），不再逐对转换拼音
         
         # 加权平均计算最终相似度 - 权重已调整
         algorithms_config = [
@@ -95,6 +107,38 @@ class SimilarityCalculator:
         
         return min(1.0, max(0.0, final_similarity))
     
+    def score_many(self, source: str, candidates: List[str] = None,
+                   processed_candidates: Optional[List[str]] = None) -> np.ndarray:
+        """
+        一对多计算字符串相似度，结果与逐对调用 calculate_string_similarity 一致
+        
+        Args:
+            source: 源字符串
+            candidates: 候选字符串列表
+            processed_candidates: 已预处理的候选字符串（可在多个源字符串间复用）
+            
+        Returns:
+            np.ndarray: 每个候选的相似度分数 (0-1)
+        """
+        if processed_candidates is None:
+            processed_candidates = [self._preprocess_target(c) if c else '' for c in candidates or []]
+        
+        scores = np.zeros(len(processed_candidates), dtype=np.float64)
+        processed_source = self._preprocess_string(source) if source else ''
+        if not processed_source or not processed_candidates:
+            return scores
+        
+        # 拼音分数不在加权算法之列，与逐对计算一致不参与打分
+        levenshtein = process.cdist([processed_source], processed_candidates,
+                                    scorer=fuzz.token_set_ratio, dtype=np.float64)[0]
+        jaro_winkler = process.cdist([processed_source], processed_candidates,
+                                     scorer=fuzz.WRatio, dtype=np.float64)[0]
+        scores = levenshtein / 100.0 * 0.5 + jaro_winkler / 100.0 * 0.5
+        
+        empty = np.fromiter((not c for c in processed_candidates), dtype=bool, count=len(processed_candidates))
+        scores[empty] = 0.0
+        return np.clip(scores, 0.0, 1.0)
+    
     def calculate_numeric_similarity(self, num1: Optional[float], num2: Optional[float], 
                                    field_config: Dict) -> float:
         """
@@ -265,7 +309,7 @@ class SimilarityCalculator:
         
         # 标准化地址
         norm_addr1 = self._preprocess_string(addr1)
-        norm_addr2 = self._preprocess_string(addr2)
+        norm_addr2 = self._preprocess_target(addr2)
         
         if not norm_addr1 or not norm_addr2:
             return 0.0
@@ -279,8 +323,8 @@ class SimilarityCalculator:
     def _calculate_pinyin_similarity(self, str1: str, str2: str) -> float:
         """计算拼音相似度"""
         try:
-            pinyin1 = ''.join([item[0] for item in pypinyin.pinyin(str1, style=pypinyin.NORMAL)])
-            pinyin2 = ''.join([item[0] for item in pypinyin.pinyin(str2, style=pypinyin.NORMAL)])
+            pinyin1 = to_pinyin(str1)
+            pinyin2 = to_pinyin(str2)
             
             return fuzz.token_set_ratio(pinyin1, pinyin2) / 100.0
             
@@ -339,6 +383,17 @@ class FuzzyMatcher:
         }
         self.threshold = self.fuzzy_config.get('similarity_threshold', 0.75)
         self.similarity_calculator = SimilarityCalculator(config)
+        self.feature_store = None
+    
+    def attach_feature_store(self, store):
+        """
+        挂载目标表特征库，目标记录的预处理结果改为查表
+        
+        Args:
+            store: TargetFeatureStore实例（None表示不使用）
+        """
+        self.feature_store = store
+        self.similarity_calculator.attach_feature_store(store)
     
     def _safe_str(self, value, default: str = '') -> str:
         """安全地将任何类型转换为字符串并去除空白"""
@@ -362,10 +417,11 @@ class FuzzyMatcher:
         """
         # 收集所有候选匹配（分数超过阈值的记录）
         candidates = []
+        string_scores = self._prescore_string_fields(source_record, target_records)
         
-        for target_record in target_records:
+        for target_record, target_string_scores in zip(target_records, string_scores):
             score, field_similarities = self._calculate_record_similarity(
-                source_record, target_record
+                source_record, target_record, target_string_scores
             )
             
             if score >= self.threshold:
@@ -537,9 +593,39 @@ class FuzzyMatcher:
         
         return complete_fields / total_fields
     
-    def _calculate_record_similarity(self, source_record: Dict, target_record: Dict) -> Tuple[float, Dict]:
+    def _string_field_value(self, record: Dict, field: str) -> str:
+        """取字符串类型字段的比较值"""
+        value = record.get(field)
+        return str(value) if value is not None else ''
+    
+    def _prescore_string_fields(self, source_record: Dict, target_records: List[Dict]) -> List[Dict[str, float]]:
+        """
+        批量预计算字符串类型字段的相似度（一个源记录对全部候选一次性打分）
+        
+        Returns:
+            List[Dict[str, float]]: 与target_records一一对应的 {字段名: 相似度}
+        """
+        target_scores = [{} for _ in target_records]
+        if not target_records:
+            return target_scores
+        
+        for field_name, field_config in self.fields_config.items():
+            if field_config['match_type'] != 'string':
+                continue
+            source_value = self._string_field_value(source_record, field_config['source_field'])
+            target_values = [self._string_field_value(target, field_config.get('target_field'))
+                             for target in target_records]
+            scores = self.similarity_calculator.score_many(source_value, target_values)
+            for scores_by_field, score in zip(target_scores, scores):
+                scores_by_field[field_name] = float(score)
+        return target_scores
+    
+    def _calculate_record_similarity(self, source_record: Dict, target_record: Dict,
+                                     string_scores: Optional[Dict[str, float]] = None) -> Tuple[float, Dict]:
         """
         计算两条记录的相似度
+        
+        string_scores 为 _prescore_string_fields 批量预计算的字符串字段相似度，提供时直接复用
         """
         field_similarities = {}
         weighted_score = 0.0
@@ -570,9 +656,11 @@ class FuzzyMatcher:
             target_value_orig = target_record.get(target_field)
 
             similarity = 0.0
-            if match_type == 'string':
-                source_str = str(source_value_orig) if source_value_orig is not None else ''
-                target_str = str(target_value_orig) if target_value_orig is not None else ''
+            if match_type == 'string' and string_scores is not None and field_name in string_scores:
+                similarity = string_scores[field_name]
+            elif match_type == 'string':
+                source_str = self._string_field_value(source_record, source_field)
+                target_str = self._string_field_value(target_record, target_field)
                 similarity = self.similarity_calculator.calculate_string_similarity(source_str, target_str)
             elif match_type == 'address':
                 source_str = str(source_value_orig) if source_value_orig is not None else ''
@@ -694,10 +782,11 @@ class FuzzyMatcher:
         try:
             # 收集所有超过阈值的候选匹配
             candidates = []
+            string_scores = self._prescore_string_fields(source_record, target_records)
             
-            for target_record in target_records:
+            for target_record, target_string_scores in zip(target_records, string_scores):
                 score, field_similarities = self._calculate_record_similarity(
-                    source_record, target_record
+                    source_record, target_record, target_string_scores
                 )
                 
                 if score >= self.threshold:
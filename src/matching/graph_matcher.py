@@ -3,6 +3,7 @@ from pymongo.database import Database
 import numpy as np
 from typing import Dict
 import logging
+from ..database.collection_snapshot import iter_collection_batches
 
 logger = logging.getLogger(__name__)
 
@@ -60,26 +61,16 @@ class GraphMatcher:
             # 计算实际需要处理的数量
             actual_limit = limit if limit > 0 else collection.count_documents(query_filter)
             
-            for skip in range(0, actual_limit, batch_size):
-                current_batch_size = min(batch_size, actual_limit - skip)
-                
-                # 批量查询
-                cursor = collection.find(query_filter, projection).skip(skip).limit(current_batch_size)
-                
-                batch_count = 0
-                for unit in cursor:
+            # 优先使用列式快照，不可用时按_id范围分页读库
+            for batch in iter_collection_batches(collection, list(projection), batch_size, limit=limit):
+                for unit in batch:
                     self.add_unit_to_graph(unit, 'xfaqpc', 
                                            name_field='UNIT_NAME', 
                                            address_field='UNIT_ADDRESS', 
                                            person_field='LEGAL_PEOPLE')
-                    batch_count += 1
                 
-                processed_count += batch_count
+                processed_count += len(batch)
                 print(f"  Processed {processed_count}/{actual_limit} xfaqpc records...")
-                
-                # 如果批次不满，说明已经处理完了
-                if batch_count < current_batch_size:
-                    break
 
             # 2. 批量加载 消防监督管理系统 (xxj_shdwjbxx)
             print("Processing xxj_shdwjbxx collection...")
@@ -90,26 +81,15 @@ class GraphMatcher:
             actual_limit_xxj = limit if limit > 0 else collection_xxj.count_documents(query_filter)
             processed_count_xxj = 0
             
-            for skip in range(0, actual_limit_xxj, batch_size):
-                current_batch_size = min(batch_size, actual_limit_xxj - skip)
-                
-                # 批量查询
-                cursor = collection_xxj.find(query_filter, projection_xxj).skip(skip).limit(current_batch_size)
-                
-                batch_count = 0
-                for unit in cursor:
+            for batch in iter_collection_batches(collection_xxj, list(projection_xxj), batch_size, limit=limit):
+                for unit in batch:
                     self.add_unit_to_graph(unit, 'xxj', 
                                            name_field='dwmc', 
                                            address_field='dwdz', 
                                            person_field='fddbr')
-                    batch_count += 1
                 
-                processed_count_xxj += batch_count
+                processed_count_xxj += len(batch)
                 print(f"  Processed {processed_count_xxj}/{actual_limit_xxj} xxj records...")
-                
-                # 如果批次不满，说明已经处理完了
-                if batch_count < current_batch_size:
-                    break
 
             self._is_built = True
             print(f"Graph built successfully with {self.graph.number_of_nodes()} nodes and {self.graph.number_of_edges()} edges.")
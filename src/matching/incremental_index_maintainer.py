@@ -0,0 +1,648 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量索引维护器
+跟踪已建索引源表的新增、修改和删除（支持时使用MongoDB Change Stream，否则按 _id / 更新时间字段水位轮询），
+只为变更记录重新提取关键词/切片并更新受影响的倒排项，每次更新后索引版本号加一，避免每日少量数据刷新触发整表重建。
+倒排索引文件目标只为变更记录提取关键词，但会在内存中重新压缩并整体重写索引文件（耗时与索引大小成正比，不扫描源表）
+"""
+
+import time
+import logging
+from threading import Event, Lock, Thread
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from pymongo.errors import PyMongoError
+
+from .universal_text_matcher import FieldType, UniversalTextMatcher
+from .inverted_keyword_index import KeywordInvertedIndex, IndexVersionConflict, invalidate_keyword_index
+from .minhash_lsh_index import char_ngrams, invalidate_minhash_lsh_index
+from ..database.range_reader import IdRangeReader, normalize_id
+from ..database.index_versions import INDEX_STATE_COLLECTION
+from ..utils.config import get_index_maintenance_config
+from ..utils.tokenizer_service import get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+# 维护状态集合：每个索引目标一条记录（水位、Change Stream续传令牌、索引版本）
+STATE_COLLECTION = INDEX_STATE_COLLECTION
+
+# 切片索引关键词的停用词（与切片索引脚本一致）
+SLICE_KEYWORD_STOPWORDS = {'有限', '公司', '企业', '集团', '工厂', '商店', '中心'}
+
+# 倒排索引文件被其他写入者抢先更新时，基于新版本重新合并的次数
+INVERTED_FILE_APPLY_ATTEMPTS = 3
+
+# 进程内每个索引目标一把同步锁（多个维护器实例，如应用后台同步与索引构建器，共用）
+_target_locks: Dict[str, Lock] = {}
+_target_locks_guard = Lock()
+
+
+def _get_target_lock(key: str) -> Lock:
+    with _target_locks_guard:
+        return _target_locks.setdefault(key, Lock())
+
+
+class FullRebuildRequired(Exception):
+    """源表被删除/重命名等无法增量处理的变更，需要整表重建索引"""
+
+
+# ==================== 索引目标 ====================
+
+class IndexTarget:
+    """增量维护的索引目标（源表的一个字段及其索引存储）"""
+
+    kind = ''
+
+    def __init__(self, db, table_name: str, field_name: str):
+        self.db = db
+        self.table_name = table_name
+        self.field_name = field_name
+
+    @property
+    def key(self) -> str:
+        """维护状态键"""
+        return f"{self.kind}:{self.table_name}.{self.field_name}"
+
+    def describe(self) -> Dict[str, Any]:
+        """写入维护状态的目标参数（进程重启后据此重建目标）"""
+        return {'kind': self.kind, 'table_name': self.table_name, 'field_name': self.field_name}
+
+    def exists(self) -> bool:
+        """索引是否已构建"""
+        raise NotImplementedError
+
+    def indexed_ids(self) -> Set[Any]:
+        """索引中的全部文档ID"""
+        raise NotImplementedError
+
+    def apply(self, values: Dict[Any, Any], deletes: Set[Any]) -> Dict[str, int]:
+        """
+        更新受影响的倒排项
+
+        Args:
+            values: 新增或修改的文档 {文档ID: 字段值}
+            deletes: 删除的文档ID
+
+        Returns:
+            Dict: 更新统计
+        """
+        raise NotImplementedError
+
+
+class _KeywordTargetMixin:
+    """按通用文本匹配器的字段类型配置提取关键词"""
+
+    def _extract_keywords(self, value: Any, field_type: FieldType) -> Tuple[str, List[str]]:
+        config = self.text_matcher.field_configs.get(field_type, self.text_matcher.field_configs[FieldType.TEXT])
+        preprocessed_value = self.text_matcher._apply_preprocessing(value, config)
+        if not preprocessed_value:
+            return '', []
+        return preprocessed_value, self.text_matcher._apply_keyword_extraction(preprocessed_value, config) or []
+
+    def _resolve_field_type(self, stored_type: Optional[str], values: Dict[Any, Any]) -> FieldType:
+        if stored_type:
+            try:
+                return FieldType(stored_type)
+            except ValueError:
+                pass
+        samples = [str(v) for v in list(values.values())[:20] if v]
+        return self.text_matcher.detect_field_type(self.field_name, samples)
+
+
+class InvertedFileIndexTarget(_KeywordTargetMixin, IndexTarget):
+    """进程内压缩倒排索引文件（data/keyword_indexes）"""
+
+    kind = 'inverted_file'
+
+    def __init__(self, db, table_name: str, field_name: str, text_matcher, index_dir: Optional[str] = None):
+        super().__init__(db, table_name, field_name)
+        self.text_matcher = text_matcher
+        self.index_dir = index_dir
+
+    def describe(self) -> Dict[str, Any]:
+        return {**super().describe(), 'index_dir': str(self.index_dir) if self.index_dir else None}
+
+    def exists(self) -> bool:
+        return KeywordInvertedIndex.exists(self.table_name, self.field_name, self.index_dir)
+
+    def indexed_ids(self) -> Set[Any]:
+        index = KeywordInvertedIndex.load(self.table_name, self.field_name, self.index_dir)
+        return set(index.doc_ids()) if index is not None else set()
+
+    def apply(self, values: Dict[Any, Any], deletes: Set[Any]) -> Dict[str, int]:
+        """
+        只为变更文档提取关键词；倒排表在内存中合并后重新压缩，整体重写索引文件
+
+        保存时索引已被其他写入者替换（整表构建或其他进程的同步）则基于新版本重新合并，
+        不会用旧版本的合并结果覆盖更新的索引
+        """
+        upserts = None
+        for attempt in range(1, INVERTED_FILE_APPLY_ATTEMPTS + 1):
+            index = KeywordInvertedIndex.load(self.table_name, self.field_name, self.index_dir)
+            if index is None:
+                raise FullRebuildRequired(f"倒排索引不存在: {self.table_name}.{self.field_name}")
+
+            if upserts is None:
+                field_type = self._resolve_field_type(index.meta.get('field_type'), values)
+                upserts = {doc_id: self._extract_keywords(value, field_type)[1] for doc_id, value in values.items()}
+            result = index.apply_changes(upserts, deletes)
+            try:
+                index.save()
+            except IndexVersionConflict as e:
+                if attempt == INVERTED_FILE_APPLY_ATTEMPTS:
+                    raise
+                logger.info(f"{str(e)}，基于新版本重新合并 ({attempt}/{INVERTED_FILE_APPLY_ATTEMPTS})")
+                continue
+            invalidate_keyword_index(self.table_name, self.field_name)
+            return result
+
+
+class KeywordCollectionTarget(_KeywordTargetMixin, IndexTarget):
+    """Mongo关键词索引集合（{table}_{field}_keywords）"""
+
+    kind = 'keyword_collection'
+
+    def __init__(self, db, table_name: str, field_name: str, text_matcher, batch_size: int = 1000):
+        super().__init__(db, table_name, field_name)
+        self.text_matcher = text_matcher
+        self.batch_size = batch_size
+        self.index_collection = db[f"{table_name}_{field_name}_keywords"]
+
+    def _filter(self) -> Dict[str, str]:
+        return {'source_table': self.table_name, 'field_name': self.field_name}
+
+    def exists(self) -> bool:
+        return self.index_collection.count_documents(self._filter(), limit=1) > 0
+
+    def indexed_ids(self) -> Set[Any]:
+        pipeline = [{'$match': self._filter()}, {'$group': {'_id': '$doc_id'}}]
+        return {doc['_id'] for doc in self.index_collection.aggregate(pipeline, allowDiskUse=True)}
+
+    def apply(self, values: Dict[Any, Any], deletes: Set[Any]) -> Dict[str, int]:
+        changed_ids = list(set(values) | set(deletes))
+        removed = 0
+        for start in range(0, len(changed_ids), self.batch_size):
+            removed += self.index_collection.delete_many({
+                **self._filter(), 'doc_id': {'$in': changed_ids[start:start + self.batch_size]}
+            }).deleted_count
+
+        sample = self.index_collection.find_one(self._filter(), {'field_type': 1}) or {}
+        field_type = self._resolve_field_type(sample.get('field_type'), values)
+
+        postings = []
+        added = 0
+        for doc_id, value in values.items():
+            preprocessed_value, keywords = self._extract_keywords(value, field_type)
+            for keyword in keywords:
+                postings.append({
+                    'doc_id': doc_id,
+                    'source_table': self.table_name,
+                    'field_name': self.field_name,
+                    'field_type': field_type.value,
+                    'keyword': keyword,
+                    'original_value': str(value),
+                    'preprocessed_value': preprocessed_value,
+                    'created_at': time.time()
+                })
+                added += 1
+            if len(postings) >= self.batch_size:
+                self.index_collection.insert_many(postings, ordered=False)
+                postings = []
+        if postings:
+            self.index_collection.insert_many(postings, ordered=False)
+
+        return {'removed': removed, 'added': added}
+
+
+class NameSliceTarget(IndexTarget):
+    """单位名称切片/关键词索引集合（{table}_name_slices、{table}_name_keywords）"""
+
+    kind = 'name_slices'
+
+    def __init__(self, db, table_name: str, field_name: str, batch_size: int = 1000):
+        super().__init__(db, table_name, field_name)
+        self.batch_size = batch_size
+        self.slice_collection = db[f"{table_name}_name_slices"]
+        self.keyword_collection = db[f"{table_name}_name_keywords"]
+
+    def exists(self) -> bool:
+        return self.slice_collection.count_documents({}, limit=1) > 0
+
+    def indexed_ids(self) -> Set[Any]:
+        pipeline = [{'$group': {'_id': '$doc_id'}}]
+        return {doc['_id'] for doc in self.slice_collection.aggregate(pipeline, allowDiskUse=True)}
+
+    @staticmethod
+    def _extract_keywords(text: str) -> Set[str]:
+        keywords = set()
+        for word in get_tokenizer().tokenize(text):
+            word = word.strip()
+            if len(word) >= 2 and word not in SLICE_KEYWORD_STOPWORDS:
+                keywords.add(word)
+        return keywords
+
+    def apply(self, values: Dict[Any, Any], deletes: Set[Any]) -> Dict[str, int]:
+        changed_ids = list(set(values) | set(deletes))
+        removed = 0
+        for start in range(0, len(changed_ids), self.batch_size):
+            id_filter = {'doc_id': {'$in': changed_ids[start:start + self.batch_size]}}
+            removed += self.slice_collection.delete_many(id_filter).deleted_count
+            self.keyword_collection.delete_many(id_filter)
+
+        slice_data, keyword_data = [], []
+        for doc_id, value in values.items():
+            unit_name = str(value).strip()
+            slices_3 = char_ngrams(unit_name, (3,))
+            for slice_text in char_ngrams(unit_name, (2, 3)):
+                slice_data.append({
+                    'slice': slice_text,
+                    'doc_id': doc_id,
+                    'unit_name': unit_name,
+                    'slice_type': '3gram' if slice_text in slices_3 else '2gram'
+                })
+            for keyword in self._extract_keywords(unit_name):
+                keyword_data.append({'keyword': keyword, 'doc_id': doc_id, 'unit_name': unit_name})
+
+        added = len(slice_data)
+        for start in range(0, len(slice_data), self.batch_size):
+            self.slice_collection.insert_many(slice_data[start:start + self.batch_size], ordered=False)
+        for start in range(0, len(keyword_data), self.batch_size):
+            self.keyword_collection.insert_many(keyword_data[start:start + self.batch_size], ordered=False)
+
+        invalidate_minhash_lsh_index(self.table_name, self.field_name)
+        return {'removed': removed, 'added': added}
+
+
+# ==================== 维护器 ====================
+
+class IncrementalIndexMaintainer:
+    """增量索引维护器"""
+
+    def __init__(self, db, config: Optional[Dict[str, Any]] = None):
+        """
+        初始化维护器
+
+        Args:
+            db: MongoDB数据库
+            config: 维护配置（覆盖 high_performance.json 的 index_maintenance 节）
+        """
+        self.db = db
+        self.config = {
+            'use_change_streams': True,      # 副本集/分片集群上使用Change Stream
+            'updated_field': 'updated_time',  # 轮询模式下识别修改记录的更新时间字段
+            'poll_interval': 300,             # 后台同步间隔（秒）
+            'batch_size': 1000,
+            'max_await_ms': 1000              # Change Stream单次等待时间
+        }
+        try:
+            self.config.update(get_index_maintenance_config())
+        except Exception as e:
+            logger.debug(f"读取增量维护配置失败，使用默认配置: {str(e)}")
+        self.config.update(config or {})
+
+        self.state_collection = db[STATE_COLLECTION]
+        self._targets: Dict[str, IndexTarget] = {}
+        self._change_streams_supported: Optional[bool] = None
+        self._lock = Lock()
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+
+        self.stats = {
+            'syncs': 0,
+            'documents_upserted': 0,
+            'documents_deleted': 0,
+            'full_rebuilds_required': 0,
+            'last_sync_time': None
+        }
+
+    # ==================== 目标注册与状态 ====================
+
+    def register(self, target: IndexTarget) -> IndexTarget:
+        """注册索引目标（同键目标只保留一个）"""
+        with self._lock:
+            return self._targets.setdefault(target.key, target)
+
+    def register_persisted_targets(self, text_matcher=None) -> List[IndexTarget]:
+        """
+        按维护状态集合中的记录重建并注册索引目标（进程启动后恢复后台同步范围）
+
+        Args:
+            text_matcher: 关键词目标使用的通用文本匹配器（None时按需创建）
+
+        Returns:
+            List[IndexTarget]: 注册的目标
+        """
+        targets = []
+        for state in self.state_collection.find({}):
+            kind = state.get('kind')
+            table_name, field_name = state.get('table_name'), state.get('field_name')
+            if not (kind and table_name and field_name):
+                # 旧版本状态只有键：kind:table.field
+                kind, _, qualified = str(state['_id']).partition(':')
+                table_name, _, field_name = qualified.rpartition('.')
+            if not (table_name and field_name):
+                continue
+
+            if kind == NameSliceTarget.kind:
+                target = NameSliceTarget(self.db, table_name, field_name, self.config['batch_size'])
+            elif kind in (InvertedFileIndexTarget.kind, KeywordCollectionTarget.kind):
+                if text_matcher is None:
+                    text_matcher = UniversalTextMatcher(None)
+                if kind == InvertedFileIndexTarget.kind:
+                    target = InvertedFileIndexTarget(self.db, table_name, field_name, text_matcher,
+                                                     state.get('index_dir'))
+                else:
+                    target = KeywordCollectionTarget(self.db, table_name, field_name, text_matcher,
+                                                     self.config['batch_size'])
+            else:
+                logger.debug(f"未知的索引目标类型，跳过: {state['_id']}")
+                continue
+            targets.append(self.register(target))
+
+        logger.info(f"已从维护状态恢复 {len(targets)} 个索引目标")
+        return targets
+
+    def _load_state(self, target: IndexTarget) -> Optional[Dict[str, Any]]:
+        return self.state_collection.find_one({'_id': target.key})
+
+    def _save_state(self, target: IndexTarget, state: Dict[str, Any]):
+        state = {k: v for k, v in state.items() if k != '_id'}
+        state.update(target.describe())
+        state['updated_at'] = time.time()
+        self.state_collection.replace_one({'_id': target.key}, state, upsert=True)
+
+    def get_index_version(self, target: IndexTarget) -> int:
+        """索引版本（每次整表构建或增量更新后加一）"""
+        state = self._load_state(target) or {}
+        return int(state.get('index_version', 0))
+
+    def _capture_watermark(self, collection) -> Dict[str, Any]:
+        """记录源表当前水位：最大_id、更新时间字段最大值、记录数、Change Stream续传令牌"""
+        last = list(collection.find({}, {'_id': 1}).sort('_id', -1).limit(1))
+        last_id = last[0]['_id'] if last else None
+        watermark = {
+            'last_id': last_id,
+            'last_updated': self._max_updated_value(collection),
+            'doc_count': collection.count_documents({'_id': {'$lte': last_id}}) if last_id is not None else 0,
+            'resume_token': self._open_resume_token(collection)
+        }
+        return watermark
+
+    def _max_updated_value(self, collection) -> Any:
+        updated_field = self.config.get('updated_field')
+        if not updated_field:
+            return None
+        last = list(collection.find({updated_field: {'$exists': True}}, {updated_field: 1})
+                    .sort(updated_field, -1).limit(1))
+        return last[0].get(updated_field) if last else None
+
+    def _open_resume_token(self, collection) -> Any:
+        """打开Change Stream获取当前续传令牌（不支持时返回None）"""
+        if not self.config['use_change_streams'] or self._change_streams_supported is False:
+            return None
+        try:
+            with collection.watch(max_await_time_ms=1) as stream:
+                stream.try_next()
+                token = stream.resume_token
+            self._change_streams_supported = True
+            return token
+        except (PyMongoError, NotImplementedError, TypeError, AttributeError) as e:
+            if self._change_streams_supported is None:
+                logger.info(f"Change Stream不可用（{type(e).__name__}），使用水位轮询维护索引")
+            self._change_streams_supported = False
+            return None
+
+    def mark_baseline(self, target: IndexTarget):
+        """
+        整表构建前记录水位基线（构建期间的变更会在下一次同步时重放，更新是幂等的）
+
+        Args:
+            target: 索引目标
+        """
+        self.register(target)
+        collection = self.db[target.table_name]
+        state = self._load_state(target) or {}
+        state.update(self._capture_watermark(collection))
+        state['index_version'] = int(state.get('index_version', 0)) + 1
+        state['mode'] = 'full_build'
+        self._save_state(target, state)
+
+    # ==================== 变更收集 ====================
+
+    def _collect_from_change_stream(self, collection, target: IndexTarget,
+                                    state: Dict[str, Any]) -> Optional[Tuple[Dict, Set, Dict]]:
+        """从续传令牌处读取Change Stream，返回 (变更文档, 删除ID, 新水位)，不可用时返回None"""
+        token = state.get('resume_token')
+        if token is None or not self.config['use_change_streams'] or self._change_streams_supported is False:
+            return None
+
+        field = target.field_name
+        values: Dict[Any, Any] = {}
+        deletes: Set[Any] = set()
+        try:
+            with collection.watch(full_document='updateLookup', resume_after=token,
+                                  max_await_time_ms=self.config['max_await_ms']) as stream:
+                while stream.alive:
+                    change = stream.try_next()
+                    if change is None:
+                        break
+                    operation = change['operationType']
+                    if operation in ('drop', 'rename', 'dropDatabase', 'invalidate'):
+                        raise FullRebuildRequired(f"源表发生 {operation} 变更: {collection.name}")
+
+                    doc_id = change.get('documentKey', {}).get('_id')
+                    if operation == 'update':
+                        description = change.get('updateDescription', {})
+                        touched = list(description.get('updatedFields', {})) + list(description.get('removedFields', []))
+                        if not any(path == field or path.startswith(f"{field}.") for path in touched):
+                            continue  # 未修改索引字段
+                    if operation in ('insert', 'replace', 'update') and change.get('fullDocument') is not None:
+                        values[doc_id] = change['fullDocument'].get(field)
+                        deletes.discard(doc_id)
+                    elif operation in ('insert', 'replace', 'update', 'delete'):
+                        # 回查时文档已被删除
+                        deletes.add(doc_id)
+                        values.pop(doc_id, None)
+                new_token = stream.resume_token
+
+        except FullRebuildRequired:
+            raise
+        except (PyMongoError, NotImplementedError, TypeError, AttributeError) as e:
+            # 令牌过期（oplog已滚动）等情况退回水位轮询
+            logger.warning(f"读取Change Stream失败，退回水位轮询: {collection.name} - {str(e)}")
+            return None
+
+        new_state = dict(state)
+        new_state['resume_token'] = new_token
+        return values, deletes, new_state
+
+    def _collect_by_polling(self, collection, target: IndexTarget,
+                            state: Dict[str, Any]) -> Tuple[Dict, Set, Dict]:
+        """按水位轮询：_id大于水位的为新增，更新时间字段大于水位的为修改，水位以下记录数减少时比对ID找出删除"""
+        field = target.field_name
+        updated_field = self.config.get('updated_field')
+        last_id = normalize_id(state.get('last_id'))
+        values: Dict[Any, Any] = {}
+        deletes: Set[Any] = set()
+        new_state = dict(state)
+
+        if last_id is None:
+            # 无水位（索引由旧版本构建）：与索引中的文档ID整体比对
+            indexed_ids = target.indexed_ids()
+            current_ids = set()
+            for batch in IdRangeReader(collection, projection={field: 1},
+                                       batch_size=self.config['batch_size']).iter_batches():
+                for doc in batch:
+                    current_ids.add(doc['_id'])
+                    if doc['_id'] not in indexed_ids and doc.get(field):
+                        values[doc['_id']] = doc.get(field)
+            deletes = indexed_ids - current_ids
+            new_state.update(self._capture_watermark(collection))
+            return values, deletes, new_state
+
+        # 1. 新增记录
+        max_id = last_id
+        for batch in IdRangeReader(collection, projection={field: 1}, batch_size=self.config['batch_size'],
+                                   start_after=last_id).iter_batches():
+            for doc in batch:
+                values[doc['_id']] = doc.get(field)
+            max_id = batch[-1]['_id']
+
+        # 2. 修改记录
+        last_updated = state.get('last_updated')
+        if updated_field and last_updated is not None:
+            for doc in collection.find({updated_field: {'$gt': last_updated}, '_id': {'$lte': last_id}},
+                                       {field: 1}):
+                values[doc['_id']] = doc.get(field)
+
+        # 3. 删除记录：水位以下记录数少于基线时才比对ID
+        old_count = collection.count_documents({'_id': {'$lte': last_id}})
+        if old_count < state.get('doc_count', 0):
+            current_ids = set()
+            for batch in IdRangeReader(collection, query={'_id': {'$lte': last_id}}, projection={'_id': 1},
+                                       batch_size=self.config['batch_size'] * 10).iter_batches():
+                current_ids.update(doc['_id'] for doc in batch)
+            deletes = {doc_id for doc_id in target.indexed_ids()
+                       if doc_id not in current_ids and doc_id not in values}
+
+        new_state.update({
+            'last_id': max_id,
+            'last_updated': self._max_updated_value(collection),
+            'doc_count': collection.count_documents({'_id': {'$lte': max_id}})
+        })
+        if self.config['use_change_streams'] and new_state.get('resume_token') is None:
+            new_state['resume_token'] = self._open_resume_token(collection)
+        return values, deletes, new_state
+
+    # ==================== 同步 ====================
+
+    def sync_target(self, target: IndexTarget) -> Dict[str, Any]:
+        """
+        将单个索引目标同步到源表当前内容
+
+        Returns:
+            Dict: 同步结果（status: updated / unchanged / rebuild_required / error）
+        """
+        start_time = time.time()
+        target = self.register(target)
+        # 同一目标的同步在进程内串行执行（跨进程的倒排索引文件写入由索引自身的文件锁串行化）
+        with _get_target_lock(target.key):
+            return self._sync_target_locked(target, start_time)
+
+    def _sync_target_locked(self, target: IndexTarget, start_time: float) -> Dict[str, Any]:
+        collection = self.db[target.table_name]
+        result = {'target': target.key, 'table_name': target.table_name, 'field_name': target.field_name}
+
+        try:
+            state = self._load_state(target) or {}
+            collected = self._collect_from_change_stream(collection, target, state)
+            mode = 'change_stream'
+            if collected is None:
+                collected = self._collect_by_polling(collection, target, state)
+                mode = 'polling'
+            values, deletes, new_state = collected
+
+            # 索引字段被清空的记录按删除处理
+            deletes |= {doc_id for doc_id, value in values.items() if not value}
+            values = {doc_id: value for doc_id, value in values.items() if value}
+
+            if values or deletes:
+                result.update(target.apply(values, deletes))
+                new_state['index_version'] = int(state.get('index_version', 0)) + 1
+            new_state['mode'] = mode
+            self._save_state(target, new_state)
+
+            self.stats['syncs'] += 1
+            self.stats['documents_upserted'] += len(values)
+            self.stats['documents_deleted'] += len(deletes)
+            self.stats['last_sync_time'] = time.time()
+
+            result.update({
+                'status': 'updated' if values or deletes else 'unchanged',
+                'mode': mode,
+                'upserted': len(values),
+                'deleted': len(deletes),
+                'index_version': int(new_state.get('index_version', 0)),
+                'sync_time': time.time() - start_time
+            })
+            if values or deletes:
+                logger.info(f"🔄 索引增量同步: {target.key}, 新增/修改 {len(values)}, 删除 {len(deletes)}, "
+                           f"方式 {mode}, 版本 {result['index_version']}, 耗时 {result['sync_time']:.2f}s")
+            return result
+
+        except FullRebuildRequired as e:
+            self.stats['full_rebuilds_required'] += 1
+            self.state_collection.delete_one({'_id': target.key})
+            logger.warning(f"索引需要整表重建: {target.key} - {str(e)}")
+            result.update({'status': 'rebuild_required', 'reason': str(e)})
+            return result
+
+        except Exception as e:
+            logger.error(f"索引增量同步失败: {target.key} - {str(e)}")
+            result.update({'status': 'error', 'error': str(e)})
+            return result
+
+    def sync(self, table_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """同步已注册的全部（或指定源表的）索引目标"""
+        with self._lock:
+            targets = [t for t in self._targets.values() if table_name is None or t.table_name == table_name]
+        return [self.sync_target(target) for target in targets if target.exists()]
+
+    # ==================== 后台同步 ====================
+
+    def start(self, interval: Optional[float] = None):
+        """启动后台同步线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        interval = interval or self.config['poll_interval']
+        self._stop_event.clear()
+
+        def _run():
+            while not self._stop_event.is_set():
+                try:
+                    self.sync()
+                except Exception as e:
+                    logger.error(f"后台索引同步失败: {str(e)}")
+                self._stop_event.wait(interval)
+
+        self._thread = Thread(target=_run, name='index-maintainer', daemon=True)
+        self._thread.start()
+        logger.info(f"🔄 增量索引维护已启动，同步间隔 {interval}s")
+
+    def stop(self):
+        """停止后台同步线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取维护统计"""
+        with self._lock:
+            targets = list(self._targets)
+        return {
+            **self.stats,
+            'change_streams_supported': self._change_streams_supported,
+            'targets': targets
+        }
@@ -12,13 +12,13 @@
 5. 多层次匹配：结合字符级、词汇级、语义级匹配
 """
 
-import jieba
 import re
 import logging
 from typing import List, Dict, Set, Tuple, Optional
 from dataclasses import dataclass
 from fuzzywuzzy import fuzz
 import numpy as np
+from ..utils.tokenizer_service import get_tokenizer
 
 logger = logging.getLogger(__name__)
 
@@ -199,7 +199,7 @@ class IntelligentUnitNameMatcher:
                 break
         
         # 3. 对剩余部分进行分词
-        words = jieba.lcut(remaining)
+        words = get_tokenizer().lcut(remaining)
         words = [w for w in words if w.strip() and w not in self.stop_words]
         
         # 4. 分类词汇
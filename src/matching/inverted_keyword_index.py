@@ -0,0 +1,682 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程内压缩倒排索引
+替代 {table}_{field}_keywords Mongo索引集合：关键词驻留为整数ID，
+倒排表为排序后差分编码的整数数组，落盘为可内存映射的文件，重启后秒级加载
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+from array import array
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+import numpy as np
+from scipy import sparse
+from bson import ObjectId, json_util
+
+from ..utils.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+# 默认索引目录：项目根目录下的 data/keyword_indexes
+DEFAULT_INDEX_DIR = Path(__file__).parent.parent.parent / "data" / "keyword_indexes"
+
+
+class IndexVersionConflict(RuntimeError):
+    """增量更新所基于的索引版本已被其他写入者替换"""
+
+
+class KeywordInvertedIndex:
+    """压缩倒排索引（关键词 -> 差分编码的文档序号列表）"""
+
+    FORMAT_VERSION = 1
+
+    # 批量检索时不参与候选生成的高频关键词文档频率阈值
+    COMMON_DF_CAP = 5000
+
+    # 批量检索时每批缓存的高频关键词组合重叠计数上限
+    MAX_CACHED_SIGNATURES = 64
+
+    META_FILE = 'meta.json'
+    VOCABULARY_FILE = 'vocabulary.json'
+    OFFSETS_FILE = 'offsets.npy'
+    POSTINGS_FILE = 'postings.npy'
+    OBJECT_ID_FILE = 'doc_ids.npy'
+    RAW_ID_FILE = 'doc_ids.json'
+    # 索引目录下指向当前版本子目录的指针文件，以及串行化写入者的锁文件
+    CURRENT_FILE = 'CURRENT'
+    LOCK_FILE = 'write.lock'
+
+    def __init__(self, table_name: str, field_name: str, index_dir: Optional[str] = None):
+        """
+        初始化倒排索引
+
+        Args:
+            table_name: 源表名
+            field_name: 字段名
+            index_dir: 索引根目录（默认 data/keyword_indexes）
+        """
+        self.table_name = table_name
+        self.field_name = field_name
+        self.index_dir = Path(index_dir) if index_dir else DEFAULT_INDEX_DIR
+        self.meta: Dict[str, Any] = {}
+        # 加载时所在的版本子目录名（新建索引为None）
+        self.version_name: Optional[str] = None
+
+        # 查询结构
+        self._vocabulary: List[str] = []
+        self._keyword_ids: Dict[str, int] = {}
+        self._offsets: Optional[np.ndarray] = None
+        self._postings: Optional[np.ndarray] = None
+        self._object_ids: Optional[np.ndarray] = None
+        self._raw_ids: Optional[List[Any]] = None
+
+        # 构建缓冲：(关键词ID, 文档序号) 对，按文档顺序追加
+        self._build_keyword_ids = array('I')
+        self._build_doc_positions = array('I')
+        self._build_doc_ids: List[Any] = []
+
+    @property
+    def path(self) -> Path:
+        """索引根目录（其下为各版本子目录与指针文件）"""
+        return self.index_dir / f"{self.table_name}_{self.field_name}"
+
+    @classmethod
+    def _current_version_path(cls, root: Path) -> Optional[Path]:
+        """指针文件指向的版本子目录，未构建时返回None"""
+        try:
+            version_name = (root / cls.CURRENT_FILE).read_text(encoding='utf-8').strip()
+        except FileNotFoundError:
+            return None
+        return root / version_name if version_name else None
+
+    @property
+    def doc_count(self) -> int:
+        """文档数量"""
+        if self._object_ids is not None:
+            return len(self._object_ids)
+        if self._raw_ids is not None:
+            return len(self._raw_ids)
+        return len(self._build_doc_ids)
+
+    @property
+    def keyword_count(self) -> int:
+        """关键词数量"""
+        return len(self._vocabulary)
+
+    # ==================== 构建 ====================
+
+    def add_document(self, doc_id: Any, keywords: Iterable[str]) -> int:
+        """
+        追加一个文档的关键词
+
+        Args:
+            doc_id: 文档ID
+            keywords: 关键词列表
+
+        Returns:
+            int: 写入的关键词数量
+        """
+        position = len(self._build_doc_ids)
+        added = 0
+
+        for keyword in set(keywords):
+            keyword_id = self._keyword_ids.get(keyword)
+            if keyword_id is None:
+                keyword_id = len(self._vocabulary)
+                self._keyword_ids[keyword] = keyword_id
+                self._vocabulary.append(keyword)
+            self._build_keyword_ids.append(keyword_id)
+            self._build_doc_positions.append(position)
+            added += 1
+
+        if added:
+            self._build_doc_ids.append(doc_id)
+        return added
+
+    def finalize(self, extra_meta: Optional[Dict[str, Any]] = None):
+        """将构建缓冲压缩为差分编码的倒排表"""
+        keyword_ids = np.frombuffer(self._build_keyword_ids, dtype=np.uint32)
+        positions = np.frombuffer(self._build_doc_positions, dtype=np.uint32)
+
+        # 稳定排序：同一关键词内文档序号保持追加顺序（即升序）
+        order = np.argsort(keyword_ids, kind='stable')
+        sorted_positions = positions[order]
+        counts = np.bincount(keyword_ids, minlength=len(self._vocabulary)) if len(keyword_ids) else \
+            np.zeros(len(self._vocabulary), dtype=np.int64)
+
+        offsets = np.zeros(len(self._vocabulary) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        # 差分编码：每个倒排表首元素保留绝对值
+        deltas = sorted_positions.copy()
+        if len(deltas) > 1:
+            deltas[1:] -= sorted_positions[:-1]
+        starts = offsets[:-1][counts > 0]
+        deltas[starts] = sorted_positions[starts]
+
+        self._offsets = offsets
+        self._postings = deltas
+
+        if self._build_doc_ids and all(isinstance(doc_id, ObjectId) for doc_id in self._build_doc_ids):
+            self._object_ids = np.frombuffer(
+                b''.join(doc_id.binary for doc_id in self._build_doc_ids), dtype=np.uint8
+            ).reshape(-1, 12)
+        else:
+            self._raw_ids = list(self._build_doc_ids)
+
+        self.meta = {
+            'format_version': self.FORMAT_VERSION,
+            'table_name': self.table_name,
+            'field_name': self.field_name,
+            'doc_count': self.doc_count,
+            'keyword_count': self.keyword_count,
+            'posting_count': int(len(deltas)),
+            'doc_id_kind': 'object_id' if self._object_ids is not None else 'raw',
+            'built_at': time.time(),
+            'index_version': 1
+        }
+        if extra_meta:
+            self.meta.update(extra_meta)
+
+        self._build_keyword_ids = array('I')
+        self._build_doc_positions = array('I')
+        self._build_doc_ids = []
+
+    def doc_ids(self) -> List[Any]:
+        """全部文档ID（按文档序号）"""
+        if self._object_ids is not None:
+            return [ObjectId(row.tobytes()) for row in self._object_ids]
+        return list(self._raw_ids or [])
+
+    def _decode_all(self) -> Tuple[np.ndarray, np.ndarray]:
+        """解码全部倒排表，返回 (关键词ID数组, 文档序号数组)，按关键词、文档序号升序"""
+        counts = np.diff(np.asarray(self._offsets))
+        keyword_ids = np.repeat(np.arange(len(counts), dtype=np.uint32), counts)
+        absolute = np.cumsum(self._postings, dtype=np.int64)
+        # 每段首元素为绝对值：减去该段之前的累计值
+        starts = np.asarray(self._offsets[:-1])
+        bases = np.where(starts > 0, absolute[np.maximum(starts - 1, 0)], 0) if len(absolute) else starts
+        return keyword_ids, absolute - np.repeat(bases, counts)
+
+    def apply_changes(self, upserts: Dict[Any, Iterable[str]], deletes: Iterable[Any] = ()) -> Dict[str, int]:
+        """
+        增量更新倒排表：移除变更/删除文档的倒排项，追加变更文档的新关键词，重新压缩后版本号加一
+
+        只需为变更文档提取关键词，已有文档的倒排项直接在压缩数组上合并，无需重新扫描源表
+
+        Args:
+            upserts: 新增或修改的文档 {文档ID: 关键词列表}
+            deletes: 删除的文档ID
+
+        Returns:
+            Dict: {'removed': 移除的文档数, 'added': 追加的文档数}
+        """
+        changed_ids = set(upserts) | set(deletes)
+        old_doc_ids = self.doc_ids()
+        removed = np.fromiter((doc_id in changed_ids for doc_id in old_doc_ids), dtype=bool,
+                              count=len(old_doc_ids))
+
+        keyword_ids, positions = self._decode_all()
+        keep = ~removed[positions] if len(positions) else np.empty(0, dtype=bool)
+        # 保留文档的新序号（压缩掉被移除的文档）
+        new_positions = np.cumsum(~removed) - 1
+
+        self._build_keyword_ids = array('I', keyword_ids[keep].astype(np.uint32).tobytes())
+        self._build_doc_positions = array('I', new_positions[positions[keep]].astype(np.uint32).tobytes())
+        self._build_doc_ids = [doc_id for doc_id, gone in zip(old_doc_ids, removed) if not gone]
+        kept_count = len(self._build_doc_ids)
+
+        added = 0
+        for doc_id, keywords in upserts.items():
+            if self.add_document(doc_id, keywords):
+                added += 1
+
+        index_version = int(self.meta.get('index_version', 1)) + 1
+        extra_meta = {k: v for k, v in self.meta.items()
+                      if k not in ('doc_count', 'keyword_count', 'posting_count', 'doc_id_kind', 'built_at')}
+        built_at = self.meta.get('built_at')
+        self._object_ids = self._raw_ids = None
+        self.finalize(extra_meta)
+        self.meta.update({'built_at': built_at, 'index_version': index_version, 'updated_at': time.time()})
+
+        logger.info(f"🔄 倒排索引增量更新: {self.table_name}.{self.field_name}, "
+                   f"移除 {int(removed.sum())} 个文档, 追加 {added} 个文档, "
+                   f"保留 {kept_count} 个文档, 版本 {index_version}")
+        return {'removed': int(removed.sum()), 'added': added}
+
+    def save(self):
+        """
+        持有写锁写入新的版本子目录后原子切换指针文件
+
+        不重命名或删除正在使用的版本目录（Windows下内存映射中的文件无法删除或替换），
+        旧版本目录在切换后尽力清理，清理失败的留待下次保存。
+        从磁盘加载后增量更新的索引，若期间已有其他写入者（整表构建或另一同步进程）切换了版本，
+        抛出IndexVersionConflict，避免以旧版本为基础的合并结果覆盖更新的索引
+
+        Raises:
+            IndexVersionConflict: 当前版本已不是本索引加载时的版本
+        """
+        root = self.path
+        root.mkdir(parents=True, exist_ok=True)
+
+        with FileLock(root / self.LOCK_FILE):
+            current_path = self._current_version_path(root)
+            current_name = current_path.name if current_path is not None else None
+            if self.version_name is not None and current_name != self.version_name:
+                raise IndexVersionConflict(f"倒排索引已被其他写入者更新: {root} "
+                                           f"(加载版本 {self.version_name}, 当前版本 {current_name})")
+
+            version_name = f"v{time.time_ns()}_{os.getpid()}"
+            version_path = root / version_name
+            version_path.mkdir()
+
+            np.save(version_path / self.OFFSETS_FILE, self._offsets)
+            np.save(version_path / self.POSTINGS_FILE, self._postings)
+            if self._object_ids is not None:
+                np.save(version_path / self.OBJECT_ID_FILE, self._object_ids)
+            else:
+                with open(version_path / self.RAW_ID_FILE, 'w', encoding='utf-8') as f:
+                    f.write(json_util.dumps(self._raw_ids))
+            with open(version_path / self.VOCABULARY_FILE, 'w', encoding='utf-8') as f:
+                json.dump(self._vocabulary, f, ensure_ascii=False)
+            with open(version_path / self.META_FILE, 'w', encoding='utf-8') as f:
+                json.dump(self.meta, f, ensure_ascii=False, indent=2)
+
+            pointer_temp = root / f"{self.CURRENT_FILE}.{version_name}.tmp"
+            with open(pointer_temp, 'w', encoding='utf-8') as f:
+                f.write(version_name)
+            os.replace(pointer_temp, root / self.CURRENT_FILE)
+            self.version_name = version_name
+
+            # 其他写入者只在持有写锁时创建版本目录，此处清理的只会是已被替换的旧版本
+            for entry in root.iterdir():
+                if entry.is_dir():
+                    if entry.name != version_name:
+                        shutil.rmtree(entry, ignore_errors=True)
+                elif entry.name not in (self.CURRENT_FILE, self.LOCK_FILE):
+                    # 单目录布局遗留的索引文件
+                    try:
+                        entry.unlink()
+                    except OSError:
+                        pass
+
+        logger.info(f"💾 倒排索引已保存: {version_path}, "
+                   f"文档 {self.meta.get('doc_count', 0)}, 关键词 {self.meta.get('keyword_count', 0)}, "
+                   f"倒排项 {self.meta.get('posting_count', 0)}")
+
+    # ==================== 加载 ====================
+
+    @classmethod
+    def exists(cls, table_name: str, field_name: str, index_dir: Optional[str] = None) -> bool:
+        """检查索引文件是否存在"""
+        base_dir = Path(index_dir) if index_dir else DEFAULT_INDEX_DIR
+        version_path = cls._current_version_path(base_dir / f"{table_name}_{field_name}")
+        return version_path is not None and (version_path / cls.META_FILE).exists()
+
+    @classmethod
+    def load(cls, table_name: str, field_name: str,
+             index_dir: Optional[str] = None) -> Optional['KeywordInvertedIndex']:
+        """
+        以内存映射方式加载索引
+
+        Returns:
+            Optional[KeywordInvertedIndex]: 索引实例，不存在或格式不兼容时返回None
+        """
+        index = cls(table_name, field_name, index_dir)
+        path = cls._current_version_path(index.path)
+        if path is None:
+            return None
+        meta_path = path / cls.META_FILE
+        if not meta_path.exists():
+            return None
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                index.meta = json.load(f)
+            if index.meta.get('format_version') != cls.FORMAT_VERSION:
+                logger.warning(f"倒排索引格式版本不兼容，忽略: {path}")
+                return None
+
+            index._offsets = np.load(path / cls.OFFSETS_FILE, mmap_mode='r')
+            index._postings = np.load(path / cls.POSTINGS_FILE, mmap_mode='r')
+            if index.meta.get('doc_id_kind') == 'object_id':
+                index._object_ids = np.load(path / cls.OBJECT_ID_FILE, mmap_mode='r')
+            else:
+                with open(path / cls.RAW_ID_FILE, 'r', encoding='utf-8') as f:
+                    index._raw_ids = json_util.loads(f.read())
+
+            with open(path / cls.VOCABULARY_FILE, 'r', encoding='utf-8') as f:
+                index._vocabulary = json.load(f)
+            index._keyword_ids = {keyword: i for i, keyword in enumerate(index._vocabulary)}
+            index.version_name = path.name
+
+            logger.info(f"📂 倒排索引已加载: {path}, 文档 {index.doc_count}, 关键词 {index.keyword_count}")
+            return index
+
+        except Exception as e:
+            logger.warning(f"加载倒排索引失败: {path} - {str(e)}")
+            return None
+
+    # ==================== 查询 ====================
+
+    def get_doc_id(self, position: int) -> Any:
+        """文档序号 -> 原始文档ID"""
+        if self._object_ids is not None:
+            return ObjectId(self._object_ids[position].tobytes())
+        return self._raw_ids[position]
+
+    def get_postings(self, keyword: str) -> np.ndarray:
+        """
+        获取关键词的文档序号列表（已解码，升序）
+
+        Args:
+            keyword: 关键词
+
+        Returns:
+            np.ndarray: 文档序号数组
+        """
+        keyword_id = self._keyword_ids.get(keyword)
+        if keyword_id is None or self._offsets is None:
+            return np.empty(0, dtype=np.int64)
+        start, end = int(self._offsets[keyword_id]), int(self._offsets[keyword_id + 1])
+        return np.cumsum(self._postings[start:end], dtype=np.int64)
+
+    def count_overlaps(self, keywords: Iterable[str]) -> Tuple[np.ndarray, np.ndarray, List[Tuple[str, np.ndarray]]]:
+        """
+        统计各文档与关键词集合的重叠数
+
+        Returns:
+            Tuple: (文档序号数组, 重叠数数组, [(关键词, 倒排表)])
+        """
+        keyword_postings = []
+        for keyword in set(keywords):
+            postings = self.get_postings(keyword)
+            if len(postings):
+                keyword_postings.append((keyword, postings))
+
+        if not keyword_postings:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, []
+
+        merged = np.concatenate([postings for _, postings in keyword_postings])
+        # 长倒排表（如“XX市”）用计数数组，短倒排表用排序去重
+        if len(merged) > self.doc_count // 8:
+            counts = np.bincount(merged, minlength=self.doc_count)
+            positions = np.flatnonzero(counts)
+            counts = counts[positions]
+        else:
+            positions, counts = np.unique(merged, return_counts=True)
+
+        return positions, counts, keyword_postings
+
+    def search(self, keywords: List[str], top_k: int, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        统计关键词重叠并取Top-K，结果结构与原聚合管道一致
+
+        Args:
+            keywords: 查询关键词（相似度分母为其数量）
+            top_k: 最大返回数量
+            min_score: 最低相似度（重叠数 / 关键词数）
+
+        Returns:
+            List[Dict]: [{'_id', 'match_count', 'matched_keywords', 'similarity_score'}]
+        """
+        if not keywords or top_k <= 0:
+            return []
+
+        positions, counts, keyword_postings = self.count_overlaps(keywords)
+        if not len(positions):
+            return []
+
+        scores = counts / len(keywords)
+        if min_score > 0:
+            mask = scores >= min_score
+            positions, counts, scores = positions[mask], counts[mask], scores[mask]
+            if not len(positions):
+                return []
+
+        # 先按第K大重叠数粗筛（保留并列项），再按 (重叠数降序, 文档序号升序) 稳定排序
+        if len(positions) > top_k:
+            kth_count = np.partition(counts, len(counts) - top_k)[len(counts) - top_k]
+            mask = counts >= kth_count
+            positions, counts, scores = positions[mask], counts[mask], scores[mask]
+
+        order = np.lexsort((positions, -counts))[:top_k]
+        positions, counts, scores = positions[order], counts[order], scores[order]
+
+        matched_keywords = [[] for _ in range(len(positions))]
+        for keyword, postings in keyword_postings:
+            hits = np.flatnonzero(np.isin(positions, postings, assume_unique=True))
+            for hit in hits:
+                matched_keywords[hit].append(keyword)
+
+        return [
+            {
+                '_id': self.get_doc_id(int(position)),
+                'match_count': int(count),
+                'matched_keywords': matched_keywords[i],
+                'similarity_score': float(score)
+            }
+            for i, (position, count, score) in enumerate(zip(positions, counts, scores))
+        ]
+
+    def search_batch(self, keyword_lists: List[List[str]], top_k: int, min_score: float = 0.0,
+                     common_df_cap: int = None) -> List[List[Dict[str, Any]]]:
+        """
+        批量检索：整批关键词并集只解码一次倒排表，以稀疏矩阵乘积一次性统计记录×文档重叠数
+
+        高频关键词（文档频率超过 common_df_cap，如“XX市”“XX区”）不参与稀疏乘积，
+        只为低频关键词召回的候选补计重叠数；仅命中高频关键词的文档按记录的高频关键词组合
+        每批统计一次后合并，因此结果与逐条 search 一致。
+
+        Args:
+            keyword_lists: 每条记录的关键词列表（相似度分母为各自关键词数量）
+            top_k: 每条记录最大返回数量
+            min_score: 最低相似度
+            common_df_cap: 高频关键词文档频率阈值（默认 COMMON_DF_CAP）
+
+        Returns:
+            List[List[Dict]]: 与 keyword_lists 对齐的 [{'_id', 'match_count', 'similarity_score'}]
+        """
+        n_records = len(keyword_lists)
+        if not n_records or top_k <= 0:
+            return [[] for _ in range(n_records)]
+
+        common_df_cap = common_df_cap or self.COMMON_DF_CAP
+
+        # 1. 关键词并集，每个关键词的倒排表只解码一次
+        local_ids: Dict[str, int] = {}
+        local_postings: List[np.ndarray] = []
+        record_rows, record_cols = [], []
+        for row, keywords in enumerate(keyword_lists):
+            for keyword in set(keywords or []):
+                col = local_ids.get(keyword)
+                if col is None:
+                    postings = self.get_postings(keyword)
+                    if not len(postings):
+                        continue
+                    col = len(local_postings)
+                    local_ids[keyword] = col
+                    local_postings.append(postings)
+                record_rows.append(row)
+                record_cols.append(col)
+
+        if not local_postings:
+            return [[] for _ in range(n_records)]
+
+        keyword_totals = np.array([len(keywords or []) for keywords in keyword_lists], dtype=np.float64)
+        record_matrix = sparse.csr_matrix(
+            (np.ones(len(record_rows), dtype=np.int32), (record_rows, record_cols)),
+            shape=(n_records, len(local_postings))
+        )
+
+        doc_freqs = np.array([len(postings) for postings in local_postings])
+        rare_cols = np.flatnonzero(doc_freqs <= common_df_cap)
+        common_cols = np.flatnonzero(doc_freqs > common_df_cap)
+
+        # 2. 低频关键词：记录×关键词 @ 关键词×文档 得到重叠计数
+        if len(rare_cols):
+            rare_postings = [local_postings[col] for col in rare_cols]
+            indptr = np.zeros(len(rare_cols) + 1, dtype=np.int64)
+            np.cumsum([len(postings) for postings in rare_postings], out=indptr[1:])
+            posting_matrix = sparse.csr_matrix(
+                (np.ones(int(indptr[-1]), dtype=np.int32), np.concatenate(rare_postings), indptr),
+                shape=(len(rare_cols), self.doc_count)
+            )
+            overlap = (record_matrix[:, rare_cols] @ posting_matrix).tocsr()
+            overlap.sort_indices()
+            rows = np.repeat(np.arange(n_records), np.diff(overlap.indptr))
+            cols = overlap.indices.astype(np.int64)
+            counts = overlap.data.astype(np.int64)
+            rare_indptr = overlap.indptr
+        else:
+            rows = cols = counts = np.empty(0, dtype=np.int64)
+            rare_indptr = np.zeros(n_records + 1, dtype=np.int64)
+
+        # 3. 高频关键词：为已召回的 (记录, 文档) 对补计重叠数
+        common_matrix = record_matrix[:, common_cols].toarray().astype(bool)
+        if len(rows) and len(common_cols):
+            for i, col in enumerate(common_cols):
+                selected = np.flatnonzero(common_matrix[rows, i])
+                if not len(selected):
+                    continue
+                counts[selected] += self._contains_sorted(local_postings[col], cols[selected])
+
+        # 4. 阈值过滤后按记录分组取Top-K
+        scores = counts / keyword_totals[rows] if len(rows) else np.empty(0)
+        mask = scores >= min_score
+        order = np.lexsort((cols[mask], -counts[mask], rows[mask]))
+        ranked_rows = rows[mask][order]
+        ranked_cols, ranked_counts = cols[mask][order], counts[mask][order]
+        row_bounds = np.searchsorted(ranked_rows, np.arange(n_records + 1))
+
+        results = []
+        signature_levels: Dict[Tuple[int, ...], Dict[Any, np.ndarray]] = {}
+        for row in range(n_records):
+            start, end = row_bounds[row], min(row_bounds[row + 1], row_bounds[row] + top_k)
+            hits = list(zip(ranked_cols[start:end].tolist(), ranked_counts[start:end].tolist()))
+
+            # 5. 仅命中高频关键词的文档：重叠数不超过记录的高频关键词数，可能进入Top-K时才合并
+            signature = tuple(common_cols[common_matrix[row]].tolist()) if len(common_cols) else ()
+            if signature and len(signature) / keyword_totals[row] >= min_score and \
+                    not (len(hits) >= top_k and hits[-1][1] > len(signature)):
+                levels = signature_levels.get(signature)
+                if levels is None:
+                    # 只统计被触及的文档（稀疏计数），缓存组合数有上限，超出时淘汰最早的组合
+                    merged = np.concatenate([local_postings[col] for col in signature])
+                    positions, doc_counts = np.unique(merged, return_counts=True)
+                    levels = {'positions': positions, 'doc_counts': doc_counts}
+                    if len(signature_levels) >= self.MAX_CACHED_SIGNATURES:
+                        signature_levels.pop(next(iter(signature_levels)))
+                    signature_levels[signature] = levels
+                rare_docs = cols[rare_indptr[row]:rare_indptr[row + 1]]
+                hits = self._merge_common_hits(hits, levels, rare_docs, len(signature),
+                                               keyword_totals[row], top_k, min_score)
+
+            results.append([
+                {
+                    '_id': self.get_doc_id(position),
+                    'match_count': count,
+                    'similarity_score': float(count / keyword_totals[row])
+                }
+                for position, count in hits
+            ])
+
+        return results
+
+    @staticmethod
+    def _contains_sorted(postings: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """判断 values 中各值是否出现在升序数组 postings 中"""
+        found = np.searchsorted(postings, values)
+        found[found >= len(postings)] = len(postings) - 1
+        return postings[found] == values
+
+    @staticmethod
+    def _merge_common_hits(hits: List[Tuple[int, int]], levels: Dict[Any, np.ndarray], rare_docs: np.ndarray,
+                           max_count: int, keyword_total: float, top_k: int,
+                           min_score: float) -> List[Tuple[int, int]]:
+        """将仅命中高频关键词的文档按 (重叠数降序, 文档序号升序) 合并进Top-K"""
+        common_hits = []
+        for count in range(max_count, 0, -1):
+            if count / keyword_total < min_score or len(common_hits) >= top_k:
+                break
+            level = levels.get(count)
+            if level is None:
+                # 同一高频关键词组合在批内共享各重叠数层级的文档列表
+                level = levels['positions'][levels['doc_counts'] == count]
+                levels[count] = level
+            if len(rare_docs):
+                level = level[~np.isin(level, rare_docs)]
+            common_hits.extend((int(position), count) for position in level[:top_k - len(common_hits)])
+
+        merged = sorted(hits + common_hits, key=lambda hit: (-hit[1], hit[0]))
+        return merged[:top_k]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取索引统计信息"""
+        return {
+            'table_name': self.table_name,
+            'field_name': self.field_name,
+            'path': str(self.path),
+            'doc_count': self.doc_count,
+            'keyword_count': self.keyword_count,
+            'posting_count': int(len(self._postings)) if self._postings is not None else 0,
+            'built_at': self.meta.get('built_at'),
+            'updated_at': self.meta.get('updated_at'),
+            'index_version': self.meta.get('index_version', 1)
+        }
+
+
+# ==================== 进程级索引注册表 ====================
+
+_index_registry: Dict[Tuple[str, str], KeywordInvertedIndex] = {}
+_registry_lock = Lock()
+
+
+def get_keyword_index(table_name: str, field_name: str,
+                      index_dir: Optional[str] = None) -> Optional[KeywordInvertedIndex]:
+    """获取（必要时加载）进程内共享的倒排索引"""
+    key = (table_name, field_name)
+    index = _index_registry.get(key)
+    if index is not None:
+        return index
+
+    with _registry_lock:
+        index = _index_registry.get(key)
+        if index is None:
+            index = KeywordInvertedIndex.load(table_name, field_name, index_dir)
+            if index is not None:
+                _index_registry[key] = index
+        return index
+
+
+def get_index_version(table_name: str, field_name: str,
+                      index_dir: Optional[str] = None) -> Optional[float]:
+    """读取索引版本（最近一次构建或增量更新的时间戳），仅解析meta.json，不加载倒排数据"""
+    base_dir = Path(index_dir) if index_dir else DEFAULT_INDEX_DIR
+    version_path = KeywordInvertedIndex._current_version_path(base_dir / f"{table_name}_{field_name}")
+    if version_path is None:
+        return None
+    meta_path = version_path / KeywordInvertedIndex.META_FILE
+    if not meta_path.exists():
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+            return meta.get('updated_at') or meta.get('built_at')
+    except Exception as e:
+        logger.warning(f"读取倒排索引版本失败: {meta_path} - {str(e)}")
+        return None
+
+
+def invalidate_keyword_index(table_name: str, field_name: str):
+    """索引重建后使进程内缓存失效"""
+    with _registry_lock:
+        _index_registry.pop((table_name, field_name), None)
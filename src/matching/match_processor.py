@@ -13,6 +13,7 @@ from threading import Lock
 import time
 
 from .exact_matcher import ExactMatcher, MatchResult
+from .exact_match_index import ExactMatchIndex
 from .fuzzy_matcher import FuzzyMatcher, FuzzyMatchResult
 from src.utils.helpers import batch_iterator, generate_match_id, format_timestamp
 
@@ -162,21 +163,13 @@ class MatchProcessor:
             # 获取目标数据（安全排查系统）
             target_records = self._load_target_records()
             logger.info(f"加载目标数据: {len(target_records)} 条")
+            # 目标数据在任务内不变，精确匹配索引只建一次
+            self.exact_matcher.attach_index(ExactMatchIndex.from_records(target_records))
             
-            # 分批处理源数据
-            skip = 0
+            # 分批处理源数据（按_id范围分页）
             batch_count = 0
             
-            while True:
-                # 获取一批源数据
-                source_batch = self.db_manager.get_supervision_units(
-                    skip=skip, 
-                    limit=self.batch_size
-                )
-                
-                if not source_batch:
-                    break
-                
+            for source_batch in self.db_manager.iter_units('supervision_units', batch_size=self.batch_size):
                 batch_count += 1
                 logger.info(f"处理第 {batch_count} 批数据: {len(source_batch)} 条")
                 
@@ -187,8 +180,6 @@ class MatchProcessor:
                 
                 # 处理当前批次
                 self._process_batch(task_id, source_batch, target_records, match_type)
-                
-                skip += self.batch_size
             
             # 任务完成
             progress.set_status("completed")
@@ -203,15 +194,9 @@ class MatchProcessor:
         try:
             # 分批加载避免内存溢出
             all_records = []
-            skip = 0
             
-            while True:
-                batch = self.db_manager.get_inspection_units(skip=skip, limit=1000)
-                if not batch:
-                    break
-                
+            for batch in self.db_manager.iter_units('inspection_units', batch_size=1000):
                 all_records.extend(batch)
-                skip += 1000
             
             return all_records
             
@@ -267,7 +252,8 @@ class MatchProcessor:
             
             # 精确匹配
             if match_type in ['exact', 'both']:
-                exact_result = self.exact_matcher.match_single_record(source_record, target_records)
+                exact_targets = None if self.exact_matcher.index is not None else target_records
+                exact_result = self.exact_matcher.match_single_record(source_record, exact_targets)
                 
                 if exact_result.matched:
                     result = self._format_match_result(exact_result, 'exact')
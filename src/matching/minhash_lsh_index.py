@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MinHash-LSH 近似近邻索引
+对单位名称、地址的字符2/3-gram切片（与切片索引集合相同的切片方式）计算MinHash签名并按band分桶，
+在内存中用NumPy构建、落盘后内存映射加载；查询时按band二分查找候选（按命中band数截断），
+再以保存的签名估计Jaccard相似度和覆盖比例过滤，替代对 *_name_slices 切片集合的聚合查询
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import shutil
+import logging
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Any, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from ..database.index_versions import compute_index_source_version
+from ..database.collection_snapshot import iter_collection_batches
+
+logger = logging.getLogger(__name__)
+
+# 默认索引目录：项目根目录下的 data/minhash_lsh
+DEFAULT_INDEX_DIR = Path(__file__).parent.parent.parent / "data" / "minhash_lsh"
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_BAND_MULTIPLIER = np.uint64(1000003)
+
+# 单次签名计算的最大切片数（控制 num_perm x 切片数 中间矩阵的大小）
+_SIGNATURE_CHUNK_GRAMS = 200000
+
+# 进程内缓存的索引与目标表版本的最短复核间隔（秒）
+VERSION_CHECK_INTERVAL = 30.0
+
+# 单次查询参与签名复核的最大候选行数（按命中band数保留最多者）
+MAX_CANDIDATE_ROWS = 2000
+
+
+def lsh_threshold(bands: int, rows: int) -> float:
+    """LSH的近似召回阈值 (1/b)^(1/r)：Jaccard高于该值的记录以较高概率进入候选"""
+    return (1.0 / bands) ** (1.0 / rows)
+
+
+def bands_for_threshold(num_perm: int, threshold: float) -> int:
+    """
+    选择band数：在召回阈值 (1/b)^(1/r) 不高于给定Jaccard阈值的划分中取每band行数最多者
+    （行数越多误报越少），无满足条件的划分时每band一行
+
+    Args:
+        num_perm: MinHash签名长度
+        threshold: 需要召回的Jaccard下限
+    """
+    for rows in range(num_perm, 0, -1):
+        if num_perm % rows == 0 and lsh_threshold(num_perm // rows, rows) <= threshold:
+            return num_perm // rows
+    return num_perm
+
+
+def char_ngrams(text: Any, ngram_sizes: Sequence[int] = (2, 3)) -> Set[str]:
+    """生成字符N-gram切片（只保留中文、字母和数字，与切片索引一致）"""
+    if not text:
+        return set()
+    clean_text = re.sub(r'[^\u4e00-\u9fff\w]', '', str(text))
+    grams = set()
+    for n in ngram_sizes:
+        for i in range(len(clean_text) - n + 1):
+            grams.add(clean_text[i:i + n])
+    return grams
+
+
+class MinHashLSHIndex:
+    """MinHash-LSH 近似近邻索引（单表单字段）"""
+
+    FORMAT_VERSION = 2
+
+    # 索引目录下的指针文件，记录当前生效的版本子目录名
+    CURRENT_FILE = 'CURRENT'
+    META_FILE = 'meta.json'
+    IDS_FILE = 'ids.json'
+    TEXTS_FILE = 'texts.json'
+    BAND_KEYS_FILE = 'band_keys.npy'
+    BAND_ROWS_FILE = 'band_rows.npy'
+    SIGNATURES_FILE = 'signatures.npy'
+    GRAM_COUNTS_FILE = 'gram_counts.npy'
+
+    def __init__(self, table_name: str, field: str, num_perm: int = 64, bands: int = 16,
+                 ngram_sizes: Sequence[int] = (2, 3), seed: int = 1, index_dir: Optional[str] = None):
+        """
+        初始化索引
+
+        Args:
+            table_name: 目标表名
+            field: 建索引的字段（如 dwmc、dwdz）
+            num_perm: MinHash签名长度
+            bands: LSH band数（每band行数为 num_perm / bands；默认16x4，召回阈值约0.5，
+                   可用 bands_for_threshold 按所需Jaccard下限选择）
+            ngram_sizes: 切片长度
+            seed: 哈希函数随机种子（构建与查询必须一致）
+            index_dir: 索引根目录（默认 data/minhash_lsh）
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm({num_perm}) 必须能被 bands({bands}) 整除")
+
+        self.table_name = table_name
+        self.field = field
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.seed = seed
+        self.index_dir = Path(index_dir) if index_dir else DEFAULT_INDEX_DIR
+        self.table_version: Optional[str] = None
+        self.built_at: Optional[float] = None
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_MAX_HASH), size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, int(_MAX_HASH), size=num_perm, dtype=np.uint64)
+
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        # 每个band按桶键排序：band_keys[i] 为排序后的桶键，band_rows[i] 为对应的记录行号
+        self._band_keys = np.empty((bands, 0), dtype=np.uint32)
+        self._band_rows = np.empty((bands, 0), dtype=np.int32)
+        # 每条记录的MinHash签名与切片数，用于查询时估计Jaccard和覆盖比例（无需重新切片）
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._gram_counts = np.empty(0, dtype=np.int32)
+
+    @property
+    def path(self) -> Path:
+        """索引根目录（其下为各版本子目录和指向当前版本的指针文件）"""
+        return self.index_dir / f"{self.table_name}__{self.field}"
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ==================== 签名 ====================
+
+    @staticmethod
+    def _gram_hashes(grams: Set[str]) -> np.ndarray:
+        return np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64, count=len(grams))
+
+    def signatures(self, gram_sets: Sequence[Set[str]]) -> np.ndarray:
+        """
+        批量计算MinHash签名（各记录切片哈希拼接后一次矩阵运算，按记录分段取最小值）
+
+        Returns:
+            np.ndarray: (记录数, num_perm) uint32 签名（无切片的记录为全最大值）
+        """
+        signatures = np.full((len(gram_sets), self.num_perm), _MAX_HASH, dtype=np.uint64)
+        start = 0
+        while start < len(gram_sets):
+            # 按切片总数划分记录块
+            end, total = start, 0
+            while end < len(gram_sets) and (total == 0 or total + len(gram_sets[end]) <= _SIGNATURE_CHUNK_GRAMS):
+                total += len(gram_sets[end])
+                end += 1
+
+            rows = [i for i in range(start, end) if gram_sets[i]]
+            if rows:
+                hashes = np.concatenate([self._gram_hashes(gram_sets[i]) for i in rows])
+                offsets = np.cumsum([0] + [len(gram_sets[i]) for i in rows[:-1]])
+                permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+                signatures[rows] = np.minimum.reduceat(permuted, offsets, axis=1).T
+            start = end
+        return signatures.astype(np.uint32)
+
+    def _band_hashes(self, signatures: np.ndarray) -> np.ndarray:
+        """将签名按band合并为桶键，返回 (记录数, bands) uint32"""
+        banded = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        keys = np.zeros((len(signatures), self.bands), dtype=np.uint64)
+        for r in range(self.rows):
+            keys = ((keys * _BAND_MULTIPLIER) ^ banded[:, :, r]) & _MAX_HASH
+        return keys.astype(np.uint32)
+
+    # ==================== 构建 ====================
+
+    def build(self, ids: List[Any], texts: List[str]) -> 'MinHashLSHIndex':
+        """由记录ID和文本构建索引（无有效切片的记录不入索引）"""
+        start_time = time.time()
+        gram_sets = [char_ngrams(text, self.ngram_sizes) for text in texts]
+        keep = [i for i, grams in enumerate(gram_sets) if grams]
+
+        self.ids = [str(ids[i]) for i in keep]
+        self.texts = [str(texts[i]) for i in keep]
+        self._signatures = self.signatures([gram_sets[i] for i in keep])
+        self._gram_counts = np.array([len(gram_sets[i]) for i in keep], dtype=np.int32)
+        band_keys = self._band_hashes(self._signatures).T
+
+        order = np.argsort(band_keys, axis=1, kind='stable')
+        self._band_keys = np.take_along_axis(band_keys, order, axis=1)
+        self._band_rows = order.astype(np.int32)
+        self.built_at = time.time()
+
+        logger.info(f"🔖 MinHash-LSH索引构建完成: {self.table_name}.{self.field}, {len(self.ids)} 条记录, "
+                   f"{self.bands}x{self.rows} bands, 耗时 {time.time() - start_time:.2f}s")
+        return self
+
+    @classmethod
+    def build_from_collection(cls, collection, field: str, index_dir: Optional[str] = None,
+                              batch_size: int = 10000, **params) -> 'MinHashLSHIndex':
+        """扫描目标表构建索引（优先读取集合快照）"""
+        index = cls(collection.name, field, index_dir=index_dir, **params)
+        table_version = compute_index_source_version(collection)
+
+        ids, texts = [], []
+        for batch in iter_collection_batches(collection, [field], batch_size=batch_size):
+            for record in batch:
+                value = record.get(field)
+                if value:
+                    ids.append(record['_id'])
+                    texts.append(str(value))
+
+        index.build(ids, texts)
+        index.table_version = table_version
+        return index
+
+    # ==================== 查询 ====================
+
+    def candidate_rows(self, text: str,
+                       max_rows: Optional[int] = MAX_CANDIDATE_ROWS) -> Tuple[int, np.ndarray, np.ndarray]:
+        """
+        按band桶键二分查找候选
+
+        Args:
+            text: 查询文本
+            max_rows: 最多返回的候选行数（超出时保留命中band数最多者，None表示不限）
+
+        Returns:
+            Tuple[int, np.ndarray, np.ndarray]: (查询切片数, 查询签名, 候选行号)
+        """
+        grams = char_ngrams(text, self.ngram_sizes)
+        if not grams or not self.ids:
+            return len(grams), np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.int32)
+
+        signature = self.signatures([grams])
+        keys = self._band_hashes(signature)[0]
+        matched = []
+        for band in range(self.bands):
+            band_keys = self._band_keys[band]
+            lo = np.searchsorted(band_keys, keys[band], side='left')
+            hi = np.searchsorted(band_keys, keys[band], side='right')
+            if hi > lo:
+                matched.append(self._band_rows[band, lo:hi])
+        if not matched:
+            return len(grams), signature[0], np.empty(0, dtype=np.int32)
+
+        rows, hits = np.unique(np.concatenate(matched), return_counts=True)
+        if max_rows and len(rows) > max_rows:
+            rows = np.sort(rows[np.argpartition(-hits, max_rows - 1)[:max_rows]])
+        return len(grams), signature[0], rows
+
+    def query(self, text: str, threshold: float = 0.5, max_results: int = 50,
+              min_containment: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        查询Jaccard相似度不低于阈值的近邻记录
+
+        Jaccard由保存的签名一致比例估计，覆盖比例由估计的Jaccard和双方切片数换算
+
+        Args:
+            text: 查询文本
+            threshold: Jaccard阈值（按签名估计值过滤）
+            max_results: 最大返回数量
+            min_containment: 查询切片被目标覆盖比例的下限
+
+        Returns:
+            List[Dict]: [{'id', 'text', 'jaccard', 'containment'}]，按Jaccard降序
+        """
+        query_count, signature, rows = self.candidate_rows(text)
+        if not len(rows):
+            return []
+
+        scores = (np.asarray(self._signatures[rows]) == signature).mean(axis=1)
+        target_counts = np.asarray(self._gram_counts[rows], dtype=np.float64)
+        # |A∩B| = J * (|A| + |B|) / (1 + J)
+        containment = np.minimum(scores * (query_count + target_counts) / (1.0 + scores) / query_count, 1.0)
+
+        keep = np.nonzero((scores >= threshold) & (containment >= min_containment))[0]
+        keep = keep[np.argsort(-scores[keep], kind='stable')][:max_results]
+        return [{
+            'id': self.ids[rows[i]],
+            'text': self.texts[rows[i]],
+            'jaccard': float(scores[i]),
+            # 查询切片被目标覆盖的比例（与切片集合聚合的 slice_score 口径一致）
+            'containment': float(containment[i])
+        } for i in keep]
+
+    # ==================== 持久化 ====================
+
+    def save(self):
+        """
+        写入新的版本子目录后原子切换指针文件
+
+        不覆盖或删除正在使用的版本目录（Windows下内存映射中的文件无法删除或替换），
+        旧版本目录在切换后尽力清理，清理失败的留待下次保存
+        """
+        root = self.path
+        root.mkdir(parents=True, exist_ok=True)
+        version_name = f"v{time.time_ns()}_{os.getpid()}"
+        version_path = root / version_name
+        version_path.mkdir()
+
+        meta = {
+            'format_version': self.FORMAT_VERSION,
+            'table_name': self.table_name,
+            'field': self.field,
+            'num_perm': self.num_perm,
+            'bands': self.bands,
+            'ngram_sizes': list(self.ngram_sizes),
+            'seed': self.seed,
+            'table_version': self.table_version,
+            'built_at': self.built_at,
+            'record_count': len(self.ids)
+        }
+        with open(version_path / self.META_FILE, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        with open(version_path / self.IDS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(self.ids, f)
+        with open(version_path / self.TEXTS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(self.texts, f, ensure_ascii=False)
+        np.save(version_path / self.BAND_KEYS_FILE, np.ascontiguousarray(self._band_keys))
+        np.save(version_path / self.BAND_ROWS_FILE, np.ascontiguousarray(self._band_rows))
+        np.save(version_path / self.SIGNATURES_FILE, np.ascontiguousarray(self._signatures))
+        np.save(version_path / self.GRAM_COUNTS_FILE, np.ascontiguousarray(self._gram_counts))
+
+        pointer_temp = root / f"{self.CURRENT_FILE}.{version_name}.tmp"
+        with open(pointer_temp, 'w', encoding='utf-8') as f:
+            f.write(version_name)
+        os.replace(pointer_temp, root / self.CURRENT_FILE)
+        logger.info(f"💾 MinHash-LSH索引已保存: {version_path}")
+
+        for entry in root.iterdir():
+            if entry.is_dir() and entry.name != version_name:
+                shutil.rmtree(entry, ignore_errors=True)
+
+    @classmethod
+    def load(cls, table_name: str, field: str, index_dir: Optional[str] = None) -> Optional['MinHashLSHIndex']:
+        """
+        加载指针文件指向的索引版本（桶键、签名数组以内存映射方式打开）
+
+        Returns:
+            Optional[MinHashLSHIndex]: 索引，不存在或格式不兼容时返回None
+        """
+        root = (Path(index_dir) if index_dir else DEFAULT_INDEX_DIR) / f"{table_name}__{field}"
+        pointer = root / cls.CURRENT_FILE
+        if not pointer.exists():
+            return None
+
+        path = root
+        try:
+            path = root / pointer.read_text(encoding='utf-8').strip()
+            with open(path / cls.META_FILE, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('format_version') != cls.FORMAT_VERSION:
+                logger.warning(f"MinHash-LSH索引格式版本不兼容，忽略: {path}")
+                return None
+
+            index = cls(table_name, field, num_perm=meta['num_perm'], bands=meta['bands'],
+                        ngram_sizes=meta['ngram_sizes'], seed=meta['seed'], index_dir=index_dir)
+            index.table_version = meta.get('table_version')
+            index.built_at = meta.get('built_at')
+            with open(path / cls.IDS_FILE, 'r', encoding='utf-8') as f:
+                index.ids = json.load(f)
+            with open(path / cls.TEXTS_FILE, 'r', encoding='utf-8') as f:
+                index.texts = json.load(f)
+            index._band_keys = np.load(path / cls.BAND_KEYS_FILE, mmap_mode='r')
+            index._band_rows = np.load(path / cls.BAND_ROWS_FILE, mmap_mode='r')
+            index._signatures = np.load(path / cls.SIGNATURES_FILE, mmap_mode='r')
+            index._gram_counts = np.load(path / cls.GRAM_COUNTS_FILE, mmap_mode='r')
+            return index
+
+        except Exception as e:
+            logger.warning(f"加载MinHash-LSH索引失败: {path} - {str(e)}")
+            return None
+
+
+# ==================== 进程内共享 ====================
+
+_index_registry: Dict[Tuple[str, str], MinHashLSHIndex] = {}
+# (表名, 字段) -> 上次确认缓存索引与目标表版本一致的时间
+_version_checked_at: Dict[Tuple[str, str], float] = {}
+_registry_lock = Lock()
+
+
+def _matches_params(index: MinHashLSHIndex, params: Dict[str, Any]) -> bool:
+    """索引的构建参数与请求的参数一致（未指定的参数不比较）"""
+    return all(tuple(value) == tuple(getattr(index, name)) if name == 'ngram_sizes' else value == getattr(index, name)
+               for name, value in params.items() if value is not None)
+
+
+def get_minhash_lsh_index(db_manager, table_name: str, field: str, index_dir: Optional[str] = None,
+                          force_rebuild: bool = False, version_check_interval: float = VERSION_CHECK_INTERVAL,
+                          **params) -> Optional[MinHashLSHIndex]:
+    """
+    获取目标表字段的MinHash-LSH索引：优先使用进程内缓存，其次是与当前表版本一致的磁盘索引，否则重建并保存。
+    进程内缓存的索引每隔version_check_interval秒与目标表版本（含增量维护版本）复核一次；
+    版本或构建参数（num_perm、bands等）不一致的索引会被重建
+
+    Args:
+        db_manager: 数据库管理器
+        table_name: 目标表名
+        field: 字段名
+        index_dir: 索引根目录
+        force_rebuild: 是否强制重建
+        version_check_interval: 缓存索引复核表版本的间隔（秒，0表示每次获取都复核）
+        **params: 索引参数（num_perm、bands、ngram_sizes、seed）
+    """
+    key = (table_name, field)
+    with _registry_lock:
+        try:
+            collection = db_manager.get_collection(table_name)
+            current_version = None
+            index = None if force_rebuild else _index_registry.get(key)
+            if index is not None and _matches_params(index, params):
+                if time.time() - _version_checked_at.get(key, 0.0) < version_check_interval:
+                    return index
+                current_version = compute_index_source_version(collection)
+                if index.table_version == current_version:
+                    _version_checked_at[key] = time.time()
+                    return index
+                logger.info(f"MinHash-LSH索引已过期（目标表已变更）: {table_name}.{field}")
+            index = None
+
+            if not force_rebuild:
+                index = MinHashLSHIndex.load(table_name, field, index_dir)
+                if current_version is None:
+                    current_version = compute_index_source_version(collection)
+                if index is not None and (index.table_version != current_version
+                                          or not _matches_params(index, params)):
+                    logger.info(f"MinHash-LSH索引已过期或参数不一致: {table_name}.{field}")
+                    index = None
+
+            if index is None:
+                index = MinHashLSHIndex.build_from_collection(collection, field, index_dir, **params)
+                try:
+                    index.save()
+                except Exception as e:
+                    logger.warning(f"保存MinHash-LSH索引失败: {str(e)}")
+
+            _index_registry[key] = index
+            _version_checked_at[key] = time.time()
+            return index
+
+        except Exception as e:
+            logger.error(f"获取MinHash-LSH索引失败: {table_name}.{field} - {str(e)}")
+            return None
+
+
+def invalidate_minhash_lsh_index(table_name: str, field: Optional[str] = None):
+    """使进程内缓存的索引失效（field为None时失效该表全部字段）"""
+    with _registry_lock:
+        for key in [k for k in _index_registry if k[0] == table_name and (field is None or k[1] == field)]:
+            _index_registry.pop(key, None)
+            _version_checked_at.pop(key, None)
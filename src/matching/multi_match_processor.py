@@ -10,9 +10,13 @@ from datetime import datetime
 from bson import ObjectId
 
 from ..database.connection import DatabaseManager
+from ..database.range_reader import IdRangeReader
+from ..database.collection_snapshot import load_collection_records
 from .exact_matcher import ExactMatcher
+from .exact_match_index import ExactMatchIndex
 from .fuzzy_matcher import FuzzyMatcher
 from .match_result import MultiMatchResult
+from ..utils.config import get_index_maintenance_config
 
 logger = logging.getLogger(__name__)
 
@@ -95,17 +99,18 @@ class MultiMatchProcessor:
             
             # 获取所有目标记录（消防监督系统）到内存中
             logger.info("加载目标记录到内存...")
-            target_records = list(target_collection.find({}))
+            target_records = load_collection_records(
+                target_collection, updated_field=get_index_maintenance_config().get('updated_field', 'updated_time')
+            )
             logger.info(f"已加载 {len(target_records):,} 条目标记录")
-            
-            # 分批处理源记录
-            for batch_start in range(0, total_source_count, self.batch_size):
-                batch_end = min(batch_start + self.batch_size, total_source_count)
-                
-                logger.info(f"处理批次 {batch_start:,} - {batch_end:,}")
-                
-                # 获取当前批次的源记录
-                source_records = list(source_collection.find({}).skip(batch_start).limit(self.batch_size))
+            # 目标记录在任务内不变，精确匹配索引只建一次
+            self.exact_matcher.attach_index(ExactMatchIndex.from_records(target_records))
+            
+            # 分批处理源记录（按_id范围分页）
+            source_reader = IdRangeReader(source_collection, batch_size=self.batch_size, limit=total_source_count)
+            for source_records in source_reader.iter_batches():
+                batch_start = source_reader.records_read - len(source_records)
+                logger.info(f"处理批次 {batch_start:,} - {source_reader.records_read:,}")
                 
                 # 处理当前批次
                 batch_results = []
@@ -191,7 +196,8 @@ class MultiMatchProcessor:
         """
         try:
             # 首先尝试精确匹配
-            exact_result = self.exact_matcher.match_single_record_multi(source_record, target_records)
+            exact_targets = None if self.exact_matcher.index is not None else target_records
+            exact_result = self.exact_matcher.match_single_record_multi(source_record, exact_targets)
             
             if exact_result.matched:
                 logger.debug(f"精确匹配成功: {source_record.get('UNIT_NAME', 'Unknown')} -> {exact_result.total_matches} 条记录")
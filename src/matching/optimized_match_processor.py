@@ -19,8 +19,14 @@ from .exact_matcher import ExactMatcher, MatchResult
 from .fuzzy_matcher import FuzzyMatcher
 from .optimized_fuzzy_matcher import OptimizedFuzzyMatcher, FuzzyMatchResult
 from .enhanced_fuzzy_matcher import EnhancedFuzzyMatcher, EnhancedFuzzyMatchResult
+from .target_feature_store import get_feature_store
+from .exact_match_index import get_exact_match_index
 from .graph_matcher import GraphMatcher
 from .prefilter_system import PrefilterSystem
+from .task_checkpoint import TaskCheckpointStore
+from .process_pool_engine import (
+    ProcessMatchingPool, EXECUTION_MODE_PROCESS, EXECUTION_MODE_THREAD, compact_records
+)
 from ..database.connection import DatabaseManager
 from src.utils.helpers import batch_iterator, generate_match_id, format_timestamp
 from src.utils.config import ConfigManager
@@ -129,11 +135,71 @@ class OptimizedMatchProgress:
         """设置当前批次"""
         with self.lock:
             self.current_batch = batch_num
+    
+    def get_counters(self) -> Dict[str, int]:
+        """获取可持久化的计数器"""
+        with self.lock:
+            return {
+                'total': self.total_records,
+                'processed': self.processed_records,
+                'matched': self.matched_records,
+                'updated': self.updated_records,
+                'skipped': self.skipped_records,
+                'error': self.error_records,
+                'current_batch': self.current_batch
+            }
+    
+    def restore_counters(self, counters: Dict[str, int]):
+        """从检查点恢复计数器"""
+        with self.lock:
+            self.processed_records = counters.get('processed', 0)
+            self.matched_records = counters.get('matched', 0)
+            self.updated_records = counters.get('updated', 0)
+            self.skipped_records = counters.get('skipped', 0)
+            self.error_records = counters.get('error', 0)
+            self.current_batch = counters.get('current_batch', 0)
+
+
+def _build_optimized_worker_context() -> Dict:
+    """工作进程上下文：每个进程独立建立数据库连接并构建一次匹配器"""
+    config_manager = ConfigManager()
+    db_manager = DatabaseManager(config=config_manager.get_database_config())
+    processor = OptimizedMatchProcessor(db_manager, config_manager)
+    processor.execution_mode = EXECUTION_MODE_THREAD  # 工作进程内不再嵌套进程池
+    processor._attach_target_features()
+    if processor.use_graph_matcher:
+        processor.graph_matcher = GraphMatcher(db_manager.get_db(), config_manager.get_matching_config())
+        processor.graph_matcher.build_graph(limit=processor.graph_config.get('initial_build_limit', 1000))
+    return {'processor': processor}
+
+
+def _optimized_match_chunk(context: Dict, records: List[Dict], match_type: str,
+                           mode: str) -> List[Tuple[Optional[Dict], Optional[str]]]:
+    """工作进程内处理一块精简记录，返回 (结果, 异常信息) 列表"""
+    processor = context['processor']
+    outcomes = []
+    for record in records:
+        try:
+            outcomes.append((processor._process_optimized_single_record(record, match_type, mode), None))
+        except Exception as e:
+            outcomes.append((None, str(e)))
+    return outcomes
+
+
+def _unwrap_process_outcome(result: Optional[Dict], error: Optional[str]) -> Optional[Dict]:
+    """还原工作进程返回的处理结果，工作进程内的异常在主进程重新抛出"""
+    if error is not None:
+        raise RuntimeError(error)
+    return result
 
 
 class OptimizedMatchProcessor:
     """优化的匹配处理器"""
     
+    # 进程模式下下发给工作进程的源记录字段：覆盖字段预处理、一致性检查与结果格式化读取的全部源字段
+    PROCESS_RECORD_FIELDS = ('UNIT_NAME', 'ADDRESS', 'LEGAL_PEOPLE', 'CREDIT_CODE',
+                             'SECURITY_PEOPLE', 'SECURITY_TEL', 'UNIT_TYPE', 'ID', 'BUILDING_ID')
+    
     def __init__(self, db_manager, config_manager: ConfigManager):
         """
         初始化优化匹配处理器
@@ -165,9 +231,16 @@ class OptimizedMatchProcessor:
         self.max_workers = perf_config.get('max_workers', 4)
         self.timeout = self.batch_config.get('timeout', 300)
         
+        # 执行模式：thread（线程池，默认）或 process（进程池，绕开GIL）
+        self.execution_mode = perf_config.get('execution_mode', EXECUTION_MODE_THREAD)
+        self.process_workers = perf_config.get('process_workers', 0)
+        self.process_chunk_size = perf_config.get('process_chunk_size', 50)
+        self._process_pools: Dict[str, ProcessMatchingPool] = {}
+        
         # 任务管理
         self.active_tasks = {}
         self.tasks_lock = Lock()
+        self.checkpoint_store = TaskCheckpointStore(db_manager)
     
     def _safe_str(self, value, default: str = '') -> str:
         """安全地将任何类型转换为字符串并去除空白"""
@@ -225,6 +298,13 @@ class OptimizedMatchProcessor:
             with self.tasks_lock:
                 self.active_tasks[task_id] = progress
             
+            # 初始检查点，记录恢复任务所需的配置
+            task_config = {'match_type': match_type, 'mode': mode, 'batch_size': self.batch_size}
+            self.checkpoint_store.save(
+                task_id, 'optimized_matching', None, progress.get_counters(),
+                self._compute_task_config_hash(task_config), config=task_config
+            )
+            
             # 启动异步任务
             from threading import Thread
             task_thread = Thread(
@@ -242,28 +322,45 @@ class OptimizedMatchProcessor:
             logger.error(f"启动优化匹配任务失败: {str(e)}")
             raise
     
-    def _execute_optimized_matching_task(self, task_id: str, match_type: str, mode: str):
-        """执行优化的匹配任务"""
+    def _attach_target_features(self):
+        """为匹配器挂载目标表特征库和精确匹配索引（目标表未变化时复用已构建的结果）"""
+        store = get_feature_store(self.db_manager, 'xxj_shdwjbxx')
+        self.fuzzy_matcher.attach_feature_store(store)
+        self.enhanced_fuzzy_matcher.attach_feature_store(store)
+        self.exact_matcher.attach_index(get_exact_match_index(self.db_manager, 'xxj_shdwjbxx'))
+    
+    def _execute_optimized_matching_task(self, task_id: str, match_type: str, mode: str,
+                                         start_after: str = None):
+        """
+        执行优化的匹配任务
+        
+        每个批次的结果保存成功后写入检查点（读取页末条记录的_id），
+        start_after 非空时从该_id之后继续处理
+        """
         progress = self.active_tasks.get(task_id)
         if not progress:
             return
         
         try:
             logger.info(f"开始执行优化匹配任务: {task_id}, 模式: {mode}")
+            self._attach_target_features()
             
             if mode == MatchingMode.INCREMENTAL:
-                source_records_generator = self._get_unmatched_records_generator()
+                source_records_generator = self._get_unmatched_records_generator(start_after)
             else:
-                source_records_generator = self._get_all_records_generator()
+                source_records_generator = self._get_all_records_generator(start_after)
             
-            batch_count = 0
+            task_config = {'match_type': match_type, 'mode': mode, 'batch_size': self.batch_size}
+            config_hash = self._compute_task_config_hash(task_config)
+            batch_count = progress.current_batch
             
-            for source_batch in source_records_generator:
+            for source_batch, page_last_id in source_records_generator:
                 if not source_batch:
                     break
                 
                 # --- 终极修复：在每个批次开始时，重新初始化GraphMatcher ---
-                if self.use_graph_matcher:
+                # 进程模式下图匹配器由各工作进程自行构建
+                if self.use_graph_matcher and self.execution_mode != EXECUTION_MODE_PROCESS:
                     logger.info("批处理级资源管理：重新创建图匹配器...")
                     self.graph_matcher = GraphMatcher(self.db_manager.get_db(), self.config_manager.get_matching_config())
                     # 可以选择为每个批次的图进行小的热启动
@@ -279,7 +376,21 @@ class OptimizedMatchProcessor:
                     logger.info(f"任务停止信号检测到，停止处理新批次: {task_id}")
                     break
                 
-                self._process_optimized_batch(task_id, source_batch, match_type, mode)
+                batch_saved = self._process_optimized_batch(task_id, source_batch, match_type, mode)
+                
+                # 保存失败时终止任务并保留上一检查点，续跑时从该批次重新处理；
+                # 继续处理后续批次会用更靠后的_id覆盖检查点，失败批次将被永久跳过
+                if not batch_saved:
+                    logger.error(f"第 {batch_count} 批结果保存失败，任务终止，可从上一检查点续跑: {task_id}")
+                    progress.set_status("error")
+                    self.checkpoint_store.update_status(task_id, "error")
+                    return
+                
+                # 批次结果已提交，记录检查点
+                self.checkpoint_store.save(
+                    task_id, 'optimized_matching', page_last_id, progress.get_counters(),
+                    config_hash, config=task_config
+                )
                 
                 if progress.status == "stopped":
                     logger.info(f"任务在批次处理过程中被停止: {task_id}")
@@ -292,10 +403,74 @@ class OptimizedMatchProcessor:
                 logger.info(f"优化匹配任务已停止: {task_id}")
                 final_save_count = self._force_final_save_check()
                 logger.info(f"任务停止时最终保存检查完成: 保存了 {final_save_count} 条记录")
+            self.checkpoint_store.update_status(task_id, progress.status)
             
         except Exception as e:
             logger.error(f"优化匹配任务执行失败 {task_id}: {str(e)}")
             progress.set_status("error")
+            self.checkpoint_store.update_status(task_id, "error")
+        finally:
+            pool = self._process_pools.pop(task_id, None)
+            if pool:
+                pool.shutdown()
+    
+    def _compute_task_config_hash(self, task_config: Dict) -> str:
+        """计算任务配置哈希（包含匹配算法配置，配置变更后不允许续跑）"""
+        return TaskCheckpointStore.compute_config_hash({
+            **task_config,
+            'matching_config': self.config_manager.get_matching_config()
+        }, keys=('match_type', 'mode', 'batch_size', 'matching_config'))
+    
+    def resume_task(self, task_id: str) -> str:
+        """
+        从持久化检查点恢复优化匹配任务
+        
+        Args:
+            task_id: 任务ID
+            
+        Returns:
+            str: 任务ID
+            
+        Raises:
+            ValueError: 检查点不存在、任务已完成或正在运行、配置已变更
+        """
+        checkpoint = self.checkpoint_store.load(task_id)
+        if not checkpoint or checkpoint.get('task_type') != 'optimized_matching':
+            raise ValueError(f"任务 {task_id} 没有可恢复的检查点")
+        if checkpoint.get('status') == 'completed':
+            raise ValueError(f"任务 {task_id} 已完成，无需恢复")
+        
+        task_config = checkpoint.get('config') or {}
+        if self._compute_task_config_hash(task_config) != checkpoint.get('config_hash'):
+            raise ValueError(f"任务 {task_id} 的匹配配置在中断后已变更，无法从检查点恢复")
+        
+        counters = checkpoint.get('counters') or {}
+        mode = task_config.get('mode', MatchingMode.INCREMENTAL)
+        match_type = task_config.get('match_type', 'both')
+        if task_config.get('batch_size'):
+            self.batch_size = task_config['batch_size']
+        
+        with self.tasks_lock:
+            existing = self.active_tasks.get(task_id)
+            if existing and existing.status == "running":
+                raise ValueError(f"任务 {task_id} 正在运行中")
+            progress = OptimizedMatchProgress(task_id, counters.get('total', 0), mode)
+            progress.restore_counters(counters)
+            self.active_tasks[task_id] = progress
+        
+        self.checkpoint_store.update_status(task_id, 'running')
+        
+        from threading import Thread
+        task_thread = Thread(
+            target=self._execute_optimized_matching_task,
+            args=(task_id, match_type, mode, checkpoint.get('last_id')),
+            daemon=True
+        )
+        task_thread.start()
+        
+        logger.info(f"优化匹配任务从检查点恢复: {task_id}, last_id={checkpoint.get('last_id')}, "
+                   f"已处理 {counters.get('processed', 0)}/{counters.get('total', 0)}")
+        return task_id
     
     def _get_unmatched_count(self) -> int:
         """获取未匹配记录数量"""
@@ -333,22 +508,19 @@ class OptimizedMatchProcessor:
             logger.error(f"获取已匹配记录ID失败: {str(e)}")
             return set()
     
-    def _get_unmatched_records_generator(self):
-        """获取未匹配记录的生成器（安全排查系统）"""
+    def _get_unmatched_records_generator(self, start_after: str = None):
+        """
+        获取未匹配记录的生成器（安全排查系统，按_id范围分页）
+        
+        Yields:
+            Tuple[List[Dict], str]: (未匹配记录, 读取页末条记录的_id)
+        """
         try:
             matched_ids = self._get_matched_source_ids()
             
-            skip = 0
-            while True:
-                # 获取一批源数据（安全排查系统）
-                source_batch = self.db_manager.get_inspection_units(
-                    skip=skip, 
-                    limit=self.batch_size
-                )
-                
-                if not source_batch:
-                    break
-                
+            for source_batch in self.db_manager.iter_units(
+                'inspection_units', batch_size=self.batch_size, start_after=start_after
+            ):
                 # 过滤出未匹配的记录
                 unmatched_batch = [
                     record for record in source_batch 
@@ -356,97 +528,89 @@ class OptimizedMatchProcessor:
                 ]
                 
                 if unmatched_batch:
-                    yield unmatched_batch
-                
-                skip += self.batch_size
+                    yield unmatched_batch, source_batch[-1]['_id']
                 
         except Exception as e:
+            # 读取失败不能当作数据读完，否则任务会被标记为已完成且无法续跑
             logger.error(f"获取未匹配记录失败: {str(e)}")
-            yield []
+            raise
     
-    def _get_all_records_generator(self):
-        """获取所有记录的生成器（安全排查系统）"""
+    def _get_all_records_generator(self, start_after: str = None):
+        """
+        获取所有记录的生成器（安全排查系统，按_id范围分页）
+        
+        Yields:
+            Tuple[List[Dict], str]: (批次记录, 批次末条记录的_id)
+        """
         try:
-            skip = 0
-            while True:
-                # 获取一批源数据（安全排查系统）
-                source_batch = self.db_manager.get_inspection_units(
-                    skip=skip, 
-                    limit=self.batch_size
-                )
-                
-                if not source_batch:
-                    break
-                
-                yield source_batch
-                skip += self.batch_size
+            for source_batch in self.db_manager.iter_units(
+                'inspection_units', batch_size=self.batch_size, start_after=start_after
+            ):
+                yield source_batch, source_batch[-1]['_id']
                 
         except Exception as e:
             logger.error(f"获取所有记录失败: {str(e)}")
-            yield []
+            raise
     
     def _process_optimized_batch(self, task_id: str, source_batch: List[Dict], 
-                               match_type: str, mode: str):
-        """处理优化的批次数据"""
+                               match_type: str, mode: str) -> bool:
+        """
+        处理优化的批次数据
+        
+        Returns:
+            bool: 批次结果是否已全部提交
+        """
         progress = self.active_tasks.get(task_id)
         if not progress:
-            return
+            return False
         
         batch_results = []
         logger.info(f"🔄 开始并行处理批次: {len(source_batch)} 条记录，模式: {mode}")
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # functools.partial 用于向工作函数传递固定参数
-            # 我们将把实例 self 传递给工作函数，确保所有线程共享同一个db_manager
-            worker_func = functools.partial(self._worker, match_type=match_type, mode=mode)
-            
-            future_to_record = {executor.submit(worker_func, record): record for record in source_batch}
-            
-            for future in as_completed(future_to_record):
-                source_record = future_to_record[future]
-                try:
-                    result = future.result()
-                    if result:
-                        operation = result.get('operation', 'unknown')
-                        unit_name = source_record.get('UNIT_NAME', 'Unknown')
-                        
-                        if operation == 'skipped':
-                            logger.info(f"📝 记录跳过: {unit_name} - {result.get('reason', 'unknown')}")
-                        else:
-                            batch_results.append(result)
-                            logger.info(f"📝 记录添加到批次: {unit_name} - 操作: {operation}")
-                        
-                        # 更新进度
-                        if operation == 'matched':
-                            progress.update_progress(processed=1, matched=1, last_id=str(source_record.get('_id')))
-                        elif operation == 'updated':
-                            progress.update_progress(processed=1, updated=1, last_id=str(source_record.get('_id')))
-                        elif operation == 'skipped':
-                            progress.update_progress(processed=1, skipped=1, last_id=str(source_record.get('_id')))
-                        else:
-                            progress.update_progress(processed=1, last_id=str(source_record.get('_id')))
-                    else:
-                        logger.warning(f"📝 记录处理失败: {source_record.get('UNIT_NAME', 'Unknown')}")
-                        progress.update_progress(processed=1, error=1, last_id=str(source_record.get('_id')))
-                except Exception as exc:
-                    # 终极日志记录：手动格式化堆栈，并对内容进行消毒，防止日志系统自身崩溃
-                    import traceback
-                    import reprlib
-                    
-                    # 使用reprlib确保即使堆栈信息中有异常字符，也能安全地记录
-                    safe_exc_str = reprlib.repr(str(exc))
+        for source_record, get_result in self._iter_record_outcomes(task_id, source_batch, match_type, mode):
+            try:
+                result = get_result()
+                if result:
+                    operation = result.get('operation', 'unknown')
+                    unit_name = source_record.get('UNIT_NAME', 'Unknown')
                     
-                    logger.error(f"处理记录 {source_record.get('_id')} 时产生异常: {safe_exc_str}")
+                    if operation == 'skipped':
+                        logger.info(f"📝 记录跳过: {unit_name} - {result.get('reason', 'unknown')}")
+                    else:
+                        batch_results.append(result)
+                        logger.info(f"📝 记录添加到批次: {unit_name} - 操作: {operation}")
                     
-                    # 手动获取并记录堆栈
-                    try:
-                        tb_str = traceback.format_exc()
-                        safe_tb_str = reprlib.repr(tb_str)
-                        logger.error(f"详细错误堆栈: {safe_tb_str}")
-                    except Exception as log_exc:
-                        logger.error(f"记录堆栈信息时再次发生错误: {reprlib.repr(str(log_exc))}")
+                    # 更新进度
+                    if operation == 'matched':
+                        progress.update_progress(processed=1, matched=1, last_id=str(source_record.get('_id')))
+                    elif operation == 'updated':
+                        progress.update_progress(processed=1, updated=1, last_id=str(source_record.get('_id')))
+                    elif operation == 'skipped':
+                        progress.update_progress(processed=1, skipped=1, last_id=str(source_record.get('_id')))
+                    else:
+                        progress.update_progress(processed=1, last_id=str(source_record.get('_id')))
+                else:
+                    logger.warning(f"📝 记录处理失败: {source_record.get('UNIT_NAME', 'Unknown')}")
+                    progress.update_progress(processed=1, error=1, last_id=str(source_record.get('_id')))
+            except Exception as exc:
+                # 终极日志记录：手动格式化堆栈，并对内容进行消毒，防止日志系统自身崩溃
+                import traceback
+                import reprlib
+                
+                # 使用reprlib确保即使堆栈信息中有异常字符，也能安全地记录
+                safe_exc_str = reprlib.repr(str(exc))
+                
+                logger.error(f"处理记录 {source_record.get('_id')} 时产生异常: {safe_exc_str}")
+                
+                # 手动获取并记录堆栈
+                try:
+                    tb_str = traceback.format_exc()
+                    safe_tb_str = reprlib.repr(tb_str)
+                    logger.error(f"详细错误堆栈: {safe_tb_str}")
+                except Exception as log_exc:
+                    logger.error(f"记录堆栈信息时再次发生错误: {reprlib.repr(str(log_exc))}")
 
-                    progress.update_progress(processed=1, error=1)
+                progress.update_progress(processed=1, error=1)
         
         # 批量保存结果 - 无论是否停止都要保存已处理的结果
         logger.info(f"💾 准备保存批次结果: {len(batch_results)} 条记录")
@@ -459,6 +623,7 @@ class OptimizedMatchProcessor:
                 logger.info(f"💾 结果 {i+1}: {result.get('unit_name', 'Unknown')} -> {result.get('operation', 'unknown')}")
             
             save_success = self._batch_save_optimized_results(batch_results)
+            batch_saved = save_success
             if save_success:
                 if progress.status == "stopped":
                     logger.info(f"✅ 任务停止前成功保存 {len(batch_results)} 条匹配结果")
@@ -467,6 +632,7 @@ class OptimizedMatchProcessor:
             else:
                 logger.error(f"❌ 保存 {len(batch_results)} 条匹配结果失败")
         else:
+            batch_saved = True
             if progress.status == "stopped":
                 logger.warning("⚠️ 任务停止，当前批次无需保存的匹配结果")
             else:
@@ -479,6 +645,59 @@ class OptimizedMatchProcessor:
         if progress.status == "stopped":
             logger.info(f"任务在批次处理过程中被停止: {task_id}")
             progress.set_status("stopped")
+        
+        return batch_saved
+    
+    def _iter_record_outcomes(self, task_id: str, source_batch: List[Dict], match_type: str, mode: str):
+        """
+        按完成顺序产出批次内每条记录的处理结果
+        
+        线程模式与进程模式共用后续的进度统计和单点写库逻辑
+        
+        Yields:
+            Tuple[Dict, Callable]: (源记录, 结果获取函数；处理异常在调用时抛出)
+        """
+        if self.execution_mode == EXECUTION_MODE_PROCESS:
+            yield from self._iter_process_outcomes(task_id, source_batch, match_type, mode)
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # functools.partial 用于向工作函数传递固定参数
+            # 我们将把实例 self 传递给工作函数，确保所有线程共享同一个db_manager
+            worker_func = functools.partial(self._worker, match_type=match_type, mode=mode)
+            
+            future_to_record = {executor.submit(worker_func, record): record for record in source_batch}
+            
+            for future in as_completed(future_to_record):
+                yield future_to_record[future], future.result
+    
+    def _iter_process_outcomes(self, task_id: str, source_batch: List[Dict], match_type: str, mode: str):
+        """进程池处理批次：源记录精简后分块下发，结果按块流式返回"""
+        pool = self._process_pools.get(task_id)
+        if pool is None:
+            pool = ProcessMatchingPool(_build_optimized_worker_context, max_workers=self.process_workers)
+            self._process_pools[task_id] = pool
+        
+        compact_batch = compact_records(source_batch, self.PROCESS_RECORD_FIELDS)
+        pending_indexes = set(range(len(source_batch)))
+        try:
+            for start, chunk_outcomes in pool.imap_chunks(
+                _optimized_match_chunk, compact_batch, self.process_chunk_size, match_type, mode
+            ):
+                for offset, (result, error) in enumerate(chunk_outcomes):
+                    pending_indexes.discard(start + offset)
+                    yield source_batch[start + offset], functools.partial(_unwrap_process_outcome, result, error)
+        except Exception as e:
+            # 工作进程异常退出：丢弃进程池，本批次剩余记录改用线程池处理
+            logger.error(f"进程池处理失败，剩余 {len(pending_indexes)} 条记录改用线程池: {str(e)}")
+            self._process_pools.pop(task_id, None)
+            pool.shutdown(wait_for_workers=False)
+            remaining = [source_batch[i] for i in sorted(pending_indexes)]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                worker_func = functools.partial(self._worker, match_type=match_type, mode=mode)
+                future_to_record = {executor.submit(worker_func, record): record for record in remaining}
+                for future in as_completed(future_to_record):
+                    yield future_to_record[future], future.result
     
     def _worker(self, source_record: Dict, match_type: str, mode: str) -> Optional[Dict]:
         """
@@ -532,7 +751,9 @@ class OptimizedMatchProcessor:
             
             # 精确匹配
             if match_type in ['exact', 'both']:
-                exact_result = self.exact_matcher.match_single_record(safe_source_record, target_candidates)
+                # 已挂载全表索引时直接按信用代码查找，不受预过滤候选范围限制
+                exact_targets = None if self.exact_matcher.index is not None else target_candidates
+                exact_result = self.exact_matcher.match_single_record(safe_source_record, exact_targets)
                 
                 if exact_result.matched:
                     match_result = self._format_optimized_match_result(
@@ -6,13 +6,14 @@
 import logging
 from typing import Dict, List, Any, Optional, Set, Tuple
 import re
-import jieba
-import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 from collections import defaultdict
 import pymongo
 
+from ..utils.bounded_cache import BoundedCache
+from ..utils.tokenizer_service import get_tokenizer
+
 logger = logging.getLogger(__name__)
 
 
@@ -43,13 +44,19 @@ class OptimizedPrefilter:
             'thread_count': min(16, 32),               # 线程数
             'enable_cache': True,            # 启用缓存
             'cache_size': 10000,              # 缓存大小
+            'cache_ttl': 3600,                # 缓存生存时间（秒）
+            'cache_max_bytes': 256 * 1024 * 1024,  # 缓存估算字节上限
             'text_search_limit': 30,         # 文本搜索限制
             'enable_fuzzy_prefilter': True,  # 启用模糊预过滤
         }
         
-        # 缓存系统
-        self.candidate_cache = {}
-        self.cache_lock = threading.Lock()
+        # 缓存系统（有界LRU/TTL缓存，线程安全）
+        self.candidate_cache = BoundedCache(
+            'prefilter.candidates',
+            max_entries=self.config['cache_size'],
+            ttl_seconds=self.config['cache_ttl'],
+            max_bytes=self.config['cache_max_bytes']
+        )
         
         # 性能统计
         self.stats = {
@@ -102,12 +109,12 @@ class OptimizedPrefilter:
         cache_key = self._generate_cache_key(source_record)
         
         # 检查缓存
-        if self.config['enable_cache'] and cache_key in self.candidate_cache:
-            with self.cache_lock:
-                if cache_key in self.candidate_cache:
-                    self.stats['cache_hits'] += 1
-                    logger.debug(f"缓存命中: {cache_key}")
-                    return self.candidate_cache[cache_key]
+        if self.config['enable_cache']:
+            cached_candidates = self.candidate_cache.get(cache_key)
+            if cached_candidates is not None:
+                self.stats['cache_hits'] += 1
+                logger.debug(f"缓存命中: {cache_key}")
+                return cached_candidates
         
         try:
             # 获取候选记录
@@ -120,9 +127,8 @@ class OptimizedPrefilter:
             final_candidates = unique_candidates[:self.config['max_total_candidates']]
             
             # 更新缓存
-            if self.config['enable_cache'] and len(self.candidate_cache) < self.config['cache_size']:
-                with self.cache_lock:
-                    self.candidate_cache[cache_key] = final_candidates
+            if self.config['enable_cache']:
+                self.candidate_cache.set(cache_key, final_candidates)
             
             # 更新统计
             query_time = time.time() - start_time
@@ -308,7 +314,7 @@ class OptimizedPrefilter:
         """提取关键词"""
         try:
             # 使用jieba分词
-            words = jieba.lcut(text)
+            words = get_tokenizer().lcut(text)
             
             # 过滤短词和停用词
             keywords = []
@@ -375,14 +381,14 @@ class OptimizedPrefilter:
         
         stats['field_avg_performance'] = field_avg_performance
         stats['cache_hit_rate'] = (self.stats['cache_hits'] / max(self.stats['total_queries'], 1)) * 100
+        stats['cache'] = self.candidate_cache.get_stats()
         
         return stats
     
     def clear_cache(self):
         """清空缓存"""
-        with self.cache_lock:
-            self.candidate_cache.clear()
-            logger.info("预过滤缓存已清空")
+        self.candidate_cache.clear()
+        logger.info("预过滤缓存已清空")
     
     def update_config(self, new_config: Dict[str, Any]):
         """更新配置"""
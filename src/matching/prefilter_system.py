@@ -6,9 +6,9 @@
 import pymongo
 from typing import Dict, List
 import logging
-import jieba
 import json
 import re
+from ..utils.tokenizer_service import get_tokenizer
 
 logger = logging.getLogger(__name__)
 
@@ -154,7 +154,7 @@ class PrefilterSystem:
                 break
         
         # 2. 使用jieba进行分词
-        words = jieba.lcut(text, cut_all=False)
+        words = get_tokenizer().lcut(text)
         
         # 3. 过滤关键词
         keywords = []
@@ -189,7 +189,7 @@ class PrefilterSystem:
         stop_words = {'市', '区', '县', '镇', '乡', '村', '街道', '路', '号', '弄', '室', '栋', '座'}
         
         # 使用jieba进行分词
-        words = jieba.lcut(address, cut_all=False)
+        words = get_tokenizer().lcut(address)
         
         # 过滤关键词
         keywords = []
@@ -0,0 +1,161 @@
+"""
+多进程匹配执行引擎
+相似度计算、拼音转换、jieba分词等均为纯Python字符串运算，线程池受GIL限制只能用满约一个核心。
+本模块提供进程池执行模式：工作进程启动时一次性加载jieba词典并构建匹配上下文，
+之后只接收精简后的记录块，结果按块流式返回给主进程，由主进程统一写库
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODE_THREAD = 'thread'
+EXECUTION_MODE_PROCESS = 'process'
+
+# 工作进程内的匹配上下文（由上下文工厂在进程启动时构建，每个进程只构建一次）
+_worker_context: Dict[str, Any] = {}
+
+
+def _initialize_worker(context_factory: Callable[..., Dict[str, Any]], factory_args: Tuple):
+    """工作进程初始化：加载jieba词典（含自定义词典）并构建匹配上下文"""
+    try:
+        import jieba
+        jieba.setLogLevel(logging.WARNING)
+        from ..utils.tokenizer_service import get_tokenizer
+        get_tokenizer().warm_up()
+    except ImportError:
+        pass
+
+    _worker_context.clear()
+    if context_factory is not None:
+        _worker_context.update(context_factory(*factory_args) or {})
+    logger.debug(f"匹配工作进程初始化完成: pid={os.getpid()}")
+
+
+def _run_chunk(chunk_func: Callable, chunk: List[Any], extra_args: Tuple) -> List[Any]:
+    """在工作进程中执行记录块处理函数"""
+    return chunk_func(_worker_context, chunk, *extra_args)
+
+
+def get_parallel_config() -> Dict[str, Any]:
+    """读取并行处理配置（high_performance.json 的 parallel_processing 节）"""
+    from src.utils.config import ConfigManager
+    return ConfigManager().get_performance_config().get('parallel_processing', {})
+
+
+def resolve_process_workers(configured: Optional[int] = None) -> int:
+    """解析工作进程数，未配置或配置为0时使用CPU核心数"""
+    if configured and configured > 0:
+        return configured
+    return os.cpu_count() or 1
+
+
+def compact_records(records: Sequence[Dict], fields: Iterable[str]) -> List[Dict]:
+    """
+    将记录精简为只含指定字段的字典，减少跨进程序列化的数据量
+
+    Args:
+        records: 原始记录
+        fields: 需要保留的字段（_id总是保留）
+
+    Returns:
+        List[Dict]: 精简后的记录
+    """
+    keep_fields = ['_id'] + [f for f in dict.fromkeys(fields) if f and f != '_id']
+    return [{field: record.get(field) for field in keep_fields if field in record} for record in records]
+
+
+class ProcessMatchingPool:
+    """匹配进程池"""
+
+    def __init__(self, context_factory: Optional[Callable[..., Dict[str, Any]]] = None,
+                 factory_args: Tuple = (), max_workers: Optional[int] = None,
+                 start_method: str = 'spawn'):
+        """
+        初始化进程池
+
+        Args:
+            context_factory: 模块级函数，在每个工作进程中调用一次，返回匹配上下文字典
+            factory_args: 上下文工厂参数（需可序列化）
+            max_workers: 工作进程数（None或0表示CPU核心数）
+            start_method: 进程启动方式，默认spawn（Web服务为多线程进程，fork存在死锁风险）
+        """
+        self.max_workers = resolve_process_workers(max_workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_initialize_worker,
+            initargs=(context_factory, factory_args)
+        )
+        logger.info(f"匹配进程池已创建: {self.max_workers} 个工作进程, 启动方式: {start_method}")
+
+    def imap_chunks(self, chunk_func: Callable, items: Sequence[Any], chunk_size: int,
+                    *extra_args) -> Iterator[Tuple[int, List[Any]]]:
+        """
+        分块提交并按完成顺序流式返回结果
+
+        Args:
+            chunk_func: 模块级函数 chunk_func(context, chunk, *extra_args) -> List
+            items: 待处理的（已精简）记录
+            chunk_size: 每块记录数
+            extra_args: 传给处理函数的附加参数（需可序列化）
+
+        Yields:
+            Tuple[int, List[Any]]: (块起始下标, 块处理结果)
+        """
+        chunk_size = max(1, chunk_size)
+        starts = range(0, len(items), chunk_size)
+        chunks = (list(items[start:start + chunk_size]) for start in starts)
+        for number, result in self.imap_iter(chunk_func, chunks, *extra_args):
+            yield starts[number], result
+
+    def imap_iter(self, chunk_func: Callable, chunks: Iterable[List[Any]],
+                  *extra_args) -> Iterator[Tuple[int, List[Any]]]:
+        """
+        流式处理块迭代器：只在有空闲名额时从迭代器取下一块，主进程读取与工作进程计算重叠进行
+
+        Args:
+            chunk_func: 模块级函数 chunk_func(context, chunk, *extra_args) -> Any
+            chunks: 块迭代器（如按_id范围分批读取的记录）
+            extra_args: 传给处理函数的附加参数（需可序列化）
+
+        Yields:
+            Tuple[int, Any]: (块序号, 块处理结果)，按完成顺序
+        """
+        chunks = enumerate(chunks)
+        # 限制在途块数量，避免结果在主进程堆积
+        max_in_flight = self.max_workers * 2
+        pending = {}
+
+        def submit_next() -> bool:
+            item = next(chunks, None)
+            if item is None:
+                return False
+            number, chunk = item
+            future = self._executor.submit(_run_chunk, chunk_func, chunk, extra_args)
+            pending[future] = number
+            return True
+
+        while len(pending) < max_in_flight and submit_next():
+            pass
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                number = pending.pop(future)
+                yield number, future.result()
+                submit_next()
+
+    def shutdown(self, wait_for_workers: bool = True):
+        """关闭进程池"""
+        self._executor.shutdown(wait=wait_for_workers, cancel_futures=True)
+
+    def __enter__(self) -> 'ProcessMatchingPool':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
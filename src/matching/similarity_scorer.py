@@ -4,18 +4,42 @@
 """
 
 import logging
+import math
 import re
-from typing import Dict, List, Optional, Tuple, Any
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Any, Sequence
 import jieba
-import pypinyin
 from fuzzywuzzy import fuzz
+from rapidfuzz import fuzz as rapid_fuzz, process as rapid_process, utils as rapid_utils
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 from src.utils.helpers import normalize_string, normalize_phone, safe_float_convert, calculate_percentage_diff
+from .char_tfidf_model import CharNgramTfidfModel, get_tfidf_model
+from .address_parser import parse_address
+from src.utils.pinyin_table import to_pinyin
 
 logger = logging.getLogger(__name__)
 
+# 双文档TF-IDF中只出现在一侧的词的平滑IDF值：ln((1+2)/(1+1)) + 1
+_PAIR_UNSHARED_IDF = math.log(1.5) + 1.0
+
+
+@dataclass
+class CandidateFeatures:
+    """候选字符串的预计算特征（同一批候选可被多个源字符串复用）"""
+    raw_present: np.ndarray       # 原始值是否非空
+    normalized: List[str]         # 标准化后的字符串
+    pinyin: List[str]             # 拼音串（未启用拼音时为空列表）
+    token_counts: Any = None      # 候选×词表 的TF-IDF词频稀疏矩阵（csr，未使用语料模型时）
+    vocabulary: Dict[str, int] = None   # 词 -> 列下标
+    squared_norms: np.ndarray = None    # 每个候选词频的平方和
+    tfidf_model: Optional[CharNgramTfidfModel] = None   # 生成候选向量所用的语料模型
+    tfidf_vectors: Any = None     # 候选的语料TF-IDF向量（csr，已L2归一化）
+
+    def __len__(self) -> int:
+        return len(self.normalized)
+
 
 class SimilarityCalculator:
     """相似度计算器"""
@@ -34,12 +58,43 @@ class SimilarityCalculator:
         self.phone_config = config.get('phone_similarity', {})
         self.address_config = config.get('address_similarity', {})
         
-        # 初始化TF-IDF向量化器
+        # 初始化TF-IDF向量化器（只用于构建分词器，不在计算中拟合，可被多线程共享）
         self.tfidf_vectorizer = TfidfVectorizer(
             max_features=1000,
             stop_words=None,
             ngram_range=(1, 2)
         )
+        # 与向量化器一致的分词器，供双文档余弦计算使用
+        self._tfidf_analyzer = self.tfidf_vectorizer.build_analyzer()
+        
+        # 目标表语料上拟合的字符级TF-IDF模型，挂载后余弦相似度改用语料级IDF
+        self.tfidf_model: Optional[CharNgramTfidfModel] = None
+        model_table = self.string_config.get('tfidf_model_table')
+        if model_table:
+            self.attach_tfidf_model(get_tfidf_model(model_table))
+        
+        # 目标表特征库（TargetFeatureStore），挂载后目标侧的标准化/拼音/地址分解直接查表
+        self.feature_store = None
+    
+    def attach_tfidf_model(self, model: Optional[CharNgramTfidfModel]):
+        """
+        挂载目标表的字符级TF-IDF模型（传入None则恢复双文档TF-IDF）
+        
+        Args:
+            model: 已拟合的模型
+        """
+        self.tfidf_model = model
+        if model is not None:
+            logger.info(f"余弦相似度使用目标表 {model.table_name} 的字符TF-IDF模型")
+    
+    def attach_feature_store(self, store):
+        """
+        挂载目标表特征库（传入None则恢复逐次计算）
+        
+        Args:
+            store: TargetFeatureStore实例
+        """
+        self.feature_store = store
         
     def calculate_string_similarity(self, str1: str, str2: str) -> float:
         """
@@ -55,21 +110,15 @@ class SimilarityCalculator:
         if not str1 or not str2:
             return 0.0
             
-        # 标准化字符串
+        # 标准化字符串（目标侧优先使用特征库的预计算结果）
         str1 = normalize_string(str1)
-        str2 = normalize_string(str2)
+        str2 = self._normalize_target_string(str2)
         
         if str1 == str2:
             return 1.0
             
         # 获取算法配置
-        algorithms = self.string_config.get('algorithms', [])
-        if not algorithms:
-            algorithms = [
-                {'name': 'levenshtein', 'weight': 0.3},
-                {'name': 'jaro_winkler', 'weight': 0.3},
-                {'name': 'cosine', 'weight': 0.4}
-            ]
+        algorithms = self._get_string_algorithms()
         
         total_score = 0.0
         total_weight = 0.0
@@ -98,6 +147,226 @@ class SimilarityCalculator:
         
         return total_score / total_weight if total_weight > 0 else 0.0
     
+    def _normalize_target_string(self, text: str) -> str:
+        """标准化目标侧字符串"""
+        if self.feature_store is not None:
+            normalized = self.feature_store.normalized_text(text)
+            if normalized is not None:
+                return normalized
+        return normalize_string(text)
+    
+    def _get_string_algorithms(self) -> List[Dict]:
+        """获取字符串相似度算法及权重配置"""
+        algorithms = self.string_config.get('algorithms', [])
+        if not algorithms:
+            algorithms = [
+                {'name': 'levenshtein', 'weight': 0.3},
+                {'name': 'jaro_winkler', 'weight': 0.3},
+                {'name': 'cosine', 'weight': 0.4}
+            ]
+        return algorithms
+    
+    def precompute_candidate_features(self, candidates: Sequence[str]) -> CandidateFeatures:
+        """
+        预计算候选字符串特征（标准化串、拼音串、TF-IDF词频）
+        
+        Args:
+            candidates: 候选字符串列表
+            
+        Returns:
+            CandidateFeatures: 可在多次 score_many 调用间复用的候选特征
+        """
+        raw_present = np.array([bool(c) for c in candidates], dtype=bool)
+        normalized = [self._normalize_target_string(c) if c else '' for c in candidates]
+        
+        pinyin_strings = []
+        if self.chinese_config.get('enable_pinyin', True):
+            pinyin_strings = [self._target_pinyin(text) for text in normalized]
+        
+        features = CandidateFeatures(
+            raw_present=raw_present,
+            normalized=normalized,
+            pinyin=pinyin_strings
+        )
+        if self.tfidf_model is not None:
+            features.tfidf_model = self.tfidf_model
+            features.tfidf_vectors = self.tfidf_model.vectors_for(normalized)
+        else:
+            features.token_counts, features.vocabulary, features.squared_norms = self._count_terms(normalized)
+        return features
+    
+    def _count_terms(self, texts: Sequence[str]) -> Tuple[Any, Dict[str, int], np.ndarray]:
+        """
+        统计双文档TF-IDF所需的词频
+        
+        Returns:
+            Tuple: (文本×词表 词频稀疏矩阵, 词 -> 列下标, 每行词频平方和)
+        """
+        vocabulary: Dict[str, int] = {}
+        rows, cols, values = [], [], []
+        for row, text in enumerate(texts):
+            term_counts: Dict[int, int] = {}
+            for term in self._tfidf_analyzer(text) if text else ():
+                col = vocabulary.setdefault(term, len(vocabulary))
+                term_counts[col] = term_counts.get(col, 0) + 1
+            for col, count in term_counts.items():
+                rows.append(row)
+                cols.append(col)
+                values.append(count)
+        
+        token_counts = sparse.csr_matrix(
+            (np.asarray(values, dtype=np.float64), (rows, cols)),
+            shape=(len(texts), max(len(vocabulary), 1))
+        )
+        squared_norms = np.asarray(token_counts.multiply(token_counts).sum(axis=1)).ravel()
+        return token_counts, vocabulary, squared_norms
+    
+    def score_many(self, source: str, candidates: Sequence[str] = None,
+                   features: Optional[CandidateFeatures] = None) -> np.ndarray:
+        """
+        一对多计算字符串相似度，结果与逐对调用 calculate_string_similarity 一致
+        
+        Args:
+            source: 源字符串
+            candidates: 候选字符串列表（已提供features时可省略）
+            features: 预计算的候选特征（由 precompute_candidate_features 生成）
+            
+        Returns:
+            np.ndarray: 每个候选的相似度分数 (0-1)
+        """
+        if features is None:
+            features = self.precompute_candidate_features(candidates or [])
+        
+        count = len(features)
+        if count == 0 or not source:
+            return np.zeros(count, dtype=np.float64)
+        
+        source_text = normalize_string(source)
+        
+        total_score = np.zeros(count, dtype=np.float64)
+        total_weight = 0.0
+        
+        for algorithm in self._get_string_algorithms():
+            name = algorithm['name']
+            weight = algorithm['weight']
+            
+            if name == 'levenshtein':
+                scores = self._ratio_many(source_text, features.normalized, rapid_fuzz.ratio)
+            elif name == 'jaro_winkler':
+                scores = self._ratio_many(source_text, features.normalized, rapid_fuzz.token_sort_ratio,
+                                          processor=rapid_utils.default_process)
+            elif name == 'cosine':
+                scores = self._cosine_many(source_text, features)
+            else:
+                continue
+            
+            total_score += scores * weight
+            total_weight += weight
+        
+        # 中文处理增强
+        if self.chinese_config.get('enable_pinyin', True):
+            source_pinyin = self._to_pinyin(source_text)
+            if source_pinyin:
+                total_score += self._ratio_many(source_pinyin, features.pinyin, rapid_fuzz.ratio) * 0.2
+            total_weight += 0.2
+        
+        scores = total_score / total_weight if total_weight > 0 else total_score
+        
+        # 与逐对计算保持一致：完全相同为1，候选为空为0
+        exact = np.fromiter((text == source_text for text in features.normalized), dtype=bool, count=count)
+        scores[exact] = 1.0
+        scores[~features.raw_present] = 0.0
+        return scores
+    
+    @staticmethod
+    def _ratio_many(source: str, candidates: List[str], scorer, processor=None) -> np.ndarray:
+        """批量计算RapidFuzz比率，按fuzzywuzzy的整数百分比取整，空串得0分"""
+        if not source or not candidates:
+            return np.zeros(len(candidates), dtype=np.float64)
+        
+        scores = rapid_process.cdist([source], candidates, scorer=scorer, processor=processor,
+                                     dtype=np.float64)[0]
+        scores = np.round(scores) / 100.0
+        if processor is not None:
+            source = processor(source)
+            empty = np.fromiter((not processor(c) for c in candidates), dtype=bool, count=len(candidates))
+        else:
+            empty = np.fromiter((not c for c in candidates), dtype=bool, count=len(candidates))
+        if not source:
+            # 预处理后两侧均为空视为相同
+            return empty.astype(np.float64)
+        scores[empty] = 0.0
+        return scores
+    
+    def _cosine_many(self, source_text: str, features: CandidateFeatures) -> np.ndarray:
+        """批量计算余弦相似度：有语料模型时为稀疏点积，否则为双文档TF-IDF"""
+        if features.tfidf_vectors is not None:
+            return features.tfidf_model.cosine_to_vectors(source_text, features.tfidf_vectors)
+        return self._pair_cosine_many(source_text, features.token_counts,
+                                      features.vocabulary, features.squared_norms)
+    
+    def _pair_cosine_many(self, source_text: str, token_counts, vocabulary: Dict[str, int],
+                          squared_norms: np.ndarray) -> np.ndarray:
+        """
+        批量计算双文档TF-IDF余弦相似度
+        
+        对两个字符串单独拟合TF-IDF时，两侧都出现的词IDF为1，只出现在一侧的词IDF为ln(1.5)+1。
+        据此用稀疏矩阵一次性得到所有候选的点积和两侧范数，无需拟合向量化器
+        """
+        count = token_counts.shape[0]
+        source_counts: Dict[str, int] = {}
+        for term in self._tfidf_analyzer(source_text) if source_text else ():
+            source_counts[term] = source_counts.get(term, 0) + 1
+        if not source_counts:
+            return np.zeros(count, dtype=np.float64)
+        
+        width = token_counts.shape[1]
+        source_vector = np.zeros(width, dtype=np.float64)
+        extra_squared = 0.0
+        for term, term_count in source_counts.items():
+            col = vocabulary.get(term)
+            if col is None:
+                extra_squared += term_count * term_count
+            else:
+                source_vector[col] = term_count
+        
+        idf_sq = _PAIR_UNSHARED_IDF * _PAIR_UNSHARED_IDF
+        source_squared = float(np.dot(source_vector, source_vector)) + extra_squared
+        
+        present = token_counts.copy()
+        present.data[:] = 1.0
+        dot = token_counts @ source_vector
+        shared_source_squared = present @ (source_vector * source_vector)
+        shared_candidate_squared = token_counts.multiply(token_counts) @ (source_vector > 0).astype(np.float64)
+        
+        source_norm_sq = idf_sq * source_squared - (idf_sq - 1.0) * shared_source_squared
+        candidate_norm_sq = idf_sq * squared_norms - (idf_sq - 1.0) * shared_candidate_squared
+        denominator = np.sqrt(source_norm_sq * candidate_norm_sq)
+        
+        scores = np.zeros(count, dtype=np.float64)
+        valid = denominator > 0
+        scores[valid] = dot[valid] / denominator[valid]
+        return np.clip(scores, 0.0, 1.0)
+    
+    def _target_pinyin(self, normalized: str) -> str:
+        """目标侧标准化串的拼音（特征库中已有则直接读取）"""
+        if self.feature_store is not None and normalized:
+            pinyin = self.feature_store.pinyin_of(normalized)
+            if pinyin is not None:
+                return pinyin
+        return self._to_pinyin(normalized)
+    
+    @staticmethod
+    def _to_pinyin(text: str) -> str:
+        """转换为拼音串（查表 + 进程内缓存，与pypinyin的NORMAL风格结果一致）"""
+        if not text:
+            return ''
+        try:
+            return to_pinyin(text)
+        except Exception as e:
+            logger.debug(f"拼音转换失败: {str(e)}")
+            return ''
+    
     def _levenshtein_similarity(self, str1: str, str2: str) -> float:
         """Levenshtein距离相似度"""
         return fuzz.ratio(str1, str2) / 100.0
@@ -109,12 +378,10 @@ class SimilarityCalculator:
     def _cosine_similarity(self, str1: str, str2: str) -> float:
         """余弦相似度"""
         try:
-            # 使用TF-IDF向量化
-            corpus = [str1, str2]
-            tfidf_matrix = self.tfidf_vectorizer.fit_transform(corpus)
-            similarity_matrix = cosine_similarity(tfidf_matrix)
-            
-            return similarity_matrix[0, 1]
+            if self.tfidf_model is not None:
+                return float(self.tfidf_model.cosine_many(str1, [str2])[0])
+            # 无语料模型时按双文档TF-IDF的闭式解计算，不拟合共享的向量化器
+            return float(self._pair_cosine_many(str1, *self._count_terms([str2]))[0])
         except Exception as e:
             logger.debug(f"余弦相似度计算失败: {str(e)}")
             return 0.0
@@ -123,8 +390,10 @@ class SimilarityCalculator:
         """拼音相似度"""
         try:
             # 转换为拼音
-            pinyin1 = ''.join([item[0] for item in pypinyin.pinyin(str1, style=pypinyin.NORMAL)])
-            pinyin2 = ''.join([item[0] for item in pypinyin.pinyin(str2, style=pypinyin.NORMAL)])
+            pinyin1 = to_pinyin(str1)
+            pinyin2 = self.feature_store.pinyin_of(str2) if self.feature_store is not None else None
+            if pinyin2 is None:
+                pinyin2 = to_pinyin(str2)
             
             if not pinyin1 or not pinyin2:
                 return 0.0
@@ -182,7 +451,9 @@ class SimilarityCalculator:
         
         # 标准化电话号码
         norm_phone1 = normalize_phone(phone1)
-        norm_phone2 = normalize_phone(phone2)
+        norm_phone2 = self.feature_store.normalized_phone(phone2) if self.feature_store is not None else None
+        if norm_phone2 is None:
+            norm_phone2 = normalize_phone(phone2)
         
         if not norm_phone1 or not norm_phone2:
             return 0.0
@@ -219,7 +490,9 @@ class SimilarityCalculator:
         # 恢复地址标准化 - 这是地址匹配的核心功能
         from .address_normalizer import normalize_address_for_matching
         normalized_addr1 = normalize_address_for_matching(addr1)
-        normalized_addr2 = normalize_address_for_matching(addr2)
+        normalized_addr2 = self.feature_store.normalized_address(addr2) if self.feature_store is not None else None
+        if normalized_addr2 is None:
+            normalized_addr2 = normalize_address_for_matching(addr2)
         
         logger.debug(f"地址标准化: '{addr1}' -> '{normalized_addr1}'")
         logger.debug(f"地址标准化: '{addr2}' -> '{normalized_addr2}'")
@@ -249,7 +522,9 @@ class SimilarityCalculator:
         try:
             # 1. 提取地址核心组件
             components1 = self._extract_enhanced_address_components(addr1)
-            components2 = self._extract_enhanced_address_components(addr2)
+            components2 = self.feature_store.address_components(addr2) if self.feature_store is not None else None
+            if components2 is None:
+                components2 = self._extract_enhanced_address_components(addr2)
             
             # 2. 计算组件权重化相似度
             return self._calculate_weighted_address_similarity(components1, components2)
@@ -264,58 +539,12 @@ class SimilarityCalculator:
     
     def _extract_enhanced_address_components(self, address: str) -> Dict[str, str]:
         """
-        提取增强的地址组件
-        支持更复杂的地址解析，包括建筑物名称、门牌号等
+        提取增强的地址组件（6级结构 + 建筑物名称 + 详细信息）
+        使用共享地址解析引擎（地名库 + 预编译正则，结果按地址缓存）
         
         【关键修复】确保输入地址已经过标准化处理
         """
-        components = {
-            'province': '',    # 1省级：省、自治区、直辖市
-            'city': '',        # 2地级：地级市、地区、自治州、盟
-            'district': '',    # 3县级：县、县级市、区、旗
-            'town': '',        # 4乡级：街道、镇、乡
-            'street': '',      # 5村级：社区、行政村、新村、里弄、道路
-            'number': '',      # 6门牌：门牌号、楼号、单元号、室号
-            'building': '',    # 建筑物名称（不参与6级匹配）
-            'detail': ''       # 其他详细信息（不参与6级匹配）
-        }
-        
-        # 【修复】确保输入地址已标准化（调用方已处理，这里做二次确认）
-        # 注意：此时address应该已经是标准化后的地址
-        logger.debug(f"提取地址组件，输入地址: '{address}'")
-        
-        # 【2025年8月22日修复】6级地址组件提取 - 严格按照6级层级结构
-        # 1省级：省、自治区、直辖市；2地级：地级市、地区、自治州、盟；3县级：县、县级市、区、旗；
-        # 4乡级：街道、镇、乡；5村级：社区、行政村、新村、里弄、道路；6门牌：门牌号、楼号、单元号、室号
-        patterns = {
-            'province': r'([^省市区县]{2,8}(?:省|市|自治区))',  # 1省级
-            'city': r'([^省市区县]{2,8}(?:市|州|县))',          # 2地级  
-            'district': r'([^省市区县镇]{2,8}(?:区|县|开发区|高新区|经济区))',  # 3县级
-            'town': r'([^省市区县]{2,8}(?:镇|乡|街道))',        # 4乡级：街道、镇、乡
-            'street': r'([^路街道巷弄里号栋幢座楼室层]{1,20}(?:路|街|道|巷|里|大街|大道|街道|村|邨|社区|新村|小区|公寓|花园|苑|庄|家园|城|园区))',  # 5村级：道路、村、邨、社区、小区等（移除弄，避免与门牌冲突）
-            'number': r'(\d+(?:弄\d*号?|号|栋|幢|座|楼|室|层))',  # 6门牌：门牌号、楼号、单元号、室号
-            'building': r'([^路街道巷弄里号栋幢座楼室层]{2,20}(?:养老院|敬老院|老年公寓|护理院|福利院|公司|厂|店|馆|所|站|场|生态园|科技园|工业园|产业园|广场|中心|大厦))'
-        }
-        
-        # 【修复】预处理已在标准化阶段完成，这里直接使用标准化后的地址
-        remaining_address = address
-        
-        # 按顺序提取各组件
-        for component, pattern in patterns.items():
-            matches = re.findall(pattern, remaining_address)
-            if matches:
-                # 取最长的匹配（通常更准确）
-                matched_component = max(matches, key=len)
-                components[component] = matched_component
-                # 从剩余地址中移除已匹配的部分
-                remaining_address = remaining_address.replace(matched_component, '', 1)
-                logger.debug(f"提取到{component}: '{matched_component}'")
-        
-        # 剩余部分作为详细信息
-        components['detail'] = remaining_address.strip()
-        
-        logger.debug(f"地址组件提取结果: {components}")
-        return components
+        return parse_address(address).to_dict()
     
     def _calculate_weighted_address_similarity(self, comp1: Dict[str, str], comp2: Dict[str, str]) -> float:
         """
@@ -595,47 +824,8 @@ class SimilarityCalculator:
             return self.calculate_string_similarity(addr1, addr2)
     
     def _extract_address_components(self, address: str) -> Dict[str, str]:
-        """提取地址组件"""
-        components = {
-            'province': '',    # 1省级：省、自治区、直辖市
-            'city': '',        # 2地级：地级市、地区、自治州、盟
-            'district': '',    # 3县级：县、县级市、区、旗
-            'town': '',        # 4乡级：街道、镇、乡
-            'street': '',      # 5村级：社区、行政村、新村、里弄、道路
-            'number': '',      # 6门牌：门牌号、楼号、单元号、室号
-            'building': '',    # 建筑物名称（不参与6级匹配）
-            'detail': ''       # 其他详细信息（不参与6级匹配）
-        }
-        
-        # 预处理：移除行政层级词汇
-        remaining_address = address
-        remaining_address = re.sub(r'市辖区', '', remaining_address)  # 移除"市辖区"
-        remaining_address = re.sub(r'县辖区', '', remaining_address)  # 移除"县辖区"
-        
-        # 【2025年8月22日修复】6级地址组件提取 - 严格按照6级层级结构
-        # 1省级：省、自治区、直辖市；2地级：地级市、地区、自治州、盟；3县级：县、县级市、区、旗；
-        # 4乡级：街道、镇、乡；5村级：社区、行政村、新村、里弄、道路；6门牌：门牌号、楼号、单元号、室号
-        patterns = {
-            'province': r'([^省市区县]{2,8}(?:省|市|自治区))',  # 1省级
-            'city': r'([^省市区县]{2,8}(?:市|州|县))',          # 2地级  
-            'district': r'([^省市区县镇]{2,8}(?:区|县|开发区|高新区|经济区))',  # 3县级
-            'town': r'([^省市区县]{2,8}(?:镇|乡|街道))',        # 4乡级：街道、镇、乡
-            'street': r'([^路街道巷弄里号栋幢座楼室层]{1,20}(?:路|街|道|巷|里|大街|大道|街道|村|邨|社区|新村|小区|公寓|花园|苑|庄|家园|城|园区))',  # 5村级：道路、村、邨、社区、小区等（移除弄，避免与门牌冲突）
-            'number': r'(\d+(?:弄\d*号?|号|栋|幢|座|楼|室|层))',  # 6门牌：门牌号、楼号、单元号、室号
-            'building': r'([^路街道巷弄里号栋幢座楼室层]{2,20}(?:养老院|敬老院|老年公寓|护理院|福利院|公司|厂|店|馆|所|站|场|生态园|科技园|工业园|产业园|广场|中心|大厦))'
-        }
-        
-        # 按顺序提取各组件
-        for component, pattern in patterns.items():
-            matches = re.findall(pattern, remaining_address)
-            if matches:
-                components[component] = matches[0]
-                remaining_address = remaining_address.replace(matches[0], '', 1)
-        
-        # 剩余部分作为详细地址
-        components['detail'] = remaining_address.strip()
-        
-        return components
+        """提取地址组件（与增强地址解析共用同一解析引擎）"""
+        return parse_address(address).to_dict()
     
     def calculate_comprehensive_similarity(self, source_record: Dict, target_record: Dict, 
                                         field_configs: Dict) -> Tuple[float, Dict]:
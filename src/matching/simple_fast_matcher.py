@@ -7,21 +7,150 @@
 
 import time
 import logging
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Any, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from ..database.collection_snapshot import load_collection_records, compute_snapshot_fingerprint
+from .blocking_engine import BlockingEngine, BlockingRule
+from ..utils.config import get_index_maintenance_config
+from .process_pool_engine import (
+    ProcessMatchingPool, EXECUTION_MODE_PROCESS, compact_records, get_parallel_config
+)
+
 logger = logging.getLogger(__name__)
 
+
+def _build_fast_match_context(target_records: List[Dict],
+                              blocking_rules: Optional[List[BlockingRule]] = None,
+                              blocking_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """工作进程上下文：目标表精简记录只在进程启动时传入一次，声明了分块规则时在进程内建立分块"""
+    context = {'target_records': target_records, 'blocking_engine': None}
+    if blocking_rules:
+        blocking_config = blocking_config or {}
+        context['blocking_engine'] = BlockingEngine(
+            blocking_rules, blocking_config.get('max_block_size', 500),
+            blocking_config.get('max_candidates_per_record', 200)
+        ).build(target_records)
+        context['records_by_id'] = {record['_id']: record for record in target_records}
+    return context
+
+
+def _fast_match_chunk(context: Dict[str, Any], source_chunk: List[Dict], mappings: List[Dict],
+                      source_table: str, target_table: str, task_id: str) -> List[Dict]:
+    """工作进程内匹配一块源记录"""
+    results = []
+    engine = context['blocking_engine']
+    for source_record in source_chunk:
+        target_records = context['target_records'] if engine is None else [
+            context['records_by_id'][i] for i in engine.candidate_ids(source_record)
+        ]
+        results.extend(SimpleFastMatcher._match_single_record_fast(
+            source_record, target_records, mappings, source_table, target_table, task_id
+        ))
+    return results
+
+
 class SimpleFastMatcher:
     """简单快速匹配器 - 优先速度"""
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, execution_mode: str = None, process_workers: int = None):
+        """
+        初始化简单快速匹配器
+        
+        Args:
+            db_manager: 数据库管理器
+            execution_mode: 执行模式（'thread' 或 'process'），默认读取并行处理配置
+            process_workers: 进程模式下的工作进程数（0或None表示CPU核心数）
+        """
         self.db_manager = db_manager
+        parallel_config = get_parallel_config()
+        self.execution_mode = execution_mode or parallel_config.get('execution_mode', 'thread')
+        self.process_workers = process_workers or parallel_config.get('process_workers', 0)
+        self.process_chunk_size = parallel_config.get('process_chunk_size', 200)
+        # 目标表的更新时间字段（与增量索引维护一致），快照指纹据此感知原地修改
+        self.updated_field = get_index_maintenance_config().get('updated_field', 'updated_time')
         self.stats = {
             'total_queries': 0,
             'total_matches': 0,
             'avg_query_time': 0.0
         }
+        
+        # 进程模式：每个目标表一个进程池，目标记录在池创建时一次性下发给工作进程
+        self._process_pools: Dict[str, ProcessMatchingPool] = {}
+        # 线程模式：(任务ID, 目标表) -> 快照指纹，任务内各批次复用，不再逐批计算
+        self._snapshot_fingerprints: Dict[Tuple[str, str], str] = {}
+        
+        # 分块引擎：每个目标表一个，目标数据不变时跨批次复用
+        self._blocking_engines: Dict[str, Tuple[Tuple, BlockingEngine, Dict[Any, Dict]]] = {}
+    
+    @staticmethod
+    def _get_primary_mappings(mappings: List[Dict]) -> List[Dict]:
+        """获取主要匹配字段映射"""
+        primary_mappings = [m for m in mappings if m.get('field_priority') == 'primary']
+        if not primary_mappings:
+            primary_mappings = mappings[:2]  # 取前两个字段
+        return primary_mappings
+    
+    def _get_process_pool(self, target_table: str, table_mappings: List[Dict]) -> ProcessMatchingPool:
+        """获取目标表对应的进程池（首次使用时加载目标数据并创建）"""
+        pool = self._process_pools.get(target_table)
+        if pool is None:
+            target_fields = [m['target_field'] for m in self._get_primary_mappings(table_mappings)]
+            blocking = BlockingEngine.from_config(table_mappings, target_table)
+            if blocking is not None:
+                target_fields += [field for field in blocking.target_fields if field not in target_fields]
+            target_collection = self.db_manager.get_collection(target_table)
+            projection = {field: 1 for field in target_fields}
+            target_records = compact_records(
+                list(target_collection.find({}, projection).limit(100000)), target_fields
+            )
+            for record in target_records:
+                record['_id'] = str(record.get('_id', ''))
+            
+            logger.info(f"📊 目标记录数: {len(target_records)}（进程模式，仅下发 {target_fields} 字段）")
+            context_args = (target_records,) if blocking is None else (
+                target_records, blocking.rules,
+                {'max_block_size': blocking.max_block_size,
+                 'max_candidates_per_record': blocking.max_candidates_per_record}
+            )
+            pool = ProcessMatchingPool(
+                _build_fast_match_context, context_args, max_workers=self.process_workers
+            )
+            self._process_pools[target_table] = pool
+        return pool
+    
+    def _get_blocking_engine(self, target_table: str, table_mappings: List[Dict],
+                             target_records: List[Dict]) -> Optional[Tuple[BlockingEngine, Dict[Any, Dict]]]:
+        """获取目标表的分块引擎（未声明分块规则时返回None；目标数据或规则变化时重建）"""
+        engine = BlockingEngine.from_config(table_mappings, target_table)
+        if engine is None:
+            return None
+        
+        signature = (
+            tuple(rule.name for rule in engine.rules),
+            len(target_records),
+            target_records[0].get('_id') if target_records else None,
+            target_records[-1].get('_id') if target_records else None
+        )
+        cached = self._blocking_engines.get(target_table)
+        if cached is not None and cached[0] == signature:
+            return cached[1], cached[2]
+        
+        engine.build(target_records)
+        records_by_id = {record.get('_id'): record for record in target_records}
+        self._blocking_engines[target_table] = (signature, engine, records_by_id)
+        return engine, records_by_id
+    
+    def get_blocking_stats(self) -> Dict[str, Any]:
+        """获取各目标表分块引擎的候选统计"""
+        return {table: cached[1].get_stats() for table, cached in self._blocking_engines.items()}
+    
+    def close(self):
+        """关闭进程池"""
+        for pool in self._process_pools.values():
+            pool.shutdown()
+        self._process_pools.clear()
+        self._snapshot_fingerprints.clear()
     
     def batch_match(self, source_records: List[Dict], mappings: List[Dict], 
                    source_table: str, task_id: str) -> List[Dict]:
@@ -45,32 +174,15 @@ class SimpleFastMatcher:
         for target_table, table_mappings in target_tables.items():
             logger.info(f"📊 匹配目标表: {target_table}")
             
-            # 获取目标数据（一次性加载，避免重复查询）
-            target_collection = self.db_manager.get_collection(target_table)
-            target_records = list(target_collection.find({}).limit(100000))  # 限制数量避免内存问题
-            
-            logger.info(f"📊 目标记录数: {len(target_records)}")
+            if self.execution_mode == EXECUTION_MODE_PROCESS:
+                all_results.extend(self._batch_match_in_processes(
+                    source_records, table_mappings, source_table, target_table, task_id
+                ))
+                continue
             
-            # 使用线程池并行处理
-            with ThreadPoolExecutor(max_workers=16) as executor:  # 高并发
-                future_to_source = {}
-                
-                for source_record in source_records:
-                    future = executor.submit(
-                        self._match_single_record_fast,
-                        source_record, target_records, table_mappings,
-                        source_table, target_table, task_id
-                    )
-                    future_to_source[future] = source_record
-                
-                # 收集结果
-                for future in as_completed(future_to_source):
-                    try:
-                        result = future.result(timeout=5)  # 快速超时
-                        if result:
-                            all_results.extend(result)
-                    except Exception as e:
-                        logger.warning(f"单记录匹配失败: {e}")
+            all_results.extend(self._batch_match_in_threads(
+                source_records, table_mappings, source_table, target_table, task_id
+            ))
         
         duration = time.time() - start_time
         speed = batch_size / duration if duration > 0 else 0
@@ -81,17 +193,124 @@ class SimpleFastMatcher:
         
         return all_results
     
-    def _match_single_record_fast(self, source_record: Dict, target_records: List[Dict],
-                                 mappings: List[Dict], source_table: str, 
-                                 target_table: str, task_id: str) -> List[Dict]:
+    def _get_snapshot_fingerprint(self, task_id: str, target_table: str, target_collection) -> Optional[str]:
+        """获取任务内缓存的目标表快照指纹（计算失败时返回None，由快照读取自行计算）"""
+        key = (task_id, target_table)
+        if key not in self._snapshot_fingerprints:
+            try:
+                self._snapshot_fingerprints[key] = compute_snapshot_fingerprint(target_collection, self.updated_field)
+            except Exception as e:
+                logger.warning(f"计算目标表快照指纹失败: {target_table} - {str(e)}")
+                return None
+        return self._snapshot_fingerprints[key]
+    
+    def _batch_match_in_threads(self, source_records: List[Dict], table_mappings: List[Dict],
+                                source_table: str, target_table: str, task_id: str) -> List[Dict]:
+        """线程池匹配：目标表映射字段一次性加载，源记录逐条并行比较"""
+        # 获取目标数据（一次性加载映射字段，优先使用列式快照）
+        target_collection = self.db_manager.get_collection(target_table)
+        target_fields = [m['target_field'] for m in table_mappings]
+        # 分块规则可能依赖映射之外的目标字段（如 extra_target_fields 中的地址），与进程模式一致一并读取
+        blocking_config = BlockingEngine.from_config(table_mappings, target_table)
+        if blocking_config is not None:
+            target_fields += [field for field in blocking_config.target_fields if field not in target_fields]
+        # 每个批次都会重新读取，首次即导出整表快照供后续批次复用；变更指纹每个任务只计算一次
+        target_records = load_collection_records(target_collection, target_fields, limit=100000,  # 限制数量避免内存问题
+                                                 updated_field=self.updated_field,
+                                                 build_snapshot=True,
+                                                 fingerprint=self._get_snapshot_fingerprint(
+                                                     task_id, target_table, target_collection))
+        
+        logger.info(f"📊 目标记录数: {len(target_records)}")
+        
+        # 映射声明了分块键时，每条源记录只与其分块候选比较
+        blocking = self._get_blocking_engine(target_table, table_mappings, target_records)
+        
+        # 使用线程池并行处理
+        results = []
+        with ThreadPoolExecutor(max_workers=16) as executor:  # 高并发
+            future_to_source = {}
+            
+            for source_record in source_records:
+                if blocking is None:
+                    record_targets = target_records
+                else:
+                    engine, records_by_id = blocking
+                    record_targets = [records_by_id[i] for i in engine.candidate_ids(source_record)]
+                future = executor.submit(
+                    self._match_single_record_fast,
+                    source_record, record_targets, table_mappings,
+                    source_table, target_table, task_id
+                )
+                future_to_source[future] = source_record
+            
+            # 收集结果
+            for future in as_completed(future_to_source):
+                try:
+                    result = future.result(timeout=5)  # 快速超时
+                    if result:
+                        results.extend(result)
+                except Exception as e:
+                    logger.warning(f"单记录匹配失败: {e}")
+        
+        if blocking is not None:
+            blocking_stats = blocking[0].get_stats()
+            logger.info(f"🧱 分块候选: 平均 {blocking_stats['avg_pairs_per_record']:.1f} 对/记录, "
+                       f"最大 {blocking_stats['max_pairs_per_record']}, "
+                       f"无候选记录 {blocking_stats['records_without_candidates']}")
+        
+        return results
+    
+    def _batch_match_in_processes(self, source_records: List[Dict], table_mappings: List[Dict],
+                                  source_table: str, target_table: str, task_id: str) -> List[Dict]:
+        """进程池匹配：源记录精简后分块下发，结果按块流式收集"""
+        pool = self._get_process_pool(target_table, table_mappings)
+        source_fields = [m['source_field'] for m in self._get_primary_mappings(table_mappings)]
+        # 分块规则可能依赖主映射之外的源字段（extra_source_fields、非主映射上的规则），一并下发
+        blocking = BlockingEngine.from_config(table_mappings, target_table)
+        if blocking is not None:
+            source_fields += [field for field in blocking.source_fields if field not in source_fields]
+        compact_sources = compact_records(source_records, source_fields)
+        
+        results = []
+        completed_starts = set()
+        try:
+            for chunk_start, chunk_results in pool.imap_chunks(
+                _fast_match_chunk, compact_sources, self.process_chunk_size,
+                table_mappings, source_table, target_table, task_id
+            ):
+                results.extend(chunk_results)
+                completed_starts.add(chunk_start)
+        except Exception as e:
+            # 工作进程异常退出后进程池不可再用，丢弃后下个批次重新创建
+            logger.warning(f"进程池匹配失败，未完成的记录回退线程模式: {e}")
+            self._process_pools.pop(target_table, None)
+            pool.shutdown(wait_for_workers=False)
+            
+            # 未完成块的源记录用线程模式补跑，避免静默丢失
+            chunk_size = max(1, self.process_chunk_size)
+            pending_records = [
+                record
+                for start in range(0, len(source_records), chunk_size)
+                if start not in completed_starts
+                for record in source_records[start:start + chunk_size]
+            ]
+            if pending_records:
+                results.extend(self._batch_match_in_threads(
+                    pending_records, table_mappings, source_table, target_table, task_id
+                ))
+        return results
+    
+    @staticmethod
+    def _match_single_record_fast(source_record: Dict, target_records: List[Dict],
+                                  mappings: List[Dict], source_table: str, 
+                                  target_table: str, task_id: str) -> List[Dict]:
         """单记录快速匹配"""
         results = []
         
         try:
             # 获取主要匹配字段
-            primary_mappings = [m for m in mappings if m.get('field_priority') == 'primary']
-            if not primary_mappings:
-                primary_mappings = mappings[:2]  # 取前两个字段
+            primary_mappings = SimpleFastMatcher._get_primary_mappings(mappings)
             
             # 快速精确匹配
             for target_record in target_records:
@@ -7,18 +7,25 @@
 
 import pymongo
 import re
-import jieba
 import time
 from typing import Dict, List, Set, Tuple, Optional
 from rapidfuzz import fuzz, process
 from collections import defaultdict, Counter
 import logging
 
+from .minhash_lsh_index import get_minhash_lsh_index, bands_for_threshold
+from ..database.range_reader import normalize_id
+from ..utils.tokenizer_service import get_tokenizer
+
 logger = logging.getLogger(__name__)
 
+# 候选记录回表读取的字段
+CANDIDATE_PROJECTION = {'dwmc': 1, 'dwdz': 1, 'tyshxydm': 1, 'fddbr': 1, 'xfaqglr': 1}
+
 class SliceEnhancedMatcher:
     def __init__(self, db_manager=None):
         """初始化切片增强匹配器"""
+        self.db_manager = db_manager
         if db_manager:
             # 使用get_db()方法获取数据库实例
             if hasattr(db_manager, 'get_db'):
@@ -48,16 +55,30 @@ class SliceEnhancedMatcher:
             'final_similarity_threshold': 0.75, # 最终相似度阈值
             'max_candidates': 50,               # 最大候选数量
             'use_cache': True,                  # 启用缓存
-            'cache_ttl': 7 * 24 * 3600         # 缓存过期时间（7天）
+            'cache_ttl': 7 * 24 * 3600,        # 缓存过期时间（7天）
+            'use_lsh_index': True,             # 使用MinHash-LSH索引查找名称候选（不可用时回退到切片集合聚合）
+            # union: LSH候选再与切片聚合候选取并集; lsh_only: 只用LSH（按Jaccard召回，目标远长于源名称时
+            # 覆盖比例达标的记录也可能漏召回，如“上海华为技术”在16x4划分下漏掉“上海华为技术有限公司”，
+            # 召回率经实测与切片聚合相当前保持union）
+            'lsh_candidate_mode': 'union',
+            'lsh_jaccard_threshold': 0.5,      # LSH召回阈值，用于选择band划分
+            'lsh_verify_jaccard': 0.35,        # 签名估计Jaccard的复核下限（低于召回阈值以容纳估计误差）
+            'lsh_num_perm': 64,                # MinHash签名长度
+            'lsh_bands': None                  # LSH band数（None表示按lsh_jaccard_threshold选择，64位签名为16x4）
         }
         
+        # 获取索引失败的字段（不再重试）；获取成功的索引每次从进程内缓存取，以便目标表变更后换用新索引
+        self._lsh_unavailable = set()
+        self._lsh_index_sizes = {}
+        
         # 性能统计
         self.stats = {
             'slice_queries': 0,
             'keyword_queries': 0,
             'cache_hits': 0,
             'cache_misses': 0,
-            'total_matches': 0
+            'total_matches': 0,
+            'lsh_queries': 0
         }
         
         logger.info("🚀 切片增强匹配器初始化完成")
@@ -84,8 +105,8 @@ class SliceEnhancedMatcher:
         if not text:
             return set()
         
-        # 使用jieba分词
-        words = jieba.cut(text)
+        # 使用jieba分词（共享分词服务，结果按文本记忆）
+        words = get_tokenizer().tokenize(text)
         keywords = set()
         
         for word in words:
@@ -96,6 +117,48 @@ class SliceEnhancedMatcher:
         
         return keywords
     
+    def _lsh_bands(self) -> int:
+        """LSH band数：未配置时按精确Jaccard下限选择，保证阈值附近的记录能以较高概率召回"""
+        return self.config['lsh_bands'] or bands_for_threshold(self.config['lsh_num_perm'],
+                                                               self.config['lsh_jaccard_threshold'])
+    
+    def _get_lsh_index(self, field: str):
+        """获取目标表字段的MinHash-LSH索引（不可用时返回None）"""
+        if (field in self._lsh_unavailable or not self.config['use_lsh_index']
+                or not hasattr(self.db_manager, 'get_collection')):
+            return None
+        index = get_minhash_lsh_index(self.db_manager, self.target_collection.name, field,
+                                      num_perm=self.config['lsh_num_perm'], bands=self._lsh_bands())
+        if index is None:
+            self._lsh_unavailable.add(field)
+        else:
+            self._lsh_index_sizes[field] = len(index)
+        return index
+    
+    def _find_candidates_by_lsh(self, index, text: str, max_results: int) -> List[Dict]:
+        """通过MinHash-LSH索引查找候选（按签名复核并截断）并回表读取完整记录"""
+        self.stats['lsh_queries'] += 1
+        neighbors = index.query(text, self.config['lsh_verify_jaccard'], max_results,
+                                min_containment=self.config['slice_match_threshold'])
+        neighbors.sort(key=lambda n: n['containment'], reverse=True)
+        if not neighbors:
+            return []
+        
+        full_records = self.target_collection.find(
+            {'_id': {'$in': [normalize_id(n['id']) for n in neighbors]}}, CANDIDATE_PROJECTION
+        )
+        record_map = {str(record['_id']): record for record in full_records}
+        
+        result = []
+        for neighbor in neighbors:
+            record = record_map.get(neighbor['id'])
+            if record is not None:
+                record = record.copy()
+                record['slice_score'] = neighbor['containment']
+                record['jaccard_score'] = neighbor['jaccard']
+                result.append(record)
+        return result
+    
     def find_candidates_by_slices(self, source_name: str) -> List[Dict]:
         """通过切片查找候选记录"""
         try:
@@ -107,6 +170,45 @@ class SliceEnhancedMatcher:
             if not all_slices:
                 return []
             
+            # MinHash-LSH候选（slice_score口径一致：源切片被目标覆盖的比例）；lsh_only模式下替代切片集合聚合，
+            # 默认的union模式下再与聚合结果取并集，补回Jaccard较低但覆盖比例达标的记录；索引不可用时只用聚合
+            lsh_candidates = []
+            index = self._get_lsh_index('dwmc')
+            if index is not None:
+                lsh_candidates = self._find_candidates_by_lsh(index, source_name, self.config['max_candidates'])
+                if self.config['lsh_candidate_mode'] != 'union':
+                    return lsh_candidates
+            
+            slice_candidates = self._find_candidates_by_slice_aggregation(all_slices)
+            if not lsh_candidates:
+                return slice_candidates
+            return self._merge_candidates(slice_candidates, lsh_candidates,
+                                         max_results=self.config['max_candidates'])
+            
+        except Exception as e:
+            logger.error(f"切片查询失败: {e}")
+            return []
+    
+    @staticmethod
+    def _merge_candidates(*candidate_lists: List[Dict], max_results: int) -> List[Dict]:
+        """合并多路候选（同一记录取slice_score较高者），按slice_score降序截断"""
+        merged = {}
+        for candidates in candidate_lists:
+            for record in candidates:
+                key = str(record['_id'])
+                current = merged.get(key)
+                if current is None:
+                    merged[key] = record
+                elif record['slice_score'] > current['slice_score']:
+                    merged[key] = {**current, **record}
+                else:
+                    merged[key] = {**record, **current}
+        result = sorted(merged.values(), key=lambda record: record['slice_score'], reverse=True)
+        return result[:max_results]
+    
+    def _find_candidates_by_slice_aggregation(self, all_slices: Set[str]) -> List[Dict]:
+        """通过切片集合聚合精确统计源切片被目标覆盖的比例"""
+        try:
             # 查询切片索引
             self.stats['slice_queries'] += 1
             
@@ -134,7 +236,7 @@ class SliceEnhancedMatcher:
                 doc_ids = [candidate['_id'] for candidate in candidates]
                 full_records = list(self.target_collection.find(
                     {'_id': {'$in': doc_ids}},
-                    {'dwmc': 1, 'dwdz': 1, 'tyshxydm': 1, 'fddbr': 1, 'xfaqglr': 1}
+                    CANDIDATE_PROJECTION
                 ))
                 
                 # 合并切片信息和完整记录
@@ -157,6 +259,18 @@ class SliceEnhancedMatcher:
             logger.error(f"切片查询失败: {e}")
             return []
     
+    def find_candidates_by_address(self, source_address: str) -> List[Dict]:
+        """通过地址MinHash-LSH索引查找候选记录（索引不可用时返回空列表）"""
+        try:
+            index = self._get_lsh_index('dwdz')
+            if index is None or not source_address:
+                return []
+            return self._find_candidates_by_lsh(index, source_address, self.config['max_candidates'])
+            
+        except Exception as e:
+            logger.error(f"地址切片查询失败: {e}")
+            return []
+    
     def find_candidates_by_keywords(self, source_name: str) -> List[Dict]:
         """通过关键词查找候选记录"""
         try:
@@ -190,7 +304,7 @@ class SliceEnhancedMatcher:
                 doc_ids = [candidate['_id'] for candidate in candidates]
                 full_records = list(self.target_collection.find(
                     {'_id': {'$in': doc_ids}},
-                    {'dwmc': 1, 'dwdz': 1, 'tyshxydm': 1, 'fddbr': 1, 'xfaqglr': 1}
+                    CANDIDATE_PROJECTION
                 ))
                 
                 # 合并关键词信息和完整记录
@@ -337,6 +451,22 @@ class SliceEnhancedMatcher:
         
         return final_score
     
+    def fast_fuzzy_match(self, source_name: str, threshold: float = 0.7, max_results: int = 50) -> List[Dict]:
+        """
+        快速模糊匹配：切片候选按名称相似度过滤
+        
+        Returns:
+            List[Dict]: [{'target_record', 'similarity_score'}]，按相似度降序
+        """
+        matches = []
+        for candidate in self.find_candidates_by_slices(source_name):
+            similarity = self.calculate_similarity(source_name, candidate.get('dwmc', ''))
+            if similarity >= threshold:
+                matches.append({'target_record': candidate, 'similarity_score': similarity})
+        
+        matches.sort(key=lambda m: m['similarity_score'], reverse=True)
+        return matches[:max_results]
+    
     def find_best_matches(self, source_record: Dict) -> List[Dict]:
         """查找最佳匹配"""
         source_name = source_record.get('UNIT_NAME', '')
@@ -395,7 +525,9 @@ class SliceEnhancedMatcher:
             'cache_hits': self.stats['cache_hits'],
             'cache_misses': self.stats['cache_misses'],
             'cache_hit_rate': self.stats['cache_hits'] / (self.stats['cache_hits'] + self.stats['cache_misses']) if (self.stats['cache_hits'] + self.stats['cache_misses']) > 0 else 0,
-            'total_matches': self.stats['total_matches']
+            'total_matches': self.stats['total_matches'],
+            'lsh_queries': self.stats['lsh_queries'],
+            'lsh_indexes': {**dict(self._lsh_index_sizes), **{field: None for field in self._lsh_unavailable}}
         }
     
     def clear_cache(self):
@@ -11,6 +11,9 @@ from dataclasses import dataclass
 from rapidfuzz import fuzz
 import logging
 
+from src.utils.bounded_cache import BoundedCache
+from src.utils.keyword_automaton import PrefixTrie, SuffixTrie, AhoCorasickAutomaton
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -76,60 +79,75 @@ class StructuredNameMatcher:
             'business_type_conflict': 0.3 # 业务类型冲突阈值
         }
         
+        # 目标表特征库（TargetFeatureStore），挂载后目标名称的结构分解直接查表
+        self.feature_store = None
+        
         # 初始化分词和模式
         self._init_patterns()
         self._init_business_conflicts()
+        self._compile_patterns()
+        
+        # 名称解析结果缓存（解析结果为共享对象，调用方不应修改）
+        self._parse_cache = BoundedCache('structured_name.parse',
+                                         max_entries=self.config.get('parse_cache_size', 50000))
     
     def _init_patterns(self):
         """初始化正则表达式模式和关键词"""
         
-        # 行政区域模式
-        self.region_patterns = [
-            # 直辖市具体区县
-            r'(上海市?(?:浦东新区|黄浦区|徐汇区|长宁区|静安区|普陀区|虹口区|杨浦区|闵行区|宝山区|嘉定区|金山区|松江区|青浦区|奉贤区|崇明区|崇明县))',
-            r'(北京市?(?:东城区|西城区|朝阳区|丰台区|石景山区|海淀区|门头沟区|房山区|通州区|顺义区|昌平区|大兴区|怀柔区|平谷区|密云区|延庆区))',
-            r'(天津市?(?:和平区|河东区|河西区|南开区|河北区|红桥区|东丽区|西青区|津南区|北辰区|武清区|宝坻区|滨海新区|宁河区|静海区|蓟州区))',
-            r'(重庆市?(?:渝中区|大渡口区|江北区|沙坪坝区|九龙坡区|南岸区|北碚区|綦江区|大足区|渝北区|巴南区|黔江区|长寿区|江津区|合川区|永川区|南川区|璧山区|铜梁区|潼南区|荣昌区|开州区|梁平区|武隆区|城口县|丰都县|垫江县|忠县|云阳县|奉节县|巫山县|巫溪县|石柱县|秀山县|酉阳县|彭水县))',
-            
-            # 省会城市具体区县
-            r'(深圳市?(?:罗湖区|福田区|南山区|宝安区|龙岗区|盐田区|龙华区|坪山区|光明区|大鹏新区))',
-            r'(广州市?(?:荔湾区|越秀区|海珠区|天河区|白云区|黄埔区|番禺区|花都区|南沙区|增城区|从化区))',
-            r'(杭州市?(?:上城区|下城区|江干区|拱墅区|西湖区|滨江区|萧山区|余杭区|富阳区|临安区|桐庐县|淳安县|建德市))',
-            
+        # 行政区域：城市（可带"市"）及其下辖区县，解析时取名称开头匹配的最长区域
+        self.region_districts = {
             # 直辖市
-            r'(上海市?)',
-            r'(北京市?)',
-            r'(天津市?)',
-            r'(重庆市?)',
-            
+            '上海': [
+                '浦东新区', '黄浦区', '徐汇区', '长宁区', '静安区', '普陀区', '虹口区', '杨浦区', '闵行区', '宝山区', '嘉定区', '金山区', '松江区',
+                '青浦区', '奉贤区', '崇明区', '崇明县'
+            ],
+            '北京': [
+                '东城区', '西城区', '朝阳区', '丰台区', '石景山区', '海淀区', '门头沟区', '房山区', '通州区', '顺义区', '昌平区', '大兴区', '怀柔区',
+                '平谷区', '密云区', '延庆区'
+            ],
+            '天津': [
+                '和平区', '河东区', '河西区', '南开区', '河北区', '红桥区', '东丽区', '西青区', '津南区', '北辰区', '武清区', '宝坻区', '滨海新区',
+                '宁河区', '静海区', '蓟州区'
+            ],
+            '重庆': [
+                '渝中区', '大渡口区', '江北区', '沙坪坝区', '九龙坡区', '南岸区', '北碚区', '綦江区', '大足区', '渝北区', '巴南区', '黔江区', '长寿区',
+                '江津区', '合川区', '永川区', '南川区', '璧山区', '铜梁区', '潼南区', '荣昌区', '开州区', '梁平区', '武隆区', '城口县', '丰都县',
+                '垫江县', '忠县', '云阳县', '奉节县', '巫山县', '巫溪县', '石柱县', '秀山县', '酉阳县', '彭水县'
+            ],
             # 省会城市
-            r'(深圳市?)',
-            r'(广州市?)',
-            r'(杭州市?)',
-            
-            # 通用行政区域（最后匹配）
-            r'([\u4e00-\u9fa5]{2,8}(?:市|区|县|省))',
-        ]
-        
-        # 公司性质模式（按优先级排序）
-        self.company_type_patterns = [
-            r'(股份有限公司)$',
-            r'(有限责任公司)$', 
-            r'(有限公司)$',
-            r'(股份公司)$',
-            r'(集团有限公司)$',
-            r'(集团公司)$',
-            r'(集团)$',
-            r'(公司)$',
-            r'(企业)$',
-            r'(工厂)$',
-            r'(厂)$',
-            r'(研究院)$',
-            r'(研究所)$',
-            r'(事务所)$',
-            r'(所)$',
-            r'(中心)$',
-            r'(部)$'
+            '深圳': [
+                '罗湖区', '福田区', '南山区', '宝安区', '龙岗区', '盐田区', '龙华区', '坪山区', '光明区', '大鹏新区'
+            ],
+            '广州': [
+                '荔湾区', '越秀区', '海珠区', '天河区', '白云区', '黄埔区', '番禺区', '花都区', '南沙区', '增城区', '从化区'
+            ],
+            '杭州': [
+                '上城区', '下城区', '江干区', '拱墅区', '西湖区', '滨江区', '萧山区', '余杭区', '富阳区', '临安区', '桐庐县', '淳安县', '建德市'
+            ]
+        }
+
+        # 通用行政区域（以上均未匹配时使用）
+        self.generic_region_pattern = re.compile(r'([\u4e00-\u9fa5]{2,8}(?:市|区|县|省))')
+
+        # 公司性质（按优先级排序，名称结尾同时匹配多个时取排在前面的）
+        self.company_types = [
+            '股份有限公司',
+            '有限责任公司',
+            '有限公司',
+            '股份公司',
+            '集团有限公司',
+            '集团公司',
+            '集团',
+            '公司',
+            '企业',
+            '工厂',
+            '厂',
+            '研究院',
+            '研究所',
+            '事务所',
+            '所',
+            '中心',
+            '部'
         ]
         
         # 业务类型关键词（按长度排序，优先匹配长的）
@@ -223,6 +241,31 @@ class StructuredNameMatcher:
             '浦发': ['浦东发展'],
             '同仁堂': ['同仁堂药业', '同仁堂医药'],
         }
+        
+        # 核心名称中进一步剥离的业务后缀（按优先级排序）
+        self.business_suffixes = ['钢结构', '工贸', '贸易', '电器', '科技', '技术', '信息', '软件',
+                                  '化工', '建筑', '装饰', '服装', '食品', '物流', '投资', '地产',
+                                  '能源', '材料', '汽车', '广告', '教育', '医疗', '环保']
+    
+    def _compile_patterns(self):
+        """将区域、公司性质、业务类型关键词编译为Trie/Aho-Corasick自动机（只构建一次）"""
+        self._region_trie = PrefixTrie()
+        for city, districts in self.region_districts.items():
+            for prefix in (city, city + '市'):
+                self._region_trie.add(prefix)
+                for district in districts:
+                    self._region_trie.add(prefix + district)
+        
+        self._company_type_trie = SuffixTrie(self.company_types)
+        self._business_suffix_trie = SuffixTrie(self.business_suffixes)
+        
+        # 业务类型：长关键词优先，同长度按列表顺序
+        self._business_automaton = AhoCorasickAutomaton()
+        for index, keyword in enumerate(self.business_keywords):
+            self._business_automaton.add(keyword, (-len(keyword), index))
+        self._business_automaton.compile()
+        
+        self._bracket_pattern = re.compile(r'[（(][^）)]*[）)]')
     
     def _init_business_conflicts(self):
         """初始化业务类型冲突检测"""
@@ -247,9 +290,21 @@ class StructuredNameMatcher:
             ('科技', '工贸'),
         ]
     
+    def attach_feature_store(self, store):
+        """挂载目标表特征库（传入None则恢复逐次解析）"""
+        self.feature_store = store
+    
+    def _parse_target_name(self, company_name: str) -> NameStructure:
+        """解析目标名称结构（特征库中已有则直接读取）"""
+        if self.feature_store is not None and company_name:
+            structure = self.feature_store.name_structure(company_name)
+            if structure is not None:
+                return structure
+        return self.parse_company_name(company_name)
+    
     def parse_company_name(self, company_name: str) -> NameStructure:
         """
-        解析公司名称结构
+        解析公司名称结构（结果按名称缓存）
         
         Args:
             company_name: 公司名称
@@ -260,66 +315,73 @@ class StructuredNameMatcher:
         if not company_name:
             return NameStructure(original=company_name)
         
+        structure = self._parse_cache.get(company_name)
+        if structure is None:
+            structure = self._parse_uncached(company_name)
+            self._parse_cache.set(company_name, structure)
+        return structure
+    
+    def parse_many(self, company_names: List[str], use_cache: bool = True) -> List[NameStructure]:
+        """
+        批量解析公司名称（同一批内重复名称只解析一次），用于目标表预解析
+        
+        Args:
+            company_names: 公司名称列表
+            use_cache: 是否读写解析缓存（一次性预解析整张目标表时可关闭，避免挤出热点名称）
+            
+        Returns:
+            List[NameStructure]: 与输入一一对应的名称结构
+        """
+        parsed: Dict[str, NameStructure] = {}
+        results = []
+        for company_name in company_names:
+            structure = parsed.get(company_name)
+            if structure is None:
+                if not company_name:
+                    structure = NameStructure(original=company_name)
+                elif use_cache:
+                    structure = self.parse_company_name(company_name)
+                else:
+                    structure = self._parse_uncached(company_name)
+                parsed[company_name] = structure
+            results.append(structure)
+        return results
+    
+    def _parse_uncached(self, company_name: str) -> NameStructure:
+        """解析公司名称结构（区域前缀Trie、公司性质后缀Trie、业务类型自动机各扫描一次）"""
         name = company_name.strip()
         original_name = name
         
         # 预处理：移除括号内容（通常是备注信息）
-        name = re.sub(r'[（(][^）)]*[）)]', '', name)
+        name = self._bracket_pattern.sub('', name)
         
         # 1. 提取行政区域（从前面开始匹配）
-        region = ""
-        for pattern in self.region_patterns:
-            match = re.match(pattern, name)
+        region = self._region_trie.longest_prefix(name)
+        if not region:
+            match = self.generic_region_pattern.match(name)
             if match:
                 region = match.group(1)
-                name = name[len(region):]  # 移除已匹配的区域
-                break
+        name = name[len(region):]  # 移除已匹配的区域
         
         # 2. 提取公司性质（从后面开始匹配）
-        company_type = ""
-        for pattern in self.company_type_patterns:
-            match = re.search(pattern, name)
-            if match:
-                company_type = match.group(1)
-                name = name[:match.start()]  # 移除已匹配的公司性质
-                break
+        company_type = self._company_type_trie.best_suffix(name)
+        if company_type:
+            name = name[:-len(company_type)]  # 移除已匹配的公司性质
         
         # 3. 在剩余部分中提取业务类型（优先匹配长的关键词）
-        business_type = ""
-        remaining_name = name
-        
-        # 按长度排序，优先匹配长的业务类型
-        sorted_keywords = sorted(self.business_keywords, key=len, reverse=True)
-        for keyword in sorted_keywords:
-            if keyword in name:
-                business_type = keyword
-                remaining_name = remaining_name.replace(keyword, '', 1)
-                break
+        business_type = self._business_automaton.best_match(name)
+        remaining_name = name.replace(business_type, '', 1) if business_type else name
         
         # 4. 剩余部分作为核心名称
         core_name = remaining_name.strip()
         
-        # 特殊处理：如果核心名称包含业务类型，进行二次分离
-        if core_name and not business_type:
-            for keyword in sorted_keywords:
-                if keyword in core_name:
-                    business_type = keyword
-                    core_name = core_name.replace(keyword, '', 1).strip()
-                    break
-        
-        # 新增：进一步精简核心名称（去除常见业务后缀）
-        business_suffixes = ['钢结构', '工贸', '贸易', '电器', '科技', '技术', '信息', '软件', 
-                           '化工', '建筑', '装饰', '服装', '食品', '物流', '投资', '地产', 
-                           '能源', '材料', '汽车', '广告', '教育', '医疗', '环保']
-        
-        for suffix in business_suffixes:
-            if core_name.endswith(suffix) and len(core_name) > len(suffix):
-                # 移除业务后缀，保留真正的核心名称
-                core_name = core_name[:-len(suffix)].strip()
-                # 如果还没有业务类型，设置为这个后缀
-                if not business_type:
-                    business_type = suffix
-                break
+        # 进一步精简核心名称（去除常见业务后缀，保留真正的核心名称）
+        suffix = self._business_suffix_trie.best_suffix(core_name, max_length=len(core_name) - 1)
+        if suffix:
+            core_name = core_name[:-len(suffix)].strip()
+            # 如果还没有业务类型，设置为这个后缀
+            if not business_type:
+                business_type = suffix
         
         # 计算分解置信度
         confidence = self._calculate_parse_confidence(
@@ -406,7 +468,7 @@ class StructuredNameMatcher:
         
         # 1. 解析两个名称的结构
         source_structure = self.parse_company_name(source_name)
-        target_structure = self.parse_company_name(target_name)
+        target_structure = self._parse_target_name(target_name)
         
         # 2. 检查业务类型冲突
         business_conflict = self._has_business_type_conflict(
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+目标表记录特征库
+对目标表的单位名称、地址、电话、信用代码一次性预计算标准化串、名称结构、地址组件和拼音，
+按列存放在紧凑数组中；匹配器按记录_id或原始值查取，不再在每次比较时重复分解同一目标值。
+特征库随数据源版本（记录数 + 最大_id + 增量维护版本）构建一次并保存磁盘快照，
+其他进程（如进程池中的工作进程）直接加载快照；表发生变化后自动重建
+"""
+
+import os
+import time
+import pickle
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from src.utils.helpers import normalize_string, normalize_phone
+from src.utils.pinyin_table import get_pinyin_table
+from ..database.range_reader import IdRangeReader
+from ..database.index_versions import compute_index_source_version
+from ..utils.file_lock import FileLock
+from .address_normalizer import normalize_address_for_matching
+from .address_parser import COMPONENT_FIELDS, AddressComponents, AddressComponentTable, get_address_parser
+from .fuzzy_matcher import SimilarityCalculator as FuzzySimilarityCalculator
+from .structured_name_matcher import StructuredNameMatcher, NameStructure
+
+logger = logging.getLogger(__name__)
+
+# 默认快照目录：项目根目录下的 data/feature_stores
+DEFAULT_SNAPSHOT_DIR = Path(__file__).parent.parent.parent / "data" / "feature_stores"
+
+# 默认字段角色（目标表为监督管理表时的字段名）
+DEFAULT_FIELD_ROLES = {
+    'name': 'dwmc',
+    'address': 'dwdz',
+    'phone': 'lxdh',
+    'credit_code': 'tyshxydm'
+}
+
+ADDRESS_COMPONENTS = COMPONENT_FIELDS
+
+
+class TargetFeatureStore:
+    """目标表记录特征库（列式存储）"""
+
+    FORMAT_VERSION = 1
+
+    NAME_COLUMNS = ('name_normalized', 'name_pinyin', 'name_processed', 'name_region', 'name_core',
+                    'name_core_pinyin', 'name_business_type', 'name_company_type')
+    ADDRESS_COLUMNS = ('address_normalized', 'address_processed') + tuple(f'address_{c}' for c in ADDRESS_COMPONENTS)
+
+    def __init__(self, table_name: str, field_roles: Optional[Dict[str, str]] = None):
+        """
+        初始化特征库
+
+        Args:
+            table_name: 目标表名
+            field_roles: 字段角色 {'name'|'address'|'phone'|'credit_code': 字段名}
+        """
+        self.table_name = table_name
+        self.field_roles = {role: field for role, field in (field_roles or DEFAULT_FIELD_ROLES).items() if field}
+        self.version: Optional[str] = None
+        self.built_at: Optional[float] = None
+
+        self.columns: Dict[str, np.ndarray] = {}
+        self._name_confidence: Optional[np.ndarray] = None
+        # 地址组件的列式编码表（一条地址对整表逐层比较时使用）
+        self.address_table: Optional[AddressComponentTable] = None
+        self._row_by_id: Dict[str, int] = {}
+        # 原始值/标准化值 -> 行号（同值记录共享同一行的特征）
+        self._row_by_name: Dict[str, int] = {}
+        self._row_by_address: Dict[str, int] = {}
+        self._row_by_phone: Dict[str, int] = {}
+        self._row_by_normalized_name: Dict[str, int] = {}
+        self._row_by_normalized_address: Dict[str, int] = {}
+
+        # 特征提取器（与各匹配器的比较逻辑使用同一套分解方法）
+        self._fuzzy_scorer = FuzzySimilarityCalculator({})
+        self._name_parser = StructuredNameMatcher()
+        self._address_parser = get_address_parser()
+        self._pinyin_table = get_pinyin_table()
+
+    def __len__(self) -> int:
+        return len(self._row_by_id)
+
+    # ==================== 构建 ====================
+
+    def build(self, collection, batch_size: int = 5000) -> 'TargetFeatureStore':
+        """
+        读取目标表并预计算全部记录特征
+
+        Args:
+            collection: 目标表集合
+            batch_size: 读取批次大小
+        """
+        start_time = time.time()
+        version = compute_index_source_version(collection)
+        projection = {field: 1 for field in self.field_roles.values()}
+
+        rows: Dict[str, List[Any]] = {column: [] for column in self._column_names()}
+        confidence: List[float] = []
+        # 同一原始值只分解一次，重复值共享特征对象
+        name_cache: Dict[str, Dict[str, Any]] = {}
+        address_cache: Dict[str, Dict[str, Any]] = {}
+        address_rows: List[AddressComponents] = []
+        row_by_id, row_by_name, row_by_address, row_by_phone = {}, {}, {}, {}
+
+        for batch in IdRangeReader(collection, projection=projection, batch_size=batch_size).iter_batches():
+            if 'name' in self.field_roles:
+                # 本批新出现的名称批量预解析（一次性数据，不写入解析缓存）
+                new_names = list(dict.fromkeys(name for name in (self._value(r, 'name') for r in batch)
+                                               if name not in name_cache))
+                structures = dict(zip(new_names, self._name_parser.parse_many(new_names, use_cache=False)))
+
+            if 'address' in self.field_roles:
+                # 本批新出现的地址标准化后批量解析组件
+                new_addresses = list(dict.fromkeys(address for address in (self._value(r, 'address') for r in batch)
+                                                   if address not in address_cache))
+                normalized = [normalize_address_for_matching(address) if address else '' for address in new_addresses]
+                parsed = self._address_parser.parse_many(normalized, use_cache=False)
+                address_components = dict(zip(new_addresses, zip(normalized, parsed)))
+
+            for record in batch:
+                row = len(row_by_id)
+                row_by_id[str(record['_id'])] = row
+
+                if 'name' in self.field_roles:
+                    name = self._value(record, 'name')
+                    features = name_cache.get(name)
+                    if features is None:
+                        features = name_cache[name] = self._name_features(name, structures[name])
+                    for column in self.NAME_COLUMNS:
+                        rows[column].append(features[column])
+                    confidence.append(features['name_confidence'])
+                    if name:
+                        row_by_name.setdefault(name, row)
+
+                if 'address' in self.field_roles:
+                    address = self._value(record, 'address')
+                    features = address_cache.get(address)
+                    if features is None:
+                        features = address_cache[address] = self._address_features(address, *address_components[address])
+                    for column in self.ADDRESS_COLUMNS:
+                        rows[column].append(features[column])
+                    address_rows.append(features['components'])
+                    if address:
+                        row_by_address.setdefault(address, row)
+
+                if 'phone' in self.field_roles:
+                    phone = self._value(record, 'phone')
+                    rows['phone'].append(normalize_phone(phone))
+                    if phone:
+                        row_by_phone.setdefault(phone, row)
+
+                if 'credit_code' in self.field_roles:
+                    rows['credit_code'].append(self._value(record, 'credit_code').upper())
+
+        self.columns = {column: np.array(values, dtype=object) for column, values in rows.items()}
+        self._name_confidence = np.asarray(confidence, dtype=np.float32)
+        self.address_table = AddressComponentTable.from_components(address_rows) if address_rows else None
+        self._row_by_id = row_by_id
+        self._row_by_name = row_by_name
+        self._row_by_address = row_by_address
+        self._row_by_phone = row_by_phone
+        self._row_by_normalized_name = self._reverse_index('name_normalized', row_by_name)
+        self._row_by_normalized_address = self._reverse_index('address_normalized', row_by_address)
+        self.version = version
+        self.built_at = time.time()
+
+        logger.info(f"🧮 目标表特征库构建完成: {self.table_name}, 记录 {len(row_by_id)}, "
+                   f"不同名称 {len(name_cache)}, 不同地址 {len(address_cache)}, "
+                   f"耗时 {time.time() - start_time:.2f}s")
+        return self
+
+    def _column_names(self) -> List[str]:
+        """当前字段角色对应的特征列"""
+        columns = []
+        if 'name' in self.field_roles:
+            columns.extend(self.NAME_COLUMNS)
+        if 'address' in self.field_roles:
+            columns.extend(self.ADDRESS_COLUMNS)
+        columns.extend(role for role in ('phone', 'credit_code') if role in self.field_roles)
+        return columns
+
+    def _value(self, record: Dict, role: str) -> str:
+        """读取记录中某角色字段的字符串值"""
+        value = record.get(self.field_roles[role])
+        return str(value).strip() if value is not None else ''
+
+    def _reverse_index(self, column: str, raw_rows: Dict[str, int]) -> Dict[str, int]:
+        """建立 标准化值 -> 行号 索引"""
+        values = self.columns.get(column)
+        if values is None:
+            return {}
+        index = {}
+        for row in raw_rows.values():
+            if values[row]:
+                index.setdefault(values[row], row)
+        return index
+
+    def _name_features(self, name: str, structure: Optional[NameStructure] = None) -> Dict[str, Any]:
+        """分解单位名称（structure为已批量解析的名称结构）"""
+        normalized = normalize_string(name) if name else ''
+        if structure is None:
+            structure = self._name_parser.parse_company_name(name)
+        # 一次性数据，不写入拼音缓存
+        name_pinyin, core_pinyin = self._pinyin_table.convert_many([normalized, structure.core_name], use_cache=False)
+        return {
+            'name_normalized': normalized,
+            'name_pinyin': name_pinyin,
+            'name_processed': self._fuzzy_scorer._preprocess_string(name),
+            'name_region': structure.region,
+            'name_core': structure.core_name,
+            'name_core_pinyin': core_pinyin,
+            'name_business_type': structure.business_type,
+            'name_company_type': structure.company_type,
+            'name_confidence': structure.confidence
+        }
+
+    def _address_features(self, address: str, normalized: str, components: AddressComponents) -> Dict[str, Any]:
+        """分解地址（normalized、components为已批量标准化和解析的结果）"""
+        features = {
+            'address_normalized': normalized,
+            'address_processed': self._fuzzy_scorer._preprocess_string(address),
+            'components': components
+        }
+        for component in ADDRESS_COMPONENTS:
+            features[f'address_{component}'] = components.get(component, '')
+        return features
+
+    # ==================== 快照 ====================
+
+    @staticmethod
+    def snapshot_path(table_name: str, field_roles: Dict[str, str], snapshot_dir: Optional[str] = None) -> Path:
+        """快照文件路径（按表名和字段角色区分）"""
+        base_dir = Path(snapshot_dir) if snapshot_dir else DEFAULT_SNAPSHOT_DIR
+        roles_key = hashlib.md5(repr(sorted(field_roles.items())).encode('utf-8')).hexdigest()[:8]
+        return base_dir / f"{table_name}_{roles_key}.pkl"
+
+    def save(self, snapshot_dir: Optional[str] = None):
+        """原子写入磁盘快照（先写唯一临时文件再替换）"""
+        path = self.snapshot_path(self.table_name, self.field_roles, snapshot_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            'format_version': self.FORMAT_VERSION,
+            'table_name': self.table_name,
+            'field_roles': self.field_roles,
+            'version': self.version,
+            'built_at': self.built_at,
+            'columns': self.columns,
+            'name_confidence': self._name_confidence,
+            'address_codes': self.address_table.codes if self.address_table is not None else None,
+            'address_vocabulary': self.address_table.vocabulary if self.address_table is not None else None,
+            'row_by_id': self._row_by_id,
+            'row_by_name': self._row_by_name,
+            'row_by_address': self._row_by_address,
+            'row_by_phone': self._row_by_phone
+        }
+
+        fd, temp_name = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=str(path.parent))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_name, path)
+        except BaseException:
+            try:
+                os.remove(temp_name)
+            except OSError:
+                pass
+            raise
+        logger.info(f"💾 目标表特征库快照已保存: {path}")
+
+    @classmethod
+    def load(cls, table_name: str, field_roles: Dict[str, str],
+             snapshot_dir: Optional[str] = None) -> Optional['TargetFeatureStore']:
+        """
+        加载磁盘快照
+
+        Returns:
+            Optional[TargetFeatureStore]: 特征库，快照不存在或格式不兼容时返回None
+        """
+        path = cls.snapshot_path(table_name, field_roles, snapshot_dir)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                payload = pickle.load(f)
+            if payload.get('format_version') != cls.FORMAT_VERSION or payload.get('field_roles') != field_roles:
+                logger.warning(f"目标表特征库快照格式版本或字段角色不兼容，忽略: {path}")
+                return None
+
+            store = cls(table_name, payload['field_roles'])
+            store.version = payload['version']
+            store.built_at = payload['built_at']
+            store.columns = payload['columns']
+            store._name_confidence = payload['name_confidence']
+            if payload['address_codes'] is not None:
+                store.address_table = AddressComponentTable(payload['address_codes'], payload['address_vocabulary'])
+            store._row_by_id = payload['row_by_id']
+            store._row_by_name = payload['row_by_name']
+            store._row_by_address = payload['row_by_address']
+            store._row_by_phone = payload['row_by_phone']
+            store._row_by_normalized_name = store._reverse_index('name_normalized', store._row_by_name)
+            store._row_by_normalized_address = store._reverse_index('address_normalized', store._row_by_address)
+            logger.info(f"📂 目标表特征库快照已加载: {path}, 记录 {len(store)}")
+            return store
+
+        except Exception as e:
+            logger.warning(f"加载目标表特征库快照失败: {path} - {str(e)}")
+            return None
+
+    # ==================== 查询 ====================
+
+    def row_of(self, record_id: Any) -> Optional[int]:
+        """按目标记录_id获取行号"""
+        return self._row_by_id.get(str(record_id))
+
+    def record_features(self, record_id: Any) -> Optional[Dict[str, Any]]:
+        """获取目标记录的全部预计算特征"""
+        row = self.row_of(record_id)
+        if row is None:
+            return None
+        return {column: values[row] for column, values in self.columns.items()}
+
+    def get(self, column: str, row: int) -> Any:
+        """读取某行某列的特征值"""
+        return self.columns[column][row]
+
+    def normalized_text(self, raw: str) -> Optional[str]:
+        """已知名称原始值的 normalize_string 结果"""
+        row = self._row_by_name.get(raw)
+        return self.columns['name_normalized'][row] if row is not None else None
+
+    def pinyin_of(self, normalized_name: str) -> Optional[str]:
+        """已知名称标准化串的拼音"""
+        row = self._row_by_normalized_name.get(normalized_name)
+        return self.columns['name_pinyin'][row] if row is not None else None
+
+    def processed_text(self, raw: str) -> Optional[str]:
+        """已知名称或地址原始值的模糊匹配预处理结果"""
+        row = self._row_by_name.get(raw)
+        if row is not None:
+            return self.columns['name_processed'][row]
+        row = self._row_by_address.get(raw)
+        if row is not None:
+            return self.columns['address_processed'][row]
+        return None
+
+    def name_structure(self, raw: str) -> Optional[NameStructure]:
+        """已知名称原始值的结构化分解结果"""
+        row = self._row_by_name.get(raw)
+        if row is None:
+            return None
+        return NameStructure(
+            region=self.columns['name_region'][row],
+            core_name=self.columns['name_core'][row],
+            business_type=self.columns['name_business_type'][row],
+            company_type=self.columns['name_company_type'][row],
+            original=raw,
+            confidence=float(self._name_confidence[row])
+        )
+
+    def core_pinyin(self, raw: str) -> Optional[str]:
+        """已知名称原始值的核心名称拼音"""
+        row = self._row_by_name.get(raw)
+        return self.columns['name_core_pinyin'][row] if row is not None else None
+
+    def normalized_phone(self, raw: str) -> Optional[str]:
+        """已知电话原始值的 normalize_phone 结果"""
+        row = self._row_by_phone.get(raw)
+        return self.columns['phone'][row] if row is not None else None
+
+    def normalized_address(self, raw: str) -> Optional[str]:
+        """已知地址原始值的地址标准化结果"""
+        row = self._row_by_address.get(raw)
+        return self.columns['address_normalized'][row] if row is not None else None
+
+    def address_components(self, normalized_address: str) -> Optional[Dict[str, str]]:
+        """已知标准化地址的组件分解结果"""
+        row = self._row_by_normalized_address.get(normalized_address)
+        if row is None:
+            return None
+        return {component: self.columns[f'address_{component}'][row] for component in ADDRESS_COMPONENTS}
+
+
+# ==================== 进程内共享 ====================
+
+_store_registry: Dict[str, TargetFeatureStore] = {}
+_version_checked_at: Dict[str, float] = {}
+_registry_lock = Lock()
+
+# 两次表版本检查的最小间隔（秒）
+VERSION_CHECK_INTERVAL = 60
+
+
+def get_feature_store(db_manager, table_name: str, field_roles: Optional[Dict[str, str]] = None,
+                      force_rebuild: bool = False, snapshot_dir: Optional[str] = None) -> Optional[TargetFeatureStore]:
+    """
+    获取目标表特征库：优先使用进程内缓存，其次是与当前数据源版本一致的磁盘快照，否则重建并保存快照。
+    数据源版本变化（含经增量维护同步的原地修改）或字段角色不同时重建；
+    同一快照的构建由文件锁串行化，并发启动的工作进程只有一个构建，其余等待后加载快照
+
+    Args:
+        db_manager: 数据库管理器
+        table_name: 目标表名
+        field_roles: 字段角色（默认 DEFAULT_FIELD_ROLES）
+        force_rebuild: 是否强制重建
+        snapshot_dir: 快照目录（默认 data/feature_stores）
+    """
+    roles = {role: field for role, field in (field_roles or DEFAULT_FIELD_ROLES).items() if field}
+    with _registry_lock:
+        store = _store_registry.get(table_name)
+        try:
+            collection = db_manager.get_collection(table_name)
+            current_version = None
+            if store is not None and not force_rebuild and store.field_roles == roles:
+                now = time.time()
+                if now - _version_checked_at.get(table_name, 0) < VERSION_CHECK_INTERVAL:
+                    return store
+                _version_checked_at[table_name] = now
+                current_version = compute_index_source_version(collection)
+                if current_version == store.version:
+                    return store
+                logger.info(f"目标表 {table_name} 已变化，重建特征库")
+
+            snapshot_path = TargetFeatureStore.snapshot_path(table_name, roles, snapshot_dir)
+            snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            with FileLock(snapshot_path.with_name(snapshot_path.name + '.lock')):
+                snapshot = None if force_rebuild else TargetFeatureStore.load(table_name, roles, snapshot_dir)
+                if snapshot is not None:
+                    if current_version is None:
+                        current_version = compute_index_source_version(collection)
+                    if snapshot.version != current_version:
+                        logger.info(f"目标表特征库快照已过期: {table_name}")
+                        snapshot = None
+
+                if snapshot is not None:
+                    store = snapshot
+                else:
+                    store = TargetFeatureStore(table_name, roles).build(collection)
+                    try:
+                        store.save(snapshot_dir)
+                    except Exception as e:
+                        logger.warning(f"保存目标表特征库快照失败: {str(e)}")
+
+            _store_registry[table_name] = store
+            _version_checked_at[table_name] = time.time()
+            return store
+
+        except Exception as e:
+            logger.error(f"构建目标表特征库失败: {table_name} - {str(e)}")
+            return store
+
+
+def invalidate_feature_store(table_name: str):
+    """目标表数据变更后使特征库失效"""
+    with _registry_lock:
+        _store_registry.pop(table_name, None)
+        _version_checked_at.pop(table_name, None)
@@ -0,0 +1,160 @@
+"""
+匹配任务检查点模块
+将任务的已提交进度（最后提交的_id、计数器、配置哈希、所用索引版本）持久化到MongoDB，
+进程重启后可从检查点处继续执行，不重复处理已提交的批次
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Sequence
+
+from .inverted_keyword_index import get_index_version
+
+logger = logging.getLogger(__name__)
+
+
+class TaskCheckpointStore:
+    """匹配任务检查点存储"""
+
+    COLLECTION_NAME = 'matching_task_checkpoints'
+
+    # 参与配置哈希的字段：只包含影响匹配结果的配置，任务文档中的运行状态、错误信息、时间戳等不参与
+    MATCHING_CONFIG_KEYS = (
+        'mappings', 'source_table', 'target_tables', 'algorithm_type',
+        'similarity_threshold', 'batch_size', 'max_results'
+    )
+
+    def __init__(self, db_manager):
+        """
+        初始化检查点存储
+
+        Args:
+            db_manager: 数据库管理器
+        """
+        self.db_manager = db_manager
+        self._index_ready = False
+
+    def _get_collection(self):
+        """获取检查点集合（首次访问时创建task_id唯一索引）"""
+        collection = self.db_manager.get_collection(self.COLLECTION_NAME)
+        if not self._index_ready:
+            try:
+                collection.create_index('task_id', unique=True)
+            except Exception as e:
+                logger.warning(f"创建检查点索引失败: {str(e)}")
+            self._index_ready = True
+        return collection
+
+    @classmethod
+    def compute_config_hash(cls, config: Dict[str, Any],
+                            keys: Optional[Sequence[str]] = None) -> str:
+        """
+        计算任务配置哈希
+
+        Args:
+            config: 任务配置
+            keys: 参与哈希的字段，默认MATCHING_CONFIG_KEYS
+
+        Returns:
+            str: 配置的SHA1摘要
+        """
+        keys = cls.MATCHING_CONFIG_KEYS if keys is None else keys
+        stable_config = {key: config.get(key) for key in keys}
+        payload = json.dumps(stable_config, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def collect_index_versions(mappings: List[Dict]) -> Dict[str, Any]:
+        """
+        收集字段映射涉及的目标表倒排索引版本
+
+        Args:
+            mappings: 字段映射配置
+
+        Returns:
+            Dict[str, Any]: {'表名.字段名': 索引版本}，索引不存在时版本为None
+        """
+        versions = {}
+        for mapping in mappings or []:
+            target_table = mapping.get('target_table')
+            target_field = mapping.get('target_field')
+            if target_table and target_field:
+                versions[f"{target_table}.{target_field}"] = get_index_version(target_table, target_field)
+        return versions
+
+    def save(self, task_id: str, task_type: str, last_id: Any, counters: Dict[str, int],
+             config_hash: str, index_versions: Optional[Dict[str, Any]] = None,
+             status: str = 'running', config: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        保存检查点（须在批次结果提交之后调用）
+
+        Args:
+            task_id: 任务ID
+            task_type: 任务类型（'user_data_matching' 或 'optimized_matching'）
+            last_id: 最后一个已提交批次的末条记录_id
+            counters: 进度计数器
+            config_hash: 任务配置哈希
+            index_versions: 所用索引版本
+            status: 任务状态
+            config: 恢复任务所需的配置
+
+        Returns:
+            bool: 是否保存成功
+        """
+        now = datetime.now().isoformat()
+        update_fields = {
+            'task_type': task_type,
+            'last_id': last_id,
+            'counters': counters,
+            'config_hash': config_hash,
+            'index_versions': index_versions or {},
+            'status': status,
+            'updated_at': now
+        }
+        if config is not None:
+            update_fields['config'] = config
+
+        try:
+            self._get_collection().update_one(
+                {'task_id': task_id},
+                {'$set': update_fields, '$setOnInsert': {'created_at': now}},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            logger.error(f"保存任务检查点失败: {task_id} - {str(e)}")
+            return False
+
+    def load(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """读取任务检查点，不存在时返回None"""
+        try:
+            return self._get_collection().find_one({'task_id': task_id}, {'_id': 0})
+        except Exception as e:
+            logger.error(f"读取任务检查点失败: {task_id} - {str(e)}")
+            return None
+
+    def update_status(self, task_id: str, status: str) -> bool:
+        """仅更新检查点中的任务状态"""
+        try:
+            self._get_collection().update_one(
+                {'task_id': task_id},
+                {'$set': {'status': status, 'updated_at': datetime.now().isoformat()}}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"更新任务检查点状态失败: {task_id} - {str(e)}")
+            return False
+
+    @staticmethod
+    def diff_index_versions(checkpoint: Dict[str, Any], index_versions: Dict[str, Any]) -> List[str]:
+        """
+        对比检查点记录的索引版本与当前索引版本
+
+        Returns:
+            List[str]: 版本发生变化的索引键
+        """
+        recorded = checkpoint.get('index_versions') or {}
+        return sorted(key for key in set(recorded) | set(index_versions)
+                      if recorded.get(key) != index_versions.get(key))
@@ -7,15 +7,58 @@
 
 import logging
 import time
-from typing import Dict, List, Set, Any, Optional
+from threading import Lock
+from typing import Dict, List, Set, Any, Optional, Iterator, Callable
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import pymongo
 from pymongo import ASCENDING, TEXT
 from .universal_text_matcher import UniversalTextMatcher, FieldType
+from .inverted_keyword_index import KeywordInvertedIndex, invalidate_keyword_index
+from .incremental_index_maintainer import (
+    IncrementalIndexMaintainer, InvertedFileIndexTarget, KeywordCollectionTarget
+)
+from .process_pool_engine import (
+    ProcessMatchingPool, EXECUTION_MODE_PROCESS, resolve_process_workers
+)
+from ..database.range_reader import IdRangeReader
 
 logger = logging.getLogger(__name__)
 
 
+def _build_tokenizer_context() -> Dict[str, Any]:
+    """工作进程上下文：不连接数据库的文本匹配器（只用其预处理和关键词提取）"""
+    return {'text_matcher': UniversalTextMatcher(None)}
+
+
+def _tokenize_records(context: Dict[str, Any], records: List[Dict], field_name: str,
+                      field_type_value: str) -> Dict[str, Any]:
+    """
+    对一个_id范围内的记录做预处理和关键词提取
+
+    Returns:
+        Dict: {'rows': [(文档ID, 原始值, 预处理值, 关键词列表)], 'records': 记录数, 'tokenize_time': 耗时}
+    """
+    start_time = time.time()
+    text_matcher = context['text_matcher']
+    config = text_matcher.field_configs.get(FieldType(field_type_value),
+                                            text_matcher.field_configs[FieldType.TEXT])
+    rows = []
+    for doc in records:
+        try:
+            field_value = doc.get(field_name)
+            if not field_value:
+                continue
+            preprocessed_value = text_matcher._apply_preprocessing(field_value, config)
+            if not preprocessed_value:
+                continue
+            keywords = text_matcher._apply_keyword_extraction(preprocessed_value, config)
+            if keywords:
+                rows.append((doc['_id'], str(field_value), preprocessed_value, keywords))
+        except Exception as e:
+            logger.warning(f"处理记录失败: {doc.get('_id')} - {str(e)}")
+    return {'rows': rows, 'records': len(records), 'tokenize_time': time.time() - start_time}
+
+
 class UniversalIndexBuilder:
     """通用索引构建器"""
     
@@ -29,6 +72,7 @@ class UniversalIndexBuilder:
         self.db_manager = db_manager
         self.db = db_manager.get_db() if db_manager else None
         self.text_matcher = UniversalTextMatcher(db_manager)
+        self.index_maintainer = IncrementalIndexMaintainer(self.db) if self.db is not None else None
         
         # 构建配置
         self.build_config = {
@@ -36,10 +80,23 @@ class UniversalIndexBuilder:
             'max_workers': 8,
             'enable_parallel': True,
             'clear_existing': True,  # 是否清空现有索引
+            'incremental_update': True,  # 索引已存在时增量同步源表变更（而非跳过）
             'create_compound_indexes': True,  # 是否创建复合索引
-            'enable_progress_logging': True
+            'enable_progress_logging': True,
+            'index_backend': 'inverted_file',  # 索引后端: inverted_file(进程内倒排索引文件) / mongo(关键词集合)
+            'index_dir': None,  # 倒排索引目录（默认 data/keyword_indexes）
+            'execution_mode': EXECUTION_MODE_PROCESS,  # 分词执行方式: process(进程池) / thread(当前线程)
+            'process_workers': 0,  # 分词进程数（0表示CPU核心数）
+            'process_min_records': 20000,  # 记录数不少于该值时才启用进程池
+            'range_size': 5000,  # 每个_id范围的记录数（一个范围在一个进程内完成分词）
+            'write_batch_size': 10000  # 关键词集合无序批量写入的条数
         }
         
+        # 分词进程池（同一构建器的多个字段/表共享，最后一个使用者释放时关闭）
+        self._process_pool: Optional[ProcessMatchingPool] = None
+        self._pool_users = 0
+        self._pool_lock = Lock()
+        
         # 性能统计
         self.build_stats = {
             'total_records_processed': 0,
@@ -83,27 +140,44 @@ class UniversalIndexBuilder:
             
             # 构建索引表名
             index_table_name = f"{table_name}_{field_name}_keywords"
-            
-            # 检查是否需要重建
-            if not force_rebuild and self._index_exists_and_valid(index_table_name, table_name, field_name):
-                logger.info(f"索引已存在且有效，跳过构建: {index_table_name}")
-                return {'status': 'skipped', 'reason': 'index_exists'}
-            
-            # 清空现有索引（如果存在）
-            if self.build_config['clear_existing']:
-                self._clear_existing_index(index_table_name, table_name, field_name)
+            use_inverted_file = self.build_config['index_backend'] == 'inverted_file'
             
             # 获取字段处理配置
             config = self.text_matcher.field_configs.get(field_type, 
                                                        self.text_matcher.field_configs[FieldType.TEXT])
             
-            # 构建索引
-            build_result = self._build_index_for_field(
-                source_collection, index_table_name, field_name, field_type, config
-            )
+            index_target = self._make_index_target(table_name, field_name)
             
-            # 创建索引表的数据库索引
-            self._create_database_indexes(index_table_name)
+            if use_inverted_file:
+                # 检查是否需要重建
+                if not force_rebuild and KeywordInvertedIndex.exists(table_name, field_name,
+                                                                     self.build_config['index_dir']):
+                    return self._sync_existing_index(index_target)
+                
+                self._mark_index_baseline(index_target)
+                build_result = self._build_inverted_index_for_field(
+                    source_collection, field_name, field_type, config
+                )
+            else:
+                # 检查是否需要重建
+                if not force_rebuild and self._index_exists_and_valid(index_table_name, table_name, field_name):
+                    return self._sync_existing_index(index_target)
+                
+                # 清空现有索引（如果存在）
+                if self.build_config['clear_existing']:
+                    self._clear_existing_index(index_table_name, table_name, field_name)
+                
+                self._mark_index_baseline(index_target)
+                
+                # 构建索引
+                build_result = self._build_index_for_field(
+                    source_collection, index_table_name, field_name, field_type, config
+                )
+                
+                # 装载完成后再创建索引表的数据库索引
+                index_start = time.time()
+                self._create_database_indexes(index_table_name)
+                build_result['stage_stats']['create_indexes'] = {'seconds': time.time() - index_start}
             
             # 更新统计
             build_time = time.time() - start_time
@@ -116,10 +190,12 @@ class UniversalIndexBuilder:
                 'field_name': field_name,
                 'field_type': field_type.value,
                 'index_table_name': index_table_name,
+                'index_backend': self.build_config['index_backend'],
                 'records_processed': build_result['records_processed'],
                 'keywords_created': build_result['keywords_created'],
                 'build_time': build_time,
-                'processing_rate': build_result['records_processed'] / max(build_time, 0.001)
+                'processing_rate': build_result['records_processed'] / max(build_time, 0.001),
+                'stage_stats': build_result['stage_stats']
             }
             
             logger.info(f"✅ 索引构建完成: {index_table_name}, "
@@ -178,16 +254,25 @@ class UniversalIndexBuilder:
                 logger.warning(f"表 {table_name} 没有需要构建索引的字段")
                 return results
             
-            # 并行构建索引
-            if self.build_config['enable_parallel'] and len(target_fields) > 1:
-                field_results = self._build_indexes_parallel(table_name, target_fields, force_rebuild)
-            else:
-                field_results = self._build_indexes_sequential(table_name, target_fields, force_rebuild)
+            # 多个字段共享同一个分词进程池（避免每个字段重复启动进程）
+            pool = None
+            if self.build_config['execution_mode'] == EXECUTION_MODE_PROCESS and \
+                    self.db[table_name].estimated_document_count() >= self.build_config['process_min_records']:
+                pool = self._acquire_process_pool()
+            try:
+                # 并行构建索引
+                if self.build_config['enable_parallel'] and len(target_fields) > 1:
+                    field_results = self._build_indexes_parallel(table_name, target_fields, force_rebuild)
+                else:
+                    field_results = self._build_indexes_sequential(table_name, target_fields, force_rebuild)
+            finally:
+                if pool is not None:
+                    self._release_process_pool()
             
             # 汇总结果
             for field_result in field_results:
                 results['field_results'].append(field_result)
-                if field_result['status'] == 'success':
+                if field_result['status'] in ('success', 'updated'):
                     results['success_count'] += 1
                 elif field_result['status'] == 'error':
                     results['error_count'] += 1
@@ -214,6 +299,43 @@ class UniversalIndexBuilder:
                 'total_build_time': time.time() - start_time
             }
     
+    def _make_index_target(self, table_name: str, field_name: str):
+        """按当前索引后端创建增量维护目标"""
+        if self.build_config['index_backend'] == 'inverted_file':
+            return InvertedFileIndexTarget(self.db, table_name, field_name, self.text_matcher,
+                                           self.build_config['index_dir'])
+        return KeywordCollectionTarget(self.db, table_name, field_name, self.text_matcher,
+                                       self.build_config['batch_size'])
+    
+    def _sync_existing_index(self, index_target) -> Dict[str, Any]:
+        """索引已存在：增量同步源表变更（未启用增量维护时跳过）"""
+        if not self.build_config['incremental_update'] or self.index_maintainer is None:
+            logger.info(f"索引已存在，跳过构建: {index_target.table_name}.{index_target.field_name}")
+            return {'status': 'skipped', 'reason': 'index_exists'}
+        
+        result = self.index_maintainer.sync_target(index_target)
+        if result['status'] == 'rebuild_required':
+            return self.build_field_index(index_target.table_name, index_target.field_name, force_rebuild=True)
+        if result['status'] == 'unchanged':
+            logger.info(f"索引已是最新，跳过构建: {index_target.table_name}.{index_target.field_name}")
+            return {**result, 'status': 'skipped', 'reason': 'index_up_to_date'}
+        return result
+    
+    def _mark_index_baseline(self, index_target):
+        """整表构建前记录增量维护水位"""
+        if self.index_maintainer is None:
+            return
+        try:
+            self.index_maintainer.mark_baseline(index_target)
+        except Exception as e:
+            logger.warning(f"记录索引维护水位失败: {index_target.key} - {str(e)}")
+    
+    def sync_indexes(self, table_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """增量同步已注册的索引（table_name为None时同步全部）"""
+        if self.index_maintainer is None:
+            return []
+        return self.index_maintainer.sync(table_name)
+    
     def _get_sample_values(self, collection, field_name: str, sample_size: int = 20) -> List[str]:
         """获取字段样本值"""
         try:
@@ -255,92 +377,211 @@ class UniversalIndexBuilder:
         """清空现有索引"""
         try:
             if index_table_name in self.db.list_collection_names():
-                # 只清空特定字段的索引数据
-                self.db[index_table_name].delete_many({
-                    'source_table': source_table,
-                    'field_name': field_name
-                })
+                index_collection = self.db[index_table_name]
+                other_fields = index_collection.count_documents({'$or': [
+                    {'source_table': {'$ne': source_table}},
+                    {'field_name': {'$ne': field_name}}
+                ]}, limit=1)
+                if not other_fields:
+                    # 整个集合只含该字段：连同二级索引一起删除，装载完成后再建索引，避免写入时维护索引
+                    index_collection.drop()
+                else:
+                    # 只清空特定字段的索引数据
+                    index_collection.delete_many({
+                        'source_table': source_table,
+                        'field_name': field_name
+                    })
                 logger.info(f"已清空现有索引数据: {index_table_name}.{field_name}")
         except Exception as e:
             logger.warning(f"清空索引失败: {index_table_name} - {str(e)}")
     
+    def _acquire_process_pool(self) -> Optional[ProcessMatchingPool]:
+        """获取共享分词进程池（创建失败时返回None，退回当前线程分词）"""
+        with self._pool_lock:
+            if self._process_pool is None:
+                try:
+                    self._process_pool = ProcessMatchingPool(
+                        _build_tokenizer_context,
+                        max_workers=resolve_process_workers(self.build_config['process_workers'])
+                    )
+                except Exception as e:
+                    logger.warning(f"创建分词进程池失败，使用当前线程分词: {str(e)}")
+                    return None
+            self._pool_users += 1
+            return self._process_pool
+    
+    def _release_process_pool(self):
+        """释放共享分词进程池"""
+        with self._pool_lock:
+            self._pool_users = max(0, self._pool_users - 1)
+            if self._pool_users == 0 and self._process_pool is not None:
+                self._process_pool.shutdown()
+                self._process_pool = None
+    
+    def _iter_tokenized_ranges(self, source_collection, field_name: str, field_type: FieldType,
+                               stage_stats: Dict[str, Dict[str, float]]) -> Iterator[Dict[str, Any]]:
+        """
+        按_id范围读取源表并分词：每个范围作为一个任务交给分词进程，读取、分词、写入三个阶段重叠进行
+        
+        Yields:
+            Dict: 单个范围的分词结果（见 _tokenize_records）
+        """
+        range_query = {field_name: {'$nin': [None, '']}}
+        reader = IdRangeReader(source_collection, query=range_query, projection={'_id': 1, field_name: 1},
+                               batch_size=self.build_config['range_size'])
+        
+        def read_ranges() -> Iterator[List[Dict]]:
+            batches = reader.iter_batches()
+            while True:
+                read_start = time.time()
+                batch = next(batches, None)
+                stage_stats['read']['seconds'] += time.time() - read_start
+                if batch is None:
+                    return
+                stage_stats['read']['records'] += len(batch)
+                yield batch
+        
+        use_process = self.build_config['execution_mode'] == EXECUTION_MODE_PROCESS and \
+            source_collection.estimated_document_count() >= self.build_config['process_min_records']
+        pool = self._acquire_process_pool() if use_process else None
+        try:
+            if pool is not None:
+                results = self._in_range_order(pool.imap_iter(
+                    _tokenize_records, read_ranges(), field_name, field_type.value))
+            else:
+                context = {'text_matcher': self.text_matcher}
+                results = (_tokenize_records(context, batch, field_name, field_type.value)
+                           for batch in read_ranges())
+            
+            for result in results:
+                stage_stats['tokenize']['records'] += result['records']
+                stage_stats['tokenize']['seconds'] += result['tokenize_time']
+                yield result
+        finally:
+            if pool is not None:
+                self._release_process_pool()
+    
+    @staticmethod
+    def _in_range_order(numbered_results: Iterator[tuple]) -> Iterator[Dict[str, Any]]:
+        """将按完成顺序返回的范围结果恢复为_id顺序（文档序号与单线程构建一致）"""
+        waiting = {}
+        next_number = 0
+        for number, result in numbered_results:
+            waiting[number] = result
+            while next_number in waiting:
+                yield waiting.pop(next_number)
+                next_number += 1
+    
+    def _run_build_pipeline(self, source_collection, field_name: str, field_type: FieldType,
+                            sink: Callable[[List[tuple]], int], flush: Callable[[], None]) -> Dict[str, Any]:
+        """
+        执行读取 -> 分词 -> 写入流水线
+        
+        Args:
+            sink: 写入一个范围的分词结果，返回生成的关键词数
+            flush: 写入剩余缓冲
+            
+        Returns:
+            Dict: 处理记录数、关键词数和各阶段速度
+        """
+        pipeline_start = time.time()
+        stage_stats = {stage: {'records': 0, 'seconds': 0.0} for stage in ('read', 'tokenize', 'write')}
+        records_processed = 0
+        keywords_created = 0
+        next_progress = 50000
+        
+        for result in self._iter_tokenized_ranges(source_collection, field_name, field_type, stage_stats):
+            write_start = time.time()
+            keywords_created += sink(result['rows'])
+            stage_stats['write']['seconds'] += time.time() - write_start
+            stage_stats['write']['records'] += len(result['rows'])
+            records_processed += len(result['rows'])
+            
+            if self.build_config['enable_progress_logging'] and stage_stats['read']['records'] >= next_progress:
+                next_progress += 50000
+                logger.info(f"索引构建进度: {field_name} - 已读取 {stage_stats['read']['records']} 条, "
+                           f"已写入 {records_processed} 条记录")
+        
+        write_start = time.time()
+        flush()
+        stage_stats['write']['seconds'] += time.time() - write_start
+        
+        total_time = time.time() - pipeline_start
+        for stats in stage_stats.values():
+            stats['records_per_sec'] = stats['records'] / max(stats['seconds'], 0.001)
+        stage_stats['pipeline'] = {
+            'records': stage_stats['read']['records'],
+            'seconds': total_time,
+            'records_per_sec': stage_stats['read']['records'] / max(total_time, 0.001)
+        }
+        logger.info(f"索引构建流水线: {source_collection.name}.{field_name}, " + ", ".join(
+            f"{stage} {stats['records_per_sec']:.0f} 条/秒" for stage, stats in stage_stats.items()))
+        
+        # 更新全局统计
+        self.build_stats['total_records_processed'] += records_processed
+        self.build_stats['total_keywords_created'] += keywords_created
+        
+        return {
+            'records_processed': records_processed,
+            'keywords_created': keywords_created,
+            'stage_stats': stage_stats
+        }
+    
     def _build_index_for_field(self, source_collection, index_table_name: str, 
                               field_name: str, field_type: FieldType, config) -> Dict[str, int]:
-        """为单个字段构建索引"""
+        """为单个字段构建索引（关键词集合以无序批量写入）"""
         index_collection = self.db[index_table_name]
+        buffer = []
         
-        records_processed = 0
-        keywords_created = 0
-        batch_keywords = []
+        def write_buffer():
+            if buffer:
+                index_collection.insert_many(buffer, ordered=False)
+                buffer.clear()
+        
+        def sink(rows: List[tuple]) -> int:
+            created = 0
+            now = time.time()
+            for doc_id, field_value, preprocessed_value, keywords in rows:
+                for keyword in keywords:
+                    buffer.append({
+                        'doc_id': doc_id,
+                        'source_table': source_collection.name,
+                        'field_name': field_name,
+                        'field_type': field_type.value,
+                        'keyword': keyword,
+                        'original_value': field_value,
+                        'preprocessed_value': preprocessed_value,
+                        'created_at': now
+                    })
+                    created += 1
+                if len(buffer) >= self.build_config['write_batch_size']:
+                    write_buffer()
+            return created
         
         try:
-            # 获取所有有效记录
-            cursor = source_collection.find(
-                {field_name: {'$exists': True, '$ne': None, '$ne': ''}},
-                {'_id': 1, field_name: 1}
-            )
-            
-            for doc in cursor:
-                try:
-                    doc_id = doc['_id']
-                    field_value = doc.get(field_name)
-                    
-                    if not field_value:
-                        continue
-                    
-                    # 预处理字段值
-                    preprocessed_value = self.text_matcher._apply_preprocessing(field_value, config)
-                    if not preprocessed_value:
-                        continue
-                    
-                    # 提取关键词
-                    keywords = self.text_matcher._apply_keyword_extraction(preprocessed_value, config)
-                    if not keywords:
-                        continue
-                    
-                    # 为每个关键词创建索引记录
-                    for keyword in keywords:
-                        batch_keywords.append({
-                            'doc_id': doc_id,
-                            'source_table': source_collection.name,
-                            'field_name': field_name,
-                            'field_type': field_type.value,
-                            'keyword': keyword,
-                            'original_value': str(field_value),
-                            'preprocessed_value': preprocessed_value,
-                            'created_at': time.time()
-                        })
-                        keywords_created += 1
-                    
-                    records_processed += 1
-                    
-                    # 批量插入
-                    if len(batch_keywords) >= self.build_config['batch_size']:
-                        index_collection.insert_many(batch_keywords)
-                        batch_keywords = []
-                        
-                        if self.build_config['enable_progress_logging'] and records_processed % 5000 == 0:
-                            logger.info(f"索引构建进度: {field_name} - {records_processed} 条记录")
-                
-                except Exception as e:
-                    logger.warning(f"处理记录失败: {doc.get('_id')} - {str(e)}")
-                    continue
-            
-            # 插入剩余的关键词
-            if batch_keywords:
-                index_collection.insert_many(batch_keywords)
-            
-            # 更新全局统计
-            self.build_stats['total_records_processed'] += records_processed
-            self.build_stats['total_keywords_created'] += keywords_created
+            return self._run_build_pipeline(source_collection, field_name, field_type, sink, write_buffer)
+        except Exception as e:
+            logger.error(f"构建字段索引失败: {field_name} - {str(e)}")
+            raise
+    
+    def _build_inverted_index_for_field(self, source_collection, field_name: str,
+                                        field_type: FieldType, config) -> Dict[str, int]:
+        """为单个字段构建进程内倒排索引文件"""
+        index = KeywordInvertedIndex(source_collection.name, field_name, self.build_config['index_dir'])
+        
+        def sink(rows: List[tuple]) -> int:
+            return sum(index.add_document(doc_id, keywords) for doc_id, _, _, keywords in rows)
+        
+        try:
+            build_result = self._run_build_pipeline(source_collection, field_name, field_type, sink, lambda: None)
             
-            return {
-                'records_processed': records_processed,
-                'keywords_created': keywords_created
-            }
+            index.finalize({'field_type': field_type.value})
+            index.save()
+            invalidate_keyword_index(source_collection.name, field_name)
+            return build_result
             
         except Exception as e:
-            logger.error(f"构建字段索引失败: {field_name} - {str(e)}")
+            logger.error(f"构建倒排索引失败: {field_name} - {str(e)}")
             raise
     
     def _create_database_indexes(self, index_table_name: str):
@@ -481,6 +722,7 @@ class UniversalIndexBuilder:
     def get_build_stats(self) -> Dict[str, Any]:
         """获取构建统计信息"""
         return {
+            'index_maintenance': self.index_maintainer.get_stats() if self.index_maintainer else None,
             'total_records_processed': self.build_stats['total_records_processed'],
             'total_keywords_created': self.build_stats['total_keywords_created'],
             'total_time_spent': self.build_stats['total_time_spent'],
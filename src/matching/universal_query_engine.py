@@ -14,7 +14,9 @@ from collections import defaultdict
 import pymongo
 from .universal_text_matcher import UniversalTextMatcher, FieldType
 from .universal_index_builder import UniversalIndexBuilder
+from .inverted_keyword_index import get_keyword_index
 from .similarity_scorer import SimilarityCalculator
+from ..utils.bounded_cache import BoundedCache
 
 logger = logging.getLogger(__name__)
 
@@ -79,17 +81,23 @@ class UniversalQueryEngine:
             'enable_parallel': True,
             'enable_cache': True,
             'cache_ttl': 3600,
+            'cache_size': 1000,  # 每类缓存的最大条目数
             'default_similarity_threshold': 0.6,
             'max_candidates_per_field': 200,  # 【高性能恢复】增加候选数量
             'max_candidates_per_record': 50,  # 【高性能恢复】增加每记录候选数
             'query_timeout': 60.0,  # 【高性能模式】合理的超时时间
             'enable_auto_index_creation': True,
-            'enable_fast_mode': True  # 启用快速模式
+            'enable_fast_mode': True,  # 启用快速模式
+            'index_backend': self.index_builder.build_config['index_backend']  # 与索引构建器保持一致
         }
         
-        # 缓存系统
-        self.query_cache = {}
-        self.pipeline_cache = {}
+        # 缓存系统（有界LRU/TTL缓存）
+        self.query_cache = BoundedCache('query_engine.query',
+                                        max_entries=self.query_config['cache_size'],
+                                        ttl_seconds=self.query_config['cache_ttl'])
+        self.pipeline_cache = BoundedCache('query_engine.pipeline',
+                                           max_entries=self.query_config['cache_size'],
+                                           ttl_seconds=self.query_config['cache_ttl'])
         
         # 性能统计
         self.query_stats = {
@@ -223,6 +231,15 @@ class UniversalQueryEngine:
                                    keywords: List[str], config, similarity_threshold: float) -> List[Dict]:
         """执行单字段聚合查询"""
         try:
+            # 优先使用进程内倒排索引
+            if self.query_config['index_backend'] == 'inverted_file':
+                keyword_index = self._get_keyword_index(target_table, target_field)
+                if keyword_index is None:
+                    return []
+                
+                search_results = keyword_index.search(keywords, config.max_candidates, similarity_threshold)
+                return self._fetch_full_records(target_table, search_results)
+            
             # 构建索引表名（根据字段名动态生成）
             index_table_name = f"{target_table}_{target_field}_keywords"
             
@@ -255,14 +272,29 @@ class UniversalQueryEngine:
             logger.error(f"单字段查询执行失败: {target_table}.{target_field} - {str(e)}")
             return []
     
+    def _get_keyword_index(self, target_table: str, target_field: str):
+        """获取倒排索引，不存在时按配置自动构建"""
+        index_dir = self.index_builder.build_config['index_dir']
+        keyword_index = get_keyword_index(target_table, target_field, index_dir)
+        if keyword_index is not None:
+            return keyword_index
+        
+        if not self.query_config['enable_auto_index_creation']:
+            logger.warning(f"倒排索引不存在: {target_table}.{target_field}")
+            return None
+        
+        logger.info(f"倒排索引不存在，自动创建: {target_table}.{target_field}")
+        self.index_builder.build_field_index(target_table, target_field)
+        self.query_stats['auto_indexes_created'] += 1
+        return get_keyword_index(target_table, target_field, index_dir)
+    
     def _build_aggregation_pipeline(self, target_field: str, keywords: List[str], 
                                    similarity_threshold: float, max_candidates: int) -> List[Dict]:
         """构建聚合管道"""
         # 缓存检查
         cache_key = f"{target_field}_{len(keywords)}_{similarity_threshold}_{max_candidates}"
-        if cache_key in self.pipeline_cache:
-            pipeline_template = self.pipeline_cache[cache_key]
-        else:
+        pipeline_template = self.pipeline_cache.get(cache_key)
+        if pipeline_template is None:
             pipeline_template = [
                 # 第1阶段：匹配关键词
                 {'$match': {
@@ -289,7 +321,7 @@ class UniversalQueryEngine:
                 # 第6阶段：限制候选数量
                 {'$limit': max_candidates}
             ]
-            self.pipeline_cache[cache_key] = pipeline_template
+            self.pipeline_cache.set(cache_key, pipeline_template)
         
         # 动态替换关键词（避免缓存污染）
         pipeline = []
@@ -354,7 +386,7 @@ class UniversalQueryEngine:
                     record = record_map[lookup_id].copy()
                     record['similarity_score'] = agg_result['similarity_score']
                     record['_matched_keywords'] = agg_result['matched_keywords']
-                    record['_original_value'] = agg_result['original_value']
+                    record['_original_value'] = agg_result.get('original_value', '')
                     candidates.append(record)
             
             return candidates
@@ -590,22 +622,29 @@ class UniversalQueryEngine:
                     'record_results': {}
                 }
             
-            # 执行批量聚合查询
-            candidates = self._execute_batch_aggregation_query(
-                target_table, target_field, list(all_keywords), config, record_keywords
-            )
-            
-            # 为每个记录匹配候选
-            record_results = self._match_candidates_to_records(
-                candidates, record_keywords, config.similarity_threshold
-            )
+            if self.query_config['index_backend'] == 'inverted_file':
+                # 整批关键词并集一次性合并倒排表，按记录直接取Top-K
+                record_results, total_candidates = self._execute_inverted_batch_query(
+                    target_table, target_field, record_keywords, config.similarity_threshold
+                )
+            else:
+                # 执行批量聚合查询
+                candidates = self._execute_batch_aggregation_query(
+                    target_table, target_field, list(all_keywords), config, record_keywords
+                )
+                
+                # 为每个记录匹配候选
+                record_results = self._match_candidates_to_records(
+                    candidates, record_keywords, config.similarity_threshold
+                )
+                total_candidates = len(candidates)
             
             return {
                 'target_table': target_table,
                 'target_field': target_field,
                 'field_type': field_type.value,
                 'status': 'success',
-                'total_candidates': len(candidates),
+                'total_candidates': total_candidates,
                 'record_results': record_results
             }
             
@@ -617,6 +656,17 @@ class UniversalQueryEngine:
                                         all_keywords: List[str], config, record_keywords: Dict) -> List[Dict]:
         """执行批量聚合查询"""
         try:
+            max_candidates = self.query_config['max_candidates_per_field'] * 5  # 【修复】为500条记录提供足够候选
+            
+            # 优先使用进程内倒排索引
+            if self.query_config['index_backend'] == 'inverted_file':
+                keyword_index = self._get_keyword_index(target_table, target_field)
+                if keyword_index is None:
+                    return []
+                
+                search_results = keyword_index.search(all_keywords, max_candidates)
+                return self._fetch_full_records_batch(target_table, search_results)
+            
             # 构建索引表名（根据字段名动态生成）
             index_table_name = f"{target_table}_{target_field}_keywords"
             
@@ -646,7 +696,7 @@ class UniversalQueryEngine:
                 # 第3阶段：按匹配关键词数量排序（更多匹配的优先）
                 {'$sort': {'match_count': -1}},
                 # 第4阶段：限制候选数量（在相似度计算前先限制，提高性能）
-                {'$limit': self.query_config['max_candidates_per_field'] * 5}  # 【修复】为500条记录提供足够候选
+                {'$limit': max_candidates}
             ]
             
             # 执行查询
@@ -661,6 +711,54 @@ class UniversalQueryEngine:
             logger.error(f"批量聚合查询失败: {target_table}.{target_field} - {str(e)}")
             return []
     
+    def _execute_inverted_batch_query(self, target_table: str, target_field: str,
+                                      record_keywords: Dict[str, Dict],
+                                      similarity_threshold: float) -> Tuple[Dict[str, List[Dict]], int]:
+        """
+        基于倒排索引的真批量查询：每个关键词的倒排表每批只取一次，
+        记录×候选重叠数以稀疏矩阵乘积一次算出，完整记录每批只查询一次
+        
+        Returns:
+            Tuple[Dict[str, List[Dict]], int]: (记录ID到候选列表的映射, 去重候选总数)
+        """
+        try:
+            keyword_index = self._get_keyword_index(target_table, target_field)
+            if keyword_index is None:
+                return {}, 0
+            
+            record_ids = list(record_keywords.keys())
+            keyword_lists = [record_keywords[record_id]['keywords'] for record_id in record_ids]
+            batch_hits = keyword_index.search_batch(
+                keyword_lists, self.query_config['max_candidates_per_record'], similarity_threshold
+            )
+            
+            doc_ids = list({hit['_id'] for hits in batch_hits for hit in hits})
+            if not doc_ids:
+                return {}, 0
+            
+            record_map = {record['_id']: record
+                          for record in self.db[target_table].find({'_id': {'$in': doc_ids}})}
+            
+            record_results = {}
+            for record_id, hits in zip(record_ids, batch_hits):
+                record_candidates = []
+                for hit in hits:
+                    record = record_map.get(hit['_id'])
+                    if record is None:
+                        continue
+                    candidate = record.copy()
+                    candidate['similarity_score'] = hit['similarity_score']
+                    candidate['_keyword_count'] = hit['match_count']
+                    record_candidates.append(candidate)
+                if record_candidates:
+                    record_results[record_id] = record_candidates
+            
+            return record_results, len(record_map)
+            
+        except Exception as e:
+            logger.error(f"倒排索引批量查询失败: {target_table}.{target_field} - {str(e)}")
+            return {}, 0
+    
     def _match_candidates_to_records(self, candidates: List[Dict], record_keywords: Dict[str, Dict], 
                                    similarity_threshold: float) -> Dict[str, List[Dict]]:
         """将候选记录匹配到源记录"""
@@ -812,30 +910,11 @@ class UniversalQueryEngine:
         logger.info("查询缓存已清空")
 
     def _cleanup_cache_if_needed(self):
-        """根据需要清理缓存，防止内存泄漏"""
+        """清除已过期的缓存条目（缓存容量由LRU上限保证，无需整体裁剪）"""
         try:
-            # 检查缓存大小
-            query_cache_size = len(self.query_cache)
-            pipeline_cache_size = len(self.pipeline_cache)
-            
-            # 如果缓存过大，清理旧缓存
-            max_cache_size = 1000  # 最大缓存条目数
-            
-            if query_cache_size > max_cache_size:
-                # 清理一半的查询缓存
-                items_to_remove = query_cache_size // 2
-                cache_keys = list(self.query_cache.keys())
-                for key in cache_keys[:items_to_remove]:
-                    del self.query_cache[key]
-                logger.info(f"🧹 清理查询缓存: {items_to_remove} 个条目")
-            
-            if pipeline_cache_size > max_cache_size:
-                # 清理一半的管道缓存
-                items_to_remove = pipeline_cache_size // 2
-                cache_keys = list(self.pipeline_cache.keys())
-                for key in cache_keys[:items_to_remove]:
-                    del self.pipeline_cache[key]
-                logger.info(f"🧹 清理管道缓存: {items_to_remove} 个条目")
+            expired = self.query_cache.purge_expired() + self.pipeline_cache.purge_expired()
+            if expired:
+                logger.info(f"🧹 清理过期缓存: {expired} 个条目")
                 
         except Exception as e:
             logger.warning(f"缓存清理失败: {e}")
@@ -7,7 +7,6 @@
 """
 
 import re
-import jieba
 import time
 import logging
 from typing import Dict, List, Set, Tuple, Optional, Any
@@ -15,9 +14,21 @@ from collections import defaultdict
 from enum import Enum
 import pymongo
 from dataclasses import dataclass
+from .inverted_keyword_index import get_keyword_index
+from ..utils.bounded_cache import BoundedCache
+from ..utils.tokenizer_service import get_tokenizer
 
 logger = logging.getLogger(__name__)
 
+# 地址关键词提取正则（预编译；索引关键词依赖其输出，修改需重建地址字段索引）
+_ADDRESS_PROVINCE_PATTERN = re.compile(r'([\u4e00-\u9fff]{2,}省)')
+_ADDRESS_CITY_PATTERN = re.compile(r'([\u4e00-\u9fff]{2,}市)')
+_ADDRESS_DISTRICT_PATTERN = re.compile(r'([\u4e00-\u9fff]{2,}[区县])')
+_ADDRESS_TOWN_PATTERN = re.compile(r'([\u4e00-\u9fff]{2,}镇)')
+_ADDRESS_STREET_PATTERN = re.compile(r'([^省市区县镇]{2,6}[路街道巷弄])')
+_ADDRESS_NUMBER_PATTERN = re.compile(r'(\d+号?)')
+_ADDRESS_BUILDING_PATTERN = re.compile(r'([\u4e00-\u9fff]{2,6}[大厦楼宇院])')
+
 
 class FieldType(Enum):
     """字段类型枚举"""
@@ -67,13 +78,18 @@ class UniversalTextMatcher:
             'max_total_candidates': 50,
             'enable_cache': True,
             'cache_ttl': 3600,  # 1小时
+            'cache_size': 10000,
             'parallel_processing': True,
             'max_workers': 16
         }
         
-        # 缓存系统
-        self.query_cache = {}
-        self.field_type_cache = {}
+        # 缓存系统（有界LRU/TTL缓存）
+        self.query_cache = BoundedCache('text_matcher.query',
+                                        max_entries=self.performance_config['cache_size'],
+                                        ttl_seconds=self.performance_config['cache_ttl'])
+        self.field_type_cache = BoundedCache('text_matcher.field_type',
+                                             max_entries=self.performance_config['cache_size'],
+                                             ttl_seconds=self.performance_config['cache_ttl'])
         
         # 性能统计
         self.stats = {
@@ -163,11 +179,12 @@ class UniversalTextMatcher:
         """
         # 缓存检查
         cache_key = f"{field_name}_{hash(tuple(sample_values[:5]))}"
-        if cache_key in self.field_type_cache:
-            return self.field_type_cache[cache_key]
+        cached_type = self.field_type_cache.get(cache_key)
+        if cached_type is not None:
+            return cached_type
         
         field_type = self._analyze_field_type(field_name, sample_values)
-        self.field_type_cache[cache_key] = field_type
+        self.field_type_cache.set(cache_key, field_type)
         self.stats['field_type_distribution'][field_type] += 1
         
         logger.info(f"字段类型检测: {field_name} -> {field_type.value}")
@@ -302,19 +319,26 @@ class UniversalTextMatcher:
             if not keywords:
                 return []
             
-            # 构建索引表名
-            index_table_name = f"{target_table}_{target_field}_keywords"
-            
-            # 检查索引表是否存在
-            if index_table_name not in self.db.list_collection_names():
-                logger.warning(f"索引表不存在: {index_table_name}，将创建索引")
-                self._create_field_index(target_table, target_field, field_type)
-            
-            # 执行聚合查询
-            candidates = self._execute_aggregation_query(
-                index_table_name, target_table, target_field, 
-                keywords, config
-            )
+            # 优先使用进程内倒排索引，缺失时回退到关键词索引集合
+            keyword_index = get_keyword_index(target_table, target_field)
+            if keyword_index is not None:
+                candidates = self._execute_inverted_index_query(
+                    keyword_index, target_table, keywords, config
+                )
+            else:
+                # 构建索引表名
+                index_table_name = f"{target_table}_{target_field}_keywords"
+                
+                # 检查索引表是否存在
+                if index_table_name not in self.db.list_collection_names():
+                    logger.warning(f"索引表不存在: {index_table_name}，将创建索引")
+                    self._create_field_index(target_table, target_field, field_type)
+                
+                # 执行聚合查询
+                candidates = self._execute_aggregation_query(
+                    index_table_name, target_table, target_field, 
+                    keywords, config
+                )
             
             # 更新统计
             query_time = time.time() - start_time
@@ -412,6 +436,33 @@ class UniversalTextMatcher:
             logger.error(f"聚合查询执行失败: {str(e)}")
             return []
     
+    def _execute_inverted_index_query(self, keyword_index, target_table: str, keywords: List[str],
+                                      config: FieldProcessingConfig) -> List[Dict]:
+        """执行倒排索引查询"""
+        try:
+            search_results = keyword_index.search(keywords, config.max_candidates, config.similarity_threshold)
+            if not search_results:
+                return []
+            
+            # 获取完整记录
+            doc_ids = [result['_id'] for result in search_results]
+            record_map = {record['_id']: record
+                          for record in self.db[target_table].find({'_id': {'$in': doc_ids}})}
+            
+            candidates = []
+            for result in search_results:
+                if result['_id'] in record_map:
+                    record = record_map[result['_id']].copy()
+                    record['_similarity_score'] = result['similarity_score']
+                    record['_matched_keywords'] = result['matched_keywords']
+                    candidates.append(record)
+            
+            return candidates
+            
+        except Exception as e:
+            logger.error(f"倒排索引查询执行失败: {str(e)}")
+            return []
+    
     def _create_field_index(self, table_name: str, field_name: str, field_type: FieldType):
         """为字段创建索引（延迟创建）"""
         logger.info(f"开始为字段创建索引: {table_name}.{field_name} ({field_type.value})")
@@ -488,7 +539,7 @@ class UniversalTextMatcher:
         if not value:
             return []
         
-        words = jieba.cut(value)
+        words = get_tokenizer().tokenize(value)
         keywords = []
         stop_words = {'的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这'}
         
@@ -504,7 +555,7 @@ class UniversalTextMatcher:
         if not value:
             return []
         
-        words = jieba.cut(value)
+        words = get_tokenizer().tokenize(value)
         keywords = []
         stop_words = {'有限', '公司', '企业', '集团', '工厂', '商店', '中心', '责任', '股份'}
         
@@ -524,33 +575,33 @@ class UniversalTextMatcher:
         keywords = []
         
         # 省市区提取
-        province_match = re.search(r'([\u4e00-\u9fff]{2,}省)', value)
+        province_match = _ADDRESS_PROVINCE_PATTERN.search(value)
         if province_match:
             keywords.append(province_match.group(1))
         
-        city_match = re.search(r'([\u4e00-\u9fff]{2,}市)', value)
+        city_match = _ADDRESS_CITY_PATTERN.search(value)
         if city_match:
             keywords.append(city_match.group(1))
         
-        district_match = re.search(r'([\u4e00-\u9fff]{2,}[区县])', value)
+        district_match = _ADDRESS_DISTRICT_PATTERN.search(value)
         if district_match:
             keywords.append(district_match.group(1))
         
         # 镇级行政区划提取
-        town_match = re.search(r'([\u4e00-\u9fff]{2,}镇)', value)
+        town_match = _ADDRESS_TOWN_PATTERN.search(value)
         if town_match:
             keywords.append(town_match.group(1))
         
         # 街道路名提取（简化版）
-        street_matches = re.findall(r'([^省市区县镇]{2,6}[路街道巷弄])', value)
+        street_matches = _ADDRESS_STREET_PATTERN.findall(value)
         keywords.extend(street_matches[:3])  # 只取前3个，避免过多关键词
         
         # 门牌号提取（简化版）
-        number_matches = re.findall(r'(\d+号?)', value)
+        number_matches = _ADDRESS_NUMBER_PATTERN.findall(value)
         keywords.extend(number_matches[:2])  # 只取前2个门牌号
         
         # 建筑物名称提取（简化版）
-        building_matches = re.findall(r'([\u4e00-\u9fff]{2,6}[大厦楼宇院])', value)
+        building_matches = _ADDRESS_BUILDING_PATTERN.findall(value)
         keywords.extend(building_matches[:2])  # 只取前2个建筑物名称
         
         return list(set(keywords))
@@ -18,6 +18,7 @@ import pandas as pd
 from datetime import datetime
 import threading
 import time
+from bson import ObjectId
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from src.utils.memory_manager import get_memory_manager, check_memory_before_task
 
@@ -34,12 +35,51 @@ from .optimized_prefilter import OptimizedPrefilter, CandidateRanker
 from .graph_matcher import GraphMatcher
 from .slice_enhanced_matcher import SliceEnhancedMatcher
 from .universal_query_engine import UniversalQueryEngine
+from ..database.range_reader import IdRangeReader
+from .task_checkpoint import TaskCheckpointStore
+from .char_tfidf_model import ensure_tfidf_model
+from .target_feature_store import get_feature_store
 from .hierarchical_matcher import HierarchicalMatcher
 from .intelligent_unit_name_matcher import IntelligentUnitNameMatcher
 from .address_similarity_filter import AddressSimilarityFilter, AddressFilterConfig
 
 logger = logging.getLogger(__name__)
 
+# 进程级的运行中任务登记（task_id -> 任务线程）：每个请求都会新建匹配器实例，
+# 实例内的running_tasks无法拦截同一任务的重复启动或续跑
+_ACTIVE_TASKS: Dict[str, Optional[threading.Thread]] = {}
+_ACTIVE_TASK_LOCK = threading.Lock()
+
+
+def _claim_task(task_id: str) -> bool:
+    """登记任务为运行中，已有线程在本进程运行（或正在启动）时返回False"""
+    with _ACTIVE_TASK_LOCK:
+        if task_id in _ACTIVE_TASKS:
+            thread = _ACTIVE_TASKS[task_id]
+            if thread is None or thread.is_alive():
+                return False
+        _ACTIVE_TASKS[task_id] = None
+        return True
+
+
+def _bind_task_thread(task_id: str, thread: threading.Thread):
+    """记录已登记任务的执行线程"""
+    with _ACTIVE_TASK_LOCK:
+        _ACTIVE_TASKS[task_id] = thread
+
+
+def _is_task_alive(task_id: str) -> bool:
+    """本进程内是否有线程正在执行该任务"""
+    with _ACTIVE_TASK_LOCK:
+        thread = _ACTIVE_TASKS.get(task_id)
+        return task_id in _ACTIVE_TASKS and (thread is None or thread.is_alive())
+
+
+def _release_task(task_id: str):
+    """任务线程结束后解除登记"""
+    with _ACTIVE_TASK_LOCK:
+        _ACTIVE_TASKS.pop(task_id, None)
+
 
 class UserDataMatcher:
     """用户数据智能匹配器"""
@@ -100,6 +140,9 @@ class UserDataMatcher:
         self.running_tasks = {}
         self.stop_flags = {}  # 任务停止标志
         
+        # 任务检查点（支持进程重启后断点续跑）
+        self.checkpoint_store = TaskCheckpointStore(db_manager) if db_manager else None
+        
         # 性能统计
         self.performance_stats = {
             'total_processed': 0,
@@ -281,18 +324,24 @@ class UserDataMatcher:
             logger.warning(f"关键字段验证配置加载失败，使用默认配置: {str(e)}")
             logger.info(f"默认配置: {default_config}")
     
-    def start_matching_task(self, task_config: Dict[str, Any]) -> str:
+    def start_matching_task(self, task_config: Dict[str, Any],
+                            resume_checkpoint: Optional[Dict[str, Any]] = None) -> str:
         """
         启动匹配任务（包含性能优化）
         
         Args:
             task_config: 任务配置
+            resume_checkpoint: 断点续跑时的任务检查点（None表示从头开始）
             
         Returns:
             str: 任务ID
         """
         task_id = task_config['task_id']
         
+        # 续跑时resume_task已完成登记；新任务在此登记，阻止运行期间的续跑请求再起一个执行线程
+        if resume_checkpoint is None and not _claim_task(task_id):
+            raise ValueError(f"任务 {task_id} 正在运行中")
+        
         try:
             # 第一步：创建优化索引
             if self.index_manager and task_config.get('mappings'):
@@ -312,6 +361,11 @@ class UserDataMatcher:
                            f"创建: {index_result.get('created_count', 0)}, "
                            f"跳过: {index_result.get('skipped_count', 0)}")
             
+            # 为目标表准备字符TF-IDF模型（每表拟合一次并落盘，余弦相似度复用预计算向量）
+            if task_config.get('mappings'):
+                self._prepare_tfidf_model(task_config['mappings'])
+                self._prepare_feature_store(task_config['mappings'])
+            
             # 第二步：初始化高性能匹配组件
             if task_config.get('mappings') and self.use_high_performance:
                 logger.info("初始化高性能匹配组件...")
@@ -369,9 +423,10 @@ class UserDataMatcher:
             # 第三步：创建后台线程执行匹配
             thread = threading.Thread(
                 target=self._execute_optimized_matching_task,
-                args=(task_id, task_config)
+                args=(task_id, task_config, resume_checkpoint)
             )
             thread.daemon = True
+            _bind_task_thread(task_id, thread)
             thread.start()
             
             self.running_tasks[task_id] = {
@@ -386,8 +441,82 @@ class UserDataMatcher:
             
         except Exception as e:
             logger.error(f"启动优化匹配任务失败: {str(e)}")
-            # 降级到普通匹配
-            return self._start_fallback_matching_task(task_config)
+            if resume_checkpoint:
+                # 降级匹配不支持检查点，续跑任务不能降级后从头执行
+                raise
+            # 降级到普通匹配（沿用本次登记，由降级线程结束时解除）
+            try:
+                return self._start_fallback_matching_task(task_config)
+            except Exception:
+                _release_task(task_id)
+                raise
+    
+    def _prepare_tfidf_model(self, mappings: List[Dict]):
+        """
+        加载或拟合主目标表的字符TF-IDF模型并挂载到相似度计算器
+        
+        Args:
+            mappings: 字段映射配置
+        """
+        target_fields: Dict[str, List[str]] = {}
+        for mapping in mappings:
+            target_table = mapping.get('target_table')
+            target_field = mapping.get('target_field')
+            if target_table and target_field:
+                target_fields.setdefault(target_table, []).append(target_field)
+        if not target_fields or not self.db_manager:
+            return
+        
+        primary_table = next(iter(target_fields))
+        try:
+            model = ensure_tfidf_model(self.db_manager, primary_table, target_fields[primary_table])
+            self.similarity_calculator.attach_tfidf_model(model)
+        except Exception as e:
+            logger.warning(f"准备字符TF-IDF模型失败，余弦相似度使用双文档TF-IDF: {str(e)}")
+            self.similarity_calculator.attach_tfidf_model(None)
+    
+    def _prepare_feature_store(self, mappings: List[Dict]):
+        """
+        为主目标表构建（或复用）记录特征库并挂载到各匹配器
+        
+        Args:
+            mappings: 字段映射配置
+        """
+        primary_table = next((m.get('target_table') for m in mappings if m.get('target_table')), None)
+        if not primary_table or not self.db_manager:
+            return
+        
+        # 按字段名识别名称、地址、电话、信用代码字段
+        field_roles = {}
+        for mapping in mappings:
+            if mapping.get('target_table') != primary_table:
+                continue
+            source_field = mapping.get('source_field', '')
+            target_field = mapping.get('target_field', '')
+            if not target_field:
+                continue
+            target_lower = target_field.lower()
+            if 'name' not in field_roles and self._is_unit_name_field(source_field, target_field):
+                field_roles['name'] = target_field
+            elif 'address' not in field_roles and self._is_address_field(source_field, target_field):
+                field_roles['address'] = target_field
+            elif 'phone' not in field_roles and any(k in target_lower for k in ('dh', 'phone', '电话')):
+                field_roles['phone'] = target_field
+            elif 'credit_code' not in field_roles and any(k in target_lower for k in ('xydm', 'credit', '信用代码')):
+                field_roles['credit_code'] = target_field
+        if not field_roles:
+            return
+        
+        try:
+            store = get_feature_store(self.db_manager, primary_table, field_roles)
+        except Exception as e:
+            logger.warning(f"准备目标表特征库失败，目标特征将逐次计算: {str(e)}")
+            store = None
+        
+        self.similarity_calculator.attach_feature_store(store)
+        for matcher in (getattr(self, 'fuzzy_matcher', None), getattr(self, 'enhanced_fuzzy_matcher', None)):
+            if matcher is not None:
+                matcher.attach_feature_store(store)
     
     def _start_fallback_matching_task(self, task_config: Dict[str, Any]) -> str:
         """启动降级匹配任务（不使用优化）"""
@@ -400,6 +529,7 @@ class UserDataMatcher:
             args=(task_id, task_config)
         )
         thread.daemon = True
+        _bind_task_thread(task_id, thread)
         thread.start()
         
         self.running_tasks[task_id] = {
@@ -411,9 +541,13 @@ class UserDataMatcher:
         
         return task_id
     
-    def _execute_optimized_matching_task(self, task_id: str, config: Dict[str, Any]):
+    def _execute_optimized_matching_task(self, task_id: str, config: Dict[str, Any],
+                                         resume_checkpoint: Optional[Dict[str, Any]] = None):
         """
         执行优化匹配任务（后台线程）
+        
+        每个批次的结果提交后写入检查点；传入resume_checkpoint时从检查点记录的_id之后继续，
+        并恢复已提交的计数器
         """
         try:
             logger.info(f"开始执行优化匹配任务: {task_id}")
@@ -475,14 +609,38 @@ class UserDataMatcher:
             result_collection_name = f'user_match_results_{task_id}'
             result_collection = db[result_collection_name]
             
+            # 检查点信息
+            config_hash = TaskCheckpointStore.compute_config_hash(config)
+            index_versions = TaskCheckpointStore.collect_index_versions(mappings)
+            start_after = None
+            if resume_checkpoint:
+                start_after = resume_checkpoint.get('last_id')
+                counters = resume_checkpoint.get('counters') or {}
+                processed_count = counters.get('processed', 0)
+                matched_count = counters.get('matched', 0)
+                self._discard_uncommitted_results(result_collection, start_after)
+                logger.info(f"任务 {task_id} 从检查点恢复: last_id={start_after}, "
+                           f"已处理 {processed_count}, 已匹配 {matched_count}")
+            elif self.checkpoint_store:
+                # 初始检查点，保证首个批次提交前中断的任务也可恢复
+                self.checkpoint_store.save(
+                    task_id, 'user_data_matching', None,
+                    {'processed': 0, 'matched': 0, 'total': total_records},
+                    config_hash, index_versions
+                )
+            
             # 分批处理记录
             batch_start_time = time.time()
+            last_committed_id = start_after
             
-            for batch_records in self._get_source_records_batch(source_collection, batch_size):
+            for batch_records in self._get_source_records_batch(source_collection, batch_size,
+                                                                start_after=start_after):
                 if self.stop_flags.get(task_id, False):
                     logger.info(f"任务 {task_id} 被停止")
                     self._update_task_status(task_id, 'stopped', 100, '任务已停止', 
                                            processed_count, total_records, matched_count)
+                    if self.checkpoint_store:
+                        self.checkpoint_store.update_status(task_id, 'stopped')
                     return
                 
                 # 处理当前批次
@@ -491,11 +649,13 @@ class UserDataMatcher:
                 )
                 
                 # 保存匹配结果 - 添加数据库连接检查
+                batch_saved = True
                 if batch_results:
                     try:
                         result_collection.insert_many(batch_results)
                         matched_count += len(batch_results)
                     except Exception as e:
+                        batch_saved = False
                         logger.error(f"保存匹配结果失败: {str(e)}")
                         # 检查是否是数据库连接问题
                         if "connection" in str(e).lower() or "network" in str(e).lower():
@@ -506,15 +666,36 @@ class UserDataMatcher:
                                 # 重新获取结果集合
                                 db = self.db_manager.get_collection(source_table).database
                                 result_collection = db[result_collection_name]
-                                # 重试保存
+                                # 清理首次写入可能残留的部分结果后重试保存
+                                self._discard_uncommitted_results(result_collection, last_committed_id)
                                 result_collection.insert_many(batch_results)
                                 matched_count += len(batch_results)
+                                batch_saved = True
                                 logger.info("数据库重连成功，匹配结果保存完成")
                             except Exception as retry_error:
                                 logger.error(f"数据库重连后仍然保存失败: {str(retry_error)}")
-                                # 继续处理下一批次，不中断整个任务
+                
+                # 保存失败时终止任务并保留上一检查点，续跑时从该批次重新处理；
+                # 继续处理后续批次会用更靠后的_id覆盖检查点，失败批次将被永久跳过
+                if not batch_saved:
+                    error_msg = '匹配结果保存失败，任务终止，可从上一检查点续跑'
+                    logger.error(f"任务 {task_id} {error_msg}")
+                    self._update_task_status(task_id, 'failed', round(processed_count / total_records * 100, 2),
+                                           error_msg, processed_count, total_records, matched_count)
+                    if self.checkpoint_store:
+                        self.checkpoint_store.update_status(task_id, 'failed')
+                    return
                 
                 processed_count += len(batch_records)
+                last_committed_id = batch_records[-1]['_id']
+                
+                # 批次结果已提交，记录检查点
+                if self.checkpoint_store:
+                    self.checkpoint_store.save(
+                        task_id, 'user_data_matching', batch_records[-1]['_id'],
+                        {'processed': processed_count, 'matched': matched_count, 'total': total_records},
+                        config_hash, index_versions
+                    )
                 
                 # 更新进度
                 progress = (processed_count / total_records) * 100
@@ -539,6 +720,8 @@ class UserDataMatcher:
             self._update_task_status(task_id, 'completed', 100.0, 
                                    f'匹配完成，共找到 {matched_count} 个匹配结果',
                                    processed_count, total_records, matched_count)
+            if self.checkpoint_store:
+                self.checkpoint_store.update_status(task_id, 'completed')
             
             logger.info(f"优化匹配任务完成: {task_id}, "
                        f"处理: {processed_count}, 匹配: {matched_count}, "
@@ -548,10 +731,16 @@ class UserDataMatcher:
             logger.error(f"执行优化匹配任务失败: {task_id} - {str(e)}")
             self._update_task_status(task_id, 'failed', 0, f'匹配任务失败: {str(e)}',
                                    0, 0, 0)
+            if self.checkpoint_store:
+                self.checkpoint_store.update_status(task_id, 'failed')
         finally:
             # 清理任务
             if task_id in self.running_tasks:
                 del self.running_tasks[task_id]
+            _release_task(task_id)
+            # 释放进程模式下的工作进程
+            if getattr(self, 'simple_fast_matcher', None):
+                self.simple_fast_matcher.close()
     
     def _process_optimized_batch(self, batch_records: List[Dict], mappings: List[Dict], 
                                source_table: str, task_id: str) -> List[Dict]:
@@ -1774,25 +1963,102 @@ class UserDataMatcher:
         
         return matched_fields
     
-    def _get_source_records_batch(self, collection, batch_size: int = 5000):
+    def _get_source_records_batch(self, collection, batch_size: int = 5000, start_after=None,
+                                  projection: Dict = None):
         """
-        批量获取源记录
+        批量获取源记录（按_id范围分页，避免skip在后期批次的O(n)扫描）
         
         Args:
             collection: MongoDB集合
             batch_size: 批次大小
+            start_after: 从该_id之后开始读取（断点续跑）
+            projection: 字段投影
             
         Yields:
             List[Dict]: 批次记录
         """
-        skip = 0
-        while True:
-            batch = list(collection.find({}).skip(skip).limit(batch_size))
-            if not batch:
-                break
-            yield batch
-            skip += batch_size
+        reader = IdRangeReader(collection, projection=projection, batch_size=batch_size,
+                               start_after=start_after)
+        yield from reader.iter_batches()
 
+    def _discard_uncommitted_results(self, result_collection, last_id: Any):
+        """
+        删除检查点之后写入的匹配结果
+        
+        批次结果写入后、检查点保存前进程中断时，该批次会在续跑时重新处理，
+        需先清除其已写入的结果，避免重复
+        """
+        try:
+            if last_id is None:
+                result = result_collection.delete_many({})
+            elif isinstance(last_id, ObjectId):
+                # 24位十六进制字符串的字典序与ObjectId顺序一致
+                result = result_collection.delete_many({'source_id': {'$gt': str(last_id)}})
+            else:
+                logger.debug(f"检查点_id类型为 {type(last_id).__name__}，跳过未提交结果清理")
+                return
+            if result.deleted_count:
+                logger.info(f"清除检查点之后的未提交匹配结果: {result.deleted_count} 条")
+        except Exception as e:
+            logger.warning(f"清除未提交匹配结果失败: {str(e)}")
+    
+    def resume_task(self, task_id: str) -> str:
+        """
+        从持久化检查点恢复匹配任务
+        
+        Args:
+            task_id: 任务ID
+            
+        Returns:
+            str: 任务ID
+            
+        Raises:
+            ValueError: 检查点或任务不存在、任务已完成、配置已变更
+        """
+        if not self.checkpoint_store:
+            raise ValueError("数据库连接未初始化")
+        
+        checkpoint = self.checkpoint_store.load(task_id)
+        if not checkpoint:
+            raise ValueError(f"任务 {task_id} 没有可恢复的检查点")
+        if checkpoint.get('status') == 'completed':
+            raise ValueError(f"任务 {task_id} 已完成，无需恢复")
+        if checkpoint.get('status') == 'running' and _is_task_alive(task_id):
+            raise ValueError(f"任务 {task_id} 正在运行中，无需恢复")
+        # 进程级登记，任务线程结束时解除；并发的续跑请求只有一个能通过
+        if not _claim_task(task_id):
+            raise ValueError(f"任务 {task_id} 正在运行中")
+        
+        try:
+            task_collection = self.db_manager.get_collection('user_matching_tasks')
+            task_config = task_collection.find_one({'task_id': task_id})
+            if not task_config:
+                raise ValueError(f"任务 {task_id} 不存在")
+            
+            if TaskCheckpointStore.compute_config_hash(task_config) != checkpoint.get('config_hash'):
+                raise ValueError(f"任务 {task_id} 的配置在中断后已变更，无法从检查点恢复")
+            
+            changed_indexes = TaskCheckpointStore.diff_index_versions(
+                checkpoint, TaskCheckpointStore.collect_index_versions(task_config.get('mappings', []))
+            )
+            if changed_indexes:
+                logger.warning(f"任务 {task_id} 中断后以下索引已重建，后续批次将使用新索引: {changed_indexes}")
+            
+            # 恢复期间清除停止标志并标记为运行中
+            self.stop_flags.pop(task_id, None)
+            task_collection.update_one(
+                {'task_id': task_id},
+                {'$set': {'status': 'running', 'updated_at': datetime.now().isoformat()}}
+            )
+            self.checkpoint_store.update_status(task_id, 'running')
+            
+            logger.info(f"恢复用户数据匹配任务: {task_id}, 检查点 last_id={checkpoint.get('last_id')}")
+            return self.start_matching_task(task_config, resume_checkpoint=checkpoint)
+        except Exception:
+            # 任务线程未启动，解除登记以便再次续跑
+            _release_task(task_id)
+            raise
+    
     def _update_task_status(self, task_id: str, status: str, progress: float = 0, 
                            message: str = "", processed: int = 0, total: int = 0, matches: int = 0):
         """更新任务状态"""
@@ -2017,6 +2283,7 @@ class UserDataMatcher:
             # 清理任务缓存
             if task_id in self.running_tasks:
                 del self.running_tasks[task_id]
+            _release_task(task_id)
     
     def _select_matcher(self, algorithm_type: str):
         """
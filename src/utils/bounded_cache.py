@@ -0,0 +1,222 @@
+"""
+有界缓存模块
+线程安全的LRU缓存，支持条目数上限、TTL过期和按字节估算的容量上限，并记录命中/未命中/淘汰统计。
+查询引擎、预过滤器、匹配器、知识图谱存储等子系统统一使用本缓存，统计信息汇总到性能监控接口
+"""
+
+import sys
+import time
+import logging
+import weakref
+from collections import OrderedDict
+from threading import RLock
+from typing import Dict, Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# 所有存活的缓存实例（弱引用，实例销毁后自动移除）
+_cache_registry: "weakref.WeakSet[BoundedCache]" = weakref.WeakSet()
+
+
+def estimate_size(value: Any, depth: int = 2) -> int:
+    """
+    估算对象占用的字节数（对容器向下展开有限层级）
+
+    Args:
+        value: 对象
+        depth: 向下展开的容器层数
+
+    Returns:
+        int: 估算字节数
+    """
+    size = sys.getsizeof(value)
+    if depth <= 0:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += sys.getsizeof(k) + estimate_size(v, depth - 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += estimate_size(item, depth - 1)
+    return size
+
+
+class BoundedCache:
+    """线程安全的有界LRU/TTL缓存"""
+
+    def __init__(self, name: str, max_entries: int = 10000, ttl_seconds: Optional[float] = None,
+                 max_bytes: Optional[int] = None, sizer: Callable[[Any], int] = estimate_size):
+        """
+        初始化缓存
+
+        Args:
+            name: 缓存名称（用于统计汇总，同名实例的统计合并显示）
+            max_entries: 最大条目数
+            ttl_seconds: 条目生存时间（None表示不过期）
+            max_bytes: 按sizer估算的总字节上限（None表示不限制）
+            sizer: 条目字节数估算函数
+        """
+        self.name = name
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sizer = sizer if max_bytes else None
+
+        # key -> (value, 过期时间, 字节数)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejections = 0
+
+        _cache_registry.add(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取缓存值，未命中或已过期时返回default"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """
+        写入缓存值
+
+        Args:
+            key: 键
+            value: 值
+            ttl_seconds: 本条目的生存时间（None时使用缓存默认TTL）
+        """
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl else None
+        size = self._sizer(value) if self._sizer else 0
+
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if self.max_bytes and size > self.max_bytes:
+                # 单个条目超过容量上限，不缓存
+                self.rejections += 1
+                return
+
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                oldest_key = next(iter(self._data))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                       ttl_seconds: Optional[float] = None) -> Any:
+        """获取缓存值，未命中时调用compute计算并写入"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value, ttl_seconds)
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """移除并返回缓存值"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            self._remove(key)
+            return entry[0]
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def purge_expired(self) -> int:
+        """清除所有已过期条目，返回清除数量"""
+        if not self.ttl_seconds:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, (_, expires_at, _) in self._data.items()
+                       if expires_at is not None and expires_at <= now]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+            return len(expired)
+
+    def clear(self):
+        """清空缓存（保留统计计数）"""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            return entry is not _MISSING and (entry[1] is None or entry[1] > time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'size': len(self._data),
+                'max_size': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'rejections': self.rejections
+            }
+
+
+def get_all_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    汇总所有存活缓存的统计（同名实例合并）
+
+    Returns:
+        Dict[str, Dict[str, Any]]: 缓存名 -> 统计
+    """
+    summary: Dict[str, Dict[str, Any]] = {}
+    for cache in list(_cache_registry):
+        stats = cache.get_stats()
+        merged = summary.get(cache.name)
+        if merged is None:
+            stats['instances'] = 1
+            summary[cache.name] = stats
+            continue
+
+        merged['instances'] += 1
+        for field in ('size', 'max_size', 'bytes', 'hits', 'misses', 'evictions', 'expirations', 'rejections'):
+            merged[field] += stats[field]
+        if merged['max_bytes'] is not None and stats['max_bytes'] is not None:
+            merged['max_bytes'] += stats['max_bytes']
+
+    for stats in summary.values():
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats.pop('name', None)
+    return summary
@@ -36,7 +36,9 @@ class ConfigManager:
         self._performance_config = self._load_config('high_performance.json', is_json=True, default={
             "parallel_processing": {
                 "max_workers": 8,
-                "max_db_connections": 4
+                "max_db_connections": 4,
+                "execution_mode": "thread",
+                "process_workers": 0
             }
         })
         self._initialized = True
@@ -73,6 +75,10 @@ class ConfigManager:
     def get_performance_config(self) -> Dict:
         return self._performance_config
 
+    def get_index_maintenance_config(self) -> Dict:
+        """增量索引维护配置（high_performance.json 的 index_maintenance 节）"""
+        return self._performance_config.get('index_maintenance', {})
+
     def update_matching_config(self, new_config: Dict[str, Any]) -> bool:
         """
         更新匹配算法配置
@@ -171,4 +177,9 @@ class ConfigManager:
         except Exception:
             results['web'] = False
             
-        return results 
\ No newline at end of file
+        return results 
+
+
+def get_index_maintenance_config() -> Dict[str, Any]:
+    """读取增量索引维护配置（供匹配器读取更新时间字段，无需导入索引维护模块）"""
+    return ConfigManager().get_index_maintenance_config()
@@ -0,0 +1,88 @@
+"""
+跨进程文件锁
+以锁文件上的操作系统独占锁串行化多个进程（及同一进程内多个线程）对同一磁盘资源的写入，
+POSIX下使用fcntl.flock，Windows下使用msvcrt.locking；进程退出时锁由操作系统自动释放
+"""
+
+import os
+import time
+import logging
+from pathlib import Path
+from typing import Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+class FileLockTimeout(TimeoutError):
+    """等待文件锁超时"""
+
+
+class FileLock:
+    """
+    基于锁文件的跨进程独占锁（上下文管理器）
+
+    每次获取都单独打开锁文件，同一进程内的不同线程之间同样互斥；不可重入
+    """
+
+    def __init__(self, path: Union[str, Path], timeout: Optional[float] = None,
+                 poll_interval: float = 0.05):
+        """
+        Args:
+            path: 锁文件路径（不存在时创建）
+            timeout: 等待秒数（None表示一直等待）
+            poll_interval: 轮询间隔秒数
+        """
+        self.path = Path(path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while not self._try_lock(fd):
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                raise FileLockTimeout(f"等待文件锁超时: {self.path}")
+            time.sleep(self.poll_interval)
+        self._fd = fd
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        except OSError as e:
+            logger.warning(f"释放文件锁失败: {self.path} - {str(e)}")
+        finally:
+            os.close(fd)
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
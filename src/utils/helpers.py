@@ -311,14 +311,9 @@ def batch_iterator(items: Union[list, 'pymongo.collection.Collection'], batch_si
         is_collection = False
 
     if is_collection:
-        # 处理PyMongo集合
-        skip = 0
-        while True:
-            batch = list(items.find({}).skip(skip).limit(batch_size))
-            if not batch:
-                break
-            yield batch
-            skip += batch_size
+        # 处理PyMongo集合（按_id范围分页）
+        from src.database.range_reader import IdRangeReader
+        yield from IdRangeReader(items, batch_size=batch_size).iter_batches()
     else:
         # 处理列表
         for i in range(0, len(items), batch_size):
@@ -0,0 +1,186 @@
+"""
+关键词自动机模块
+前缀Trie、后缀Trie与Aho-Corasick多模式自动机，词表一次性编译后可对任意文本单次扫描完成关键词查找，
+供单位名称、地址等结构化解析器替代逐条正则/逐个关键词的线性匹配
+"""
+
+from collections import deque
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+# 节点中存放词条终止信息的键（不会与单字符键冲突）
+_END = ''
+
+
+class PrefixTrie:
+    """前缀Trie：查找文本开头（或指定位置起）匹配的全部词条"""
+
+    def __init__(self, words: Optional[Iterable[str]] = None):
+        self._root: Dict[str, Any] = {}
+        self._size = 0
+        for priority, word in enumerate(words or ()):
+            self.add(word, priority)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, word: str, value: Any = None):
+        """加入词条（value为词条附带值，如优先级；重复加入时保留首次的值）"""
+        if not word:
+            return
+        node = self._root
+        for char in word:
+            node = node.setdefault(char, {})
+        if _END not in node:
+            node[_END] = (word, value)
+            self._size += 1
+
+    def iter_prefixes(self, text: str, start: int = 0) -> Iterator[Tuple[str, Any]]:
+        """按长度递增依次输出 text[start:] 开头匹配的 (词条, 附带值)"""
+        node = self._root
+        for index in range(start, len(text)):
+            node = node.get(text[index])
+            if node is None:
+                return
+            if _END in node:
+                yield node[_END]
+
+    def longest_prefix(self, text: str, start: int = 0) -> str:
+        """text[start:] 开头匹配的最长词条（无匹配时返回空串）"""
+        longest = ''
+        for word, _ in self.iter_prefixes(text, start):
+            longest = word
+        return longest
+
+    def best_prefix(self, text: str, start: int = 0) -> str:
+        """text[start:] 开头匹配的词条中附带值（优先级）最小者"""
+        best, best_value = '', None
+        for word, value in self.iter_prefixes(text, start):
+            if best_value is None or value < best_value:
+                best, best_value = word, value
+        return best
+
+
+class SuffixTrie:
+    """后缀Trie：查找文本结尾匹配的全部词条（内部以反转词条存储）"""
+
+    def __init__(self, words: Optional[Iterable[str]] = None):
+        self._trie = PrefixTrie()
+        for priority, word in enumerate(words or ()):
+            self.add(word, priority)
+
+    def __len__(self) -> int:
+        return len(self._trie)
+
+    def add(self, word: str, value: Any = None):
+        """加入词条（value为词条附带值，如优先级）"""
+        if word:
+            self._trie.add(word[::-1], (word, value))
+
+    def iter_suffixes(self, text: str) -> Iterator[Tuple[str, Any]]:
+        """按长度递增依次输出 text 结尾匹配的 (词条, 附带值)"""
+        for _, entry in self._trie.iter_prefixes(text[::-1]):
+            yield entry
+
+    def best_suffix(self, text: str, max_length: Optional[int] = None) -> str:
+        """
+        text 结尾匹配的词条中附带值（优先级）最小者
+
+        Args:
+            text: 文本
+            max_length: 词条最大长度（超过的匹配忽略，如要求去掉后缀后仍有剩余）
+        """
+        best, best_value = '', None
+        for word, value in self.iter_suffixes(text):
+            if max_length is not None and len(word) > max_length:
+                break
+            if best_value is None or value < best_value:
+                best, best_value = word, value
+        return best
+
+
+class AhoCorasickAutomaton:
+    """Aho-Corasick多模式匹配自动机：单次扫描找出文本中出现的全部词条"""
+
+    def __init__(self, words: Optional[Iterable[str]] = None):
+        # 各节点的转移表、失败指针、输出词条
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, Any]]] = [[]]
+        self._words: Dict[str, Any] = {}
+        self._compiled = True
+        for priority, word in enumerate(words or ()):
+            self.add(word, priority)
+        self.compile()
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def add(self, word: str, value: Any = None):
+        """加入词条（value为词条附带值，如优先级；重复加入时保留首次的值）；加入后需重新compile"""
+        if not word or word in self._words:
+            return
+        self._words[word] = value
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((word, value))
+        self._compiled = False
+
+    def compile(self):
+        """按广度优先构建失败指针并合并输出"""
+        if self._compiled:
+            return
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fallback = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fallback if fallback != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+        self._compiled = True
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str, Any]]:
+        """输出文本中全部匹配 (起始位置, 词条, 附带值)，按结束位置递增"""
+        if not self._compiled:
+            self.compile()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for word, value in output[state]:
+                yield index - len(word) + 1, word, value
+
+    def find_all(self, text: str) -> List[str]:
+        """文本中出现的全部不同词条"""
+        return list(dict.fromkeys(word for _, word, _ in self.iter_matches(text)))
+
+    def best_match(self, text: str, key=None) -> str:
+        """
+        文本中出现的词条中排序键最小者
+
+        Args:
+            text: 文本
+            key: (词条, 附带值) -> 排序键，默认按附带值（优先级）
+        """
+        best, best_key = '', None
+        for _, word, value in self.iter_matches(text):
+            candidate_key = key(word, value) if key else value
+            if best_key is None or candidate_key < best_key:
+                best, best_key = word, candidate_key
+        return best
@@ -9,12 +9,14 @@ import logging
 import gc
 import time
 import psutil
-from typing import Dict, List, Any, Optional, Generator, Callable
+from typing import Dict, List, Optional, Generator, Callable
 from threading import Lock, RLock
 from collections import deque
 import weakref
 from datetime import datetime
 
+from .bounded_cache import BoundedCache
+
 logger = logging.getLogger(__name__)
 
 
@@ -293,79 +295,19 @@ class PerformanceMonitor:
             }
 
 
-class SmartCache:
-    """智能缓存系统"""
+class SmartCache(BoundedCache):
+    """智能缓存系统（基于有界LRU/TTL缓存）"""
     
-    def __init__(self, max_size: int = 10000, ttl_seconds: int = 3600):
+    def __init__(self, max_size: int = 10000, ttl_seconds: int = 3600, name: str = 'smart_cache'):
         """
         初始化智能缓存
         
         Args:
             max_size: 最大缓存条目数
             ttl_seconds: 生存时间（秒）
+            name: 缓存名称
         """
-        self.max_size = max_size
-        self.ttl_seconds = ttl_seconds
-        self._cache = {}
-        self._access_times = {}
-        self._lock = RLock()
-        
-    def get(self, key: str) -> Optional[Any]:
-        """获取缓存值"""
-        with self._lock:
-            if key not in self._cache:
-                return None
-            
-            # 检查TTL
-            if time.time() - self._cache[key]['timestamp'] > self.ttl_seconds:
-                del self._cache[key]
-                if key in self._access_times:
-                    del self._access_times[key]
-                return None
-            
-            # 更新访问时间
-            self._access_times[key] = time.time()
-            return self._cache[key]['value']
-    
-    def set(self, key: str, value: Any):
-        """设置缓存值"""
-        with self._lock:
-            current_time = time.time()
-            
-            # 如果缓存已满，移除最久未访问的条目
-            if len(self._cache) >= self.max_size and key not in self._cache:
-                self._evict_lru()
-            
-            self._cache[key] = {
-                'value': value,
-                'timestamp': current_time
-            }
-            self._access_times[key] = current_time
-    
-    def _evict_lru(self):
-        """移除最久未使用的条目"""
-        if not self._access_times:
-            return
-        
-        lru_key = min(self._access_times.keys(), key=lambda k: self._access_times[k])
-        del self._cache[lru_key]
-        del self._access_times[lru_key]
-    
-    def clear(self):
-        """清空缓存"""
-        with self._lock:
-            self._cache.clear()
-            self._access_times.clear()
-    
-    def get_stats(self) -> Dict:
-        """获取缓存统计"""
-        with self._lock:
-            return {
-                'size': len(self._cache),
-                'max_size': self.max_size,
-                'hit_rate': 'not_implemented',  # 需要额外的统计逻辑
-                'ttl_seconds': self.ttl_seconds
-            }
+        super().__init__(name, max_entries=max_size, ttl_seconds=ttl_seconds)
 
 
 # 全局性能优化器实例
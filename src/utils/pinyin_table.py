@@ -0,0 +1,170 @@
+"""
+拼音转换表模块
+由pypinyin单字词典一次性预计算 字符 -> 无声调默认读音 查找表，拼音转换变为纯查表；
+词组词典中读音与默认读音不同的字（如"银行"的"行"）依赖上下文，含这类字的字符串按pypinyin的
+正向最大匹配分词后取词组读音，保证结果与 ''.join(pypinyin.pinyin(text, style=NORMAL)) 一致。字符串级结果按LRU缓存
+"""
+
+import logging
+from threading import Lock
+from typing import Dict, List, Any, Iterable, Optional, Set
+
+from .bounded_cache import BoundedCache
+
+try:
+    from pypinyin.constants import RE_HANS
+    from pypinyin.pinyin_dict import pinyin_dict
+    from pypinyin.phrases_dict import phrases_dict
+    from pypinyin.contrib.tone_convert import to_normal
+    from pypinyin.seg.mmseg import seg as phrase_segmenter
+    from pypinyin.seg.simpleseg import simple_seg
+    PYPINYIN_AVAILABLE = True
+except ImportError:
+    PYPINYIN_AVAILABLE = False
+    logging.warning("pypinyin未安装，拼音转换不可用")
+
+logger = logging.getLogger(__name__)
+
+
+class PinyinTable:
+    """单字拼音查找表 + 字符串结果缓存"""
+
+    def __init__(self, cache_size: int = 200000):
+        """
+        初始化拼音表（查找表在首次转换时构建）
+
+        Args:
+            cache_size: 字符串转换结果缓存条目数
+        """
+        self._table: Optional[Dict[str, str]] = None
+        # 读音依赖词组上下文的字
+        self._ambiguous: Set[str] = set()
+        # 词组 -> 无声调读音（按需填充）
+        self._phrase_pinyin: Dict[str, str] = {}
+        self._build_lock = Lock()
+        self._cache = BoundedCache('pinyin.text', max_entries=cache_size)
+        self.stats = {'table_hits': 0, 'phrase_lookups': 0}
+
+    def _ensure_table(self) -> Dict[str, str]:
+        """构建单字查找表（只收录pypinyin视为汉字的字符，与其分段规则一致）"""
+        if self._table is None:
+            with self._build_lock:
+                if self._table is None:
+                    table: Dict[str, str] = {}
+                    for code_point, readings in pinyin_dict.items():
+                        char = chr(code_point)
+                        if RE_HANS.match(char):
+                            # 不在词组中时pypinyin取第一个读音
+                            table[char] = to_normal(readings.split(',')[0])
+
+                    ambiguous: Set[str] = set()
+                    for phrase, phrase_readings in phrases_dict.items():
+                        for char, char_readings in zip(phrase, phrase_readings):
+                            if char not in ambiguous and to_normal(char_readings[0]) != table.get(char, char):
+                                ambiguous.add(char)
+                    self._ambiguous = ambiguous
+                    self._table = table
+                    logger.info(f"拼音查找表构建完成: {len(table)} 个汉字, 其中 {len(ambiguous)} 个读音依赖词组")
+        return self._table
+
+    def _convert_uncached(self, text: str) -> str:
+        table = self._ensure_table()
+        if not any(char in self._ambiguous for char in text):
+            self.stats['table_hits'] += 1
+            return ''.join([table.get(char, char) for char in text])
+
+        # 含读音依赖上下文的字：与pypinyin相同地按汉字/非汉字切分、汉字段正向最大匹配分词，词组取词组读音
+        self.stats['phrase_lookups'] += 1
+        parts = []
+        for segment in simple_seg(text):
+            if not segment or not RE_HANS.match(segment):
+                parts.append(segment)
+                continue
+            for word in phrase_segmenter.cut(segment):
+                if len(word) > 1 and word in phrases_dict:
+                    parts.append(self._phrase_reading(word))
+                else:
+                    parts.extend(table.get(char, char) for char in word)
+        return ''.join(parts)
+
+    def _phrase_reading(self, phrase: str) -> str:
+        """词组的无声调读音"""
+        reading = self._phrase_pinyin.get(phrase)
+        if reading is None:
+            reading = self._phrase_pinyin[phrase] = ''.join(
+                to_normal(char_readings[0]) for char_readings in phrases_dict[phrase])
+        return reading
+
+    def convert(self, text: str) -> str:
+        """
+        转换为无声调拼音串（非汉字原样保留）
+
+        Args:
+            text: 文本
+
+        Returns:
+            str: 拼音串，pypinyin不可用时返回空串
+        """
+        if not text or not PYPINYIN_AVAILABLE:
+            return ''
+        pinyin = self._cache.get(text)
+        if pinyin is None:
+            pinyin = self._convert_uncached(text)
+            self._cache.set(text, pinyin)
+        return pinyin
+
+    def convert_many(self, texts: Iterable[str], use_cache: bool = True) -> List[str]:
+        """
+        批量转换（同一批内重复文本只转换一次）
+
+        Args:
+            texts: 文本序列
+            use_cache: 是否读写结果缓存（一次性转换整张目标表时可关闭）
+        """
+        converted: Dict[str, str] = {}
+        results = []
+        for text in texts:
+            pinyin = converted.get(text)
+            if pinyin is None:
+                if not text or not PYPINYIN_AVAILABLE:
+                    pinyin = ''
+                elif use_cache:
+                    pinyin = self.convert(text)
+                else:
+                    pinyin = self._convert_uncached(text)
+                converted[text] = pinyin
+            results.append(pinyin)
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取查表/词组消歧次数及缓存统计"""
+        return {
+            **self.stats,
+            'table_size': len(self._table) if self._table is not None else 0,
+            'ambiguous_chars': len(self._ambiguous),
+            'cache': self._cache.get_stats()
+        }
+
+
+_pinyin_table: Optional[PinyinTable] = None
+_pinyin_table_lock = Lock()
+
+
+def get_pinyin_table() -> PinyinTable:
+    """获取进程内共享的拼音表"""
+    global _pinyin_table
+    if _pinyin_table is None:
+        with _pinyin_table_lock:
+            if _pinyin_table is None:
+                _pinyin_table = PinyinTable()
+    return _pinyin_table
+
+
+def to_pinyin(text: str) -> str:
+    """转换为无声调拼音串（查表 + 缓存）"""
+    return get_pinyin_table().convert(text)
+
+
+def to_pinyin_many(texts: Iterable[str], use_cache: bool = True) -> List[str]:
+    """批量转换为无声调拼音串"""
+    return get_pinyin_table().convert_many(texts, use_cache=use_cache)
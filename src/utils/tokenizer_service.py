@@ -0,0 +1,319 @@
+"""
+共享分词服务
+进程内只初始化一次jieba（含自定义词典），按 (文本, 模式) 记忆分词结果（有界LRU缓存），
+可选写穿到本地SQLite键值文件以便跨进程/重启复用；批量分词去重后一次查询、一次写入持久化缓存
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Any, Optional, Sequence
+
+from .bounded_cache import BoundedCache
+
+try:
+    import warnings
+    # 抑制jieba的pkg_resources弃用警告
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=UserWarning, module="jieba._compat")
+        import jieba
+        import jieba.posseg as pseg
+    JIEBA_AVAILABLE = True
+except ImportError:
+    JIEBA_AVAILABLE = False
+    logging.warning("jieba未安装，分词服务不可用")
+
+logger = logging.getLogger(__name__)
+
+# 分词模式
+MODE_ACCURATE = 'accurate'  # 精确模式 jieba.cut
+MODE_FULL = 'full'          # 全模式 jieba.cut(cut_all=True)
+MODE_SEARCH = 'search'      # 搜索引擎模式 jieba.cut_for_search
+MODE_POS = 'pos'            # 词性标注 jieba.posseg.cut，结果为 (词, 词性)
+
+# 默认持久化缓存文件：项目根目录下的 data/token_cache/tokens.sqlite
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent / "data" / "token_cache" / "tokens.sqlite"
+
+
+def get_tokenizer_config() -> Dict[str, Any]:
+    """读取分词服务配置（high_performance.json 的 tokenizer 节）"""
+    from src.utils.config import ConfigManager
+    return ConfigManager().get_performance_config().get('tokenizer', {})
+
+
+class _PersistentTokenStore:
+    """SQLite键值文件：key为 模式 + 文本，value为JSON编码的分词结果"""
+
+    def __init__(self, path: Path, dictionary_fingerprint: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS tokens (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+
+        # 词典变化后分词结果失效
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'dictionary'").fetchone()
+        if row is None or row[0] != dictionary_fingerprint:
+            self._conn.execute('DELETE FROM tokens')
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('dictionary', ?)", (dictionary_fingerprint,))
+        self._conn.commit()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Any]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                for key, value in self._conn.execute(
+                        f'SELECT key, value FROM tokens WHERE key IN ({placeholders})', chunk):
+                    found[key] = json.loads(value)
+        return found
+
+    def put_many(self, items: Dict[str, Any]):
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany('INSERT OR REPLACE INTO tokens VALUES (?, ?)',
+                                   [(k, json.dumps(v, ensure_ascii=False)) for k, v in items.items()])
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM tokens').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TokenizerService:
+    """带记忆的共享分词服务"""
+
+    def __init__(self, user_dicts: Optional[List[str]] = None, memo_size: int = 200000,
+                 persistent_cache: bool = False, cache_path: Optional[str] = None):
+        """
+        初始化分词服务
+
+        Args:
+            user_dicts: 自定义词典路径列表
+            memo_size: 内存记忆的最大条目数
+            persistent_cache: 是否写穿到本地键值文件
+            cache_path: 键值文件路径（默认 data/token_cache/tokens.sqlite）
+        """
+        self.user_dicts = [p for p in (user_dicts or []) if p]
+        self.memo = BoundedCache('tokenizer.memo', max_entries=memo_size)
+
+        self._warmed_up = False
+        self._warm_up_lock = Lock()
+
+        self._store: Optional[_PersistentTokenStore] = None
+        if persistent_cache:
+            try:
+                self._store = _PersistentTokenStore(Path(cache_path) if cache_path else DEFAULT_CACHE_PATH,
+                                                    self._dictionary_fingerprint())
+            except Exception as e:
+                logger.warning(f"分词持久化缓存不可用: {str(e)}")
+
+        self.stats = {
+            'tokenized': 0,
+            'store_hits': 0
+        }
+
+    def _dictionary_fingerprint(self) -> str:
+        """自定义词典指纹（路径 + 修改时间 + 大小）"""
+        parts = []
+        for path in self.user_dicts:
+            try:
+                stat = os.stat(path)
+                parts.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+            except OSError:
+                parts.append(f"{path}:missing")
+        return hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def warm_up(self):
+        """初始化jieba词典并加载自定义词典（每个进程只执行一次）"""
+        if self._warmed_up or not JIEBA_AVAILABLE:
+            return
+        with self._warm_up_lock:
+            if self._warmed_up:
+                return
+            jieba.initialize()
+            for path in self.user_dicts:
+                try:
+                    jieba.load_userdict(path)
+                    logger.info(f"加载自定义词典: {path}")
+                except Exception as e:
+                    logger.warning(f"加载自定义词典失败: {path} - {e}")
+            self._warmed_up = True
+
+    # ==================== 分词 ====================
+
+    @staticmethod
+    def _cut(text: str, mode: str) -> tuple:
+        if mode == MODE_POS:
+            return tuple((word, flag) for word, flag in pseg.cut(text))
+        if mode == MODE_SEARCH:
+            return tuple(jieba.cut_for_search(text))
+        return tuple(jieba.cut(text, cut_all=(mode == MODE_FULL)))
+
+    @staticmethod
+    def _store_key(text: str, mode: str) -> str:
+        return f"{mode}\x00{text}"
+
+    def tokenize(self, text: Any, mode: str = MODE_ACCURATE) -> tuple:
+        """
+        分词（结果按 (文本, 模式) 记忆）
+
+        Args:
+            text: 文本
+            mode: 分词模式（accurate / full / search / pos）
+
+        Returns:
+            tuple: 词元组；pos模式为 (词, 词性) 元组
+        """
+        if not text or not JIEBA_AVAILABLE:
+            return ()
+        text = str(text)
+        key = (text, mode)
+        tokens = self.memo.get(key)
+        if tokens is not None:
+            return tokens
+
+        if self._store is not None:
+            stored = self._store.get_many([self._store_key(text, mode)])
+            if stored:
+                tokens = tuple(tuple(t) if isinstance(t, list) else t for t in next(iter(stored.values())))
+                self.stats['store_hits'] += 1
+                self.memo.set(key, tokens)
+                return tokens
+
+        self.warm_up()
+        tokens = self._cut(text, mode)
+        self.stats['tokenized'] += 1
+        self.memo.set(key, tokens)
+        if self._store is not None:
+            self._store.put_many({self._store_key(text, mode): tokens})
+        return tokens
+
+    def lcut(self, text: Any, mode: str = MODE_ACCURATE) -> list:
+        """分词并返回列表（可替代 jieba.lcut）"""
+        return list(self.tokenize(text, mode))
+
+    def tokenize_many(self, texts: Sequence[Any], mode: str = MODE_ACCURATE) -> List[tuple]:
+        """
+        批量分词：去重后只对未命中的文本分词，持久化缓存按批查询和写入
+
+        Args:
+            texts: 文本列表
+            mode: 分词模式
+
+        Returns:
+            List[tuple]: 与输入对齐的分词结果
+        """
+        if not JIEBA_AVAILABLE:
+            return [() for _ in texts]
+
+        normalized = [str(t) if t else '' for t in texts]
+        results: Dict[str, tuple] = {}
+        misses = []
+        for text in dict.fromkeys(normalized):
+            if not text:
+                results[text] = ()
+                continue
+            tokens = self.memo.get((text, mode))
+            if tokens is None:
+                misses.append(text)
+            else:
+                results[text] = tokens
+
+        if misses and self._store is not None:
+            stored = self._store.get_many([self._store_key(t, mode) for t in misses])
+            if stored:
+                remaining = []
+                for text in misses:
+                    value = stored.get(self._store_key(text, mode))
+                    if value is None:
+                        remaining.append(text)
+                        continue
+                    tokens = tuple(tuple(t) if isinstance(t, list) else t for t in value)
+                    results[text] = tokens
+                    self.memo.set((text, mode), tokens)
+                self.stats['store_hits'] += len(misses) - len(remaining)
+                misses = remaining
+
+        if misses:
+            self.warm_up()
+            computed = {text: self._cut(text, mode) for text in misses}
+            self.stats['tokenized'] += len(computed)
+            for text, tokens in computed.items():
+                results[text] = tokens
+                self.memo.set((text, mode), tokens)
+            if self._store is not None:
+                self._store.put_many({self._store_key(t, mode): tokens for t, tokens in computed.items()})
+
+        return [results[text] for text in normalized]
+
+    def add_user_dict(self, path: str):
+        """追加自定义词典（已初始化时立即加载，并清空依赖旧词典的缓存）"""
+        if not path or path in self.user_dicts:
+            return
+        with self._warm_up_lock:
+            self.user_dicts.append(path)
+            if self._warmed_up and JIEBA_AVAILABLE:
+                jieba.load_userdict(path)
+                logger.info(f"加载自定义词典: {path}")
+            self.memo.clear()
+            if self._store is not None:
+                store_path = self._store.path
+                self._store.close()
+                self._store = _PersistentTokenStore(store_path, self._dictionary_fingerprint())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取分词服务统计"""
+        stats = {
+            **self.stats,
+            'memo': self.memo.get_stats(),
+            'warmed_up': self._warmed_up,
+            'user_dicts': self.user_dicts
+        }
+        if self._store is not None:
+            stats['persistent_entries'] = self._store.count()
+        return stats
+
+
+# ==================== 进程内共享 ====================
+
+_tokenizer: Optional[TokenizerService] = None
+_tokenizer_lock = Lock()
+
+
+def get_tokenizer() -> TokenizerService:
+    """获取进程内共享的分词服务（按 high_performance.json 的 tokenizer 节配置）"""
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                try:
+                    config = get_tokenizer_config()
+                except Exception as e:
+                    logger.debug(f"读取分词服务配置失败，使用默认配置: {str(e)}")
+                    config = {}
+                _tokenizer = TokenizerService(
+                    user_dicts=config.get('user_dicts'),
+                    memo_size=config.get('memo_size', 200000),
+                    persistent_cache=config.get('persistent_cache', False),
+                    cache_path=config.get('cache_path')
+                )
+    return _tokenizer
+
+
+def add_user_dict(path: str):
+    """为共享分词服务追加自定义词典"""
+    get_tokenizer().add_user_dict(path)
@@ -21,6 +21,7 @@ from src.matching.match_processor import MatchProcessor
 from src.matching.multi_match_processor import MultiMatchProcessor
 from src.matching.enhanced_association_processor import EnhancedAssociationProcessor, AssociationStrategy
 from src.matching.optimized_match_processor import OptimizedMatchProcessor
+from src.matching.incremental_index_maintainer import IncrementalIndexMaintainer
 from src.utils.logger import setup_logger
 from src.utils.config import ConfigManager
 from src.utils.helpers import safe_json_response, generate_match_id
@@ -37,10 +38,11 @@ from src.knowledge_graph.falkordb_store import FalkorDBStore
 from src.knowledge_graph.kg_builder import KnowledgeGraphBuilder
 from src.knowledge_graph.entity_extractor import EntityExtractor
 from src.knowledge_graph.relation_extractor import RelationExtractor
-from src.knowledge_graph.kg_quality_assessor import KnowledgeGraphQualityAssessor
+from src.knowledge_graph.kg_quality_assessor import StreamingQualityAssessor
 
 # 性能优化模块导入
 from src.utils.performance_optimizer import get_performance_monitor, get_memory_processor
+from src.utils.bounded_cache import get_all_cache_stats
 
 # 设置日志
 logger = setup_logger(__name__)
@@ -69,6 +71,7 @@ kg_quality_assessor = None
 enhanced_association_processor = None
 optimized_match_processor = None
 config_manager = None
+index_maintainer = None
 
 # V2.0新增全局变量
 csv_processor = None
@@ -82,6 +85,7 @@ def create_app():
     global db_manager, match_processor, multi_match_processor, enhanced_association_processor, optimized_match_processor, config_manager
     global csv_processor, data_analyzer, schema_detector, validation_engine
     global kg_store, kg_builder, entity_extractor, relation_extractor, kg_quality_assessor
+    global index_maintainer
     
     try:
         # 初始化配置管理器
@@ -90,6 +94,16 @@ def create_app():
         # 初始化数据库管理器
         db_manager = DatabaseManager(config=config_manager.get_database_config())
         
+        # 后台增量索引维护：恢复已建索引的维护目标并按配置间隔同步源表变更
+        if config_manager.get_index_maintenance_config().get('background_sync', False):
+            try:
+                index_maintainer = IncrementalIndexMaintainer(db_manager.get_db())
+                index_maintainer.register_persisted_targets()
+                index_maintainer.start()
+            except Exception as e:
+                logger.warning(f"后台增量索引维护启动失败: {str(e)}")
+                index_maintainer = None
+        
         # 初始化匹配处理器
         match_processor = MatchProcessor(
             db_manager=db_manager,
@@ -157,11 +171,14 @@ def create_app():
             }
         )
         
-        kg_quality_assessor = KnowledgeGraphQualityAssessor(
+        kg_quality_assessor = StreamingQualityAssessor(
             kg_store=kg_store,
             config={
                 'assessment_interval': 3600,  # 1 hour
-                'quality_threshold': 0.8
+                'quality_threshold': 0.8,
+                'clustering_sample_size': 500,
+                'path_sample_size': 20,
+                'consistency_sample_size': 2000
             }
         )
         
@@ -875,6 +892,37 @@ def api_stop_optimized_matching(task_id):
         }), 500
 
 
+@app.route('/api/resume_optimized_matching/<task_id>', methods=['POST'])
+def api_resume_optimized_matching(task_id):
+    """API: 从检查点恢复优化匹配任务"""
+    try:
+        if not optimized_match_processor:
+            return jsonify({
+                'success': False,
+                'message': '优化匹配处理器未初始化'
+            }), 500
+        
+        optimized_match_processor.resume_task(task_id)
+        
+        return jsonify({
+            'success': True,
+            'task_id': task_id,
+            'message': '优化匹配任务已从检查点恢复'
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 409
+    except Exception as e:
+        logger.error(f"恢复优化匹配任务失败: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @app.route('/api/optimized_match_statistics')
 def api_get_optimized_match_statistics():
     """API: 获取优化匹配统计信息"""
@@ -1729,84 +1777,77 @@ def api_upload_csv():
         if file_size > max_size_bytes:
             max_mb = int(round(max_size_bytes / (1024 * 1024)))
             return jsonify({'success': False, 'error': f'文件大小超过限制（最大{max_mb}MB）'}), 400
+        if file_size == 0:
+            return jsonify({'success': False, 'error': '文件为空'}), 400
             
         # 生成时间戳与原始文件名
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         original_filename = file.filename
 
-        # 读取内存内容
-        file_bytes = file.read()
+        # 上传内容分块写入临时文件，后续流式解析（不整体读入内存）
+        import tempfile
+        import uuid
+        fd, temp_path = tempfile.mkstemp(prefix='upload_', suffix=file_ext)
+        with os.fdopen(fd, 'wb') as temp_file:
+            file.save(temp_file)
+
+        task_id = str(uuid.uuid4())
+        db = db_manager.get_db()
+        db.csv_upload_tasks.insert_one({
+            'task_id': task_id,
+            'filename': original_filename,
+            'file_size': file_size,
+            'status': 'running',
+            'progress': 0,
+            'rows_inserted': 0,
+            'start_time': datetime.now().isoformat()
+        })
 
-        # 按类型解析为DataFrame（不落盘）
-        from io import BytesIO
-        import pandas as _pd
+        run_async = str(request.form.get('async', '')).lower() in ('1', 'true', 'yes')
+        if run_async:
+            import threading
+            ingest_thread = threading.Thread(
+                target=_ingest_uploaded_file,
+                args=(task_id, temp_path, original_filename, file_size, timestamp)
+            )
+            ingest_thread.daemon = True
+            ingest_thread.start()
+            return jsonify({'success': True, 'message': '文件已接收，正在后台导入', 'task_id': task_id}), 202
 
-        if file_ext in ['.xlsx', '.xls']:
-            df = _pd.read_excel(BytesIO(file_bytes))
-            df = csv_processor._basic_cleaning(df)
-            parse_meta = {
-                'encoding': 'binary',
-                'delimiter': ','
-            }
-            result = {
-                'success': True,
-                'dataframe': df,
-                'metadata': {
-                    'file_name': original_filename,
-                    'total_rows': len(df),
-                    'total_columns': len(df.columns),
-                    'columns': df.columns.tolist(),
-                },
-                'encoding': 'binary',
-                'delimiter': ',',
-                'row_count': len(df),
-                'column_count': len(df.columns),
-                'sample_data': csv_processor.get_sample_data(df),
-                'warnings': []
-            }
-        else:
-            # CSV/TXT 走解析器，不落盘
-            # 先校验（用文件名做路径参数以复用扩展名校验）
-            validation_result = csv_processor.validate_file(original_filename, file_bytes)
-            if not validation_result.get('valid'):
-                return jsonify({'success': False, 'message': f"文件验证失败: {', '.join(validation_result.get('errors', []))}"}), 400
-
-            result = csv_processor.parse_csv(file_bytes, original_filename)
-            if result.get('success'):
-                # 补全统一返回结构
-                df = result['data']
-                result = {
-                    'success': True,
-                    'dataframe': df,
-                    'metadata': result.get('metadata', {}),
-                    'encoding': result.get('metadata', {}).get('encoding', 'utf-8'),
-                    'delimiter': result.get('metadata', {}).get('delimiter', ','),
-                    'row_count': len(df),
-                    'column_count': len(df.columns),
-                    'sample_data': csv_processor.get_sample_data(df),
-                    'warnings': result.get('warnings', [])
-                }
-        
-        # 检查处理结果
-        if not result.get('success', False):
-            return jsonify({
-                'success': False,
-                'message': result.get('error', 'CSV文件处理失败')
-            }), 400
-        
-        # 进行数据分析
-        df = result['dataframe']
-        if df is None:
-            return jsonify({
-                'success': False,
-                'message': 'CSV文件解析失败，无法获取数据'
-            }), 400
-            
-        analysis_result = data_analyzer.analyze_dataframe(df)
-        
-        # 进行模式检测
-        schema_result = schema_detector.detect_schema(df)
+        outcome = _ingest_uploaded_file(task_id, temp_path, original_filename, file_size, timestamp)
+        if not outcome['success']:
+            return jsonify({'success': False, 'error': outcome['error'], 'task_id': task_id}), outcome.get('status_code', 500)
+        return jsonify({'success': True, 'message': outcome['message'], 'data': outcome['file_info'], 'task_id': task_id})
         
+    except Exception as e:
+        logger.error(f"CSV文件上传处理失败: {str(e)}")
+        return jsonify({'success': False, 'error': f'文件处理失败: {str(e)}'}), 500
+
+
+def _ingest_uploaded_file(task_id, temp_path, original_filename, file_size, timestamp):
+    """流式导入上传文件到MongoDB集合，进度写入csv_upload_tasks（结束后删除临时文件）"""
+    from src.data_manager.streaming_ingestor import StreamingIngestor
+
+    db = db_manager.get_db()
+
+    def update_task(update_data):
+        update_data['updated_time'] = datetime.now().isoformat()
+        db.csv_upload_tasks.update_one({'task_id': task_id}, {'$set': update_data})
+
+    # 仅记录本次上传通过create_collection成功占用的集合名，失败时只删除该集合
+    reserved_collection = None
+
+    def drop_partial_collection():
+        # 流式导入边解析边写入，失败时删除已写入部分的集合，释放集合名
+        if not reserved_collection:
+            return
+        try:
+            db.drop_collection(reserved_collection)
+            logger.info(f"已删除导入失败的集合: {reserved_collection}")
+        except Exception as drop_error:
+            logger.warning(f"删除导入失败的集合失败: {reserved_collection}, 错误: {drop_error}")
+
+    try:
         # 生成集合名（按文件名）与文件ID
         def derive_collection_name(name: str) -> str:
             import re
@@ -1821,48 +1862,66 @@ def api_upload_csv():
         collection_name = derive_collection_name(original_filename)
         file_id = f"csv_{timestamp}_{hash(original_filename) % 10000}"
 
-        # 写入MongoDB（按文件名建表/集合），若已存在则使用别名
+        # 按文件名建表/集合，若已存在则使用时间戳别名；
+        # 以create_collection显式创建占用集合名，并发上传同名文件时只有一个能创建成功
+        from pymongo.errors import CollectionInvalid
+        requested_collection = collection_name
+        alias_candidate = collection_name
+        idx = 0
+        while True:
+            try:
+                db.create_collection(alias_candidate)
+                break
+            except CollectionInvalid:
+                idx += 1
+                alias_candidate = (f"{requested_collection}_{timestamp}" if idx == 1
+                                   else f"{requested_collection}_{timestamp}_{idx - 1}")
+        collection_name = alias_candidate
+        reserved_collection = collection_name
+        alias_used = collection_name != requested_collection
+        alias_notice = f"集合 {requested_collection} 已存在，已使用别名 {collection_name}" if alias_used else None
+        update_task({'collection_name': collection_name, 'file_id': file_id})
+
+        # 分块解析、清洗、去重并无序批量写入
+        ingestor = StreamingIngestor(csv_processor)
         try:
-            db = db_manager.get_db()
-            existing_names = set(db.list_collection_names())
-            requested_collection = collection_name
-            alias_used = False
-            alias_notice = None
-            if collection_name in existing_names:
-                # 使用时间戳别名，确保唯一
-                alias_candidate = f"{collection_name}_{timestamp}"
-                idx = 1
-                while alias_candidate in existing_names:
-                    alias_candidate = f"{collection_name}_{timestamp}_{idx}"
-                    idx += 1
-                collection_name = alias_candidate
-                alias_used = True
-                alias_notice = f"集合 {requested_collection} 已存在，已使用别名 {collection_name}"
-            # 字段名清洗（Mongo不允许包含'.'或以'$'开头）
-            def _sanitize_field_name(name: str) -> str:
-                import re
-                n = str(name)
-                if n.startswith('$'):
-                    n = f"f_{n[1:]}"  # 前缀替换
-                n = n.replace('.', '_')
-                n = re.sub(r'\s+', '_', n).strip('_')
-                return n or 'field'
-
-            column_mapping = {col: _sanitize_field_name(col) for col in df.columns}
-            if list(column_mapping.values()) != list(df.columns):
-                df = df.rename(columns=column_mapping)
-
-            # 将NaN转为None
-            safe_df = df.where(pd.notna(df), None)
-            records = safe_df.to_dict('records')
-            if records:
-                db[collection_name].insert_many(records)
+            result = ingestor.ingest(
+                temp_path, original_filename, db[collection_name],
+                progress_callback=lambda p: update_task({
+                    'rows_inserted': p['rows_inserted'],
+                    'duplicates_removed': p['duplicates_removed'],
+                    'bytes_read': p['bytes_read'],
+                    'progress': min(p['progress'], 99) if p['progress'] is not None else None
+                })
+            )
         except Exception as e:
             logger.error(f"写入MongoDB集合失败: {collection_name}, 错误: {e}")
-            return jsonify({'success': False, 'error': f'写入数据库失败: {str(e)}'}), 500
-        
+            drop_partial_collection()
+            update_task({'status': 'failed', 'error_message': f'写入数据库失败: {str(e)}'})
+            return {'success': False, 'error': f'写入数据库失败: {str(e)}'}
+
+        if not result['success']:
+            error_message = '; '.join(result['errors'])
+            drop_partial_collection()
+            update_task({'status': 'failed', 'error_message': error_message})
+            return {'success': False, 'error': error_message, 'status_code': 400}
+
+        if result['row_count'] == 0:
+            drop_partial_collection()
+            update_task({'status': 'failed', 'error_message': '文件中没有有效数据'})
+            return {'success': False, 'error': '文件中没有有效数据', 'status_code': 400}
+
+        # 数据分析与模式检测基于样本行，避免整表载入内存
+        sample_df = result['sample']
+        analysis_result = data_analyzer.analyze_dataframe(sample_df)
+        schema_result = schema_detector.detect_schema(sample_df)
+
+        row_count = result['row_count']
+        columns = result['columns']
+        safe_sample_df = sample_df.where(pd.notna(sample_df), None)
+
         # 构建文件信息，针对大数据集优化响应大小
-        is_large_dataset = len(df) > 50000
+        is_large_dataset = row_count > 50000
         
         file_info = {
             'file_id': file_id,
@@ -1875,8 +1934,10 @@ def api_upload_csv():
             'upload_time': datetime.now().isoformat(),
             'encoding': result.get('encoding', 'utf-8'),
             'delimiter': result.get('delimiter', ','),
-            'row_count': len(df),
-            'column_count': len(df.columns),
+            'row_count': row_count,
+            'column_count': len(columns),
+            'duplicates_removed': result.get('duplicates_removed', 0),
+            'analysis_sample_rows': len(sample_df),
             'quality_score': analysis_result.get('quality_score', 0),
             'is_large_dataset': is_large_dataset
         }
@@ -1884,18 +1945,18 @@ def api_upload_csv():
         # 对于大数据集，减少详细信息以避免响应过大
         if is_large_dataset:
             file_info.update({
-                'columns': df.columns.tolist()[:20],  # 只显示前20列
-                'columns_truncated': len(df.columns) > 20,
-                'sample_data': df.head(2).to_dict('records'),  # 只显示前2行
-                'message': f'大数据集（{len(df):,}行），部分信息已省略以优化响应速度'
+                'columns': columns[:20],  # 只显示前20列
+                'columns_truncated': len(columns) > 20,
+                'sample_data': safe_sample_df.head(2).to_dict('records'),  # 只显示前2行
+                'message': f'大数据集（{row_count:,}行），部分信息已省略以优化响应速度'
             })
         else:
             file_info.update({
-                'columns': df.columns.tolist(),
+                'columns': columns,
                 'data_types': analysis_result.get('field_types', {}),
                 'schema_detection': schema_result,
-                'sample_data': df.head(5).to_dict('records'),
-                'column_mapping': column_mapping
+                'sample_data': safe_sample_df.head(5).to_dict('records'),
+                'column_mapping': result.get('column_mapping', {})
             })
         
         # 可选：存储到MongoDB
@@ -1909,15 +1970,43 @@ def api_upload_csv():
             except Exception as e:
                 logger.warning(f"存储文件信息到数据库失败: {str(e)}")
         
-        # 返回处理结果
         success_message = '文件上传和导入成功'
         if alias_notice:
             success_message += f'（{alias_notice}）'
-        return jsonify({'success': True, 'message': success_message, 'data': file_info})
-        
+        update_task({
+            'status': 'completed',
+            'progress': 100,
+            'rows_inserted': row_count,
+            'end_time': datetime.now().isoformat(),
+            'message': success_message
+        })
+        return {'success': True, 'message': success_message, 'file_info': file_info}
+
     except Exception as e:
-        logger.error(f"CSV文件上传处理失败: {str(e)}")
-        return jsonify({'success': False, 'error': f'文件处理失败: {str(e)}'}), 500
+        logger.error(f"CSV文件导入失败: {str(e)}")
+        drop_partial_collection()
+        update_task({'status': 'failed', 'error_message': f'文件处理失败: {str(e)}'})
+        return {'success': False, 'error': f'文件处理失败: {str(e)}'}
+
+    finally:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+@app.route('/api/upload_csv_progress/<task_id>')
+def api_upload_csv_progress(task_id):
+    """API: 获取CSV流式导入进度"""
+    try:
+        task = db_manager.get_db().csv_upload_tasks.find_one({'task_id': task_id}, {'_id': 0})
+        if not task:
+            return jsonify({'success': False, 'error': '任务不存在'}), 404
+        return jsonify({'success': True, 'data': task})
+
+    except Exception as e:
+        logger.error(f"获取导入进度失败: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/api/get_file_analysis/<file_id>')
@@ -3272,16 +3361,24 @@ def execute_kg_build_task(task_id, table_names, build_config, project_name):
             
             # 获取数据表数据
             collection = db[table_name]
-            documents = list(collection.find())
-            
-            if not documents:
-                logger.warning(f"数据表 {table_name} 为空，跳过处理")
-                continue
-            
-            # 转换为DataFrame
-            df = pd.DataFrame(documents)
-            if '_id' in df.columns:
-                df = df.drop('_id', axis=1)
+            # 流式构建开关与分块、队列大小同在 build_config['kg_builder'] 中
+            streaming_build = kg_builder.build_config.get('streaming_build', False)
+            if streaming_build:
+                # 流式构建按_id范围分块读取，不整表加载
+                if collection.find_one({}, {'_id': 1}) is None:
+                    logger.warning(f"数据表 {table_name} 为空，跳过处理")
+                    continue
+            else:
+                documents = list(collection.find())
+                
+                if not documents:
+                    logger.warning(f"数据表 {table_name} 为空，跳过处理")
+                    continue
+                
+                # 转换为DataFrame
+                df = pd.DataFrame(documents)
+                if '_id' in df.columns:
+                    df = df.drop('_id', axis=1)
             
             # 创建进度回调函数
             def progress_callback(progress_data):
@@ -3298,9 +3395,14 @@ def execute_kg_build_task(task_id, table_names, build_config, project_name):
                 })
             
             # 构建知识图谱（带进度回调）
-            table_result = kg_builder.build_knowledge_graph_from_dataframe(
-                df, table_name, project_name, progress_callback=progress_callback
-            )
+            if streaming_build:
+                table_result = kg_builder.build_knowledge_graph_streaming(
+                    collection, table_name, project_name, progress_callback=progress_callback
+                )
+            else:
+                table_result = kg_builder.build_knowledge_graph_from_dataframe(
+                    df, table_name, project_name, progress_callback=progress_callback
+                )
             
             build_results.append(table_result)
         
@@ -4214,6 +4316,41 @@ def api_stop_user_matching_task():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/resume_user_matching_task', methods=['POST'])
+def api_resume_user_matching_task():
+    """API: 从检查点恢复用户数据匹配任务"""
+    try:
+        task_id = request.args.get('task_id') or (request.get_json(silent=True) or {}).get('task_id')
+        if not task_id:
+            return jsonify({'success': False, 'error': '缺少任务ID'}), 400
+        
+        if not db_manager or not db_manager.mongo_client:
+            return jsonify({'success': False, 'error': '数据库连接未初始化'}), 500
+        
+        task = db_manager.get_collection('user_matching_tasks').find_one({'task_id': task_id})
+        if not task:
+            return jsonify({'success': False, 'error': '任务不存在'}), 404
+        
+        # 使用任务所属的映射配置初始化匹配器
+        config = db_manager.get_collection('field_mapping_configs').find_one({'config_id': task.get('config_id')})
+        
+        from src.matching.user_data_matcher import UserDataMatcher
+        user_matcher = UserDataMatcher(db_manager=db_manager, config=config)
+        user_matcher.resume_task(task_id)
+        
+        return jsonify({
+            'success': True,
+            'task_id': task_id,
+            'message': '用户数据匹配任务已从检查点恢复'
+        })
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        logger.error(f"恢复用户匹配任务失败: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/get_user_matching_results', methods=['GET'])
 def api_get_user_matching_results():
     """API: 获取用户数据匹配结果"""
@@ -4857,6 +4994,9 @@ def get_performance_metrics():
             'pending': 8
         }
         
+        # 各子系统缓存统计（命中率、淘汰数、占用）
+        metrics['cache_statistics'] = get_all_cache_stats()
+        
         # 详细指标
         detailed_metrics = {
             'memory_usage': {
@@ -5269,10 +5409,10 @@ def assess_kg_quality():
     """评估知识图谱质量API"""
     try:
         from src.knowledge_graph.kg_store import KnowledgeGraphStore
-        from src.knowledge_graph.kg_quality_assessor import KnowledgeGraphQualityAssessor
+        from src.knowledge_graph.kg_quality_assessor import StreamingQualityAssessor
         
         kg_store = KnowledgeGraphStore(db_manager=db_manager)
-        quality_assessor = KnowledgeGraphQualityAssessor(kg_store)
+        quality_assessor = StreamingQualityAssessor(kg_store)
         
         # 进行质量评估
         quality_report = quality_assessor.assess_overall_quality()